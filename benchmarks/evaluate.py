@@ -0,0 +1,490 @@
+#!/usr/bin/env python3
+"""
+Parsing Evaluation
+Runs resume fixtures through upload_resume under each parsing strategy and reports field accuracy, latency and tokens side by side
+
+    python benchmarks/evaluate.py                                   # bundled fixtures, ground-truth stub model
+    python benchmarks/evaluate.py --corpus resume_corpus --limit 300
+    python benchmarks/evaluate.py --strategy default --strategy budget-1000
+    python benchmarks/evaluate.py --record recordings.jsonl        # call the real models and keep their answers
+    python benchmarks/evaluate.py --replay recordings.jsonl        # score recorded answers offline
+
+Documents are the bundled fixtures (ground truth in benchmarks/ground_truth.json) plus, with
+--corpus, a corpus written by create_diverse_resumes.py --count N (truth in its manifest).
+
+The default stub answers every parse with the ground truth restricted to what is visible in the
+resume text of the prompt, so its accuracy is the ceiling a perfect model could reach after
+extraction and truncation: it measures what a strategy throws away, not model quality. Comparing
+model tiers needs real answers: record them once, then replay them as often as needed.
+"""
+import argparse
+import contextlib
+import dataclasses
+import hashlib
+import io
+import json
+import os
+import re
+import statistics
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+if BENCH_DIR not in sys.path:
+    sys.path.insert(0, BENCH_DIR)
+
+# fixtures puts server/ on sys.path, so it is imported before the server modules
+from fixtures import DOCX_FIXTURES, TEXT_FIXTURES, StubResponse, read_fixture  # noqa: E402
+import harness  # noqa: E402
+
+import app as backend  # noqa: E402
+from model_router import TaskRoute, extract_model_text  # noqa: E402
+from prompts import estimate_tokens  # noqa: E402
+from resume_model import ResumeModel  # noqa: E402
+
+
+GROUND_TRUTH = os.path.join(BENCH_DIR, 'ground_truth.json')
+RESUME_TEXT_LABEL = 'Resume Text:\n'
+
+
+@dataclass(frozen=True)
+class Strategy:
+    """One way of turning an uploaded file into a parse request"""
+    name: str
+    description: str
+    tier: Optional[str] = None
+    text_budget: Optional[int] = None
+    compact: bool = False
+
+
+STRATEGIES = (
+    Strategy('default', 'Configured route and RESUME_PARSE budget'),
+    Strategy('compact', 'Collapse whitespace, drop blank, rule and page-number lines before prompting', compact=True),
+    Strategy('budget-1500', 'Resume text trimmed to 1500 tokens', text_budget=1500),
+    Strategy('budget-1000', 'Resume text trimmed to 1000 tokens', text_budget=1000),
+    Strategy('budget-600', 'Resume text trimmed to 600 tokens', text_budget=600),
+    Strategy('tier-fast', "resume_parse routed to the 'fast' tier", tier='fast'),
+    Strategy('tier-lite', "resume_parse routed to the 'lite' tier", tier='lite'),
+)
+
+_RULE_LINE = re.compile(r'^[\s=\-_*~#.·•─━═]+$')
+_PAGE_LINE = re.compile(r'^(page\s*)?\d+(\s*(of|/)\s*\d+)?$', re.IGNORECASE)
+
+
+def compact_text(text: str) -> str:
+    """Extracted text without blank lines, decoration rules, page numbers or runs of spaces"""
+    lines = []
+    for line in text.splitlines():
+        line = re.sub(r'[ \t ]+', ' ', line).strip()
+        if line and not _RULE_LINE.match(line) and not _PAGE_LINE.match(line):
+            lines.append(line)
+    return '\n'.join(lines)
+
+
+@contextlib.contextmanager
+def applied(strategy: Strategy) -> Iterator[None]:
+    """Patch the app so upload_resume follows the strategy, and restore it afterwards"""
+    template, build_prompt = backend.RESUME_PARSE, backend.resume_parse_prompt
+    routes = dict(backend.model_router.routes)
+    if strategy.text_budget is not None:
+        backend.RESUME_PARSE = dataclasses.replace(
+            template, slots=tuple(dataclasses.replace(slot, budget=strategy.text_budget) for slot in template.slots)
+        )
+    if strategy.compact:
+        backend.resume_parse_prompt = lambda text: build_prompt(compact_text(text))
+    if strategy.tier is not None:
+        route = backend.model_router.route('resume_parse')
+        backend.model_router.routes['resume_parse'] = TaskRoute('resume_parse', strategy.tier, route.latency_budget)
+    try:
+        yield
+    finally:
+        backend.RESUME_PARSE, backend.resume_parse_prompt = template, build_prompt
+        backend.model_router.routes = routes
+
+
+@dataclass
+class Document:
+    name: str
+    filename: str
+    data: bytes
+    truth: Dict[str, Any]
+    source: str
+
+    @property
+    def format(self) -> str:
+        return self.filename.rsplit('.', 1)[-1]
+
+
+def load_documents(corpus: Optional[str], limit: Optional[int], bundled: bool = True) -> List[Document]:
+    documents = []
+    if bundled:
+        with open(GROUND_TRUTH, encoding='utf-8') as f:
+            truths = json.load(f)
+        for name in TEXT_FIXTURES + DOCX_FIXTURES:
+            if name in truths:
+                documents.append(Document(name, name, read_fixture(name), truths[name], 'bundled'))
+    if corpus:
+        with open(os.path.join(corpus, 'manifest.jsonl'), encoding='utf-8') as f:
+            for count, line in enumerate(f):
+                if limit is not None and count >= limit:
+                    break
+                entry = json.loads(line)
+                with open(os.path.join(corpus, entry['file']), 'rb') as resume:
+                    data = resume.read()
+                documents.append(Document(entry['id'], os.path.basename(entry['file']), data, entry['truth'], 'corpus'))
+    return documents
+
+
+# Models
+
+def _norm(value: Any) -> str:
+    return re.sub(r'\s+', ' ', str(value or '')).strip().lower()
+
+
+def _key(value: Any) -> str:
+    return re.sub(r'[^a-z0-9+#]', '', _norm(value))
+
+
+def _handle(value: Any) -> str:
+    value = re.sub(r'^(https?://)?(www\.)?', '', _norm(value))
+    value = re.sub(r'^(linkedin\.com|github\.com)', '', value).replace('/in/', '/')
+    return value.strip('/@ ')
+
+
+def _digits(value: Any) -> str:
+    # Last ten digits, so "+1 (415) ..." and "(415) ..." compare equal
+    return re.sub(r'\D', '', str(value or ''))[-10:]
+
+
+def truth_response(truth: Dict[str, Any], prompt: str) -> str:
+    """The ground truth as a RESUME_PARSE answer, keeping only values visible in the prompt's resume text"""
+    text = _norm(prompt.split(RESUME_TEXT_LABEL, 1)[-1])
+    digits = re.sub(r'\D', '', text)
+    seen = lambda value: bool(value) and _norm(value) in text
+
+    def contact(name: str) -> str:
+        value = truth.get(name) or ''
+        if name == 'phone':
+            return value if value and _digits(value) in digits else ''
+        if name in ('linkedin', 'github'):
+            return value if value and _handle(value).split('/')[-1] in text else ''
+        return value if seen(value) else ''
+
+    experience = []
+    for item in truth.get('experience', []):
+        if seen(item.get('company')):
+            experience.append({
+                'company': item['company'],
+                'position': item.get('role', '') if seen(item.get('role')) else '',
+                'startDate': item.get('startDate', '') if seen(item.get('startDate')) else '',
+                'endDate': item.get('endDate', '') if seen(item.get('endDate')) else '',
+                'bullets': [bullet for bullet in item.get('bullets', []) if seen(bullet)]
+            })
+    education = [
+        {
+            'school': item['school'],
+            'degree': item.get('degree', '') if seen(item.get('degree')) else '',
+            'graduationDate': item.get('year', '') if seen(item.get('year')) else ''
+        }
+        for item in truth.get('education', []) if seen(item.get('school'))
+    ]
+    return json.dumps({
+        'personalInfo': {name: contact(name) for name in ('name', 'email', 'phone', 'location', 'linkedin', 'github')},
+        'sections': [
+            {'id': 'summary', 'title': 'Professional Summary', 'content': truth.get('summary', '') if seen(truth.get('summary')) else ''},
+            {'id': 'experience', 'title': 'Experience', 'items': experience},
+            {'id': 'education', 'title': 'Education', 'items': education},
+            {'id': 'skills', 'title': 'Skills', 'items': [skill for skill in truth.get('skills', []) if seen(skill)]},
+        ]
+    })
+
+
+class ModelHarness:
+    """
+    Model factory for the router that answers from ground truth, a recording or a live model
+
+    Every call is logged with its model id, token estimates and the model
+    time it stands for: measured when live, as recorded when replaying, and
+    zero for the ground-truth stub.
+    """
+
+    def __init__(self, mode: str = 'truth', recording: Optional[str] = None, live_factory=None):
+        self.mode = mode
+        self.recording = recording
+        self.live_factory = live_factory
+        self.truth: Dict[str, Any] = {}
+        self.calls: List[Dict[str, Any]] = []
+        self._answers: Dict[str, Dict[str, Any]] = {}
+        self._live: Dict[str, Any] = {}
+        if mode == 'replay':
+            with open(recording, encoding='utf-8') as f:
+                for line in f:
+                    entry = json.loads(line)
+                    self._answers[entry['key']] = entry
+
+    def __call__(self, model_id: str) -> '_Handle':
+        return _Handle(self, model_id)
+
+    @staticmethod
+    def key(model_id: str, prompt: str) -> str:
+        return hashlib.blake2b(f"{model_id}\x00{prompt}".encode('utf-8'), digest_size=16).hexdigest()
+
+    def answer(self, model_id: str, messages: List[Dict[str, str]]) -> StubResponse:
+        prompt = messages[-1]['content']
+        call = {'model': model_id, 'promptTokens': estimate_tokens(prompt), 'outputTokens': 0, 'modelSeconds': 0.0}
+        self.calls.append(call)
+        key = self.key(model_id, prompt)
+        if self.mode == 'truth':
+            output = truth_response(self.truth, prompt)
+        elif self.mode == 'replay':
+            entry = self._answers.get(key)
+            if entry is None:
+                return StubResponse(output=None, error=f"no recorded answer from {model_id}", provider='replay')
+            output, call['modelSeconds'] = entry['output'], entry['seconds']
+        else:
+            live = self._live.get(model_id) or self._live.setdefault(model_id, self.live_factory(model_id))
+            started = time.perf_counter()
+            response = live.run(messages)
+            call['modelSeconds'] = time.perf_counter() - started
+            if getattr(response, 'error', None):
+                return response
+            output = extract_model_text(response)
+            with open(self.recording, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'key': key, 'model': model_id, 'output': output, 'seconds': call['modelSeconds']}) + '\n')
+        call['outputTokens'] = estimate_tokens(output)
+        return StubResponse(output={'role': 'assistant', 'content': output}, error=None, provider=self.mode)
+
+
+class _Handle:
+    def __init__(self, owner: ModelHarness, model_id: str):
+        self.owner = owner
+        self.id = model_id
+
+    def run(self, messages: List[Dict[str, str]], params: Any = None) -> StubResponse:
+        return self.owner.answer(self.id, messages)
+
+
+# Scoring
+
+def _tokens(value: Any) -> Set[str]:
+    return set(re.findall(r'[a-z0-9+#]+', _norm(value)))
+
+
+def _years(value: Any) -> Set[str]:
+    return set(re.findall(r'\d{4}|present|current', _norm(value)))
+
+
+def _f1(predicted: Set[str], expected: Set[str]) -> float:
+    if not predicted and not expected:
+        return 1.0
+    overlap = len(predicted & expected)
+    if not overlap:
+        return 0.0
+    precision, recall = overlap / len(predicted), overlap / len(expected)
+    return 2 * precision * recall / (precision + recall)
+
+
+def score(truth: Dict[str, Any], parsed: ResumeModel) -> Dict[str, float]:
+    """
+    Field-level accuracy of a parse, each between 0 and 1
+
+    Only fields present in the truth are scored. Entries are matched on
+    company or school; an unmatched truth entry scores 0 on every field.
+    """
+    scores: Dict[str, float] = {}
+    for name in ('name', 'email', 'location'):
+        if name in truth:
+            scores[name] = float(_key(getattr(parsed, name)) == _key(truth[name]))
+    if 'phone' in truth:
+        scores['phone'] = float(_digits(parsed.phone) == _digits(truth['phone']))
+    for name in ('linkedin', 'github'):
+        if name in truth:
+            scores[name] = float(_handle(getattr(parsed, name)) == _handle(truth[name]))
+    if 'summary' in truth:
+        scores['summary'] = _f1(_tokens(parsed.summary), _tokens(truth['summary']))
+    if 'skills' in truth:
+        scores['skills'] = _f1({_key(s) for s in parsed.skills}, {_key(s) for s in truth['skills']})
+
+    for section, match_on, fields in (
+        ('experience', 'company', ('role', 'dates', 'bullets')),
+        ('education', 'school', ('degree',)),
+    ):
+        expected = truth.get(section)
+        if not expected:
+            continue
+        predicted = list(getattr(parsed, section))
+        per_field: Dict[str, List[float]] = {f"{section}.{match_on}": []}
+        matched = 0
+        for item in expected:
+            candidate = next((p for p in predicted if _key(getattr(p, match_on)) == _key(item[match_on])), None)
+            if candidate is not None:
+                predicted.remove(candidate)
+                matched += 1
+            per_field[f"{section}.{match_on}"].append(float(candidate is not None))
+            for field in fields:
+                if field == 'role':
+                    value = float(candidate is not None and _key(candidate.position) == _key(item.get('role')))
+                elif field == 'dates':
+                    value = float(candidate is not None and _years(candidate.start_date) == _years(item.get('startDate'))
+                                  and _years(candidate.end_date) == _years(item.get('endDate')))
+                elif field == 'bullets':
+                    if 'bullets' not in item:
+                        continue
+                    value = _f1({_key(b) for b in candidate.bullets}, {_key(b) for b in item['bullets']}) if candidate else 0.0
+                else:
+                    value = float(candidate is not None and _key(candidate.degree) == _key(item.get('degree')))
+                per_field.setdefault(f"{section}.{field}", []).append(value)
+        for field, values in per_field.items():
+            if values:
+                scores[field] = statistics.fmean(values)
+        # Entries the parse invented lower precision
+        scores[f"{section}.entries"] = 2 * matched / (len(expected) + matched + len(predicted))
+    return scores
+
+
+def evaluate(strategy: Strategy, documents: List[Document], models: ModelHarness) -> Dict[str, Any]:
+    client = backend.app.test_client()
+    rows = []
+    with applied(strategy):
+        for document in documents:
+            models.truth = document.truth
+            models.calls.clear()
+            started = time.perf_counter()
+            response = client.post(
+                '/api/upload-resume', data={'file': (io.BytesIO(document.data), document.filename)},
+                content_type='multipart/form-data'
+            )
+            wall = time.perf_counter() - started
+            payload = response.get_json(silent=True) or {}
+            model_seconds = sum(call['modelSeconds'] for call in models.calls)
+            row = {
+                'document': document.name,
+                'format': document.format,
+                'source': document.source,
+                'status': response.status_code,
+                # Local work plus the model time the calls stand for; live calls are already inside wall
+                'seconds': wall if models.mode == 'record' else wall + model_seconds,
+                'modelSeconds': model_seconds,
+                'promptTokens': sum(call['promptTokens'] for call in models.calls),
+                'outputTokens': sum(call['outputTokens'] for call in models.calls),
+                'models': sorted({call['model'] for call in models.calls}),
+                'scores': {}
+            }
+            try:
+                row['scores'] = score(document.truth, ResumeModel.coerce(json.loads(payload['output'])))
+            except (KeyError, TypeError, ValueError):
+                row['error'] = payload.get('error') or 'unparseable output'
+            row['accuracy'] = statistics.fmean(row['scores'].values()) if row['scores'] else 0.0
+            rows.append(row)
+    return summarize(strategy, rows)
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+def summarize(strategy: Strategy, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    fields: Dict[str, List[float]] = {}
+    formats: Dict[str, List[float]] = {}
+    for row in rows:
+        formats.setdefault(row['format'], []).append(row['accuracy'])
+        for field, value in row['scores'].items():
+            fields.setdefault(field, []).append(value)
+    seconds = [row['seconds'] for row in rows]
+    return {
+        'strategy': dataclasses.asdict(strategy),
+        'documents': len(rows),
+        'errors': sum(1 for row in rows if 'error' in row),
+        'accuracy': statistics.fmean(row['accuracy'] for row in rows) if rows else 0.0,
+        'fields': {field: statistics.fmean(values) for field, values in sorted(fields.items())},
+        'formats': {fmt: statistics.fmean(values) for fmt, values in sorted(formats.items())},
+        'p50Seconds': _percentile(seconds, 0.5),
+        'p95Seconds': _percentile(seconds, 0.95),
+        'promptTokens': statistics.fmean(row['promptTokens'] for row in rows) if rows else 0.0,
+        'outputTokens': statistics.fmean(row['outputTokens'] for row in rows) if rows else 0.0,
+        'models': sorted({model for row in rows for model in row['models']}),
+        'rows': rows,
+    }
+
+
+def report(results: List[Dict[str, Any]], stream=sys.stdout) -> None:
+    reference = results[0]
+    stream.write(f"\n{'strategy':<14}{'docs':>6}{'errors':>8}{'accuracy':>10}{'Δ':>8}{'p50':>11}{'p95':>11}"
+                 f"{'prompt tok':>12}{'Δ':>8}{'output tok':>12}  models\n")
+    for result in results:
+        token_change = result['promptTokens'] / reference['promptTokens'] - 1 if reference['promptTokens'] else 0.0
+        stream.write(
+            f"{result['strategy']['name']:<14}{result['documents']:>6}{result['errors']:>8}"
+            f"{result['accuracy']:>10.1%}{result['accuracy'] - reference['accuracy']:>+8.1%}"
+            f"{harness.format_seconds(result['p50Seconds']):>11}{harness.format_seconds(result['p95Seconds']):>11}"
+            f"{result['promptTokens']:>12.0f}{token_change:>+8.0%}{result['outputTokens']:>12.0f}"
+            f"  {', '.join(result['models'])}\n"
+        )
+
+    fields = sorted({field for result in results for field in result['fields']})
+    names = [result['strategy']['name'] for result in results]
+    stream.write(f"\n{'field':<22}" + ''.join(f"{name:>13}" for name in names) + '\n')
+    for field in fields:
+        stream.write(f"{field:<22}" + ''.join(
+            f"{result['fields'][field]:>13.1%}" if field in result['fields'] else f"{'-':>13}" for result in results
+        ) + '\n')
+    formats = sorted({fmt for result in results for fmt in result['formats']})
+    for fmt in formats:
+        stream.write(f"{'format ' + fmt:<22}" + ''.join(
+            f"{result['formats'][fmt]:>13.1%}" if fmt in result['formats'] else f"{'-':>13}" for result in results
+        ) + '\n')
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[2])
+    parser.add_argument('--strategy', action='append', choices=[s.name for s in STRATEGIES],
+                        help='Evaluate only this strategy (repeatable); the first one is the reference')
+    parser.add_argument('--corpus', help='Directory written by create_diverse_resumes.py --count N')
+    parser.add_argument('--limit', type=int, help='Use only the first N corpus documents')
+    parser.add_argument('--no-bundled', action='store_true', help='Skip the bundled fixtures')
+    models = parser.add_mutually_exclusive_group()
+    models.add_argument('--record', metavar='PATH', help='Call the configured models and append their answers to PATH')
+    models.add_argument('--replay', metavar='PATH', help='Answer from answers recorded with --record')
+    parser.add_argument('--output', default=os.path.join(BENCH_DIR, 'results', 'evaluation.json'), help='Results file')
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    strategies = [s for name in args.strategy for s in STRATEGIES if s.name == name] if args.strategy else list(STRATEGIES)
+    documents = load_documents(args.corpus, args.limit, bundled=not args.no_bundled)
+    if not documents:
+        print("No documents to evaluate", file=sys.stderr)
+        return 2
+
+    if args.record:
+        models = ModelHarness('record', args.record, live_factory=backend.model_router.model_factory)
+    elif args.replay:
+        models = ModelHarness('replay', args.replay)
+    else:
+        models = ModelHarness('truth')
+    backend.model_router.model_factory = models
+
+    print(f"Evaluating {len(strategies)} strategies on {len(documents)} documents ({models.mode} model)")
+    results = []
+    for strategy in strategies:
+        started = time.perf_counter()
+        results.append(evaluate(strategy, documents, models))
+        print(f"  {strategy.name:<14} {time.perf_counter() - started:.1f}s  {strategy.description}")
+    report(results)
+
+    harness.save(args.output, {
+        'environment': harness.environment(),
+        'models': models.mode,
+        'documents': len(documents),
+        'results': results
+    })
+    print(f"\nResults written to {os.path.relpath(args.output)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
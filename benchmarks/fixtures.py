@@ -0,0 +1,224 @@
+"""
+Benchmark Fixtures
+Bundled resume files, a representative resume and job posting, and a stubbed model
+"""
+import json
+import os
+import sys
+import time
+from collections import namedtuple
+from typing import Any, Callable, Dict, List
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVER_DIR = os.path.join(REPO_ROOT, 'server')
+
+# The server uses flat imports and is run from its own directory; the repo root
+# holds the synthetic resume generator, whose PDF writer the benchmarks share
+for _path in (SERVER_DIR, REPO_ROOT):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+# Keep per-request INFO events out of the benchmark output
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+# Stored resume versions stay in memory instead of landing in the working directory
+os.environ.setdefault("VERSION_STORE_PATH", "")
+
+from create_diverse_resumes import text_pdf  # noqa: E402,F401  (no PDF fixture in the repo)
+
+TEXT_FIXTURES = ('sample_resume.txt', 'test_resume_minimal.txt', 'test_resume_traditional.txt', 'test_resume_dense.txt')
+DOCX_FIXTURES = ('test_resume.docx', 'test_resume_functional.docx')
+
+
+def read_fixture(name: str) -> bytes:
+    with open(os.path.join(REPO_ROOT, name), 'rb') as f:
+        return f.read()
+
+
+JOB_DESCRIPTION = """
+Senior Backend Engineer - Platform
+
+We are looking for a Senior Backend Engineer to join our Platform team. You will design,
+build and operate the services behind our job-matching product, working closely with
+product, data science and infrastructure engineers.
+
+Responsibilities:
+- Design and build REST and GraphQL APIs in Python (Django, Flask) and Go
+- Own microservices running on Kubernetes in AWS, with Terraform-managed infrastructure
+- Build data pipelines on PostgreSQL, Redis and Elasticsearch
+- Improve CI/CD pipelines (Jenkins, GitHub Actions) and observability
+- Partner with the ML team to ship NLP and Machine Learning features to production
+- Mentor engineers and lead design reviews in an Agile/Scrum environment
+
+Requirements:
+- 5+ years of backend development experience with Python or Java
+- Production experience with Docker, Kubernetes and AWS or GCP
+- Strong SQL skills (PostgreSQL or MySQL) and experience with MongoDB or DynamoDB
+- Familiarity with React or TypeScript is a plus
+- Experience with TensorFlow or PyTorch is a plus
+
+Benefits: competitive salary, equity, remote-friendly, learning budget.
+""".strip()
+
+RESUME: Dict[str, Any] = {
+    'personalInfo': {
+        'name': 'Alexandra Rodriguez',
+        'email': 'alex.rodriguez@example.com',
+        'phone': '+1 (408) 555-0100',
+        'location': 'Austin, TX',
+        'linkedin': 'linkedin.com/in/alexrodriguez',
+        'github': 'github.com/alexrodriguez'
+    },
+    'sections': [
+        {
+            'id': 'summary',
+            'title': 'Professional Summary',
+            'content': 'Senior software engineer with 8+ years building distributed systems, cloud '
+                       'infrastructure and developer platforms. Led teams of up to 8 engineers.'
+        },
+        {
+            'id': 'skills',
+            'title': 'Skills',
+            'items': [
+                'Python', 'Go', 'Java', 'TypeScript', 'JavaScript', 'SQL', 'React', 'Node.js', 'Django',
+                'Flask', 'FastAPI', 'AWS', 'GCP', 'Docker', 'Kubernetes', 'Terraform', 'Jenkins',
+                'GitHub Actions', 'PostgreSQL', 'MySQL', 'Redis', 'MongoDB', 'Elasticsearch', 'Kafka',
+                'GraphQL', 'REST', 'Microservices', 'Agile', 'Scrum', 'Machine Learning'
+            ]
+        },
+        {
+            'id': 'experience',
+            'title': 'Experience',
+            'items': [
+                {
+                    'role': f'{level} Software Engineer'.strip(),
+                    'company': company,
+                    'location': 'Austin, TX',
+                    'startDate': f'{2024 - 2 * index - 2}-01',
+                    'endDate': 'Present' if index == 0 else f'{2024 - 2 * index}-12',
+                    'bullets': [
+                        f'Built {service} services in Python and Go on Kubernetes serving {n}M requests per day',
+                        f'Cut p95 latency of the {service} API by {20 + n}% with Redis caching and query tuning',
+                        'Migrated deployments to Terraform and GitHub Actions, reducing release time from hours to minutes',
+                        'Mentored engineers and led design reviews for cross-team platform changes',
+                        f'Introduced PostgreSQL partitioning and Elasticsearch indexing for {service} search',
+                    ]
+                }
+                for index, (level, company, service, n) in enumerate([
+                    ('Senior', 'CloudScale Systems', 'billing', 12),
+                    ('Senior', 'DataFlow Inc', 'ingestion', 8),
+                    ('', 'Brightline Labs', 'matching', 5),
+                    ('Junior', 'StartupXYZ', 'notification', 1),
+                ])
+            ]
+        },
+        {
+            'id': 'projects',
+            'title': 'Projects',
+            'items': [
+                {
+                    'title': 'Open-source job scheduler',
+                    'technologies': ['Go', 'Kubernetes', 'PostgreSQL'],
+                    'bullets': ['Distributed cron for Kubernetes with leader election', '2k GitHub stars']
+                },
+                {
+                    'title': 'Resume parser',
+                    'technologies': ['Python', 'NLP', 'FastAPI'],
+                    'bullets': ['Extracts structured resumes from PDF and DOCX', 'Used by three university career centers']
+                }
+            ]
+        },
+        {
+            'id': 'education',
+            'title': 'Education',
+            'items': [
+                {'degree': 'B.S. Computer Science', 'school': 'University of Texas at Austin', 'year': '2016'}
+            ]
+        }
+    ]
+}
+
+SKILL_ITEMS: List[Any] = (
+    RESUME['sections'][1]['items']
+    + [{'name': 'Pandas'}, {'skill': 'NumPy'}, {'title': 'Spark'}, 'C++, Rust, Scala', 'Airflow; dbt']
+    + [{'category': 'Cloud', 'items': ['Lambda', 'S3', 'DynamoDB']}, None, 42, '', '  Ansible  ']
+    + ['Python', 'python', 'AWS']
+)
+
+COVER_LETTER = (
+    "Dear Hiring Manager,\n\n"
+    + "\n\n".join(
+        "I am excited to apply for the Senior Backend Engineer role. " * 4 for _ in range(4)
+    )
+    + "\n\nSincerely,\nAlexandra Rodriguez"
+)
+
+# Reply to the skeleton-mode prompt, which asks only for the personalized paragraphs
+COVER_LETTER_BODY = "\n\n".join(
+    "My work on high-throughput Python and AWS services maps directly to this role. " * 2 for _ in range(2)
+)
+
+MARKDOWN_RESUME = "\n".join([
+    "# Alexandra Rodriguez",
+    "alex.rodriguez@example.com | Austin, TX",
+    "",
+    "## PROFESSIONAL SUMMARY",
+    RESUME['sections'][0]['content'],
+    "",
+    "## EXPERIENCE",
+    *[
+        f"### {item['role']} | {item['company']}\n" + "\n".join(f"- {bullet}" for bullet in item['bullets'])
+        for item in RESUME['sections'][2]['items']
+    ],
+    "",
+    "## EDUCATION",
+    "B.S. Computer Science, University of Texas at Austin (2016)",
+])
+
+# Answers every task: resume parse and JSON tailoring read 'personalInfo'/'sections',
+# section tailoring reads the top-level section keys, everything else takes the text
+STUB_JSON = json.dumps({
+    'personalInfo': RESUME['personalInfo'],
+    'sections': RESUME['sections'],
+    'summary': RESUME['sections'][0]['content'],
+    'skills': RESUME['sections'][1]['items'],
+    'experience': RESUME['sections'][2]['items'],
+    'projects': RESUME['sections'][3]['items'],
+    'education': RESUME['sections'][4]['items'],
+})
+
+StubResponse = namedtuple('StubResponse', 'output error provider')
+
+
+class StubModel:
+    """Stands in for a Bytez model handle; replies after a fixed delay without network access"""
+
+    latency_seconds = 0.0
+
+    def __init__(self, model_id: str):
+        self.id = model_id
+
+    def run(self, messages: List[Dict[str, str]], params: Any = None) -> StubResponse:
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        prompt = messages[-1]['content'] if messages else ''
+        if 'middle of a cover letter' in prompt:
+            content = COVER_LETTER_BODY
+        else:
+            content = MARKDOWN_RESUME if 'markdown' in prompt.lower() else STUB_JSON
+        return StubResponse(output={'role': 'assistant', 'content': content}, error=None, provider='stub')
+
+
+def stubbed_app(latency_seconds: float = 0.0):
+    """Import the Flask app with every model call answered by StubModel"""
+    import app as backend
+
+    StubModel.latency_seconds = latency_seconds
+    backend.model_router.model_factory = StubModel
+    return backend
+
+
+def upload(name: str, data: bytes) -> Callable[[], Any]:
+    """Factory for fresh werkzeug FileStorage objects, as request.files would hold"""
+    import io
+    from werkzeug.datastructures import FileStorage
+
+    return lambda: FileStorage(stream=io.BytesIO(data), filename=name)
@@ -0,0 +1,173 @@
+"""
+Benchmark Harness
+Registration, timing, result files and baseline comparison for the benchmark suite
+"""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+
+@dataclass
+class Benchmark:
+    """One measured operation; setup runs untimed before every call and its return value is passed in"""
+    name: str
+    group: str
+    func: Callable[..., Any]
+    setup: Optional[Callable[[], Any]] = None
+
+
+REGISTRY: Dict[str, Benchmark] = {}
+
+
+def benchmark(group: str, name: Optional[str] = None, setup: Optional[Callable[[], Any]] = None):
+    """Register the decorated function as a benchmark in the given group ('micro' or 'macro')"""
+    def register(func):
+        bench_name = f"{group}.{name or func.__name__}"
+        REGISTRY[bench_name] = Benchmark(bench_name, group, func, setup)
+        return func
+    return register
+
+
+def _calibrate(func: Callable[[], Any], target_seconds: float) -> int:
+    """Calls per sample so that a sample takes at least target_seconds, like timeit's autorange"""
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        if time.perf_counter() - started >= target_seconds or number >= 1_000_000:
+            return number
+        number *= 2
+
+
+def measure(bench: Benchmark, min_time: float = 0.5, min_samples: int = 5, max_samples: int = 1000) -> Dict[str, Any]:
+    """
+    Time a benchmark until it has run for min_time and at least min_samples times
+
+    Operations without a setup are batched so each sample is long enough for
+    the timer; with a setup every sample is a single call.
+
+    Returns:
+        Per-call statistics in seconds
+    """
+    if bench.setup is None:
+        number = _calibrate(bench.func, 0.002)
+        call = bench.func
+    else:
+        number = 1
+        # Warm up imports and caches that are not part of the operation
+        bench.func(bench.setup())
+
+    samples: List[float] = []
+    deadline = time.perf_counter() + min_time
+    while len(samples) < max_samples and (len(samples) < min_samples or time.perf_counter() < deadline):
+        if bench.setup is None:
+            started = time.perf_counter()
+            for _ in range(number):
+                call()
+            samples.append((time.perf_counter() - started) / number)
+        else:
+            arg = bench.setup()
+            started = time.perf_counter()
+            bench.func(arg)
+            samples.append(time.perf_counter() - started)
+
+    samples.sort()
+    return {
+        'group': bench.group,
+        'samples': len(samples),
+        'number': number,
+        'median': statistics.median(samples),
+        'mean': statistics.fmean(samples),
+        'min': samples[0],
+        'p95': samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        'stdev': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    }
+
+
+def environment() -> Dict[str, Any]:
+    """Where the numbers came from; baselines are only comparable on similar machines"""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=10,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = ''
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'commit': commit,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def run(names: List[str], min_time: float = 0.5, stream=sys.stdout) -> Dict[str, Any]:
+    results = {}
+    for name in names:
+        results[name] = measure(REGISTRY[name], min_time=min_time)
+        stats = results[name]
+        stream.write(f"{name:<45} median {format_seconds(stats['median']):>10}  p95 {format_seconds(stats['p95']):>10}"
+                     f"  ({stats['samples']} x {stats['number']})\n")
+        stream.flush()
+    return {'environment': environment(), 'benchmarks': results}
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Compare medians against a baseline run
+
+    Args:
+        results: Output of run()
+        baseline: A previous run() output
+        threshold: Relative slowdown that counts as a regression, e.g. 0.25 for 25%
+
+    Returns:
+        Benchmarks grouped into regressions, improvements, unchanged and new
+    """
+    report: Dict[str, List[Dict[str, Any]]] = {'regressions': [], 'improvements': [], 'unchanged': [], 'new': []}
+    previous = baseline.get('benchmarks', {})
+    for name, stats in results['benchmarks'].items():
+        if name not in previous:
+            report['new'].append({'name': name, 'median': stats['median']})
+            continue
+        ratio = stats['median'] / previous[name]['median'] if previous[name]['median'] else float('inf')
+        entry = {'name': name, 'median': stats['median'], 'baseline': previous[name]['median'], 'ratio': round(ratio, 3)}
+        if ratio > 1 + threshold:
+            report['regressions'].append(entry)
+        elif ratio < 1 - threshold:
+            report['improvements'].append(entry)
+        else:
+            report['unchanged'].append(entry)
+    return report
+
+
+def format_seconds(seconds: float) -> str:
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def save(path: str, data: Dict[str, Any]) -> None:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def load(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
@@ -0,0 +1,148 @@
+"""
+Macro Benchmarks
+Full Flask request handling for each endpoint against a stubbed model
+"""
+import io
+import os
+import time
+
+# fixtures puts server/ on sys.path, so it is imported before the server modules
+from fixtures import COVER_LETTER, JOB_DESCRIPTION, RESUME, read_fixture, stubbed_app, text_pdf
+from harness import benchmark
+
+
+# MODEL_STUB_LATENCY_MS simulates provider time; the default measures only the server's own work
+backend = stubbed_app(latency_seconds=float(os.environ.get("MODEL_STUB_LATENCY_MS", "0")) / 1000)
+client = backend.app.test_client()
+
+_uploads = {
+    'txt': ('resume.txt', read_fixture('test_resume_dense.txt')),
+    'docx': ('resume.docx', read_fixture('test_resume_functional.docx')),
+    'pdf': ('resume.pdf', text_pdf(read_fixture('test_resume_dense.txt').decode('utf-8'))),
+}
+_generate = {
+    'resume': RESUME,
+    'jobDescription': JOB_DESCRIPTION,
+    'jobTitle': 'Senior Backend Engineer',
+    'companyName': 'Platform Co',
+}
+_markdown_input = (
+    "Rewrite my resume for this job as a Markdown document with ## section headers.\n\n" + JOB_DESCRIPTION
+)
+
+
+def cold_caches():
+    """Drop rendered and generated results so every request does the full work"""
+    backend.docx_cache.clear()
+    backend.section_tailor.cache.clear()
+    backend.cover_letter_composer.cache.clear()
+    backend.export_store.clear()
+    backend.resume_prefetcher.cache.clear()
+
+
+def post(path, **kwargs):
+    response = client.post(path, **kwargs)
+    # Drain streamed bodies so their generation is part of the measurement
+    response.get_data()
+    assert response.status_code == 200, (path, response.status_code, response.get_data()[:200])
+    response.close()
+
+
+for _kind, (_filename, _data) in _uploads.items():
+    benchmark('macro', name=f"upload_resume[{_kind}]")(
+        lambda filename=_filename, data=_data: post(
+            '/api/upload-resume', data={'file': (io.BytesIO(data), filename)}, content_type='multipart/form-data'
+        )
+    )
+
+
+@benchmark('macro')
+def generate_resume_json():
+    post('/api/generate-resume', json={**_generate, 'mode': 'json'})
+
+
+@benchmark('macro')
+def generate_resume_markdown():
+    post('/api/generate-resume', json={**_generate, 'mode': 'markdown', 'input': _markdown_input})
+
+
+@benchmark('macro', setup=cold_caches)
+def generate_resume_sections(_):
+    post('/api/generate-resume', json={**_generate, 'mode': 'sections'})
+
+
+def prefetched_sections():
+    """Cold caches, then a finished prefetch of the sections request, as after viewing the job"""
+    cold_caches()
+    prefetch_id = client.post('/api/prefetch-resume', json={**_generate, 'mode': 'sections'}).get_json()['id']
+    while backend.resume_prefetcher.status(prefetch_id) != 'ready':
+        time.sleep(0.001)
+
+
+@benchmark('macro', setup=prefetched_sections)
+def generate_resume_prefetched(_):
+    post('/api/generate-resume', json={**_generate, 'mode': 'sections'})
+
+
+@benchmark('macro')
+def generate_cover_letter():
+    post('/api/generate-cover-letter', json={'input': JOB_DESCRIPTION, 'resume': RESUME, 'jobDescription': JOB_DESCRIPTION})
+
+
+@benchmark('macro', setup=cold_caches)
+def generate_cover_letter_skeleton(_):
+    post('/api/generate-cover-letter', json={**_generate, 'mode': 'skeleton'})
+
+
+@benchmark('macro')
+def mock_interview():
+    post('/api/mock-interview', json={'messages': [{'role': 'user', 'content': 'Tell me about a hard bug you fixed.'}]})
+
+
+@benchmark('macro', setup=cold_caches)
+def download_docx(_):
+    post('/api/download-docx', json={'resume': RESUME})
+
+
+@benchmark('macro', setup=cold_caches)
+def download_docx_ooxml(_):
+    post('/api/download-docx', json={'resume': RESUME, 'engine': 'ooxml'})
+
+
+@benchmark('macro')
+def download_docx_cached():
+    post('/api/download-docx', json={'resume': RESUME})
+
+
+@benchmark('macro', setup=cold_caches)
+def download_cover_letter_docx(_):
+    post('/api/download-cover-letter-docx', json={'text': COVER_LETTER})
+
+
+@benchmark('macro', setup=cold_caches)
+def bulk_export_10(_):
+    # Distinct documents, so none of them is served from the render cache
+    documents = [
+        {'type': 'resume', 'resume': {**RESUME, 'personalInfo': {**RESUME['personalInfo'], 'name': f"Candidate {i}"}}}
+        if i % 2 else {'type': 'cover_letter', 'text': f"{COVER_LETTER}\n{i}"}
+        for i in range(10)
+    ]
+    post('/api/bulk-export', json={'documents': documents})
+
+
+@benchmark('macro', setup=cold_caches)
+def apply_pipeline_5(_):
+    jobs = [{'jobTitle': f'Engineer {i}', 'companyName': f'Co {i}', 'jobDescription': JOB_DESCRIPTION} for i in range(5)]
+    post('/api/apply-pipeline', json={'resume': RESUME, 'jobs': jobs})
+
+
+_match_jobs = [
+    {'jobTitle': f'Engineer {i}', 'companyName': f'Co {i}', 'jobDescription': f"{JOB_DESCRIPTION}\nTeam {i}"}
+    for i in range(20)
+]
+
+
+@benchmark('macro')
+def match_jobs_20():
+    # After the first call the jobs and the resume are already embedded; this is the ranking path
+    post('/api/match-jobs', json={'resume': RESUME, 'jobs': _match_jobs, 'limit': 10})
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark Runner
+Runs the micro and macro benchmarks, saves JSON results and flags regressions against a baseline
+
+    python benchmarks/run.py                      # everything, compared with benchmarks/baseline.json
+    python benchmarks/run.py --group micro -k docx
+    python benchmarks/run.py --update-baseline    # record this machine's numbers as the baseline
+
+The model is always stubbed (see fixtures.StubModel), so no API key or network is needed.
+Exits with status 1 when a benchmark's median is slower than the baseline by more than --threshold.
+
+New benchmarks are reported as "not in baseline" until the baseline is re-recorded. Commit baseline
+updates on their own, never with the change being measured, and name any regression they accept.
+"""
+import argparse
+import os
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+if BENCH_DIR not in sys.path:
+    sys.path.insert(0, BENCH_DIR)
+
+import harness  # noqa: E402
+
+
+GROUPS = ('micro', 'macro')
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[2])
+    parser.add_argument('--group', choices=GROUPS, action='append', help='Run only this group (repeatable)')
+    parser.add_argument('-k', '--filter', default='', help='Run only benchmarks whose name contains this text')
+    parser.add_argument('--min-time', type=float, default=0.5, help='Seconds to spend measuring each benchmark')
+    parser.add_argument('--output', default=os.path.join(BENCH_DIR, 'results', 'latest.json'), help='Results file')
+    parser.add_argument('--baseline', default=os.path.join(BENCH_DIR, 'baseline.json'), help='Baseline results file')
+    parser.add_argument('--threshold', type=float, default=0.25, help='Relative slowdown reported as a regression')
+    parser.add_argument('--update-baseline', action='store_true', help='Write the results to the baseline file')
+    parser.add_argument('--list', action='store_true', help='List benchmark names and exit')
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    groups = args.group or list(GROUPS)
+    # Importing a group module registers its benchmarks
+    for group in groups:
+        __import__(group)
+
+    names = [
+        name for name, bench in harness.REGISTRY.items()
+        if bench.group in groups and args.filter in name
+    ]
+    if args.list:
+        print('\n'.join(names))
+        return 0
+    if not names:
+        print("No benchmarks matched", file=sys.stderr)
+        return 2
+
+    results = harness.run(names, min_time=args.min_time)
+    harness.save(args.output, results)
+    print(f"\nResults written to {os.path.relpath(args.output)}")
+
+    if args.update_baseline:
+        # Keep baseline entries for benchmarks that were not part of this run
+        baseline = harness.load(args.baseline) or {'benchmarks': {}}
+        baseline['environment'] = results['environment']
+        baseline['benchmarks'].update(results['benchmarks'])
+        harness.save(args.baseline, baseline)
+        print(f"Baseline updated: {os.path.relpath(args.baseline)}")
+        return 0
+
+    baseline = harness.load(args.baseline)
+    if baseline is None:
+        print(f"No baseline at {os.path.relpath(args.baseline)}; run with --update-baseline to create one")
+        return 0
+
+    report = harness.compare(results, baseline, args.threshold)
+    environment = baseline.get('environment', {})
+    print(f"Compared with baseline from {environment.get('commit') or 'unknown commit'} "
+          f"({environment.get('platform', 'unknown platform')}), threshold {args.threshold:.0%}")
+    for label in ('regressions', 'improvements'):
+        for entry in report[label]:
+            print(f"  {label[:-1].upper():<12} {entry['name']:<45} {harness.format_seconds(entry['baseline'])} -> "
+                  f"{harness.format_seconds(entry['median'])} (x{entry['ratio']})")
+    if report['new']:
+        print(f"  Not in baseline: {', '.join(entry['name'] for entry in report['new'])}")
+    print(f"  {len(report['unchanged'])} unchanged, {len(report['improvements'])} faster, "
+          f"{len(report['regressions'])} slower")
+    return 1 if report['regressions'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,9 +1,20 @@
 #!/usr/bin/env python3
 """Create diverse test resumes in different formats to verify parsing robustness."""
 
+import argparse
+import json
+import os
+import random
+import re
+import textwrap
+import time
+from concurrent.futures import ProcessPoolExecutor
+
 from docx import Document
 from docx.shared import Pt, RGBColor
+from docx.enum.section import WD_SECTION
 from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
+from docx.oxml.ns import qn
 
 def create_traditional_resume():
     """Create a traditional chronological resume (TXT)."""
@@ -237,7 +248,581 @@ PUBLICATIONS & SPEAKING
         f.write(content)
     print("✓ Created test_resume_dense.txt")
 
-if __name__ == '__main__':
+# ---------------------------------------------------------------------------
+# Synthetic corpus: parametric resumes and matching job descriptions at scale
+# ---------------------------------------------------------------------------
+
+FIRST_NAMES = [
+    'Aarav', 'Priya', 'James', 'Maria', 'Wei', 'Fatima', 'Lucas', 'Sofia', 'Kenji', 'Amara', 'Noah', 'Elena',
+    'Omar', 'Chloe', 'Ravi', 'Hannah', 'Diego', 'Yuki', 'Samuel', 'Aisha', 'Mateo', 'Grace', 'Ivan', 'Leila',
+    'Daniel', 'Mei', 'Ethan', 'Zara', 'Arjun', 'Olivia', 'Tomas', 'Nadia', 'Kwame', 'Isabella', 'Hiro', 'Ana'
+]
+LAST_NAMES = [
+    'Sharma', 'Patel', 'Smith', 'Garcia', 'Zhang', 'Khan', 'Silva', 'Rossi', 'Tanaka', 'Okafor', 'Miller', 'Petrova',
+    'Haddad', 'Martin', 'Iyer', 'Schmidt', 'Lopez', 'Sato', 'Johnson', 'Bello', 'Fernandez', 'Kim', 'Novak', 'Nasser',
+    'Brown', 'Chen', 'Wilson', 'Ahmed', 'Reddy', 'Davies', 'Kowalski', 'Haddad', 'Mensah', 'Moreau', 'Nakamura', 'Costa'
+]
+CITIES = [
+    'San Francisco, CA', 'Seattle, WA', 'Austin, TX', 'New York, NY', 'Boston, MA', 'Chicago, IL', 'Denver, CO',
+    'Bengaluru, India', 'Pune, India', 'Hyderabad, India', 'London, UK', 'Berlin, Germany', 'Toronto, Canada', 'Remote'
+]
+COMPANIES = [
+    'TechStart Inc', 'DataCorp', 'CloudScale Systems', 'InnovateLabs', 'Brightline Labs', 'Nimbus Analytics',
+    'Quantum Retail', 'BlueOrbit', 'Finlytics', 'HealthBridge', 'Streamline AI', 'Pixel Forge', 'NorthStar Logistics',
+    'Greenfield Energy', 'Acme Payments', 'Vertex Mobility', 'Helio Robotics', 'Summit Bank', 'Atlas Media', 'Kite Travel'
+]
+SCHOOLS = [
+    'Stanford University', 'MIT', 'UC Berkeley', 'Georgia Institute of Technology', 'University of Texas at Austin',
+    'IIT Bombay', 'IIT Delhi', 'University of Washington', 'Carnegie Mellon University', 'University of Toronto',
+    'State University', 'Imperial College London', 'TU Munich', 'University of Michigan'
+]
+DEGREES = [
+    'B.S. Computer Science', 'B.Tech Computer Science and Engineering', 'M.S. Computer Science',
+    'B.S. Software Engineering', 'M.S. Data Science', 'B.E. Information Technology', 'B.S. Electrical Engineering'
+]
+CERTIFICATIONS = [
+    'AWS Certified Solutions Architect - Associate', 'Certified Kubernetes Administrator (CKA)',
+    'Google Cloud Professional Data Engineer', 'Certified Scrum Master', 'Azure Developer Associate',
+    'TensorFlow Developer Certificate', 'HashiCorp Certified Terraform Associate'
+]
+
+# Career tracks: job titles and the skills a resume or posting on that track draws from
+TRACKS = {
+    'backend': (
+        ['Software Engineer', 'Backend Engineer', 'Senior Backend Engineer', 'Staff Software Engineer'],
+        ['Python', 'Java', 'Go', 'Django', 'Flask', 'Spring', 'PostgreSQL', 'MySQL', 'Redis', 'Kafka', 'REST',
+         'GraphQL', 'Microservices', 'Docker', 'Kubernetes', 'AWS', 'gRPC', 'Elasticsearch']
+    ),
+    'frontend': (
+        ['Frontend Engineer', 'UI Engineer', 'Senior Frontend Engineer', 'Web Developer'],
+        ['JavaScript', 'TypeScript', 'React', 'Vue', 'Angular', 'Next.js', 'HTML5', 'CSS3', 'Tailwind', 'Redux',
+         'Webpack', 'Jest', 'Cypress', 'GraphQL', 'Node.js', 'Figma', 'Accessibility']
+    ),
+    'data': (
+        ['Data Engineer', 'Analytics Engineer', 'Senior Data Engineer', 'Data Platform Engineer'],
+        ['Python', 'SQL', 'Spark', 'Airflow', 'dbt', 'Kafka', 'Snowflake', 'BigQuery', 'PostgreSQL', 'Pandas',
+         'Scala', 'AWS', 'GCP', 'Databricks', 'Tableau', 'Data Modeling']
+    ),
+    'devops': (
+        ['DevOps Engineer', 'Site Reliability Engineer', 'Platform Engineer', 'Cloud Engineer'],
+        ['AWS', 'Azure', 'GCP', 'Terraform', 'Ansible', 'Kubernetes', 'Docker', 'Helm', 'Jenkins', 'GitHub Actions',
+         'Prometheus', 'Grafana', 'Linux', 'Bash', 'Python', 'Go', 'CI/CD']
+    ),
+    'ml': (
+        ['Machine Learning Engineer', 'Data Scientist', 'Applied Scientist', 'ML Platform Engineer'],
+        ['Python', 'PyTorch', 'TensorFlow', 'scikit-learn', 'NLP', 'Machine Learning', 'Deep Learning', 'Pandas',
+         'NumPy', 'SQL', 'Spark', 'MLflow', 'Kubernetes', 'AWS', 'Computer Vision', 'LLMs']
+    ),
+    'mobile': (
+        ['Mobile Engineer', 'iOS Engineer', 'Android Engineer', 'React Native Developer'],
+        ['Swift', 'Kotlin', 'Java', 'React Native', 'Flutter', 'Dart', 'iOS', 'Android', 'Firebase', 'GraphQL',
+         'REST', 'Xcode', 'Jetpack Compose', 'CI/CD', 'TypeScript']
+    ),
+}
+
+BULLET_TEMPLATES = [
+    'Built {thing} using {skill} and {skill2}, serving {n}K+ daily users',
+    'Reduced {metric} by {pct}% by introducing {skill} and reworking the {thing}',
+    'Led a team of {small} engineers delivering the {thing} {months} months ahead of schedule',
+    'Migrated the {thing} to {skill}, cutting infrastructure costs by {pct}%',
+    'Designed and shipped {thing} integrations with {skill2} for {n} enterprise customers',
+    'Automated {thing} testing with {skill}, raising coverage from {low}% to {high}%',
+    'Mentored {small} junior engineers and ran weekly design reviews',
+    'Instrumented the {thing} with {skill2}, reducing time to detect incidents by {pct}%',
+]
+THINGS = ['checkout service', 'data pipeline', 'search API', 'recommendation engine', 'billing platform',
+          'mobile app', 'analytics dashboard', 'deployment pipeline', 'notification system', 'auth service']
+METRICS = ['p95 latency', 'page load time', 'error rate', 'build time', 'cloud spend', 'query time']
+BOILERPLATE = [
+    'We are an equal opportunity employer and value diversity at our company. We do not discriminate on the basis '
+    'of race, religion, color, national origin, gender, sexual orientation, age, marital status or disability status.',
+    'Benefits: competitive salary, equity, health, dental and vision insurance, 401(k) matching, flexible PTO, '
+    'home office stipend and an annual learning budget.',
+    'About us: we are a fast-growing, remote-friendly team on a mission to make work better for everyone.',
+]
+
+CANONICAL_SECTIONS = ('summary', 'skills', 'experience', 'projects', 'education', 'certifications')
+LAYOUTS = ('chronological', 'functional', 'minimal', 'dense')
+NOISE_KINDS = ('headers', 'footers', 'tables', 'columns')
+LENGTHS = {'short': (1, 2, 2, 3), 'medium': (2, 4, 3, 5), 'long': (4, 7, 4, 7)}
+SECTION_TITLES = {
+    'summary': ('SUMMARY', 'PROFESSIONAL SUMMARY', 'Profile', 'About Me'),
+    'skills': ('SKILLS', 'TECHNICAL SKILLS', 'Core Competencies', 'Technologies'),
+    'experience': ('EXPERIENCE', 'PROFESSIONAL EXPERIENCE', 'Work History', 'Employment'),
+    'projects': ('PROJECTS', 'SELECTED PROJECTS', 'Side Projects'),
+    'education': ('EDUCATION', 'Education & Training', 'ACADEMIC BACKGROUND'),
+    'certifications': ('CERTIFICATIONS', 'Licenses & Certifications'),
+}
+
+
+def synth_resume(rng, length):
+    """Ground-truth resume fields for one synthetic candidate."""
+    track = rng.choice(sorted(TRACKS))
+    titles, skill_pool = TRACKS[track]
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    min_jobs, max_jobs, min_bullets, max_bullets = LENGTHS[length]
+    skills = rng.sample(skill_pool, rng.randint(min(6, len(skill_pool)), min(len(skill_pool), 6 + 3 * max_jobs)))
+
+    def bullet():
+        skill, skill2 = rng.sample(skills, 2)
+        return rng.choice(BULLET_TEMPLATES).format(
+            thing=rng.choice(THINGS), skill=skill, skill2=skill2, metric=rng.choice(METRICS),
+            n=rng.randint(2, 900), pct=rng.randint(10, 80), small=rng.randint(2, 9),
+            months=rng.randint(1, 4), low=rng.randint(20, 50), high=rng.randint(70, 95)
+        )
+
+    year = 2025
+    experience = []
+    for position in range(rng.randint(min_jobs, max_jobs)):
+        span = rng.randint(1, 4)
+        experience.append({
+            'role': titles[max(0, len(titles) - 1 - position)] if position < len(titles) else titles[0],
+            'company': rng.choice(COMPANIES),
+            'location': rng.choice(CITIES),
+            'startDate': str(year - span),
+            'endDate': 'Present' if position == 0 else str(year),
+            'bullets': [bullet() for _ in range(rng.randint(min_bullets, max_bullets))]
+        })
+        year -= span
+    education = [{'degree': rng.choice(DEGREES), 'school': rng.choice(SCHOOLS), 'year': str(year)}]
+    if length == 'long' and rng.random() < 0.5:
+        education.insert(0, {'degree': 'M.S. Computer Science', 'school': rng.choice(SCHOOLS), 'year': str(year + 2)})
+
+    handle = re.sub(r'[^a-z]', '', f"{first}{last}".lower())
+    return {
+        'track': track,
+        'name': f"{first} {last}",
+        'email': f"{handle}{rng.randint(1, 99)}@example.com",
+        'phone': f"+1 ({rng.randint(200, 989)}) 555-{rng.randint(0, 9999):04d}",
+        'location': rng.choice(CITIES),
+        'linkedin': f"linkedin.com/in/{handle}",
+        'github': f"github.com/{handle}" if rng.random() < 0.7 else '',
+        'summary': (
+            f"{experience[0]['role']} with {2025 - year}+ years of experience in {', '.join(skills[:3])}. "
+            + ' '.join(rng.sample([
+                'Passionate about reliable, well-tested systems.',
+                'Enjoys mentoring and growing engineering teams.',
+                'Track record of shipping customer-facing products quickly.',
+                'Comfortable across the stack from infrastructure to UI.',
+                'Focused on performance, observability and cost efficiency.',
+            ], 1 if length == 'short' else 2))
+        ),
+        'skills': skills,
+        'experience': experience,
+        'projects': [
+            {'title': f"{rng.choice(['Open-source', 'Internal', 'Hackathon'])} {rng.choice(THINGS)}",
+             'technologies': rng.sample(skills, min(3, len(skills))),
+             'bullets': [bullet()]}
+            for _ in range(0 if length == 'short' else rng.randint(1, 3))
+        ],
+        'education': education,
+        'certifications': rng.sample(CERTIFICATIONS, rng.randint(0, 3 if length == 'long' else 1)),
+    }
+
+
+def synth_job(rng, resume):
+    """A posting on the candidate's track that shares a random fraction of their skills."""
+    titles, skill_pool = TRACKS[resume['track']]
+    overlap = rng.uniform(0.2, 0.9)
+    shared = rng.sample(resume['skills'], max(1, int(len(resume['skills']) * overlap)))
+    others = [s for s in skill_pool if s not in resume['skills']]
+    required = shared[:6] + rng.sample(others, min(len(others), rng.randint(1, 4)))
+    nice_to_have = shared[6:9] + rng.sample(others, min(len(others), 2))
+    rng.shuffle(required)
+    title = rng.choice(titles)
+    company = rng.choice(COMPANIES)
+
+    text = '\n'.join([
+        f"{title} - {company}",
+        f"Location: {rng.choice(CITIES)}",
+        '',
+        rng.choice(BOILERPLATE[2:]),
+        '',
+        'Responsibilities:',
+        *(f"- {line}" for line in rng.sample([
+            f"Design, build and operate {rng.choice(THINGS)}s with {required[0]}",
+            'Collaborate with product, design and data teams on roadmap priorities',
+            'Own services end to end, from design reviews to on-call',
+            f"Improve reliability and performance of our {rng.choice(THINGS)}",
+            'Mentor engineers and contribute to engineering culture',
+        ], 3)),
+        '',
+        'Requirements:',
+        f"- {rng.randint(2, 8)}+ years of professional experience",
+        *(f"- Experience with {skill}" for skill in required),
+        '',
+        'Nice to have:',
+        *(f"- {skill}" for skill in nice_to_have),
+        '',
+        *rng.sample(BOILERPLATE[:2], rng.randint(0, 2)),
+    ]).strip() + '\n'
+    return {
+        'title': title,
+        'company': company,
+        'requiredSkills': required,
+        'niceToHave': nice_to_have,
+        'matchingSkills': sorted(set(resume['skills']) & set(required + nice_to_have)),
+        'text': text,
+    }
+
+
+def resume_blocks(rng, resume, layout, section_order, noise):
+    """
+    Lay a resume out as format-neutral blocks, rendered later as TXT, DOCX or PDF.
+
+    Blocks: ('title'|'line'|'heading'|'bullet', text), ('table', rows),
+    ('columns', left_blocks, right_blocks), ('header'|'footer', text).
+    """
+    def section(section_id):
+        title = rng.choice(SECTION_TITLES[section_id])
+        if section_id == 'summary' and resume['summary']:
+            return [('heading', title), ('line', resume['summary'])]
+        if section_id == 'skills':
+            # A sidebar column cannot hold a table; columns win when both are drawn
+            if 'tables' in noise and 'columns' not in noise:
+                per_row = 4
+                rows = [resume['skills'][i:i + per_row] for i in range(0, len(resume['skills']), per_row)]
+                return [('heading', title), ('table', [row + [''] * (per_row - len(row)) for row in rows])]
+            separator = rng.choice([', ', ' • ', ' | '])
+            return [('heading', title), ('line', separator.join(resume['skills']))]
+        if section_id == 'experience':
+            blocks = [('heading', title)]
+            for job in resume['experience']:
+                dates = f"{job['startDate']} - {job['endDate']}"
+                if layout == 'dense':
+                    blocks += [('line', job['role'].upper()), ('line', f"{job['company']} | {job['location']} | {dates}")]
+                else:
+                    blocks.append(('line', f"{job['role']} | {job['company']} | {dates}"))
+                bullets = job['bullets'][:1] if layout == 'minimal' else job['bullets']
+                blocks += [('bullet', text) for text in bullets]
+            return blocks
+        if section_id == 'projects' and resume['projects'] and layout != 'minimal':
+            blocks = [('heading', title)]
+            for project in resume['projects']:
+                blocks.append(('line', f"{project['title']} ({', '.join(project['technologies'])})"))
+                blocks += [('bullet', text) for text in project['bullets']]
+            return blocks
+        if section_id == 'education':
+            return [('heading', title)] + [
+                ('line', f"{item['degree']} | {item['school']} | {item['year']}") for item in resume['education']
+            ]
+        if section_id == 'certifications' and resume['certifications']:
+            return [('heading', title)] + [('bullet', cert) for cert in resume['certifications']]
+        return []
+
+    contact = ' | '.join(filter(None, [resume['email'], resume['phone'], resume['location']]))
+    links = ' | '.join(filter(None, [resume['linkedin'], resume['github']]))
+    blocks = [('title', resume['name'])]
+    if layout == 'dense':
+        blocks.append(('line', resume['experience'][0]['role']))
+    blocks += [('line', contact)] + ([('line', links)] if links else [])
+
+    sections = {section_id: section(section_id) for section_id in section_order}
+    if 'columns' in noise:
+        # Sidebar layout: short sections on the left, the rest on the right
+        side = [s for s in section_order if s in ('skills', 'education', 'certifications')]
+        main = [s for s in section_order if s not in side]
+        left = [block for s in side for block in sections[s]] or [('line', '')]
+        right = [block for s in main for block in sections[s]]
+        blocks.append(('columns', left, right))
+    else:
+        for section_id in section_order:
+            blocks += sections[section_id]
+
+    if 'headers' in noise:
+        blocks.insert(0, ('header', f"{resume['name']} - Resume - Confidential"))
+    if 'footers' in noise:
+        blocks.append(('footer', f"{resume['email']} | Page 1 of 1"))
+    return blocks
+
+
+def render_txt(blocks):
+    lines = []
+
+    def emit(block_list, out):
+        for kind, *payload in block_list:
+            if kind in ('title', 'line', 'header', 'footer'):
+                out.append(payload[0])
+            elif kind == 'heading':
+                out += ['', payload[0].upper(), '-' * len(payload[0])]
+            elif kind == 'bullet':
+                out.append(f"- {payload[0]}")
+            elif kind == 'table':
+                width = max(len(cell) for row in payload[0] for cell in row) + 2
+                out += ['| ' + ' | '.join(cell.ljust(width) for cell in row) + ' |' for row in payload[0]]
+
+    for kind, *payload in blocks:
+        if kind == 'columns':
+            left, right = [], []
+            emit(payload[0], left)
+            emit(payload[1], right)
+            left = [part for line in left for part in textwrap.wrap(line, 34, break_on_hyphens=False) or ['']]
+            # Side-by-side text, the way PDF-to-text tools often flatten two columns
+            for i in range(max(len(left), len(right))):
+                cell = left[i] if i < len(left) else ''
+                lines.append(f"{cell:<36}{right[i] if i < len(right) else ''}".rstrip())
+        else:
+            emit([(kind, *payload)], lines)
+    return '\n'.join(lines) + '\n'
+
+
+def render_docx(blocks, path):
+    doc = Document()
+
+    def emit(block_list):
+        for kind, *payload in block_list:
+            if kind == 'title':
+                paragraph = doc.add_paragraph()
+                run = paragraph.add_run(payload[0])
+                run.bold = True
+                run.font.size = Pt(16)
+            elif kind == 'heading':
+                doc.add_heading(payload[0], level=1)
+            elif kind == 'line':
+                doc.add_paragraph(payload[0])
+            elif kind == 'bullet':
+                doc.add_paragraph(payload[0], style='List Bullet')
+            elif kind == 'table':
+                rows = payload[0]
+                table = doc.add_table(rows=len(rows), cols=len(rows[0]))
+                table.style = 'Table Grid'
+                for row, values in zip(table.rows, rows):
+                    for cell, value in zip(row.cells, values):
+                        cell.text = value
+            elif kind == 'header':
+                doc.sections[0].header.paragraphs[0].text = payload[0]
+            elif kind == 'footer':
+                doc.sections[0].footer.paragraphs[0].text = payload[0]
+
+    for kind, *payload in blocks:
+        if kind == 'columns':
+            # Contact details stay full width; a continuous break starts a two-column section
+            section = doc.add_section(WD_SECTION.CONTINUOUS)
+            emit(payload[0] + payload[1])
+            columns = section._sectPr.find(qn('w:cols'))
+            if columns is None:
+                columns = section._sectPr.makeelement(qn('w:cols'), {})
+                section._sectPr.append(columns)
+            columns.set(qn('w:num'), '2')
+            columns.set(qn('w:space'), '360')
+        else:
+            emit([(kind, *payload)])
+    doc.save(path)
+
+
+def text_pdf(text=None, font_size=10, lines_per_page=60, pages=None):
+    """
+    Minimal PDF (Helvetica, WinAnsi) built without a PDF library.
+
+    Either pass plain text, written one line per text line, or pages of
+    positioned (x, y, size, bold, text) items. This is just enough structure
+    for text extractors such as pdfminer to read it back.
+    """
+    if pages is None:
+        lines = (text or '').splitlines() or ['']
+        pages = [
+            [(50, 770 - (font_size + 2) * row, font_size, False, line) for row, line in enumerate(lines[i:i + lines_per_page])]
+            for i in range(0, len(lines), lines_per_page)
+        ]
+
+    def literal(value):
+        raw = value.encode('cp1252', errors='replace')
+        return b'(' + raw.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'',  # page tree, filled in once the page object numbers are known
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>',
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>',
+    ]
+    page_refs = []
+    for items in pages:
+        content = b'BT ' + b''.join(
+            b'/F%d %d Tf 1 0 0 1 %d %d Tm ' % (2 if bold else 1, size, x, y) + literal(value) + b' Tj '
+            for x, y, size, bold, value in items
+        ) + b'ET'
+        objects.append(b'<< /Length %d >>\nstream\n' % len(content) + content + b'\nendstream')
+        objects.append(
+            b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] '
+            b'/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents %d 0 R >>' % len(objects)
+        )
+        page_refs.append(f'{len(objects)} 0 R')
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(page_refs)}] /Count {len(page_refs)} >>".encode('ascii')
+
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n' % number + body + b'\nendobj\n'
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    out += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    out += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def render_pdf(blocks, path):
+    """Lay blocks out on US Letter pages with word wrapping, real columns, headers and footers."""
+    header = next((payload[0] for kind, *payload in blocks if kind == 'header'), None)
+    footer = next((payload[0] for kind, *payload in blocks if kind == 'footer'), None)
+    pages = [[]]
+    top, bottom = 750, 60
+
+    def place(block_list, x, width, page, y):
+        for kind, *payload in block_list:
+            if kind in ('header', 'footer'):
+                continue
+            if kind == 'table':
+                texts = ['   '.join(cell.ljust(14) for cell in row) for row in payload[0]]
+                size, bold, indent = 9, False, 0
+            else:
+                size = {'title': 16, 'heading': 11}.get(kind, 9)
+                bold = kind in ('title', 'heading')
+                indent = 10 if kind == 'bullet' else 0
+                texts = [('• ' if kind == 'bullet' else '') + payload[0]]
+            if kind == 'heading':
+                y -= 6
+            for text in texts:
+                # Helvetica averages about half the font size per character
+                for line in textwrap.wrap(text, max(20, int((width - indent) / (size * 0.5))), break_on_hyphens=False) or ['']:
+                    if y < bottom:
+                        page, y = page + 1, top
+                        if page == len(pages):
+                            pages.append([])
+                    pages[page].append((x + indent, y, size, bold, line))
+                    y -= size + 3
+        return page, y
+
+    page, y = 0, top
+    for kind, *payload in blocks:
+        if kind == 'columns':
+            # Both columns start at the same height; whichever runs longer sets where the page continues
+            left = place(payload[0], 50, 170, page, y)
+            right = place(payload[1], 240, 320, page, y)
+            page, y = max(left, right, key=lambda position: (position[0], -position[1]))
+        else:
+            page, y = place([(kind, *payload)], 50, 510, page, y)
+
+    for number, items in enumerate(pages, start=1):
+        if header:
+            items.append((50, 770, 8, False, header))
+        if footer:
+            items.append((50, 30, 8, False, footer.replace('Page 1 of 1', f"Page {number} of {len(pages)}")))
+    with open(path, 'wb') as f:
+        f.write(text_pdf(pages=pages))
+
+
+def generate_one(task):
+    """Worker: build, render and write resume number `index`; returns its manifest entry."""
+    index, options = task
+    rng = random.Random(options['seed'] * 1_000_003 + index)
+
+    length = options['length'] if options['length'] != 'mixed' else rng.choice(sorted(LENGTHS))
+    layout = options['layout'] if options['layout'] != 'mixed' else rng.choice(LAYOUTS)
+    fmt = rng.choice(options['formats'])
+    noise = sorted(kind for kind in options['noise'] if rng.random() < options['noise_rate'])
+    if 'columns' in noise and 'tables' in noise:
+        noise.remove('tables')
+
+    order = list(CANONICAL_SECTIONS)
+    if layout == 'functional':
+        order.remove('skills')
+        order.insert(0, 'skills')
+    shuffle = options['section_order'] == 'shuffled' or (options['section_order'] == 'mixed' and rng.random() < 0.3)
+    if shuffle:
+        rng.shuffle(order)
+
+    resume = synth_resume(rng, length)
+    job = synth_job(rng, resume)
+    blocks = resume_blocks(rng, resume, layout, order, noise)
+
+    stem = f"{index:06d}"
+    resume_file = os.path.join('resumes', f"{stem}.{fmt}")
+    job_file = os.path.join('jobs', f"{stem}.txt")
+    target = os.path.join(options['out'], resume_file)
+    if fmt == 'txt':
+        with open(target, 'w', encoding='utf-8') as f:
+            f.write(render_txt(blocks))
+    elif fmt == 'docx':
+        render_docx(blocks, target)
+    else:
+        render_pdf(blocks, target)
+    with open(os.path.join(options['out'], job_file), 'w', encoding='utf-8') as f:
+        f.write(job.pop('text'))
+
+    return {
+        'id': stem,
+        'file': resume_file,
+        'format': fmt,
+        'layout': layout,
+        'length': length,
+        'sectionOrder': order,
+        'noise': noise,
+        'truth': resume,
+        'job': {'file': job_file, **job},
+    }
+
+
+def generate_corpus(options):
+    """Generate options['count'] resumes with a process pool and write manifest.jsonl in id order."""
+    out = options['out']
+    os.makedirs(os.path.join(out, 'resumes'), exist_ok=True)
+    os.makedirs(os.path.join(out, 'jobs'), exist_ok=True)
+
+    started = time.perf_counter()
+    tasks = ((index, options) for index in range(1, options['count'] + 1))
+    counts = {}
+    with open(os.path.join(out, 'manifest.jsonl'), 'w', encoding='utf-8') as manifest:
+        if options['workers'] == 1:
+            entries = map(generate_one, tasks)
+        else:
+            pool = ProcessPoolExecutor(max_workers=options['workers'])
+            entries = pool.map(generate_one, tasks, chunksize=max(1, min(200, options['count'] // (options['workers'] * 8))))
+        for done, entry in enumerate(entries, start=1):
+            manifest.write(json.dumps(entry) + '\n')
+            counts[entry['format']] = counts.get(entry['format'], 0) + 1
+            if done % 1000 == 0:
+                print(f"  {done}/{options['count']} ({done / (time.perf_counter() - started):.0f}/s)")
+        if options['workers'] != 1:
+            pool.shutdown()
+
+    with open(os.path.join(out, 'corpus.json'), 'w', encoding='utf-8') as f:
+        json.dump({key: value for key, value in options.items() if key != 'out'}, f, indent=2)
+    elapsed = time.perf_counter() - started
+    print(f"✓ {options['count']} resumes and job descriptions in {elapsed:.1f}s "
+          f"({', '.join(f'{n} {fmt}' for fmt, n in sorted(counts.items()))}) -> {out}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Create test resumes. Without --count, writes the four fixed fixtures to the current "
+                    "directory; with --count, generates a synthetic corpus with a ground-truth manifest."
+    )
+    parser.add_argument('--count', type=int, help='Number of synthetic resumes (e.g. 10000)')
+    parser.add_argument('--out', default='resume_corpus', help='Corpus output directory')
+    parser.add_argument('--formats', default='txt,docx,pdf', help='Comma-separated formats to draw from')
+    parser.add_argument('--layout', default='mixed', choices=LAYOUTS + ('mixed',))
+    parser.add_argument('--length', default='mixed', choices=tuple(LENGTHS) + ('mixed',))
+    parser.add_argument('--section-order', default='mixed', choices=('canonical', 'shuffled', 'mixed'))
+    parser.add_argument('--noise', default=','.join(NOISE_KINDS),
+                        help=f"Comma-separated noise kinds to draw from ({', '.join(NOISE_KINDS)}), or 'none'")
+    parser.add_argument('--noise-rate', type=float, default=0.3, help='Chance of each noise kind per resume')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Generator processes')
+    parser.add_argument('--seed', type=int, default=0, help='Same seed and options give the same corpus')
+    args = parser.parse_args(argv)
+
+    formats = [fmt.strip() for fmt in args.formats.split(',') if fmt.strip()]
+    noise = [] if args.noise == 'none' else [kind.strip() for kind in args.noise.split(',') if kind.strip()]
+    if not formats or set(formats) - {'txt', 'docx', 'pdf'}:
+        parser.error('--formats takes txt, docx and/or pdf')
+    if set(noise) - set(NOISE_KINDS):
+        parser.error(f"--noise takes {', '.join(NOISE_KINDS)} or 'none'")
+    if args.count is not None and args.count < 1:
+        parser.error('--count must be positive')
+    return args, formats, noise
+
+
+def create_fixed_resumes():
     print("Creating diverse test resumes...")
     print()
     
@@ -253,3 +838,21 @@ if __name__ == '__main__':
     print("  - test_resume_functional.docx (skills-first functional format)")
     print("  - test_resume_minimal.txt (sparse/minimal information)")
     print("  - test_resume_dense.txt (detailed/comprehensive)")
+
+if __name__ == '__main__':
+    args, formats, noise = parse_args()
+    if args.count is None:
+        create_fixed_resumes()
+    else:
+        generate_corpus({
+            'count': args.count,
+            'out': args.out,
+            'formats': formats,
+            'layout': args.layout,
+            'length': args.length,
+            'section_order': args.section_order,
+            'noise': noise,
+            'noise_rate': args.noise_rate,
+            'workers': max(1, args.workers),
+            'seed': args.seed,
+        })
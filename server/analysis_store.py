@@ -0,0 +1,119 @@
+"""
+Resume Analysis Store
+Per-resume derived artifacts computed once and reused across requests
+"""
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, List
+
+from cache import LRUCache
+from prompts import estimate_tokens
+from resume_model import ResumeModel
+from resume_service import ResumeService
+
+
+def resume_content_key(resume_data: Dict[str, Any]) -> str:
+    """
+    Hash the raw frontend resume JSON
+
+    Unlike ResumeModel.structural_key this changes with every byte the
+    frontend sends, including fields the model drops, so it suits keys of
+    outputs built from the raw sections.
+    """
+    canonical = json.dumps(resume_data, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.blake2b(canonical.encode('utf-8'), digest_size=16).hexdigest()
+
+
+@dataclass(frozen=True, slots=True)
+class ResumeAnalysis:
+    """Artifacts derived from a single resume version"""
+    key: str
+    resume: ResumeModel
+    profile_json: str
+    skill_set: FrozenSet[str]
+    experience_text: str
+    token_estimate: int
+    keyword_vector: Dict[str, int]
+    keyword_spelling: Dict[str, str]
+
+    @classmethod
+    def build(cls, key: str, resume: ResumeModel) -> 'ResumeAnalysis':
+        # Compact, key-sorted serialization keeps the prompt prefix byte-stable
+        profile_json = json.dumps(resume.to_dict(), sort_keys=True, separators=(',', ':'))
+        searchable = ' '.join([
+            resume.summary,
+            ' '.join(resume.skills),
+            resume.experience_text,
+            ' '.join(p.description for p in resume.projects)
+        ])
+        return cls(
+            key=key,
+            resume=resume,
+            profile_json=profile_json,
+            skill_set=resume.skill_set,
+            experience_text=resume.experience_text,
+            token_estimate=estimate_tokens(profile_json),
+            keyword_vector=ResumeService.keyword_counts(searchable),
+            # Skills listed by the candidate win over spellings found in the text
+            keyword_spelling={
+                **ResumeService.keyword_spellings(searchable),
+                **{skill.lower(): skill for skill in resume.skills}
+            }
+        )
+
+    def match_score(self, job_keywords: List[str]) -> float:
+        return ResumeService.calculate_match_score(self.resume, job_keywords)
+
+    def matched_keywords(self, job_keywords: List[str]) -> List[str]:
+        """
+        Job keywords the candidate already covers, in job order
+
+        Keywords count only as whole words (keyword_vector comes from the
+        word-bounded TECH_PATTERNS), so 'go' is not found in "going" nor
+        'git' in "digital".
+        """
+        return [k for k in job_keywords if k in self.skill_set or k in self.keyword_vector]
+
+    def display_keyword(self, keyword: str) -> str:
+        """A lowercased keyword in the candidate's own spelling where the resume has one"""
+        return self.keyword_spelling.get(keyword, keyword)
+
+
+class AnalysisStore:
+    """
+    Content-addressed cache of ResumeAnalysis objects
+
+    Entries are keyed on the parsed ResumeModel's structural_key, not the
+    raw JSON: the upload-time parse and the resume the frontend later sends
+    back (with its own item ids, section titles and key order) normalize to
+    the same model, so the eager put() is hit. Any edit to the content
+    changes the key, so stale analyses are never served; they simply age out.
+    """
+
+    def __init__(self, max_entries: int = 2048):
+        self._cache = LRUCache(max_entries=max_entries, name='resume_analysis')
+
+    def get(self, resume_data: Dict[str, Any]) -> ResumeAnalysis:
+        """
+        Return the analysis for a frontend resume, computing it on a miss
+
+        Args:
+            resume_data: Raw resume data from frontend
+
+        Returns:
+            ResumeAnalysis for this exact resume content
+        """
+        resume = ResumeService.parse_resume_model(resume_data)
+        key = resume.structural_key
+        return self._cache.get_or_compute(key, lambda: ResumeAnalysis.build(key, resume))
+
+    def put(self, resume_data: Dict[str, Any]) -> ResumeAnalysis:
+        """Compute and store the analysis eagerly, e.g. right after upload"""
+        resume = ResumeService.parse_resume_model(resume_data)
+        analysis = ResumeAnalysis.build(resume.structural_key, resume)
+        self._cache.set(analysis.key, analysis)
+        return analysis
+
+    def stats(self) -> Dict[str, Any]:
+        return self._cache.stats()
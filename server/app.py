@@ -1,503 +1,644 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, g, request, jsonify, send_file
 from flask_cors import CORS
+from werkzeug.exceptions import RequestEntityTooLarge
 from bytez import Bytez
 import os
+import time
 from dotenv import load_dotenv
 load_dotenv()
 import json
 from pdfminer.high_level import extract_text
-from docx import Document as DocxDocument
+from resume_model import ResumeModel, sanitize_skills_list
+from analysis_store import AnalysisStore, resume_content_key
+from jd_preprocessor import JobPostingStore
+from cache import LRUCache
+from section_tailor import SectionTailor, select_sections
+from cover_letter import CoverLetterComposer
+from prefetch import Prefetcher, generation_key
+from json_repair import complete_json, extract_json_object, strip_fences
+from semantic_matcher import SemanticMatcher
+from version_store import VersionStore
+from docx_text import iter_docx_lines
+from docx_renderer import DOCX_MIMETYPE, DocxRenderer, content_key
+from ooxml_writer import OoxmlWriter
+from bulk_export import BulkExporter
+from apply_pipeline import ApplyPipeline
+from model_router import DEFAULT_TIER_MODELS, ModelRouter, parse_routes
+from metrics import registry, timed
+from logs import get_logger
+from profiling import RequestProfiler
+from uploads import UploadPolicy, UploadRejected, format_size, read_text
+from prompts import (
+    CUSTOM_PROMPT, RESUME_PARSE, RESUME_TAILOR_FREEFORM, RESUME_TAILOR_JSON, PromptAssembler, continuation_messages,
+    cover_letter_prompt
+)
 
 app = Flask(__name__)
 CORS(app)
 
+# Size caps per upload format, checked while the body is received, and a cap on every request body
+upload_policy = UploadPolicy.from_env()
+upload_policy.install(app)
+
+upload_log = get_logger('upload')
+resume_log = get_logger('resume')
+export_log = get_logger('export')
+pipeline_log = get_logger('pipeline')
+api_log = get_logger('api')
+
+HTTP_REQUESTS = registry.counter('http_requests_total', 'HTTP responses by route, method and status')
+HTTP_SECONDS = registry.histogram('http_request_duration_seconds', 'Time to produce a response, by route')
+HTTP_IN_FLIGHT = registry.gauge('http_requests_in_flight', 'Requests currently being handled, by route')
+RESUME_GENERATIONS = registry.counter('resume_generations_total', 'Generated resumes by source (ai, template, emergency_fallback)')
+
+def route_label():
+    # The rule pattern, not the raw path, keeps label cardinality bounded
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+@app.before_request
+def start_request_metrics():
+    g.request_started = time.perf_counter()
+    HTTP_IN_FLIGHT.inc(labels={'route': route_label()})
+
+@app.after_request
+def record_request_metrics(response):
+    if 'request_started' in g:
+        route = route_label()
+        HTTP_REQUESTS.inc(labels={'route': route, 'method': request.method, 'status': response.status_code})
+        HTTP_SECONDS.observe(time.perf_counter() - g.request_started, labels={'route': route})
+    return response
+
+@app.teardown_request
+def finish_request_metrics(error=None):
+    if 'request_started' in g:
+        HTTP_IN_FLIGHT.dec(labels={'route': route_label()})
+
+# Opt-in request profiling: send "X-Profile: <PROFILE_TOKEN>" or set PROFILE_SAMPLE_RATE.
+# With neither set no hooks are installed, so disabled profiling costs nothing.
+profiler = RequestProfiler(
+    profile_dir=os.environ.get("PROFILE_DIR", "profiles"),
+    token=os.environ.get("PROFILE_TOKEN", ""),
+    sample_rate=float(os.environ.get("PROFILE_SAMPLE_RATE", "0")),
+    interval_seconds=float(os.environ.get("PROFILE_INTERVAL_MS", "5")) / 1000,
+    max_profiles=int(os.environ.get("PROFILE_MAX_FILES", "200"))
+)
+
+if profiler.enabled:
+    @app.before_request
+    def start_profile():
+        trigger = profiler.trigger(request.endpoint, request.headers.get('X-Profile'))
+        if trigger is not None:
+            g.profile = profiler.start(request.endpoint, request.method, trigger)
+
+    @app.after_request
+    def attach_profile(response):
+        profile = g.pop('profile', None)
+        if profile is not None:
+            # Streamed bodies (bulk zips, OOXML documents) are produced after this
+            # hook, so the profile ends when the response is closed
+            status = response.status_code
+            response.call_on_close(lambda: profiler.finish(profile, status))
+            response.headers['X-Profile-Id'] = profile.id
+        return response
+
+    @app.teardown_request
+    def drop_profile(exc):
+        # Only left on g when attach_profile did not run; finish it so its tracemalloc reference is released
+        profile = g.pop('profile', None)
+        if profile is not None:
+            profiler.finish(profile, 500)
+
 # Initialize Bytez SDK
 # Ideally, get key from environment variable
 BYTEZ_KEY = os.environ.get("BYTEZ_API_KEY", "e7bcd604f04b496ca11602337f3a81fc")
 sdk = Bytez(BYTEZ_KEY)
-model = sdk.model("google/gemini-2.5-pro")
 
-@app.route('/api/upload-resume', methods=['POST'])
-def upload_resume():
+# Each task goes to a model tier; slow or failing tiers fail over to faster ones.
+# MODEL_ROUTES overrides the defaults, e.g. "cover_letter=lite:10,resume_parse=fast"
+model_router = ModelRouter(
+    model_factory=sdk.model,
+    tier_models={
+        tier: os.environ.get(f"MODEL_TIER_{tier.upper()}", model_id)
+        for tier, model_id in DEFAULT_TIER_MODELS.items()
+    },
+    routes=parse_routes(os.environ.get("MODEL_ROUTES", "")),
+    # Unbounded unless set; MODEL_TIMEOUT_FACTOR times a task's budget abandons a call and fails over
+    max_concurrency=int(os.environ.get("MODEL_MAX_CONCURRENCY", "0")) or None,
+    timeout_factor=float(os.environ.get("MODEL_TIMEOUT_FACTOR", "2")) or None,
+    call_workers=int(os.environ.get("MODEL_CALL_WORKERS", "64")),
+    max_abandoned_calls=int(os.environ.get("MODEL_MAX_ABANDONED_CALLS", "16")),
+    error_rate_threshold=float(os.environ.get("MODEL_ERROR_RATE_THRESHOLD", "0.5")),
+    window_seconds=float(os.environ.get("MODEL_STATS_WINDOW_SECONDS", "300"))
+)
+
+# Derived per-resume artifacts, keyed by resume content so edits invalidate them
+analysis_store = AnalysisStore(max_entries=int(os.environ.get("ANALYSIS_CACHE_SIZE", "2048")))
+
+# Job descriptions with company blurbs, benefits and legal footers stripped, keyed by posting content
+job_postings = JobPostingStore(max_entries=int(os.environ.get("JD_CACHE_SIZE", "2048")))
+
+# Offline embeddings of resumes and job postings, cached by content across requests
+semantic_matcher = SemanticMatcher(
+    cache_size=int(os.environ.get("SEMANTIC_PROFILE_CACHE_SIZE", "2048")),
+    job_cache_size=int(os.environ.get("SEMANTIC_JOB_CACHE_SIZE", "50000"))
+)
+SEMANTIC_MATCH_WEIGHT = float(os.environ.get("SEMANTIC_MATCH_WEIGHT", "0.5"))
+MATCH_JOBS_MAX = int(os.environ.get("MATCH_JOBS_MAX", "500"))
+
+# Tailored variants kept as deltas against their base resume; VERSION_STORE_PATH="" keeps them in memory
+version_store = VersionStore.from_env()
+VERSION_META_MAX_BYTES = int(os.environ.get("VERSION_META_MAX_BYTES", "2048"))
+
+# Per-section tailoring cache keyed on (section content, job description, instructions)
+section_tailor = SectionTailor(
+    run_model=lambda prompt: model_router.run_text('resume_section', prompt),
+    cache=LRUCache(max_entries=int(os.environ.get("SECTION_CACHE_SIZE", "4096")), name='resume_sections'),
+    max_workers=int(os.environ.get("SECTION_MAX_WORKERS", "8"))
+)
+SECTION_PARALLEL_DEFAULT = os.environ.get("SECTION_PARALLEL", "0") == "1"
+
+# A JSON resume cut off mid-object is continued rather than regenerated; what is still
+# missing afterwards is dropped, keeping every completed section
+JSON_MAX_CONTINUATIONS = int(os.environ.get("JSON_MAX_CONTINUATIONS", "2"))
+RESUME_PARTIAL_KEYS = ('sections',)
+
+# Speculative generation for the job the user is viewing. It starts only while fewer than
+# PREFETCH_MAX_IN_FLIGHT model calls are running, so it never competes with a busy server
+PREFETCH_MAX_IN_FLIGHT = int(os.environ.get("PREFETCH_MAX_IN_FLIGHT", "4"))
+# A generate request waits at most this long on a running prefetch, and only when it is expected to finish by then
+PREFETCH_JOIN_SECONDS = float(os.environ.get("PREFETCH_JOIN_SECONDS", "5"))
+resume_prefetcher = Prefetcher(
+    has_capacity=lambda: model_router.in_flight < PREFETCH_MAX_IN_FLIGHT,
+    cache=LRUCache(
+        max_entries=int(os.environ.get("PREFETCH_CACHE_SIZE", "512")),
+        ttl_seconds=float(os.environ.get("PREFETCH_TTL_SECONDS", "900")),
+        name='resume_prefetch'
+    ),
+    max_workers=int(os.environ.get("PREFETCH_WORKERS", "1")),
+    per_user=int(os.environ.get("PREFETCH_PER_USER", "2")),
+    max_pending=int(os.environ.get("PREFETCH_MAX_PENDING", "64")),
+    max_wait_seconds=float(os.environ.get("PREFETCH_MAX_WAIT_SECONDS", "30"))
+)
+
+# Skeleton cover letters: fixed parts rendered locally, personalized paragraphs cached per (resume, job)
+cover_letter_composer = CoverLetterComposer(
+    run_model=lambda prompt: model_router.run_text('cover_letter_body', prompt),
+    cache=LRUCache(max_entries=int(os.environ.get("COVER_LETTER_CACHE_SIZE", "1024")), name='cover_letter_bodies')
+)
+
+# Export renderers keep a pre-styled base template per process; rendered bytes
+# are cached by payload hash so repeated preview/download clicks are free
+resume_renderer = DocxRenderer(font_name='Arial', font_size=10)
+cover_letter_renderer = DocxRenderer(font_name='Arial', font_size=11)
+docx_cache = LRUCache(max_entries=int(os.environ.get("DOCX_CACHE_SIZE", "256")), name='docx_exports')
+
+# 'ooxml' writes document.xml directly and streams the package; 'python-docx' builds it in memory
+DOCX_ENGINE = os.environ.get("DOCX_ENGINE", "python-docx")
+DOCX_STREAM_CACHE_MAX_BYTES = int(os.environ.get("DOCX_STREAM_CACHE_MAX_BYTES", str(1024 * 1024)))
+resume_writer = OoxmlWriter.from_renderer(resume_renderer)
+cover_letter_writer = OoxmlWriter.from_renderer(cover_letter_renderer)
+
+def render_export(kind, payload, ooxml=False):
+    """Render one export to DOCX bytes through the shared export cache"""
+    if kind == 'resume':
+        render = (lambda: b''.join(resume_writer.stream_resume(payload))) if ooxml else (lambda: resume_renderer.render_resume(payload))
+    else:
+        render = (lambda: b''.join(cover_letter_writer.stream_cover_letter(payload))) if ooxml else (lambda: cover_letter_renderer.render_cover_letter(payload))
+    return docx_cache.get_or_compute(content_key(kind, payload), render)
+
+# Rendered pipeline documents, served by id from /api/exports/<id>
+export_store = LRUCache(
+    max_entries=int(os.environ.get("EXPORT_STORE_SIZE", "512")),
+    ttl_seconds=float(os.environ.get("EXPORT_TTL_SECONDS", "3600")),
+    name='exports'
+)
+
+def store_export(kind, payload, download_name):
+    """Render a document into the export store and return its download URL"""
+    key = content_key(kind, payload)
+    export_store.set(key, (download_name, render_export(kind, payload, ooxml=DOCX_ENGINE == 'ooxml')))
+    return f"/api/exports/{key}"
+
+# Bulk renders always use the OOXML writer: same parts as python-docx for a fraction of the CPU.
+# Rendering is pure-Python work that holds the GIL, so more than two workers only adds contention
+bulk_exporter = BulkExporter(
+    render=lambda kind, payload: render_export(kind, payload, ooxml=True),
+    max_workers=int(os.environ.get("BULK_EXPORT_WORKERS", "2")),
+    max_documents=int(os.environ.get("BULK_EXPORT_MAX_DOCUMENTS", "100"))
+)
+
+apply_pipeline = ApplyPipeline(
+    tailor=section_tailor,
+    analysis_store=analysis_store,
+    job_postings=job_postings,
+    run_model=lambda prompt: model_router.run_text('cover_letter', prompt),
+    export=store_export,
+    max_workers=int(os.environ.get("APPLY_PIPELINE_WORKERS", "8")),
+    max_jobs=int(os.environ.get("APPLY_PIPELINE_MAX_JOBS", "60")),
+    max_in_flight=int(os.environ.get("APPLY_PIPELINE_IN_FLIGHT", "4"))
+)
+
+class RequestError(Exception):
+    """Invalid client input found by a request helper; answered with {"error": message}"""
+    
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+# Request helpers below hold the logic of the model-bound routes. The Flask views
+# call the model synchronously; asgi.py reuses the same helpers and awaits it.
+
+def uploaded_file(field='file'):
+    """
+    The uploaded file from the current request's multipart body
+    
+    Raises:
+        RequestError: If the body went over a size cap while it was being received
+    """
     try:
-        if 'file' not in request.files:
-            return jsonify({'error': 'No file part'}), 400
-        
-        file = request.files['file']
-        if file.filename == '':
-            return jsonify({'error': 'No selected file'}), 400
-            
-        text = ""
-        filename = file.filename.lower()
-        
-        if filename.endswith('.pdf'):
-            # Save temporarily to parse
-            temp_path = f"temp_{file.filename}"
-            file.save(temp_path)
-            try:
-                text = extract_text(temp_path)
-            finally:
-                if os.path.exists(temp_path):
-                    os.remove(temp_path)
-                    
-        elif filename.endswith('.docx'):
-            try:
-                doc = DocxDocument(file)
-                text = "\n".join([para.text for para in doc.paragraphs])
-                print(f"[UPLOAD] DOCX extraction: {len(text)} chars from {len(doc.paragraphs)} paragraphs")
-            except Exception as e:
-                print(f"[UPLOAD] DOCX extraction error: {e}")
-                return jsonify({'error': f'Failed to parse DOCX file: {str(e)}'}), 400
-            
-        elif filename.endswith('.txt'):
-            try:
-                text = file.read().decode('utf-8', errors='ignore')
-                print(f"[UPLOAD] TXT extraction: {len(text)} chars")
-            except Exception as e:
-                print(f"[UPLOAD] TXT extraction error: {e}")
-                return jsonify({'error': f'Failed to parse TXT file: {str(e)}'}), 400
-            
-        else:
-            return jsonify({'error': 'Unsupported file format. Please upload PDF, DOCX, or TXT'}), 400
-            
-        print(f"[UPLOAD] Total extracted text length: {len(text)}, stripped: {len(text.strip())}")
-        
-        if not text.strip():
-            return jsonify({
-                'error': 'Could not extract text from file. This may be: (1) An image-based/scanned PDF that requires OCR, (2) An empty file, or (3) A file with unreadable encoding. Please try a different file or convert your PDF to text-based format.'
-            }), 400
-            
-        # Use AI to parse the text into our JSON structure
-        print(f"[UPLOAD] Extracted {len(text)} chars. Parsing with AI...")
-        
-        prompt = f"""
-        You are an expert resume parser. Your task is to extract structured information from ANY resume format.
-        
-        IMPORTANT PARSING RULES:
-        1. Handle multi-column layouts - read left-to-right, top-to-bottom
-        2. Ignore headers, footers, and page numbers
-        3. Handle tables and formatted text
-        4. Extract data even from minimal or sparse resumes
-        5. If information is missing, use null or empty arrays (never skip required fields)
-        6. Dates can be in any format (MM/YYYY, Month Year, etc.) - normalize if possible
-        7. Skills can be in bullet lists, comma-separated, or paragraphs - extract ALL of them
-        8. Experience bullets should be action-oriented achievements
-        
-        Resume Text:
-        {text[:15000]}
-        
-        Return ONLY valid JSON in this EXACT structure:
-        {{
-            "personalInfo": {{
-                "name": "Full Name (REQUIRED - find the largest/bolded text at top)",
-                "email": "email@example.com (extract from text)",
-                "phone": "Phone Number (extract from text, null if not found)",
-                "location": "City, State (extract from text, null if not found)",
-                "linkedin": "LinkedIn URL (null if not found)",
-                "github": "GitHub URL (null if not found)",
-                "title": "Current/Most Recent Job Title (null if not found)"
-            }},
-            "sections": [
-                {{
-                    "id": "summary",
-                    "title": "Professional Summary",
-                    "content": "Extract summary/objective/profile section. If none, create brief one from experience. Max 3 sentences."
-                }},
-                {{
-                    "id": "experience",
-                    "title": "Experience",
-                    "items": [
-                        {{
-                            "company": "Company Name",
-                            "position": "Job Title",
-                            "location": "City, State or null",
-                            "startDate": "YYYY or Month YYYY",
-                            "endDate": "YYYY or Month YYYY or Present",
-                            "bullets": ["Action verb + achievement/responsibility with metrics if available"]
-                        }}
-                    ]
-                }},
-                {{
-                    "id": "education",
-                    "title": "Education",
-                    "items": [
-                        {{
-                            "school": "University/Institution Name",
-                            "degree": "Degree Type (BS, MS, PhD, etc.)",
-                            "field": "Field of Study",
-                            "graduationDate": "YYYY"
-                        }}
-                    ]
-                }},
-                {{
-                    "id": "skills",
-                    "title": "Skills",
-                    "items": ["Skill1", "Skill2", "Skill3"]
-                }}
-            ]
-        }}
-        
-        CRITICAL: 
-        - Return ONLY the JSON object, no explanations
-        - Skills MUST be a flat array of strings
-        - If a section is empty, include it with empty array/null
-        - Extract as much data as possible from the text
-        """
+        return request.files.get(field)
+    except UploadRejected as e:
+        raise RequestError(str(e), e.status)
+    except RequestEntityTooLarge:
+        raise RequestError(f'Uploads are limited to {format_size(upload_policy.max_request_bytes)}', 413)
+
+@timed('extract')
+def extract_upload_text(file):
+    """
+    Extract plain text from an uploaded resume file
+    
+    The format is sniffed from the file's content, so a mislabeled upload is
+    parsed by the right extractor and garbage is refused before parsing.
+    
+    Args:
+        file: Uploaded FileStorage (PDF, DOCX or TXT)
         
-        response = model.run([{"role": "user", "content": prompt}])
+    Returns:
+        Extracted text, never empty
         
-        # Extract and clean output
-        if hasattr(response, 'output') and isinstance(response.output, dict):
-            output = response.output.get('content', '')
-        elif isinstance(response, dict) and 'output' in response:
-            output = response['output'].get('content', '')
-        elif hasattr(response, 'content'):
-            output = response.content
-        else:
-            output = str(response)
-            
-        # Clean markdown
-        if output.startswith('```'):
-            output = output.split('\n', 1)[1]
-            if output.endswith('```'):
-                output = output.rsplit('\n', 1)[0]
+    Raises:
+        RequestError: If the file is missing, unsupported, too large or has no text
+    """
+    if file is None:
+        raise RequestError('No file part')
+    if file.filename == '':
+        raise RequestError('No selected file')
+    try:
+        fmt, size = upload_policy.detect(file)
+    except UploadRejected as e:
+        raise RequestError(str(e), e.status)
         
-        # Parse and sanitize JSON
-        import json
+    text = ""
+
+    if fmt == 'pdf':
+        # pdfminer reads the buffered upload directly; no temporary copy on disk
+        text = extract_text(file.stream)
+
+    elif fmt == 'docx':
+        try:
+            # Streams document.xml and the header/footer parts, tables and text boxes included
+            lines = list(iter_docx_lines(file.stream))
+            text = "\n".join(lines)
+            upload_log.debug('docx.extracted', chars=len(text), lines=len(lines))
+        except Exception as e:
+            upload_log.warning('docx.failed', error=str(e))
+            raise RequestError(f'Failed to parse DOCX file: {str(e)}')
+
+    else:
         try:
-            parsed_json = json.loads(output)
-            
-            def sanitize_skills_list(items):
-                clean_items = []
-                if isinstance(items, list):
-                    for item in items:
-                        if isinstance(item, str):
-                            clean_items.append(item)
-                        elif isinstance(item, dict):
-                            # Extract ALL string values from the dict recursively
-                            for key, val in item.items():
-                                if isinstance(val, str):
-                                    clean_items.append(val)
-                                elif isinstance(val, list):
-                                    clean_items.extend(sanitize_skills_list(val))
-                                elif isinstance(val, dict):
-                                    # Handle nested dicts (e.g. { "skill": { "name": "Java" } })
-                                    clean_items.extend(sanitize_skills_list([val]))
-                        elif isinstance(item, list):
-                            clean_items.extend(sanitize_skills_list(item))
-                        else:
-                            # Fallback for numbers/booleans -> stringify
-                            if item is not None:
-                                clean_items.append(str(item))
-                return clean_items
-
-            # Sanitize skills to ensure they are strings
-            if 'sections' in parsed_json:
-                for section in parsed_json['sections']:
-                    if section.get('id') == 'skills' and 'items' in section:
-                        original_items = section['items']
-                        cleaned = sanitize_skills_list(original_items)
-                        print(f"[SANITIZER] Skills cleaned. Original count: {len(original_items)}, New count: {len(cleaned)}")
-                        if len(cleaned) > 0:
-                             print(f"[SANITIZER] Sample: {cleaned[:3]}")
-                        section['items'] = cleaned
-            
-            output = json.dumps(parsed_json)
+            text = read_text(file.stream)
+            upload_log.debug('txt.extracted', chars=len(text))
         except Exception as e:
-            print(f"[SANITIZER] Error: {e}")
-            # Even if parsing fails, we might want to try to salvage something, but for now return raw
-            pass 
+            upload_log.warning('txt.failed', error=str(e))
+            raise RequestError(f'Failed to parse TXT file: {str(e)}')
         
-        return jsonify({'output': output})
+    upload_log.info('extracted', format=fmt, bytes=size, chars=len(text), stripped=len(text.strip()))
+    
+    if not text.strip():
+        raise RequestError('Could not extract text from file. This may be: (1) An image-based/scanned PDF that requires OCR, (2) An empty file, or (3) A file with unreadable encoding. Please try a different file or convert your PDF to text-based format.')
+    return text
+
+@timed('prompt_build')
+def resume_parse_prompt(text):
+    # Use AI to parse the text into our JSON structure
+    return PromptAssembler.assemble(RESUME_PARSE, resume_text=text).text
+
+@timed('sanitize')
+def finalize_parsed_resume(output):
+    """Clean and sanitize the model's parse of an uploaded resume into the response payload"""
+    # Clean markdown
+    if output.startswith('```'):
+        output = output.split('\n', 1)[1]
+        if output.endswith('```'):
+            output = output.rsplit('\n', 1)[0]
 
+    # Parse and sanitize JSON
+    try:
+        parsed_json = json.loads(output)
+
+        # Sanitize skills to ensure they are strings
+        if 'sections' in parsed_json:
+            for section in parsed_json['sections']:
+                if section.get('id') == 'skills' and 'items' in section:
+                    original_items = section['items']
+                    cleaned = sanitize_skills_list(original_items)
+                    upload_log.debug('skills.sanitized', before=len(original_items), after=len(cleaned))
+                    section['items'] = cleaned
+
+        output = json.dumps(parsed_json)
+
+        # Precompute analysis artifacts so the first generation request is a cache hit
+        analysis_store.put(parsed_json)
+        return {'output': output}
     except Exception as e:
-        print(f"Upload error: {e}")
-        return jsonify({'error': str(e)}), 500
+        upload_log.warning('parse.invalid_json', error=str(e))
+        # Even if parsing fails, we might want to try to salvage something, but for now return raw
+        pass 
 
-@app.route('/api/generate-resume', methods=['POST'])
-def generate_resume():
+    return {'output': output}
+
+@app.route('/api/upload-resume', methods=['POST'])
+def upload_resume():
     try:
-        from resume_service import ResumeService
-        
-        data = request.json
-        user_input = data.get('input', '')
-        user_resume = data.get('resume', {})
-        job_description = data.get('jobDescription', '')
-        job_title = data.get('jobTitle', 'Position')
-        company_name = data.get('companyName', 'Company')
-        generation_mode = data.get('mode', 'json') # 'json' or 'markdown' or 'custom'
-        
-        print(f"[RESUME] Generating resume for {job_title} at {company_name} (Mode: {generation_mode})")
-        
-        # Parse user resume
-        if not user_resume or not isinstance(user_resume, dict):
-            print("[RESUME] No valid resume data provided, creating minimal resume structure")
-            user_resume = {
-                'personalInfo': {
-                    'name': 'Professional',
-                    'email': '',
-                    'phone': '',
-                    'location': ''
-                },
-                'sections': []
-            }
-        parsed_resume = ResumeService.parse_user_resume(user_resume)
-        
-        # Try AI generation first
-        try:
-            prompt_content = ""
-            
-            if generation_mode == 'markdown' or generation_mode == 'custom':
-                # In markdown or custom mode, we trust the input prompt from the frontend
-                # But we should ensure we have the context if the frontend didn't fully bake it in, 
-                # though GeminiService.js seems to bake it in.
-                # Let's check if input is long enough to be a full prompt
-                if len(user_input) > 50: # Lowered threshold slightly
-                    prompt_content = user_input
-                else:
-                    # Fallback if input is short
-                    prompt_content = f"""
-                    You are an expert resume writer. Create a tailored resume.
-                    
-                    JOB DESCRIPTION:
-                    {job_description}
-                    
-                    CANDIDATE PROFILE:
-                    {json.dumps(parsed_resume)}
-                    
-                    INSTRUCTIONS:
-                    {user_input}
-                    
-                    Return the result as requested.
-                    """
-            else:
-                # Default JSON mode (for structural updates)
-                prompt_content = f"""
-                You are an expert resume writer. Create a tailored resume for the following job.
-                
-                JOB DESCRIPTION:
-                {job_description}
-                
-                CANDIDATE PROFILE:
-                {json.dumps(parsed_resume)}
-                
-                USER INSTRUCTIONS:
-                {user_input}
-                
-                REQUIREMENTS:
-                1. Extract relevant skills from BOTH the Job Description and the Candidate Profile.
-                2. The 'skills' section MUST be a simple list of strings (e.g., ["Python", "React"]). NO OBJECTS.
-                3. Tailor the Professional Summary to match the job.
-                4. Highlight relevant experience.
-                
-                Return ONLY valid JSON in the following structure:
-                {{
-                    "personalInfo": {{ ... }},
-                    "sections": [
-                        {{ "id": "summary", "title": "Professional Summary", "content": "..." }},
-                        {{ "id": "skills", "title": "Skills", "items": ["Skill1", "Skill2"] }},
-                        {{ "id": "experience", "title": "Experience", "items": [ ... ] }},
-                        {{ "id": "education", "title": "Education", "items": [ ... ] }},
-                        {{ "id": "projects", "title": "Projects", "items": [ ... ] }}
-                    ]
-                }}
-                """
-            
-            print(f"[RESUME] Calling AI model with input length: {len(prompt_content)}")
-            response = model.run([
-                {
-                    "role": "user",
-                    "content": prompt_content
-                }
-            ])
-            
-            # Extract text output
-            print(f"[RESUME] Raw AI response type: {type(response)}")
-            if hasattr(response, 'output') and isinstance(response.output, dict):
-                text_output = response.output.get('content', '')
-            elif isinstance(response, dict) and 'output' in response:
-                text_output = response['output'].get('content', '')
-            elif hasattr(response, 'content'):
-                text_output = response.content
-            else:
-                text_output = str(response)
-            
-            print(f"[RESUME] Extracted text output length: {len(text_output)}")
-            print(f"[RESUME] Extracted text preview: {text_output[:500]}")
-            
-            # Clean up the output - remove any markdown code blocks if present
-            # Clean up the output - remove any markdown code blocks if present
-            if text_output:
-                text_output = text_output.strip()
-                # Remove markdown code blocks if the AI wrapped it
-                if text_output.startswith('```'):
-                    lines = text_output.split('\n')
-                    # Remove first line (```markdown or ```)
-                    if lines[0].startswith('```'):
-                        lines = lines[1:]
-                    # Remove last line (```)
-                    if lines and lines[-1].strip() == '```':
-                        lines = lines[:-1]
-                    text_output = '\n'.join(lines).strip()
-            
-            # Sanitize generated JSON ONLY if not in markdown mode
-            is_valid_json = False
-            
-            # Auto-detect markdown if mode is custom but output looks like markdown
-            if generation_mode != 'markdown' and (text_output.strip().startswith('#') or '## ' in text_output):
-                print(f"[RESUME] Auto-detected markdown content in {generation_mode} mode")
-                generation_mode = 'markdown'
-
-            if generation_mode != 'markdown':
-                try:
-                    # Robust JSON extraction
-                    json_start = text_output.find('{')
-                    json_end = text_output.rfind('}')
-                    
-                    if json_start != -1 and json_end != -1:
-                        potential_json = text_output[json_start:json_end+1]
-                        gen_json = json.loads(potential_json)
-                        
-                        # Use the extracted JSON as the text output
-                        # But first sanitize
-                        def sanitize_skills_list(items):
-                            clean_items = []
-                            if isinstance(items, list):
-                                for item in items:
-                                    if isinstance(item, str):
-                                        clean_items.append(item)
-                                    elif isinstance(item, dict):
-                                        for key, val in item.items():
-                                            if isinstance(val, str):
-                                                clean_items.append(val)
-                                            elif isinstance(val, list):
-                                                clean_items.extend(sanitize_skills_list(val))
-                                            elif isinstance(val, dict):
-                                                clean_items.extend(sanitize_skills_list([val]))
-                                    elif isinstance(item, list):
-                                        clean_items.extend(sanitize_skills_list(item))
-                                    else:
-                                        if item is not None:
-                                            clean_items.append(str(item))
-                            return clean_items
-
-                        if 'sections' in gen_json:
-                            for section in gen_json['sections']:
-                                if section.get('id') == 'skills' and 'items' in section:
-                                    original_items = section['items']
-                                    cleaned = sanitize_skills_list(original_items)
-                                    print(f"[SANITIZER-GEN] Skills cleaned. Original count: {len(original_items)}, New count: {len(cleaned)}")
-                                    section['items'] = cleaned
-                        
-                        # Log flat structure for debugging
-                        print(f"[RESUME] Parsed JSON keys: {list(gen_json.keys())}")
-                        if 'skills' in gen_json:
-                            print(f"[RESUME] Skills found at top level: {len(gen_json['skills'])} items - {gen_json['skills'][:3]}...")
-                        
-                        text_output = json.dumps(gen_json)
-                        is_valid_json = True
-                        print("[RESUME] JSON validation successful (robust extraction)")
-                    else:
-                        print("[RESUME] No JSON object found in output")
-                except Exception as e:
-                    print(f"[RESUME] JSON sanitization/validation failed: {e}")
-
-            # Validate that it looks like a resume (starts with # or contains resume sections)
-            # Also check if it's a guide/template (contains words like "template", "example", "here is")
-            text_lower = text_output.lower()
-            
-            # Less strict guide detection for markdown mode
-            forbidden_phrases = ['template', 'example resume', 'here is a', 'tips for', 'how to', 'guide to', 'sample resume']
-            is_guide = False
-            
-            # Only check for guide phrases if it doesn't look like a valid markdown resume
-            if not text_output.strip().startswith('#'):
-                 is_guide = any(word in text_lower[:200] for word in forbidden_phrases)
-            
-            # If markdown mode, be more lenient - just look for headers
-            if generation_mode == 'markdown':
-                has_headers = (
-                    text_output.strip().startswith('#') or 
-                    '## PROFESSIONAL SUMMARY' in text_output or
-                    '## EXPERIENCE' in text_output or 
-                    '## PROFESSIONAL EXPERIENCE' in text_output or
-                    '## EDUCATION' in text_output
-                )
-                is_valid_resume = len(text_output) > 100 and has_headers
-                
-                # If it has headers but starts with preamble, try to strip preamble
-                if has_headers and not text_output.strip().startswith('#'):
-                    # Find first H1
-                    h1_index = text_output.find('# ')
-                    if h1_index != -1:
-                        print(f"[RESUME] Stripping preamble from markdown (length {h1_index})")
-                        text_output = text_output[h1_index:]
-                        is_valid_resume = True
-            else:
-                is_valid_resume = (
-                    text_output and 
-                    len(text_output) > 50 and 
-                    not is_guide and
-                    (is_valid_json or 
-                     text_output.strip().startswith('#') or 
-                     'PROFESSIONAL SUMMARY' in text_output.upper() or
-                     'EXPERIENCE' in text_output.upper() or
-                     'EDUCATION' in text_output.upper())
-                )
-            
-            print(f"[RESUME] Validation: is_valid_json={is_valid_json}, is_guide={is_guide}, len={len(text_output)}, mode={generation_mode}")
-            
-            if is_valid_resume:
-                print(f"[RESUME] AI generation successful, output length: {len(text_output)}")
-                return jsonify({"output": text_output, "source": "ai"})
-            else:
-                print(f"[RESUME] AI output doesn't look like a resume (is_guide={is_guide}), using fallback. Output preview: {text_output[:300]}")
-        
-        except Exception as ai_error:
-            print(f"[RESUME] AI generation failed: {ai_error}")
-            import traceback
-            traceback.print_exc()
+        text = extract_upload_text(uploaded_file())
+        output = model_router.run_text('resume_parse', resume_parse_prompt(text))
+        return jsonify(finalize_parsed_resume(output))
+
+    except RequestError as e:
+        return jsonify({'error': str(e)}), e.status
+    except Exception as e:
+        upload_log.exception('upload.failed')
+        return jsonify({'error': str(e)}), 500
+
+def prepare_resume_request(data):
+    """
+    Normalize a generate-resume payload and attach the cached resume analysis
+    
+    Args:
+        data: Request JSON
         
-        # Fallback to template-based generation
-        print("[RESUME] Using fallback template generation")
-        markdown_output = ResumeService.generate_detailed_resume_markdown(
-            resume=parsed_resume,
-            job_description=job_description or user_input,
-            job_title=job_title,
-            company_name=company_name
+    Returns:
+        Dictionary of request fields plus 'analysis' and 'parsed_resume'
+    """
+    user_input = data.get('input', '')
+    user_resume = data.get('resume', {})
+    job_title = data.get('jobTitle', 'Position')
+    company_name = data.get('companyName', 'Company')
+    generation_mode = data.get('mode', 'json') # 'json', 'markdown', 'custom' or 'sections'
+    
+    resume_log.info('generate.start', job_title=job_title, company=company_name, mode=generation_mode)
+    
+    # Parse user resume
+    if not user_resume or not isinstance(user_resume, dict):
+        resume_log.warning('generate.no_resume')
+        user_resume = {
+            'personalInfo': {
+                'name': 'Professional',
+                'email': '',
+                'phone': '',
+                'location': ''
+            },
+            'sections': []
+        }
+    analysis = analysis_store.get(user_resume)
+    posting = job_postings.get(data.get('jobDescription', ''))
+    return {
+        'user_input': user_input,
+        'user_resume': user_resume,
+        'job_description': posting.text,
+        'job_posting': posting,
+        'job_title': job_title,
+        'company_name': company_name,
+        'mode': generation_mode,
+        'parallel': bool(data.get('parallel', SECTION_PARALLEL_DEFAULT)),
+        'sections': select_sections(data.get('sections')),
+        'analysis': analysis,
+        'parsed_resume': analysis.resume
+    }
+
+def resume_generation_key(ctx):
+    """Key of the generation a prepared request asks for; the prefetch cache is keyed on it"""
+    # Sections mode sends the raw sections to the model, so this keys on the raw resume, not the analysis
+    return generation_key((
+        resume_content_key(ctx['user_resume']), ctx['job_posting'].key, ctx['job_title'], ctx['company_name'], ctx['mode'], ctx['user_input'],
+        ctx['sections']
+    ))
+
+def section_tailor_args(ctx):
+    """Arguments for SectionTailor.tailor / atailor in 'sections' mode"""
+    from resume_service import ResumeService
+    
+    return {
+        'resume_data': ctx['user_resume'],
+        'job_description': ctx['job_description'],
+        'instructions': ctx['user_input'],
+        'parallel': ctx['parallel'],
+        'sections': ctx['sections'],
+        'fallback': lambda section_id: ResumeService.fallback_section(
+            section_id, ctx['parsed_resume'], ctx['job_title'], ctx['company_name']
         )
-        
-        return jsonify({
-            "output": markdown_output,
-            "source": "template",
-            "match_score": ResumeService.calculate_match_score(
-                parsed_resume,
-                ResumeService.extract_job_keywords(job_description or user_input)
+    }
+
+def sections_payload(result):
+    """Response payload for section-mode tailoring; raises ValueError so the caller falls back"""
+    if not result['updates']:
+        raise ValueError("Section tailoring produced no sections")
+    RESUME_GENERATIONS.inc(labels={'source': 'ai'})
+    return {
+        "output": json.dumps(result['updates']),
+        "source": "ai",
+        "sections": {
+            "cached": result['cached'],
+            "generated": result['generated'],
+            "template": result['template'],
+            "failed": result['failed']
+        }
+    }
+
+@timed('prompt_build')
+def build_resume_prompt(ctx):
+    mode = ctx['mode']
+    if mode == 'markdown' or mode == 'custom':
+        # In markdown or custom mode, we trust the input prompt from the frontend
+        # But we should ensure we have the context if the frontend didn't fully bake it in, 
+        # though GeminiService.js seems to bake it in.
+        # Let's check if input is long enough to be a full prompt
+        if len(ctx['user_input']) > 50: # Lowered threshold slightly
+            prompt = PromptAssembler.assemble(CUSTOM_PROMPT, input=ctx['user_input'])
+        else:
+            # Fallback if input is short
+            prompt = PromptAssembler.assemble(
+                RESUME_TAILOR_FREEFORM,
+                profile=ctx['analysis'].profile_json,
+                job_description=ctx['job_description'],
+                instructions=ctx['user_input']
             )
-        })
+    else:
+        # Default JSON mode (for structural updates)
+        prompt = PromptAssembler.assemble(
+            RESUME_TAILOR_JSON,
+            profile=ctx['analysis'].profile_json,
+            job_description=ctx['job_description'],
+            instructions=ctx['user_input']
+        )
+    return prompt
 
-    except Exception as e:
-        print(f"[RESUME] Critical error: {e}")
-        import traceback
-        traceback.print_exc()
+@timed('validate')
+def finalize_resume_output(ctx, text_output):
+    """
+    Clean, validate and sanitize the model's resume output
+    
+    Args:
+        ctx: Output of prepare_resume_request
+        text_output: Raw model text
         
-        # Last resort fallback - use local variables instead of 'data'
+    Returns:
+        Response payload, or None when the output does not look like a resume
+    """
+    mode = ctx['mode']
+    resume_log.debug('model.output', chars=len(text_output), preview=text_output[:500])
+    
+    # Clean up the output - remove any markdown code blocks if present
+    # Clean up the output - remove any markdown code blocks if present
+    if text_output:
+        text_output = text_output.strip()
+        # Remove markdown code blocks if the AI wrapped it
+        if text_output.startswith('```'):
+            lines = text_output.split('\n')
+            # Remove first line (```markdown or ```)
+            if lines[0].startswith('```'):
+                lines = lines[1:]
+            # Remove last line (```)
+            if lines and lines[-1].strip() == '```':
+                lines = lines[:-1]
+            text_output = '\n'.join(lines).strip()
+
+    # Sanitize generated JSON ONLY if not in markdown mode
+    is_valid_json = False
+
+    # Auto-detect markdown if mode is custom but output looks like markdown
+    if mode != 'markdown' and (text_output.strip().startswith('#') or '## ' in text_output):
+        resume_log.debug('output.markdown_detected', requested_mode=mode)
+        mode = 'markdown'
+
+    repaired = False
+    if mode != 'markdown':
         try:
-            # Try to get job_title and company_name if they exist in local scope
-            fallback_title = locals().get('job_title', 'technology')
-            fallback_company = locals().get('company_name', 'Company')
-        except:
-            fallback_title = 'technology'
-            fallback_company = 'Company'
-            
-        return jsonify({
-            "output": f"""# Professional Resume
+            # First complete object; a cut-off one keeps its completed sections
+            gen_json, repaired = extract_json_object(text_output, RESUME_PARTIAL_KEYS)
+
+            if gen_json is not None:
+
+                # Use the extracted JSON as the text output
+                # But first sanitize
+                if 'sections' in gen_json:
+                    for section in gen_json['sections']:
+                        if section.get('id') == 'skills' and 'items' in section:
+                            original_items = section['items']
+                            cleaned = sanitize_skills_list(original_items)
+                            resume_log.debug('skills.sanitized', before=len(original_items), after=len(cleaned))
+                            section['items'] = cleaned
+
+                # Log flat structure for debugging
+                resume_log.debug('output.json', keys=list(gen_json.keys()), top_level_skills=len(gen_json.get('skills') or []))
+
+                text_output = json.dumps(gen_json)
+                is_valid_json = True
+            else:
+                resume_log.warning('output.no_json')
+        except Exception as e:
+            resume_log.warning('output.invalid_json', error=str(e))
+
+    # Validate that it looks like a resume (starts with # or contains resume sections)
+    # Also check if it's a guide/template (contains words like "template", "example", "here is")
+    text_lower = text_output.lower()
+
+    # Less strict guide detection for markdown mode
+    forbidden_phrases = ['template', 'example resume', 'here is a', 'tips for', 'how to', 'guide to', 'sample resume']
+    is_guide = False
+
+    # Only check for guide phrases if it doesn't look like a valid markdown resume
+    if not text_output.strip().startswith('#'):
+         is_guide = any(word in text_lower[:200] for word in forbidden_phrases)
+
+    # If markdown mode, be more lenient - just look for headers
+    if mode == 'markdown':
+        has_headers = (
+            text_output.strip().startswith('#') or 
+            '## PROFESSIONAL SUMMARY' in text_output or
+            '## EXPERIENCE' in text_output or 
+            '## PROFESSIONAL EXPERIENCE' in text_output or
+            '## EDUCATION' in text_output
+        )
+        is_valid_resume = len(text_output) > 100 and has_headers
+
+        # If it has headers but starts with preamble, try to strip preamble
+        if has_headers and not text_output.strip().startswith('#'):
+            # Find first H1
+            h1_index = text_output.find('# ')
+            if h1_index != -1:
+                resume_log.debug('output.preamble_stripped', chars=h1_index)
+                text_output = text_output[h1_index:]
+                is_valid_resume = True
+    else:
+        is_valid_resume = (
+            text_output and 
+            len(text_output) > 50 and 
+            not is_guide and
+            (is_valid_json or 
+             text_output.strip().startswith('#') or 
+             'PROFESSIONAL SUMMARY' in text_output.upper() or
+             'EXPERIENCE' in text_output.upper() or
+             'EDUCATION' in text_output.upper())
+        )
+
+    if is_valid_resume:
+        resume_log.info('generate.ai', chars=len(text_output), json=is_valid_json, mode=mode)
+        RESUME_GENERATIONS.inc(labels={'source': 'ai'})
+        payload = {"output": text_output, "source": "ai"}
+        if repaired:
+            payload["repaired"] = True
+        return payload
+    else:
+        resume_log.warning('output.rejected', json=is_valid_json, is_guide=is_guide, mode=mode,
+                           chars=len(text_output), preview=text_output[:300])
+    
+    return None
+
+@timed('fallback')
+def template_resume_payload(ctx):
+    """Template-based resume used when the model fails or returns something unusable"""
+    from resume_service import ResumeService
+    
+    resume_log.info('generate.template')
+    job_description = ctx['job_description'] or ctx['user_input']
+    job_keywords = list(ctx['job_posting'].keywords) if ctx['job_description'] else ResumeService.extract_job_keywords(job_description)
+    markdown_output = ResumeService.generate_detailed_resume_markdown(
+        resume=ctx['parsed_resume'],
+        job_description=job_description,
+        job_title=ctx['job_title'],
+        company_name=ctx['company_name'],
+        keywords=job_keywords
+    )
+    
+    RESUME_GENERATIONS.inc(labels={'source': 'template'})
+    return {
+        "output": markdown_output,
+        "source": "template",
+        "match_score": ctx['analysis'].match_score(job_keywords)
+    }
+
+def emergency_resume_payload(job_title='technology', company_name='Company'):
+    """Last resort output when even the template path failed"""
+    RESUME_GENERATIONS.inc(labels={'source': 'emergency_fallback'})
+    return {
+        "output": f"""# Professional Resume
 
 **Email:** user@example.com | **Phone:** (555) 123-4567
 
 ## PROFESSIONAL SUMMARY
 
-Experienced professional seeking opportunities in {fallback_title}.
+Experienced professional seeking opportunities in {job_title}.
 
 ## SKILLS
 
@@ -505,7 +646,7 @@ Python, JavaScript, React, Node.js, SQL, AWS, Docker, Git
 
 ## EXPERIENCE
 
-**Software Engineer** | **{fallback_company}** | 2020 - Present
+**Software Engineer** | **{company_name}** | 2020 - Present
 
 - Developed and maintained production systems
 - Collaborated with cross-functional teams
@@ -516,209 +657,508 @@ Python, JavaScript, React, Node.js, SQL, AWS, Docker, Git
 **Bachelor of Science in Computer Science**
 University of Technology | 2020
 """,
-            "source": "emergency_fallback"
-        }), 200
+        "source": "emergency_fallback"
+    }
+
+def generate_resume_ai(ctx):
+    """
+    Model-generated payload for a prepared request
+
+    Returns:
+        Response payload, or None when the output does not look like a resume
+
+    Raises:
+        Exception: Whatever the model call raised; callers fall back to templates
+    """
+    if ctx['mode'] == 'sections':
+        # Section-granular tailoring: unchanged sections come from cache,
+        # only edited ones are sent back to the model
+        return sections_payload(section_tailor.tailor(**section_tailor_args(ctx)))
+
+    prompt = build_resume_prompt(ctx)
+    messages = [
+        {
+            "role": "user",
+            "content": prompt.text
+        }
+    ]
+    text_output, model_id = model_router.run('resume_tailor', messages)
+    resume_log.debug('model.response', model=model_id, prompt_tokens=prompt.total_tokens)
+
+    if not expects_json_document(ctx, text_output):
+        return finalize_resume_output(ctx, text_output)
+    completion = complete_json(
+        text_output,
+        lambda partial: model_router.run('resume_tailor', continuation_messages(messages, partial))[0],
+        max_continuations=JSON_MAX_CONTINUATIONS,
+        partial_keys=RESUME_PARTIAL_KEYS
+    )
+    return completed_payload(ctx, completion)
+
+def expects_json_document(ctx, text_output):
+    """Whether the output is a JSON document that may need continuing"""
+    return ctx['mode'] != 'markdown' and strip_fences(text_output.strip()).lstrip().startswith('{')
+
+def completed_payload(ctx, completion):
+    """finalize_resume_output for a continued JSON output, flagged when parts of it had to be dropped"""
+    payload = finalize_resume_output(ctx, completion.text)
+    if payload is not None:
+        if completion.continuations:
+            payload['continuations'] = completion.continuations
+        if completion.truncated:
+            payload['repaired'] = True
+    return payload
+
+def prefetch_payload(ctx):
+    """generate_resume_ai for a prefetch: one model call at a time, and only complete AI output is kept"""
+    payload = generate_resume_ai(dict(ctx, parallel=False))
+    if payload is None or payload.get('source') != 'ai' or payload.get('repaired'):
+        return None
+    sections = payload.get('sections') or {}
+    if sections.get('template') or sections.get('failed'):
+        return None
+    return payload
+
+@app.route('/api/generate-resume', methods=['POST'])
+def generate_resume():
+    try:
+        ctx = prepare_resume_request(request.json)
+        
+        # A prefetch for this exact request may have finished, or be about to
+        prefetched = resume_prefetcher.take(resume_generation_key(ctx), wait=PREFETCH_JOIN_SECONDS)
+        if prefetched is not None:
+            return jsonify(dict(prefetched, prefetched=True))
+        
+        # Try AI generation first
+        try:
+            payload = generate_resume_ai(ctx)
+            if payload is not None:
+                return jsonify(payload)
+        
+        except Exception:
+            resume_log.exception('generate.ai_failed')
+        
+        # Fallback to template-based generation
+        return jsonify(template_resume_payload(ctx))
+
+    except Exception:
+        resume_log.exception('generate.failed')
+        
+        # Last resort fallback - use whatever the request context got to
+        ctx = locals().get('ctx') or {}
+        return jsonify(emergency_resume_payload(
+            ctx.get('job_title', 'technology'),
+            ctx.get('company_name', 'Company')
+        )), 200
+
+def prefetch_user():
+    """
+    Id the per-user prefetch cap is counted against
+
+    The API has no authenticated user, and a client-supplied id would let
+    one client spread its prefetches over as many "users" as it likes, so
+    the cap is per client address.
+    """
+    return str(request.remote_addr or 'anonymous')
+
+@app.route('/api/prefetch-resume', methods=['POST'])
+def prefetch_resume():
+    """
+    Start generating a resume for the job the user is viewing
+
+    Takes the /api/generate-resume payload; the per-user cap counts the
+    client address. The result waits in the prefetch cache until a
+    generate-resume request with the same resume, job, instructions and
+    mode takes it. Answers 202 with {id, status[, reason]}.
+    """
+    data = request.json or {}
+    if not isinstance(data.get('resume'), dict) or not data.get('jobDescription'):
+        return jsonify({"error": "Prefetch needs a resume and a jobDescription"}), 400
+    ctx = prepare_resume_request(data)
+    result = resume_prefetcher.submit(resume_generation_key(ctx), prefetch_user(), lambda: prefetch_payload(ctx))
+    return jsonify(result), 202
+
+@app.route('/api/prefetch-resume/<prefetch_id>', methods=['GET'])
+def prefetch_status(prefetch_id):
+    status = resume_prefetcher.status(prefetch_id)
+    if status is None:
+        return jsonify({"error": "Unknown prefetch"}), 404
+    return jsonify({"id": prefetch_id, "status": status})
+
+@app.route('/api/prefetch-resume/<prefetch_id>', methods=['DELETE'])
+def cancel_prefetch(prefetch_id):
+    """Cancel a prefetch when the user leaves the job, e.g. on navigation away from the job details page"""
+    cancelled = resume_prefetcher.cancel(prefetch_id, user=prefetch_user())
+    return jsonify({"id": prefetch_id, "cancelled": cancelled})
+
+@timed('prompt_build')
+def cover_letter_request_prompt(data):
+    """
+    Build the cover-letter prompt for a request
+    
+    Raises:
+        RequestError: If no input was provided
+    """
+    user_input = data.get('input')
+    
+    if not user_input:
+        raise RequestError("No input provided")
+
+    # Point the model at the candidate's strongest overlaps when the resume is supplied
+    matched = []
+    user_resume = data.get('resume')
+    job_description = data.get('jobDescription', '')
+    if isinstance(user_resume, dict) and job_description:
+        analysis = analysis_store.get(user_resume)
+        matched = analysis.matched_keywords(job_postings.keywords(job_description))
+    return cover_letter_prompt(user_input, matched)
+
+def cover_letter_plan(data):
+    """
+    Plan a skeleton-mode cover letter from the resume and job in the request
+
+    Raises:
+        RequestError: If the resume or job description is missing
+    """
+    user_resume = data.get('resume')
+    job_description = data.get('jobDescription', '')
+    if not isinstance(user_resume, dict) or not job_description:
+        raise RequestError("Skeleton mode needs a resume and a jobDescription")
+    return cover_letter_composer.plan(
+        analysis_store.get(user_resume),
+        job_postings.clean(job_description),
+        job_title=data.get('jobTitle', ''),
+        company_name=data.get('companyName', ''),
+        instructions=data.get('instructions', '')
+    )
 
 @app.route('/api/generate-cover-letter', methods=['POST'])
 def generate_cover_letter():
     try:
         data = request.json
-        user_input = data.get('input')
-        
-        if not user_input:
-            return jsonify({"error": "No input provided"}), 400
-
-        response = model.run([
-            {
-                "role": "user",
-                "content": f"Generate a professional cover letter based on the following details:\n{user_input}"
-            }
-        ])
-
-        if hasattr(response, 'output') and isinstance(response.output, dict):
-            text_output = response.output.get('content', '')
-        elif isinstance(response, dict) and 'output' in response:
-            text_output = response['output'].get('content', '')
-        else:
-            text_output = str(response)
+        # "skeleton" renders the letter locally and generates only the personalized paragraphs
+        if data.get('mode') == 'skeleton':
+            return jsonify(cover_letter_composer.compose(cover_letter_plan(data)))
+
+        prompt = cover_letter_request_prompt(data)
+        text_output = model_router.run_text('cover_letter', prompt)
 
         return jsonify({"output": text_output})
 
+    except RequestError as e:
+        return jsonify({"error": str(e)}), e.status
     except Exception as e:
-        print(f"Exception: {e}")
+        api_log.exception('cover_letter.failed')
         return jsonify({"error": str(e)}), 500
 
+def interview_messages(data):
+    messages = data.get('messages', [])
+    
+    if not messages:
+         # Initial greeting
+         messages = [{"role": "user", "content": "Start a mock interview for a software engineering role."}]
+    return messages
+
 @app.route('/api/mock-interview', methods=['POST'])
 def mock_interview():
     try:
-        data = request.json
-        messages = data.get('messages', [])
-        
-        if not messages:
-             # Initial greeting
-             messages = [{"role": "user", "content": "Start a mock interview for a software engineering role."}]
-
-        response = model.run(messages)
-
-        if hasattr(response, 'output') and isinstance(response.output, dict):
-            text_output = response.output.get('content', '')
-        elif isinstance(response, dict) and 'output' in response:
-            text_output = response['output'].get('content', '')
-        else:
-            text_output = str(response)
+        text_output, _ = model_router.run('mock_interview', interview_messages(request.json))
 
         return jsonify({"output": text_output})
 
     except Exception as e:
-        print(f"Exception: {e}")
+        api_log.exception('mock_interview.failed')
         return jsonify({"error": str(e)}), 500
 
+def send_docx(kind, payload, render, download_name, stream=None):
+    """
+    Serve a rendered DOCX from the content-hash cache, honouring If-None-Match
+    
+    The ETag is the hash of the export payload, so a client that already holds
+    this exact document gets a 304 without anything being rendered. When a
+    stream factory is given and the document is not cached, the package is
+    streamed as it is written instead of being buffered first.
+    """
+    import io
+    
+    key = content_key(kind, payload)
+    if request.if_none_match.contains(key):
+        response = app.response_class(status=304)
+        response.set_etag(key)
+        return response
+    
+    if stream is not None and key not in docx_cache:
+        chunks = stream()
+        
+        def generate():
+            produced = []
+            size = 0
+            for chunk in chunks:
+                size += len(chunk)
+                if size <= DOCX_STREAM_CACHE_MAX_BYTES:
+                    produced.append(chunk)
+                yield chunk
+            if size <= DOCX_STREAM_CACHE_MAX_BYTES:
+                docx_cache.set(key, b''.join(produced))
+        
+        response = app.response_class(generate(), mimetype=DOCX_MIMETYPE)
+        response.headers['Content-Disposition'] = f'attachment; filename={download_name}'
+        response.cache_control.no_cache = True
+        response.set_etag(key)
+        return response
+    
+    data = docx_cache.get_or_compute(key, render)
+    return send_file(
+        io.BytesIO(data),
+        as_attachment=True,
+        download_name=download_name,
+        mimetype=DOCX_MIMETYPE,
+        etag=key,
+        max_age=0
+    )
+
+def use_ooxml_engine(data):
+    """Pick the export engine: 'ooxml' streams WordprocessingML directly, 'python-docx' builds a document"""
+    return (data.get('engine') or DOCX_ENGINE) == 'ooxml'
+
 @app.route('/api/download-docx', methods=['POST'])
 def download_docx():
     try:
-        from docx import Document
-        from docx.shared import Pt, Inches
-        from docx.enum.text import WD_ALIGN_PARAGRAPH
-        import io
-
         data = request.json
         resume = data.get('resume', {})
         
-        doc = Document()
-        
-        # Styles
-        style = doc.styles['Normal']
-        font = style.font
-        font.name = 'Arial'
-        font.size = Pt(10)
-
-        # Header
-        personal = resume.get('personalInfo', {})
-        name = personal.get('name', 'Your Name')
-        header = doc.add_paragraph()
-        header.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        name_run = header.add_run(name)
-        name_run.bold = True
-        name_run.font.size = Pt(16)
-        
-        contact_info = []
-        if personal.get('email'): contact_info.append(personal['email'])
-        if personal.get('phone'): contact_info.append(personal['phone'])
-        if personal.get('location'): contact_info.append(personal['location'])
-        if personal.get('linkedin'): contact_info.append(personal['linkedin'])
-        
-        if contact_info:
-            contact_p = doc.add_paragraph(' | '.join(contact_info))
-            contact_p.alignment = WD_ALIGN_PARAGRAPH.CENTER
-            contact_p.paragraph_format.space_after = Pt(12)
-
-        # Sections
-        for section in resume.get('sections', []):
-            # Title
-            doc.add_heading(section.get('title', '').upper(), level=2)
-            
-            # Content
-            if section.get('id') == 'summary' or section.get('content'):
-                doc.add_paragraph(section.get('content', ''))
-            
-            elif section.get('id') == 'skills':
-                items = section.get('items', [])
-                if isinstance(items, list):
-                    doc.add_paragraph(', '.join(items))
-                else:
-                    doc.add_paragraph(str(items))
-            
-            elif section.get('items'):
-                for item in section.get('items', []):
-                    # Role/Title
-                    p = doc.add_paragraph()
-                    title = item.get('role') or item.get('title') or item.get('degree') or ''
-                    company = item.get('company') or item.get('school') or item.get('subtitle') or ''
-                    date = item.get('startDate') or item.get('year') or ''
-                    if item.get('endDate'): date += f" - {item.get('endDate')}"
-                    
-                    run = p.add_run(title)
-                    run.bold = True
-                    if company: p.add_run(f" | {company}")
-                    if date: p.add_run(f" | {date}")
-                    
-                    # Bullets
-                    if item.get('bullets'):
-                        for bullet in item.get('bullets', []):
-                            doc.add_paragraph(bullet, style='List Bullet')
-                    
-                    # Description
-                    if item.get('description'):
-                        doc.add_paragraph(item.get('description'))
-
-        # Save to buffer
-        buffer = io.BytesIO()
-        doc.save(buffer)
-        buffer.seek(0, 2)
-        size = buffer.tell()
-        buffer.seek(0)
-        
-        return send_file(
-            buffer,
-            as_attachment=True,
-            download_name='resume.docx',
-            mimetype='application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-            max_age=0
+        return send_docx(
+            'resume',
+            resume,
+            lambda: resume_renderer.render_resume(resume),
+            'resume.docx',
+            stream=(lambda: resume_writer.stream_resume(resume)) if use_ooxml_engine(data) else None
         )
 
     except Exception as e:
-        print(f"DOCX Generation Error: {e}")
+        export_log.exception('resume_docx.failed')
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/download-cover-letter-docx', methods=['POST'])
 def download_cover_letter_docx():
     try:
-        from docx import Document
-        from docx.shared import Pt
-        import io
-
         data = request.json
         cover_letter_text = data.get('text', '')
         
-        doc = Document()
-        style = doc.styles['Normal']
-        font = style.font
-        font.name = 'Arial'
-        font.size = Pt(11)
-
-        # Sanitize text to remove characters that might break XML
-        def sanitize(text):
-            if not text: return ""
-            # Keep only printable characters and newlines
-            return "".join(ch for ch in text if ch == '\n' or (ord(ch) >= 32 and ord(ch) != 127))
-
-        # Split by newlines and add paragraphs
-        for line in cover_letter_text.split('\n'):
-            clean_line = sanitize(line.strip())
-            if clean_line:
-                doc.add_paragraph(clean_line)
-            else:
-                # Add empty paragraph for spacing
-                doc.add_paragraph('')
-
-        buffer = io.BytesIO()
-        doc.save(buffer)
-        buffer.seek(0, 2) # Seek to end
-        size = buffer.tell()
-        buffer.seek(0)
-        
-        return send_file(
-            buffer,
-            as_attachment=True,
-            download_name='cover_letter.docx',
-            mimetype='application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-            max_age=0
+        return send_docx(
+            'cover_letter',
+            cover_letter_text,
+            lambda: cover_letter_renderer.render_cover_letter(cover_letter_text),
+            'cover_letter.docx',
+            stream=(lambda: cover_letter_writer.stream_cover_letter(cover_letter_text)) if use_ooxml_engine(data) else None
         )
 
     except Exception as e:
-        print(f"Cover Letter DOCX Error: {e}")
+        export_log.exception('cover_letter_docx.failed')
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/bulk-export', methods=['POST'])
+def bulk_export():
+    try:
+        data = request.json or {}
+        jobs = bulk_exporter.plan(data.get('documents'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    export_log.info('bulk.start', documents=len(jobs))
+    response = app.response_class(bulk_exporter.stream(jobs), mimetype='application/zip')
+    response.headers['Content-Disposition'] = 'attachment; filename=documents.zip'
+    response.cache_control.no_cache = True
+    return response
+
+@app.route('/api/apply-pipeline', methods=['POST'])
+def apply_to_jobs():
+    data = request.json or {}
+    user_resume = data.get('resume')
+    if not isinstance(user_resume, dict):
+        return jsonify({"error": "No resume provided"}), 400
+    try:
+        jobs = apply_pipeline.plan(data.get('jobs'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    pipeline_log.info('batch.start', jobs=len(jobs))
+    response = app.response_class(
+        apply_pipeline.stream(
+            user_resume,
+            jobs,
+            instructions=data.get('instructions', ''),
+            cover_letters=bool(data.get('coverLetters', True))
+        ),
+        mimetype='application/x-ndjson'
+    )
+    response.cache_control.no_cache = True
+    return response
+
+@app.route('/api/match-jobs', methods=['POST'])
+def match_jobs():
+    """
+    Rank job postings for a resume
+    
+    Only the jobs sent with the request are ranked, each scored exactly.
+    Their embeddings are cached by posting content, but titles, ids and
+    keywords always come from this request. The score blends semantic
+    similarity with the keyword match score, weighted by
+    SEMANTIC_MATCH_WEIGHT. Each result carries the job's own 'id' from the
+    request (null when it sent none) and its 'index' in 'jobs'.
+    """
+    data = request.json or {}
+    user_resume = data.get('resume')
+    if not isinstance(user_resume, dict):
+        return jsonify({"error": "No resume provided"}), 400
+    jobs = data.get('jobs')
+    if not isinstance(jobs, list) or not jobs or not all(isinstance(job, dict) for job in jobs):
+        return jsonify({"error": "'jobs' must be a non-empty list of objects"}), 400
+    if len(jobs) > MATCH_JOBS_MAX:
+        return jsonify({"error": f"At most {MATCH_JOBS_MAX} jobs per request"}), 400
+    try:
+        limit = max(1, min(int(data.get('limit', 10)), 100))
+    except (TypeError, ValueError):
+        return jsonify({"error": "'limit' must be a number"}), 400
+    
+    analysis = analysis_store.get(user_resume)
+    profile = semantic_matcher.resume_profile(analysis.key, analysis.resume)
+    embeddings = semantic_matcher.embed_jobs(jobs)
+    
+    results = []
+    for position, (job, embedding) in enumerate(zip(jobs, embeddings)):
+        keywords = job_postings.keywords(job.get('jobDescription') or '')
+        semantic_score = round(max(0.0, profile.embedding.cosine(embedding)) * 100, 1)
+        match_score = round(analysis.match_score(keywords), 1)
+        results.append({
+            'id': job.get('id'),
+            'index': position,
+            'jobTitle': job.get('jobTitle', ''),
+            'companyName': job.get('companyName', ''),
+            'score': round(SEMANTIC_MATCH_WEIGHT * semantic_score + (1 - SEMANTIC_MATCH_WEIGHT) * match_score, 1),
+            'semanticScore': semantic_score,
+            'matchScore': match_score,
+            'matchedKeywords': analysis.matched_keywords(keywords),
+            '_embedding': embedding
+        })
+    # Stable sort: equal scores keep request order
+    results.sort(key=lambda item: item['score'], reverse=True)
+    results = results[:limit]
+    for item in results:
+        item['topBullets'] = semantic_matcher.top_bullets(profile, item.pop('_embedding'))
+    
+    api_log.info('match_jobs', jobs=len(jobs), results=len(results))
+    return jsonify({'results': results, 'ranked': len(jobs)})
+
+@app.route('/api/versions', methods=['POST'])
+def store_version():
+    """
+    Store a base resume and, optionally, one tailored variant of it
+    
+    'variant' is a resume object or Markdown text; only the sections that
+    differ from 'resume' are stored. Storing the same variant again returns
+    the same id.
+    """
+    data = request.json or {}
+    base = data.get('resume')
+    if not isinstance(base, dict):
+        return jsonify({"error": "No resume provided"}), 400
+    meta = data.get('meta') or {}
+    if not isinstance(meta, dict) or len(json.dumps(meta)) > VERSION_META_MAX_BYTES:
+        return jsonify({"error": f"'meta' must be an object of at most {VERSION_META_MAX_BYTES} bytes"}), 400
+    try:
+        result = version_store.put(base, data.get('variant'), meta)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(result), 200 if result['deduplicated'] else 201
+
+@app.route('/api/versions', methods=['GET'])
+def list_versions():
+    """Variants of the base given by ?base=<id>, with the sections each one changed"""
+    base_id = request.args.get('base', '')
+    if version_store.record(base_id) is None:
+        return jsonify({"error": "Version not found"}), 404
+    return jsonify({'base': base_id, 'variants': version_store.variants(base_id)})
+
+@app.route('/api/versions/<version_id>', methods=['GET'])
+def get_version(version_id):
+    """
+    A stored version, rebuilt in the frontend shape
+    
+    ?format=legacy returns the parse_user_resume dictionary instead, and
+    ?format=delta only the changed sections plus the blobs the base lacks.
+    """
+    response_format = request.args.get('format', 'frontend')
+    if response_format == 'delta':
+        payload = version_store.delta(version_id)
+        if payload is None:
+            return jsonify({"error": "Version not found"}), 404
+        return jsonify(payload)
+    
+    record = version_store.record(version_id)
+    if record is None:
+        return jsonify({"error": "Version not found"}), 404
+    payload = {'id': version_id, 'base': record.get('base'), 'kind': record['kind'], 'meta': record.get('meta', {})}
+    document = version_store.document(version_id)
+    if record['kind'] == 'markdown':
+        payload['markdown'] = document
+    else:
+        payload['resume'] = document if response_format == 'legacy' else ResumeModel.from_dict(document).to_frontend()
+    return jsonify(payload)
+
+@app.route('/api/versions/<version_id>/diff', methods=['GET'])
+def diff_version(version_id):
+    """What changed in a version against its base, or against ?against=<id>"""
+    try:
+        result = version_store.diff(version_id, request.args.get('against'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if result is None:
+        return jsonify({"error": "Version not found"}), 404
+    return jsonify(result)
+
+@app.route('/api/exports/<export_id>', methods=['GET'])
+def download_export(export_id):
+    import io
+    
+    entry = export_store.get(export_id)
+    if entry is None:
+        return jsonify({"error": "Export not found or expired"}), 404
+    
+    download_name, data = entry
+    if request.if_none_match.contains(export_id):
+        response = app.response_class(status=304)
+        response.set_etag(export_id)
+        return response
+    return send_file(
+        io.BytesIO(data),
+        as_attachment=True,
+        download_name=download_name,
+        mimetype=DOCX_MIMETYPE,
+        etag=export_id,
+        max_age=0
+    )
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return app.response_class(registry.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/profiles', methods=['GET'])
+def list_profiles():
+    if not profiler.authorized(request.headers.get('X-Profile')):
+        return jsonify({"error": "Not found"}), 404
+    return jsonify({"profiles": profiler.list()})
+
+@app.route('/api/profiles/<profile_id>', methods=['GET'])
+def download_profile(profile_id):
+    """A stored profile as JSON, or as collapsed stacks with ?format=folded"""
+    report = profiler.load(profile_id) if profiler.authorized(request.headers.get('X-Profile')) else None
+    if report is None:
+        return jsonify({"error": "Not found"}), 404
+    if request.args.get('format') == 'folded':
+        return app.response_class(profiler.folded(report), mimetype='text/plain')
+    return jsonify(report)
+
 @app.route('/health', methods=['GET'])
 def health_check():
     return jsonify({"status": "healthy", "service": "job-yatra-backend"}), 200
@@ -0,0 +1,270 @@
+"""
+Apply Pipeline
+Tailors one resume and writes cover letters for many jobs concurrently
+"""
+import json
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from analysis_store import AnalysisStore, ResumeAnalysis
+from bulk_export import safe_filename
+from jd_preprocessor import JobPostingStore
+from logs import get_logger
+from prompts import cover_letter_prompt
+from resume_service import ResumeService
+from section_tailor import SectionTailor, merge_updates
+
+
+log = get_logger('pipeline')
+
+
+@dataclass(frozen=True)
+class JobTarget:
+    """One job the candidate is applying to"""
+    index: int
+    job_title: str
+    company_name: str
+    job_description: str
+    job_id: Optional[str] = None
+    keywords: Tuple[str, ...] = ()
+
+    @property
+    def label(self) -> str:
+        return f"{self.job_title} at {self.company_name}"
+
+
+class ApplyPipeline:
+    """
+    Run tailoring and cover-letter generation for a list of jobs
+
+    The resume is analysed once and shared by every job. Each job becomes two
+    independent tasks (section tailoring + resume DOCX, cover letter + DOCX)
+    on a bounded pool. A batch keeps at most max_in_flight tasks submitted
+    and queues the next job's tasks as earlier ones finish, so a long batch
+    does not crowd out other requests on the pool, and a client that
+    disconnects stops the batch after the tasks already running. Results
+    are yielded per job as soon as both of its tasks have finished, not in
+    request order.
+    """
+
+    def __init__(
+        self,
+        tailor: SectionTailor,
+        analysis_store: AnalysisStore,
+        run_model: Callable[[str], str],
+        export: Callable[[str, Any, str], str],
+        max_workers: int = 4,
+        max_jobs: int = 60,
+        job_postings: Optional[JobPostingStore] = None,
+        max_in_flight: Optional[int] = None
+    ):
+        """
+        Args:
+            tailor: Section tailor shared with /api/generate-resume
+            analysis_store: Store of per-resume analyses
+            run_model: Callable that sends a prompt to the model and returns its text output
+            export: Callable taking (kind, payload, download name) and returning a download URL
+            max_workers: Concurrent pipeline tasks (two per job)
+            max_jobs: Largest accepted batch
+            job_postings: Job description preprocessing cache; a private one is created when omitted
+            max_in_flight: Tasks one batch may have submitted at once; defaults to max_workers
+        """
+        self.tailor = tailor
+        self.analysis_store = analysis_store
+        self.run_model = run_model
+        self.export = export
+        self.max_workers = max_workers
+        self.max_jobs = max_jobs
+        self.job_postings = job_postings if job_postings is not None else JobPostingStore()
+        self.max_in_flight = max_in_flight or max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    def plan(self, jobs: List[Dict[str, Any]]) -> List[JobTarget]:
+        """
+        Validate the requested jobs
+
+        Args:
+            jobs: Items with jobDescription and optional jobTitle, companyName and id
+
+        Returns:
+            List of JobTarget in request order
+
+        Raises:
+            ValueError: If the list is empty, too large or a job has no description
+        """
+        if not isinstance(jobs, list) or not jobs:
+            raise ValueError("'jobs' must be a non-empty list")
+        if len(jobs) > self.max_jobs:
+            raise ValueError(f"At most {self.max_jobs} jobs per request")
+
+        targets = []
+        for index, job in enumerate(jobs, start=1):
+            job = job if isinstance(job, dict) else {}
+            job_description = (job.get('jobDescription') or job.get('description') or '').strip()
+            if not job_description:
+                raise ValueError(f"Job #{index} has no jobDescription")
+            # Boilerplate is dropped once here; every prompt of the job sees the cleaned text
+            posting = self.job_postings.get(job_description)
+            targets.append(JobTarget(
+                index=index,
+                job_title=job.get('jobTitle') or job.get('title') or 'Position',
+                company_name=job.get('companyName') or job.get('company') or 'Company',
+                job_description=posting.text,
+                job_id=job.get('id'),
+                keywords=posting.keywords
+            ))
+        return targets
+
+    def tailor_resume(
+        self,
+        resume_data: Dict[str, Any],
+        analysis: ResumeAnalysis,
+        job: JobTarget,
+        instructions: str
+    ) -> Dict[str, Any]:
+        result = self.tailor.tailor(
+            resume_data,
+            job.job_description,
+            instructions,
+            parallel=True,
+            fallback=lambda section_id: ResumeService.fallback_section(
+                section_id, analysis.resume, job.job_title, job.company_name
+            )
+        )
+        if not result['updates']:
+            raise ValueError("Section tailoring produced no sections")
+
+        tailored = merge_updates(resume_data, result['updates'])
+        stem = safe_filename(f"{job.company_name}_{job.job_title}", f"job_{job.index}")[:-5]
+        return {
+            'resume': tailored,
+            'sections': {k: result[k] for k in ('cached', 'generated', 'template', 'failed')},
+            'docx': self.export('resume', tailored, f"{stem}_resume.docx")
+        }
+
+    def write_cover_letter(self, analysis: ResumeAnalysis, job: JobTarget, job_keywords: List[str]) -> Dict[str, Any]:
+        resume = analysis.resume
+        details = "\n".join(filter(None, [
+            f"Job Title: {job.job_title}",
+            f"Company: {job.company_name}",
+            f"Job Description: {job.job_description}",
+            f"Candidate: {resume.name}",
+            f"Candidate Summary: {resume.summary}" if resume.summary else '',
+            f"Candidate Skills: {', '.join(resume.skills[:20])}" if resume.skills else ''
+        ]))
+        text = self.run_model(cover_letter_prompt(details, analysis.matched_keywords(job_keywords)))
+        if not text.strip():
+            raise ValueError("Model returned an empty cover letter")
+
+        stem = safe_filename(f"{job.company_name}_{job.job_title}", f"job_{job.index}")[:-5]
+        return {
+            'text': text,
+            'docx': self.export('cover_letter', text, f"{stem}_cover_letter.docx")
+        }
+
+    def stream(
+        self,
+        resume_data: Dict[str, Any],
+        jobs: List[JobTarget],
+        instructions: str = '',
+        cover_letters: bool = True
+    ) -> Iterator[str]:
+        """
+        Process every job and yield NDJSON lines as jobs complete
+
+        Args:
+            resume_data: Raw resume data from frontend
+            jobs: Output of plan()
+            instructions: Free-form user instructions applied to every job
+            cover_letters: Also write a cover letter per job
+
+        Yields:
+            One JSON line per job, then a summary line with "done": true
+        """
+        started = time.perf_counter()
+        analysis = self.analysis_store.get(resume_data)
+        executor = self._get_executor()
+
+        def planned() -> Iterator[Tuple[JobTarget, str, Callable[[], Any]]]:
+            for job in jobs:
+                job_keywords = list(job.keywords)
+                results[job.index] = {
+                    'index': job.index,
+                    'id': job.job_id,
+                    'jobTitle': job.job_title,
+                    'companyName': job.company_name,
+                    'matchScore': analysis.match_score(job_keywords),
+                    'errors': {}
+                }
+                outstanding[job.index] = 2 if cover_letters else 1
+                yield job, 'resume', lambda job=job: self.tailor_resume(resume_data, analysis, job, instructions)
+                if cover_letters:
+                    yield job, 'coverLetter', lambda job=job, keywords=job_keywords: self.write_cover_letter(
+                        analysis, job, keywords
+                    )
+
+        tasks: Dict[Future, Tuple[JobTarget, str]] = {}
+        outstanding: Dict[int, int] = {}
+        results: Dict[int, Dict[str, Any]] = {}
+        queue = planned()
+
+        def top_up() -> None:
+            while len(tasks) < self.max_in_flight:
+                planned_task = next(queue, None)
+                if planned_task is None:
+                    return
+                job, part, run = planned_task
+                tasks[executor.submit(run)] = (job, part)
+
+        succeeded = failed = 0
+        try:
+            top_up()
+            while tasks:
+                done, _ = wait(tasks, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job, part = tasks.pop(future)
+                    result = results[job.index]
+                    try:
+                        result[part] = future.result()
+                    except Exception as e:
+                        log.warning('task.failed', part=part, job=job.index, error=str(e))
+                        result['errors'][part] = str(e)
+
+                    outstanding[job.index] -= 1
+                    if outstanding[job.index]:
+                        continue
+
+                    result['status'] = 'error' if 'resume' not in result else ('partial' if result['errors'] else 'ok')
+                    if result['status'] == 'error':
+                        failed += 1
+                    else:
+                        succeeded += 1
+                    yield json.dumps(results.pop(job.index)) + "\n"
+                top_up()
+        finally:
+            if tasks:
+                # The client went away (the response generator was closed) or a task raised past us
+                cancelled = sum(1 for future in tasks if future.cancel())
+                log.warning('batch.abandoned', jobs=len(jobs), finished=succeeded + failed, cancelled=cancelled)
+
+        elapsed = round(time.perf_counter() - started, 2)
+        log.info('batch.done', jobs=len(jobs), seconds=elapsed, succeeded=succeeded, failed=failed)
+        yield json.dumps({
+            'done': True,
+            'total': len(jobs),
+            'succeeded': succeeded,
+            'failed': failed,
+            'seconds': elapsed
+        }) + "\n"
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix='apply-pipeline'
+                )
+            return self._executor
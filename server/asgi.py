@@ -0,0 +1,325 @@
+"""
+ASGI Server Entry Point
+Async serving mode: model-bound routes await the provider, all other routes run the Flask app
+
+Run from the server directory:
+    uvicorn asgi:application --host 0.0.0.0 --port 5000
+"""
+import asyncio
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import ThreadSensitiveContext
+from asgiref.wsgi import WsgiToAsgi
+
+import app as backend
+from app import (
+    RequestError, api_log, app, cover_letter_composer, format_size, jsonify, model_router, request, resume_log,
+    resume_prefetcher, section_tailor, upload_log, upload_policy
+)
+from bytez_async import AsyncBytezClient
+from json_repair import acomplete_json
+from prompts import continuation_messages
+
+
+# Extraction and rendering are CPU-bound; they run here instead of on the event loop
+cpu_pool = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("ASGI_CPU_WORKERS", str(min(32, (os.cpu_count() or 1) + 4)))),
+    thread_name_prefix='asgi-cpu'
+)
+
+bytez_async = AsyncBytezClient(
+    backend.BYTEZ_KEY,
+    timeout_seconds=float(os.environ.get("MODEL_TIMEOUT_SECONDS", "120")),
+    max_connections=int(os.environ.get("MODEL_MAX_CONCURRENCY_ASYNC", "512"))
+)
+model_router.async_model_factory = bytez_async.model
+model_router.max_async_concurrency = int(os.environ.get("MODEL_MAX_CONCURRENCY_ASYNC", "512"))
+section_tailor.arun_model = lambda prompt: model_router.arun_text('resume_section', prompt)
+cover_letter_composer.arun_model = lambda prompt: model_router.arun_text('cover_letter_body', prompt)
+
+
+def close_after_iteration(wsgi_app):
+    """WSGI middleware that closes the response iterable; asgiref never calls close()"""
+    def application(environ, start_response):
+        iterable = wsgi_app(environ, start_response)
+        try:
+            yield from iterable
+        finally:
+            if hasattr(iterable, 'close'):
+                iterable.close()
+    return application
+
+
+wsgi_application = WsgiToAsgi(close_after_iteration(app))
+
+
+async def run_in_cpu_pool(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(cpu_pool, func, *args)
+
+
+async def upload_resume():
+    try:
+        text = await run_in_cpu_pool(backend.extract_upload_text, backend.uploaded_file())
+        output = await model_router.arun_text('resume_parse', backend.resume_parse_prompt(text))
+        return jsonify(await run_in_cpu_pool(backend.finalize_parsed_resume, output))
+
+    except RequestError as e:
+        return jsonify({'error': str(e)}), e.status
+    except Exception as e:
+        upload_log.exception('upload.failed')
+        return jsonify({'error': str(e)}), 500
+
+
+async def generate_resume():
+    try:
+        ctx = backend.prepare_resume_request(request.json)
+
+        prefetched = await resume_prefetcher.atake(backend.resume_generation_key(ctx), wait=backend.PREFETCH_JOIN_SECONDS)
+        if prefetched is not None:
+            return jsonify(dict(prefetched, prefetched=True))
+
+        try:
+            if ctx['mode'] == 'sections':
+                result = await section_tailor.atailor(**backend.section_tailor_args(ctx))
+                return jsonify(backend.sections_payload(result))
+
+            prompt = backend.build_resume_prompt(ctx)
+            messages = [
+                {
+                    "role": "user",
+                    "content": prompt.text
+                }
+            ]
+            text_output, model_id = await model_router.arun('resume_tailor', messages)
+            resume_log.debug('model.response', model=model_id, prompt_tokens=prompt.total_tokens)
+
+            if backend.expects_json_document(ctx, text_output):
+                async def request_more(partial):
+                    return (await model_router.arun('resume_tailor', continuation_messages(messages, partial)))[0]
+
+                completion = await acomplete_json(
+                    text_output,
+                    request_more,
+                    max_continuations=backend.JSON_MAX_CONTINUATIONS,
+                    partial_keys=backend.RESUME_PARTIAL_KEYS
+                )
+                payload = backend.completed_payload(ctx, completion)
+            else:
+                payload = backend.finalize_resume_output(ctx, text_output)
+            if payload is not None:
+                return jsonify(payload)
+
+        except Exception:
+            resume_log.exception('generate.ai_failed')
+
+        return jsonify(await run_in_cpu_pool(backend.template_resume_payload, ctx))
+
+    except Exception:
+        resume_log.exception('generate.failed')
+
+        ctx = locals().get('ctx') or {}
+        return jsonify(backend.emergency_resume_payload(
+            ctx.get('job_title', 'technology'),
+            ctx.get('company_name', 'Company')
+        )), 200
+
+
+async def generate_cover_letter():
+    try:
+        data = request.json
+        if data.get('mode') == 'skeleton':
+            return jsonify(await cover_letter_composer.acompose(backend.cover_letter_plan(data)))
+
+        prompt = backend.cover_letter_request_prompt(data)
+        text_output = await model_router.arun_text('cover_letter', prompt)
+
+        return jsonify({"output": text_output})
+
+    except RequestError as e:
+        return jsonify({"error": str(e)}), e.status
+    except Exception as e:
+        api_log.exception('cover_letter.failed')
+        return jsonify({"error": str(e)}), 500
+
+
+async def mock_interview():
+    try:
+        text_output, _ = await model_router.arun('mock_interview', backend.interview_messages(request.json))
+
+        return jsonify({"output": text_output})
+
+    except Exception as e:
+        api_log.exception('mock_interview.failed')
+        return jsonify({"error": str(e)}), 500
+
+
+# Same paths and payloads as the Flask views of the same name
+ASYNC_ROUTES = {
+    '/api/upload-resume': upload_resume,
+    '/api/generate-resume': generate_resume,
+    '/api/generate-cover-letter': generate_cover_letter,
+    '/api/mock-interview': mock_interview,
+}
+
+
+def build_environ(scope, body, length):
+    """
+    Minimal WSGI environ for an ASGI HTTP scope, so Flask can parse the request
+
+    Args:
+        scope: ASGI HTTP scope
+        body: Readable binary stream positioned at the start of the request body
+        length: Body size in bytes
+    """
+    server_name, server_port = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server_name,
+        'SERVER_PORT': str(server_port),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': (scope.get('client') or ('', 0))[0],
+        'CONTENT_LENGTH': str(length),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for raw_name, raw_value in scope.get('headers', []):
+        name = raw_name.decode('latin-1').upper().replace('-', '_')
+        value = raw_value.decode('latin-1')
+        if name == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+        elif name != 'CONTENT_LENGTH':
+            key = f"HTTP_{name}"
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+class BodyTooLarge(Exception):
+    """The request body is over upload_policy.max_request_bytes"""
+
+
+def declared_length(scope):
+    """Content-Length header of an ASGI HTTP scope, or None when absent or invalid"""
+    for raw_name, raw_value in scope.get('headers', []):
+        if raw_name.lower() == b'content-length':
+            try:
+                return int(raw_value)
+            except ValueError:
+                return None
+    return None
+
+
+async def read_body(receive, limit, spool_bytes):
+    """
+    Receive the request body into a spooled buffer, giving up as soon as it grows past limit bytes
+
+    The buffer stays in memory up to spool_bytes and then moves to a
+    temporary file, as uploads do under the WSGI server.
+
+    Returns:
+        (body stream rewound to the start, body size in bytes); the caller closes the stream
+
+    Raises:
+        BodyTooLarge: If the body is larger than limit; the rest of it is never read
+    """
+    body = tempfile.SpooledTemporaryFile(max_size=spool_bytes, mode='w+b')
+    size = 0
+    try:
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                break
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if size > limit:
+                raise BodyTooLarge()
+            body.write(chunk)
+            if not message.get('more_body'):
+                break
+    except BaseException:
+        body.close()
+        raise
+    body.seek(0)
+    return body, size
+
+
+async def body_too_large():
+    # Same answer as the Flask views give when MAX_CONTENT_LENGTH trips
+    upload_log.warning('request.too_large', path=request.path)
+    return jsonify({'error': f'Uploads are limited to {format_size(upload_policy.max_request_bytes)}'}), 413
+
+
+async def handle_async_route(handler, scope, receive, send):
+    limit = upload_policy.max_request_bytes
+    try:
+        if (declared_length(scope) or 0) > limit:
+            raise BodyTooLarge()
+        body, length = await read_body(receive, limit, upload_policy.spool_bytes)
+    except BodyTooLarge:
+        body, length, handler = tempfile.SpooledTemporaryFile(), 0, body_too_large
+    with body, app.request_context(build_environ(scope, body, length)):
+        # before_request hooks (request metrics) run here too; one may answer early
+        rv = app.preprocess_request()
+        response = app.make_response(rv if rv is not None else await handler())
+        # after_request hooks, e.g. the CORS headers
+        response = app.process_response(response)
+        data = response.get_data()
+        # Runs call_on_close callbacks, e.g. finishing a request profile
+        response.close()
+
+    await send({
+        'type': 'http.response.start',
+        'status': response.status_code,
+        'headers': [
+            (name.lower().encode('latin-1'), value.encode('latin-1'))
+            for name, value in response.headers.items()
+            if name.lower() != 'content-length'
+        ] + [(b'content-length', str(len(data)).encode('latin-1'))],
+    })
+    await send({'type': 'http.response.body', 'body': data})
+
+
+async def application(scope, receive, send):
+    """
+    ASGI application
+
+    POSTs to the model-bound routes are handled on the event loop and await
+    the provider; everything else (CORS preflights, exports, downloads, the
+    apply pipeline) is delegated to the Flask app, each request on its own
+    worker thread.
+    """
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await bytez_async.aclose()
+                cpu_pool.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    handler = ASYNC_ROUTES.get(scope.get('path')) if scope['type'] == 'http' else None
+    if handler is not None and scope['method'] == 'POST':
+        await handle_async_route(handler, scope, receive, send)
+        return
+
+    # Without a per-request context asgiref runs every WSGI call on one shared thread
+    async with ThreadSensitiveContext():
+        await wsgi_application(scope, receive, send)
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    uvicorn.run('asgi:application', host=os.environ.get("HOST", "127.0.0.1"), port=int(os.environ.get("PORT", "5000")))
@@ -0,0 +1,174 @@
+"""
+Bulk DOCX Export
+Renders many resume and cover-letter documents on a small worker pool into one streamed zip
+"""
+import json
+import re
+import threading
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from logs import get_logger
+from ooxml_writer import StreamSink
+
+
+log = get_logger('export')
+
+
+EXPORT_KINDS = ('resume', 'cover_letter')
+
+_UNSAFE_NAME_CHARS = re.compile(r'[^A-Za-z0-9._-]+')
+
+
+@dataclass(frozen=True)
+class ExportJob:
+    """One document of a bulk export"""
+    index: int
+    kind: str
+    payload: Any
+    filename: str
+
+
+def safe_filename(name: str, fallback: str) -> str:
+    stem = _UNSAFE_NAME_CHARS.sub('_', (name or '').strip()).strip('._')
+    if stem.lower().endswith('.docx'):
+        stem = stem[:-5]
+    return f"{stem or fallback}.docx"
+
+
+class BulkExporter:
+    """
+    Render export payloads across a worker pool and stream them as a zip
+
+    Rendering is CPU-bound Python, so the threads do not render in parallel;
+    a pool of one or two only overlaps rendering with zip writing and the
+    GIL-free zlib work. Documents are rendered at most `window` at a time
+    and written to the archive in request order as soon as each one is
+    ready, so neither the rendered documents nor the archive are ever held
+    in memory as a whole.
+    A document that fails to render becomes an error entry and the batch
+    carries on; manifest.json at the end of the archive lists every entry.
+    """
+
+    def __init__(
+        self,
+        render: Callable[[str, Any], bytes],
+        max_workers: int = 2,
+        max_documents: int = 100
+    ):
+        """
+        Args:
+            render: Callable taking (kind, payload) and returning DOCX bytes
+            max_workers: Render threads; more than two only contend for the GIL
+            max_documents: Largest accepted batch
+        """
+        self.render = render
+        self.max_workers = max_workers
+        self.max_documents = max_documents
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    def plan(self, documents: List[Dict[str, Any]]) -> List[ExportJob]:
+        """
+        Validate a bulk export request and assign unique archive names
+
+        Args:
+            documents: Items shaped like the single-document endpoints' bodies,
+                e.g. {"type": "resume", "resume": {...}, "filename": "acme"} or
+                {"type": "cover_letter", "text": "..."}
+
+        Returns:
+            List of ExportJob in request order
+
+        Raises:
+            ValueError: If the batch is empty, too large or not a list
+        """
+        if not isinstance(documents, list) or not documents:
+            raise ValueError("'documents' must be a non-empty list")
+        if len(documents) > self.max_documents:
+            raise ValueError(f"At most {self.max_documents} documents per export")
+
+        jobs = []
+        used = set()
+        for index, document in enumerate(documents, start=1):
+            document = document if isinstance(document, dict) else {}
+            kind = document.get('type') or ('cover_letter' if 'text' in document else 'resume')
+            payload = document.get('text', '') if kind == 'cover_letter' else document.get('resume', {})
+
+            filename = safe_filename(document.get('filename', ''), f"{index:03d}_{kind}")
+            stem, suffix = filename[:-5], 2
+            while filename.lower() in used:
+                filename = f"{stem}_{suffix}.docx"
+                suffix += 1
+            used.add(filename.lower())
+
+            jobs.append(ExportJob(index=index, kind=kind, payload=payload, filename=filename))
+        return jobs
+
+    def _render_job(self, job: ExportJob) -> bytes:
+        if job.kind not in EXPORT_KINDS:
+            raise ValueError(f"Unknown document type '{job.kind}'")
+        return self.render(job.kind, job.payload)
+
+    def stream(self, jobs: List[ExportJob]) -> Iterator[bytes]:
+        """
+        Render the jobs and yield the zip archive incrementally
+
+        Args:
+            jobs: Output of plan()
+
+        Yields:
+            Chunks of the zip archive
+        """
+        executor = self._get_executor()
+        window = self.max_workers * 2
+        pending = deque()
+        queued = iter(jobs)
+        manifest = []
+
+        def submit_next():
+            job = next(queued, None)
+            if job is not None:
+                pending.append((job, time.perf_counter(), executor.submit(self._render_job, job)))
+
+        for _ in range(window):
+            submit_next()
+
+        sink = StreamSink()
+        with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            while pending:
+                job, started, future = pending.popleft()
+                submit_next()
+                entry = {'index': job.index, 'type': job.kind}
+                try:
+                    data = future.result()
+                    # DOCX parts are already deflated; storing avoids compressing them twice
+                    archive.writestr(job.filename, data, compress_type=zipfile.ZIP_STORED)
+                    entry.update(file=job.filename, status='ok', bytes=len(data))
+                except Exception as e:
+                    log.warning('document.failed', file=job.filename, kind=job.kind, error=str(e))
+                    error_name = f"errors/{job.filename[:-5]}.txt"
+                    archive.writestr(error_name, f"{job.kind} #{job.index} could not be rendered: {e}\n")
+                    entry.update(file=error_name, status='error', error=str(e))
+                entry['ms'] = round((time.perf_counter() - started) * 1000, 1)
+                manifest.append(entry)
+                yield from sink.drain()
+
+            archive.writestr('manifest.json', json.dumps({
+                'documents': manifest,
+                'succeeded': sum(1 for e in manifest if e['status'] == 'ok'),
+                'failed': sum(1 for e in manifest if e['status'] == 'error')
+            }, indent=2))
+        yield from sink.drain()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix='bulk-export'
+                )
+            return self._executor
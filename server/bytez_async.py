@@ -0,0 +1,75 @@
+"""
+Async Bytez Client
+Non-blocking equivalent of the Bytez SDK's Model.run for chat models, built on httpx
+"""
+from typing import Any, Dict, List, Optional
+
+import httpx
+from bytez.client import Response
+
+
+BYTEZ_MODELS_URL = "https://api.bytez.com/models/v2/"
+
+
+class AsyncBytezClient:
+    """
+    Shared HTTP connection pool for async model calls
+
+    The SDK opens a new blocking requests call per run; here one AsyncClient
+    keeps connections alive across calls, so thousands of waiting requests
+    cost sockets and coroutines rather than threads.
+    """
+
+    def __init__(self, api_key: str, timeout_seconds: float = 120.0, max_connections: int = 512):
+        """
+        Args:
+            api_key: Bytez API key
+            timeout_seconds: Per-request timeout; model calls can take a while
+            max_connections: Connection pool size
+        """
+        self.headers = {
+            "lang": "python",
+            "authorization": f"Key {api_key}",
+            "content-type": "application/json",
+        }
+        self.timeout_seconds = timeout_seconds
+        self.max_connections = max_connections
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def model(self, model_id: str) -> 'AsyncBytezModel':
+        return AsyncBytezModel(model_id, self)
+
+    async def post(self, model_id: str, body: Dict[str, Any]) -> Response:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=BYTEZ_MODELS_URL,
+                headers=self.headers,
+                timeout=self.timeout_seconds,
+                limits=httpx.Limits(max_connections=self.max_connections)
+            )
+        try:
+            response = await self._client.post(model_id, json=body)
+            results = response.json()
+            return Response(output=results.get('output'), error=results.get('error'), provider=results.get('provider'))
+        except Exception as error:
+            # Same contract as the SDK: failures come back as Response.error
+            return Response(error=str(error))
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class AsyncBytezModel:
+    """Chat model handle with a coroutine run(messages), mirroring bytez Model.run"""
+
+    def __init__(self, model_id: str, client: AsyncBytezClient):
+        self.id = model_id
+        self._client = client
+
+    async def run(self, input: List[Dict[str, str]], params: Optional[Dict[str, Any]] = None) -> Response:
+        body = {"input": input, "stream": False}
+        if params:
+            body["params"] = params
+        return await self._client.post(self.id, body)
@@ -0,0 +1,106 @@
+"""
+In-Process Caches
+Thread-safe LRU cache shared by the analysis, generation and export paths
+"""
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from metrics import Counter, Gauge, registry
+
+
+_MISSING = object()
+
+# Every live cache, reported on /metrics without touching the lookup path
+_caches: 'weakref.WeakSet[LRUCache]' = weakref.WeakSet()
+
+
+class LRUCache:
+    """Bounded least-recently-used cache with optional time-to-live"""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: Optional[float] = None, name: str = 'cache'):
+        """
+        Args:
+            max_entries: Maximum number of entries kept before evicting
+            ttl_seconds: Entry lifetime, or None to keep until evicted
+            name: Label used when reporting statistics
+        """
+        self.name = name
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        _caches.add(self)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, expires_at = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any) -> None:
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Return the cached value, computing and storing it on a miss
+
+        The lock is not held while computing, so concurrent misses for the
+        same key may compute twice; the last writer wins.
+        """
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        return entry[0] if entry is not None else default
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+        return entry is not None and (entry[1] is None or entry[1] > time.monotonic())
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {'name': self.name, 'size': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+def _collect_cache_metrics() -> List[object]:
+    hits = Counter('cache_hits_total', 'Cache lookups served from memory')
+    misses = Counter('cache_misses_total', 'Cache lookups that had to compute')
+    entries = Gauge('cache_entries', 'Entries currently held per cache')
+    for cache in list(_caches):
+        labels = {'cache': cache.name}
+        hits.inc(cache.hits, labels=labels)
+        misses.inc(cache.misses, labels=labels)
+        entries.inc(len(cache), labels=labels)
+    return [hits, misses, entries]
+
+
+registry.register_collector(_collect_cache_metrics)
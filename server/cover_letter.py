@@ -0,0 +1,269 @@
+"""
+Skeleton Cover Letters
+Renders the fixed parts of a cover letter locally and asks the model only for the personalized paragraphs
+"""
+import datetime
+import hashlib
+import re
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from analysis_store import ResumeAnalysis
+from cache import LRUCache
+from logs import get_logger
+from metrics import registry
+from prompts import COVER_LETTER_BODY, PromptAssembler
+from resume_service import ResumeService
+
+
+log = get_logger('cover_letter')
+
+COVER_LETTER_BODIES = registry.counter('cover_letter_bodies_total', 'Skeleton cover-letter bodies by source (ai, cache, template)')
+
+BODY_PARAGRAPHS = 2
+EVIDENCE_BULLETS = 5
+
+_FENCE = re.compile(r'^```[a-z]*\n?|\n?```$')
+# Lines the model sometimes adds although the skeleton already has them
+_FRAME_LINE = re.compile(r'^(dear\b|to whom|sincerely|best regards|kind regards|regards,|thank you for your (time|consideration))', re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class LetterPlan:
+    """Everything needed to finish one letter: the skeleton context and the body prompt"""
+    key: str
+    prompt: str
+    name: str
+    contact: Tuple[str, ...]
+    job_title: str
+    company_name: str
+    matched_keywords: Tuple[str, ...]
+    display_keywords: Tuple[str, ...]
+    evidence: Tuple[str, ...]
+    latest_role: str
+
+
+def _join_words(words: List[str]) -> str:
+    if len(words) <= 2:
+        return ' and '.join(words)
+    return f"{', '.join(words[:-1])} and {words[-1]}"
+
+
+def select_evidence(analysis: ResumeAnalysis, keywords: List[str], count: int = EVIDENCE_BULLETS) -> List[str]:
+    """
+    Resume bullets that mention the most matched keywords, most recent role first on ties
+
+    Args:
+        analysis: Analysis of the candidate's resume
+        keywords: Job keywords the candidate covers
+        count: Bullets to return
+
+    Returns:
+        Up to count bullets; the first bullets of the resume when none match
+    """
+    bullets = [bullet for item in analysis.resume.experience for bullet in item.bullets if bullet.strip()]
+    bullets += [bullet for project in analysis.resume.projects for bullet in project.bullets if bullet.strip()]
+    scored = []
+    for position, bullet in enumerate(bullets):
+        # Whole-word counts, as for the resume's keyword_vector: 'rest' is not in "restaurant"
+        found = ResumeService.keyword_counts(bullet)
+        hits = sum(1 for keyword in keywords if keyword in found)
+        scored.append((-hits, position, bullet))
+    scored.sort()
+    chosen = [bullet for hits, _, bullet in scored if hits < 0][:count]
+    return chosen or bullets[:count]
+
+
+def parse_body(text_output: str) -> List[str]:
+    """
+    Extract the personalized paragraphs from the model output
+
+    Raises:
+        ValueError: If the output holds no usable paragraph
+    """
+    text = _FENCE.sub('', text_output.strip())
+    paragraphs = []
+    for block in re.split(r'\n\s*\n', text):
+        lines = [line.strip() for line in block.splitlines() if line.strip() and not _FRAME_LINE.match(line.strip())]
+        paragraph = ' '.join(lines)
+        if len(paragraph) > 40:
+            paragraphs.append(paragraph)
+    if not paragraphs:
+        raise ValueError("Model returned no cover-letter paragraphs")
+    return paragraphs[:BODY_PARAGRAPHS]
+
+
+class CoverLetterComposer:
+    """
+    Build cover letters from a local skeleton plus model-written paragraphs
+
+    The contact block, date, greeting, opening, closing and signature come
+    from templates filled with the resume and job. The model writes only
+    the middle paragraphs from a compact list of matched keywords and
+    evidence bullets, so both the prompt and the output are a fraction of
+    a full letter. Paragraphs are cached per (resume, job, instructions);
+    when the model fails they are written from templates instead.
+    """
+
+    def __init__(
+        self,
+        run_model: Callable[[str], str],
+        cache: Optional[LRUCache] = None,
+        arun_model: Optional[Callable[[str], Awaitable[str]]] = None
+    ):
+        """
+        Args:
+            run_model: Callable that sends a prompt to the model and returns its text output
+            cache: Paragraph cache; a private one is created when omitted
+            arun_model: Coroutine function equivalent of run_model, used by acompose()
+        """
+        self.run_model = run_model
+        self.arun_model = arun_model
+        self.cache = cache if cache is not None else LRUCache(max_entries=1024, name='cover_letter_bodies')
+
+    @staticmethod
+    def plan(
+        analysis: ResumeAnalysis,
+        job_description: str,
+        job_title: str = '',
+        company_name: str = '',
+        instructions: str = ''
+    ) -> LetterPlan:
+        """
+        Prepare the skeleton and the body prompt for one letter
+
+        Args:
+            analysis: Analysis of the candidate's resume
+            job_description: Job description text
+            job_title: Position applied for
+            company_name: Hiring company
+            instructions: Optional user guidance for the personalized paragraphs
+
+        Returns:
+            LetterPlan for compose() or acompose()
+        """
+        resume = analysis.resume
+        keywords = analysis.matched_keywords(ResumeService.extract_job_keywords(job_description))
+        evidence = select_evidence(analysis, keywords)
+        # Job keywords are lowercase; the letter uses the candidate's own spelling
+        display = [analysis.display_keyword(keyword) for keyword in keywords]
+        latest = resume.experience[0] if resume.experience else None
+        latest_role = ' at '.join(filter(None, [latest.position, latest.company])) if latest else ''
+
+        highlights = '\n'.join(filter(None, [
+            f"Candidate: {resume.name}" + (f", currently {latest_role}" if latest_role else ''),
+            f"Applying for: {job_title or 'the role'}" + (f" at {company_name}" if company_name else ''),
+            f"Matched keywords: {', '.join(display)}" if display else '',
+            f"Summary: {resume.summary}" if resume.summary else '',
+            'Evidence:\n' + '\n'.join(f"- {bullet}" for bullet in evidence) if evidence else '',
+        ]))
+        prompt = PromptAssembler.assemble(
+            COVER_LETTER_BODY, highlights=highlights, job_description=job_description, instructions=instructions
+        ).text
+
+        digest = hashlib.blake2b(digest_size=16)
+        for part in (analysis.key, job_title, company_name, job_description, instructions):
+            digest.update((part or '').encode('utf-8'))
+            digest.update(b'\x00')
+
+        contact = (
+            ' | '.join(filter(None, [resume.email, resume.phone, resume.location])),
+            ' | '.join(filter(None, [resume.linkedin, resume.github])),
+        )
+        return LetterPlan(
+            key=digest.hexdigest(),
+            prompt=prompt,
+            name=resume.name,
+            contact=tuple(line for line in contact if line),
+            job_title=job_title or 'open',
+            company_name=company_name,
+            matched_keywords=tuple(keywords),
+            display_keywords=tuple(display),
+            evidence=tuple(evidence),
+            latest_role=latest_role
+        )
+
+    @staticmethod
+    def template_body(plan: LetterPlan) -> List[str]:
+        """Personalized paragraphs written without the model"""
+        company = plan.company_name or 'your team'
+        first = f"My background aligns closely with what {company} is looking for"
+        if plan.display_keywords:
+            first += f", particularly my hands-on experience with {_join_words(list(plan.display_keywords[:4]))}."
+        else:
+            first += ", and I am confident I can contribute from day one."
+        paragraphs = [first]
+        if plan.evidence:
+            paragraphs.append(
+                "Recent highlights include: " + '; '.join(bullet.rstrip('.') for bullet in plan.evidence[:3]) + '.'
+            )
+        return paragraphs
+
+    @staticmethod
+    def render(plan: LetterPlan, body: List[str], today: Optional[datetime.date] = None) -> str:
+        """
+        Assemble the full letter, one paragraph per line with blank lines between
+
+        The layout is the one download-cover-letter-docx expects.
+        """
+        today = today or datetime.date.today()
+        company = plan.company_name
+        opening = f"I am writing to apply for the {plan.job_title} position" + (f" at {company}." if company else ".")
+        if plan.latest_role:
+            opening += f" As {plan.latest_role}, I have built the experience this role calls for."
+        closing = (
+            f"I would welcome the opportunity to discuss how I can contribute to {company or 'your team'}. "
+            "Thank you for your time and consideration."
+        )
+        blocks = [
+            '\n'.join([plan.name, *plan.contact]),
+            f"{today:%B} {today.day}, {today.year}",
+            f"Dear {company} Hiring Team," if company else "Dear Hiring Manager,",
+            opening,
+            *body,
+            closing,
+            f"Sincerely,\n{plan.name}",
+        ]
+        return '\n\n'.join(blocks)
+
+    def _result(self, plan: LetterPlan, body: List[str], source: str) -> Dict[str, Any]:
+        COVER_LETTER_BODIES.inc(labels={'source': source})
+        return {
+            'output': self.render(plan, body),
+            'mode': 'skeleton',
+            'source': source,
+            'matchedKeywords': list(plan.matched_keywords)
+        }
+
+    def compose(self, plan: LetterPlan) -> Dict[str, Any]:
+        """
+        Finish a planned letter, calling the model only on a cache miss
+
+        Returns:
+            {'output': letter text, 'mode': 'skeleton', 'source': 'ai' | 'cache' | 'template', 'matchedKeywords': [...]}
+        """
+        body = self.cache.get(plan.key)
+        if body is not None:
+            return self._result(plan, body, 'cache')
+        try:
+            body = parse_body(self.run_model(plan.prompt))
+        except Exception as e:
+            log.warning('body.fallback', error=str(e))
+            return self._result(plan, self.template_body(plan), 'template')
+        self.cache.set(plan.key, body)
+        return self._result(plan, body, 'ai')
+
+    async def acompose(self, plan: LetterPlan) -> Dict[str, Any]:
+        """Async variant of compose() for the ASGI app"""
+        if self.arun_model is None:
+            raise RuntimeError("CoverLetterComposer was created without arun_model")
+        body = self.cache.get(plan.key)
+        if body is not None:
+            return self._result(plan, body, 'cache')
+        try:
+            body = parse_body(await self.arun_model(plan.prompt))
+        except Exception as e:
+            log.warning('body.fallback', error=str(e))
+            return self._result(plan, self.template_body(plan), 'template')
+        self.cache.set(plan.key, body)
+        return self._result(plan, body, 'ai')
@@ -0,0 +1,187 @@
+"""
+DOCX Rendering
+Pre-styled base templates cloned per request for resume and cover-letter exports
+"""
+import copy
+import hashlib
+import io
+import json
+from typing import Any, Dict, Optional
+
+from docx import Document
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.shared import Pt
+
+from metrics import timed
+
+
+DOCX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+
+# Control characters (except newline) and DEL break the XML parts
+_CONTROL_CHARS = {code: None for code in [*range(32), 127] if code != ord('\n')}
+
+
+def sanitize_text(text: str) -> str:
+    """Strip characters that cannot appear in WordprocessingML, in a single pass"""
+    return text.translate(_CONTROL_CHARS) if text else ""
+
+
+def content_key(kind: str, payload: Any) -> str:
+    """Hash an export payload; identical payloads render identical bytes"""
+    canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.blake2b(f"{kind}\x00{canonical}".encode('utf-8'), digest_size=16).hexdigest()
+
+
+class DocxRenderer:
+    """
+    Render documents from a base template loaded and styled once per process
+
+    Loading python-docx's default template unzips and parses every part, and
+    resolving a paragraph style by name scans the whole styles part. Both are
+    done once here; each request deep-copies the in-memory base document and
+    sets resolved style ids directly on new paragraphs.
+    """
+
+    def __init__(self, font_name: str = 'Arial', font_size: int = 10):
+        """
+        Args:
+            font_name: Font for the Normal style
+            font_size: Point size for the Normal style
+        """
+        base = Document()
+        font = base.styles['Normal'].font
+        font.name = font_name
+        font.size = Pt(font_size)
+
+        self._base = base
+        self._style_ids = {
+            name: base.styles[name].style_id
+            for name in ('List Bullet', 'Heading 1', 'Heading 2', 'Heading 3')
+        }
+
+    @property
+    def style_ids(self) -> Dict[str, str]:
+        """Resolved paragraph style ids, keyed by style name"""
+        return dict(self._style_ids)
+
+    def new_document(self):
+        """Return a fresh, independent copy of the styled base document"""
+        return copy.deepcopy(self._base)
+
+    def add_paragraph(self, doc, text: str = '', style: Optional[str] = None):
+        """Equivalent to doc.add_paragraph(text, style) without the per-call style lookup"""
+        paragraph = doc.add_paragraph(text)
+        if style is not None:
+            paragraph._p.get_or_add_pPr().style = self._style_ids[style]
+        return paragraph
+
+    def add_heading(self, doc, text: str, level: int = 1):
+        return self.add_paragraph(doc, text, f'Heading {level}')
+
+    def template_bytes(self) -> bytes:
+        """Serialized styled base template, e.g. for writers that emit parts directly"""
+        return self.to_bytes(self._base)
+
+    @staticmethod
+    def to_bytes(doc) -> bytes:
+        buffer = io.BytesIO()
+        doc.save(buffer)
+        return buffer.getvalue()
+
+    @timed('render')
+    def render_resume(self, resume: Dict[str, Any]) -> bytes:
+        """
+        Render a frontend resume JSON into DOCX bytes
+
+        Args:
+            resume: Resume in the frontend shape (personalInfo + sections)
+
+        Returns:
+            DOCX file contents
+        """
+        doc = self.new_document()
+
+        # Header
+        personal = resume.get('personalInfo', {})
+        name = personal.get('name', 'Your Name')
+        header = doc.add_paragraph()
+        header.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        name_run = header.add_run(name)
+        name_run.bold = True
+        name_run.font.size = Pt(16)
+
+        contact_info = []
+        if personal.get('email'): contact_info.append(personal['email'])
+        if personal.get('phone'): contact_info.append(personal['phone'])
+        if personal.get('location'): contact_info.append(personal['location'])
+        if personal.get('linkedin'): contact_info.append(personal['linkedin'])
+
+        if contact_info:
+            contact_p = doc.add_paragraph(' | '.join(contact_info))
+            contact_p.alignment = WD_ALIGN_PARAGRAPH.CENTER
+            contact_p.paragraph_format.space_after = Pt(12)
+
+        # Sections
+        for section in resume.get('sections', []):
+            # Title
+            self.add_heading(doc, section.get('title', '').upper(), level=2)
+
+            # Content
+            if section.get('id') == 'summary' or section.get('content'):
+                doc.add_paragraph(section.get('content', ''))
+
+            elif section.get('id') == 'skills':
+                items = section.get('items', [])
+                if isinstance(items, list):
+                    doc.add_paragraph(', '.join(items))
+                else:
+                    doc.add_paragraph(str(items))
+
+            elif section.get('items'):
+                for item in section.get('items', []):
+                    # Role/Title
+                    p = doc.add_paragraph()
+                    title = item.get('role') or item.get('title') or item.get('degree') or ''
+                    company = item.get('company') or item.get('school') or item.get('subtitle') or ''
+                    date = item.get('startDate') or item.get('year') or ''
+                    if item.get('endDate'): date += f" - {item.get('endDate')}"
+
+                    run = p.add_run(title)
+                    run.bold = True
+                    if company: p.add_run(f" | {company}")
+                    if date: p.add_run(f" | {date}")
+
+                    # Bullets
+                    if item.get('bullets'):
+                        for bullet in item.get('bullets', []):
+                            self.add_paragraph(doc, bullet, 'List Bullet')
+
+                    # Description
+                    if item.get('description'):
+                        doc.add_paragraph(item.get('description'))
+
+        return self.to_bytes(doc)
+
+    @timed('render')
+    def render_cover_letter(self, text: str) -> bytes:
+        """
+        Render cover-letter text into DOCX bytes, one paragraph per line
+
+        Args:
+            text: Cover letter plain text
+
+        Returns:
+            DOCX file contents
+        """
+        doc = self.new_document()
+
+        # Split by newlines and add paragraphs
+        for line in text.split('\n'):
+            clean_line = sanitize_text(line.strip())
+            if clean_line:
+                doc.add_paragraph(clean_line)
+            else:
+                # Add empty paragraph for spacing
+                doc.add_paragraph('')
+
+        return self.to_bytes(doc)
@@ -0,0 +1,163 @@
+"""
+Streaming DOCX Text Extraction
+Reads paragraph, table, text-box, header and footer text straight from the package XML in document order
+"""
+import posixpath
+import zipfile
+from typing import BinaryIO, Dict, Iterator, List, Tuple
+from xml.etree.ElementTree import ParseError, iterparse
+
+
+DOCUMENT_PART = 'word/document.xml'
+DOCUMENT_RELS = 'word/_rels/document.xml.rels'
+
+_W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_MC = '{http://schemas.openxmlformats.org/markup-compatibility/2006}'
+_REL = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+_P, _T, _TAB, _BR, _CR, _HYPHEN = _W + 'p', _W + 't', _W + 'tab', _W + 'br', _W + 'cr', _W + 'noBreakHyphen'
+_TBL, _TR, _TC, _TXBX = _W + 'tbl', _W + 'tr', _W + 'tc', _W + 'txbxContent'
+_BODY, _HDR, _FTR = _W + 'body', _W + 'hdr', _W + 'ftr'
+# Text boxes are stored twice: the DrawingML choice and a VML fallback copy
+_FALLBACK = _MC + 'Fallback'
+
+_FRAME_TAGS = {_P: 'p', _TC: 'tc', _TR: 'tr', _TXBX: 'txbx'}
+_BREAKS = {_BR: '\n', _CR: '\n', _HYPHEN: '-'}
+
+
+def _part_lines(source: BinaryIO) -> Iterator[str]:
+    """
+    Text lines of one WordprocessingML part, in document order
+
+    Every paragraph is a line. A table row whose cells hold one paragraph
+    each becomes one line with the cells joined by ' | '; rows with longer
+    cells (tables used for page layout) give each cell's lines in turn.
+    Text-box paragraphs are lines of their own, ahead of the paragraph that
+    anchors them. Elements are dropped as soon as they are read, so memory
+    stays flat however long the document is.
+    """
+    # Open paragraphs, cells, rows and text boxes, innermost last: (kind, collected text)
+    frames: List[Tuple[str, List]] = []
+    blocks = None  # body, header or footer element whose finished children are discarded
+    skip = 0
+    lines: List[str] = []
+
+    def emit(line: str):
+        # A line belongs to the innermost open table cell, else to the output
+        for kind, collected in reversed(frames):
+            if kind == 'tc':
+                collected.append(line)
+                return
+        lines.append(line)
+
+    for event, elem in iterparse(source, events=('start', 'end')):
+        tag = elem.tag
+        if tag == _FALLBACK:
+            skip += 1 if event == 'start' else -1
+            continue
+        if skip:
+            continue
+
+        if event == 'start':
+            if tag in _FRAME_TAGS:
+                frames.append((_FRAME_TAGS[tag], []))
+            elif tag in (_BODY, _HDR, _FTR) and blocks is None:
+                blocks = elem
+            continue
+
+        if tag == _T:
+            if frames and frames[-1][0] == 'p':
+                frames[-1][1].append(elem.text or '')
+        elif tag == _TAB:
+            # Tab stops in paragraph properties carry attributes; a tab character has none
+            if not elem.attrib and frames and frames[-1][0] == 'p':
+                frames[-1][1].append('\t')
+        elif tag in _BREAKS:
+            if frames and frames[-1][0] == 'p':
+                frames[-1][1].append(_BREAKS[tag])
+        elif tag == _P:
+            emit(''.join(frames.pop()[1]))
+        elif tag == _TC:
+            cell = frames.pop()[1]
+            if frames and frames[-1][0] == 'tr':
+                frames[-1][1].append(cell)
+        elif tag == _TR:
+            cells = [[line for line in cell if line.strip()] for cell in frames.pop()[1]]
+            if all(len(cell) <= 1 for cell in cells):
+                row = ' | '.join(cell[0] for cell in cells if cell)
+                if row:
+                    emit(row)
+            else:
+                for cell in cells:
+                    for line in cell:
+                        emit(line)
+        elif tag == _TXBX:
+            frames.pop()
+
+        if not frames and tag in (_P, _TBL) and blocks is not None:
+            blocks.clear()
+        if lines:
+            yield from lines
+            lines.clear()
+
+
+def _header_footer_parts(package: zipfile.ZipFile) -> Tuple[List[str], List[str]]:
+    """Header and footer part names from the main document's relationships"""
+    try:
+        rels = package.open(DOCUMENT_RELS)
+    except KeyError:
+        return [], []
+    parts: Dict[str, List[str]] = {'header': [], 'footer': []}
+    with rels:
+        for _, elem in iterparse(rels):
+            if elem.tag != _REL + 'Relationship' or elem.get('TargetMode') == 'External':
+                continue
+            kind = elem.get('Type', '').rsplit('/', 1)[-1]
+            if kind in parts:
+                target = elem.get('Target', '')
+                name = target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join('word', target))
+                if name in package.NameToInfo:
+                    parts[kind].append(name)
+    # header1, header2, ... header10 in numeric order
+    order = lambda name: (len(name), name)
+    return sorted(parts['header'], key=order), sorted(parts['footer'], key=order)
+
+
+def iter_docx_lines(stream: BinaryIO) -> Iterator[str]:
+    """
+    Stream the text of a DOCX file line by line: headers, body, then footers
+
+    Header and footer lines repeated across parts (first-page, even and
+    default variants) are given once.
+
+    Args:
+        stream: Seekable binary file object holding the .docx package
+
+    Raises:
+        ValueError: If the file is not a readable Word document
+    """
+    try:
+        package = zipfile.ZipFile(stream)
+    except zipfile.BadZipFile as e:
+        raise ValueError(f"Not a DOCX package: {e}")
+    with package:
+        if DOCUMENT_PART not in package.NameToInfo:
+            raise ValueError(f"Not a Word document: {DOCUMENT_PART} is missing")
+        headers, footers = _header_footer_parts(package)
+        seen = set()
+        try:
+            for name in headers + [DOCUMENT_PART] + footers:
+                with package.open(name) as part:
+                    for line in _part_lines(part):
+                        if name != DOCUMENT_PART:
+                            if not line.strip() or line in seen:
+                                continue
+                            seen.add(line)
+                        yield line
+        except ParseError as e:
+            raise ValueError(f"Malformed XML in {name}: {e}")
+
+
+def extract_docx_text(stream: BinaryIO) -> str:
+    """Plain text of a DOCX file, one line per paragraph or table row"""
+    return '\n'.join(iter_docx_lines(stream))
@@ -0,0 +1,254 @@
+"""
+Job Description Preprocessing
+Segments job postings into requirements, responsibilities and boilerplate, and caches the cleaned text per posting
+"""
+import hashlib
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from cache import LRUCache
+from logs import get_logger
+from metrics import registry
+from prompts import estimate_tokens
+from resume_service import ResumeService
+
+
+log = get_logger('jd')
+
+JD_BOILERPLATE_CHARS = registry.counter('jd_boilerplate_chars_total', 'Job description characters dropped as boilerplate, by kind')
+
+REQUIREMENTS = 'requirements'
+RESPONSIBILITIES = 'responsibilities'
+OTHER = 'other'
+# Segment kinds that never reach a prompt or the keyword extractor
+BOILERPLATE = ('company', 'benefits', 'legal')
+
+# A cleaned posting shorter than this is more likely a misclassification than a posting
+MIN_KEPT_WORDS = 30
+
+# Checked in order: "About the role" is a responsibilities heading, "About us" a company one
+_HEADING_KINDS = (
+    (RESPONSIBILITIES, re.compile(
+        r"responsibilit|duties|what you('ll| will)? (do|be doing|work on)|about the (role|job|position|opportunity)"
+        r"|the (role|job|position|opportunity)\b|role overview|position (summary|overview)|in this role|day[- ]to[- ]day"
+        r"|your (impact|mission|role)|job (description|summary)|key (tasks|accountabilities)", re.IGNORECASE)),
+    (REQUIREMENTS, re.compile(
+        r"requirement|qualification|what you('ll)? (bring|need|have)|what we('re| are) looking for|who you are"
+        r"|about you|you (have|bring|are)\b|must[- ]haves?|nice[- ]to[- ]haves?|preferred|bonus (points|if)|skills"
+        r"|experience|competenc|education|ideal candidate|tech(nology)? stack|our stack", re.IGNORECASE)),
+    ('benefits', re.compile(
+        r"benefit|perks|what we offer|we offer|compensation|salary|pay (range|transparency)|total rewards"
+        r"|why (join|work)|what's in it for you|what you('ll)? get", re.IGNORECASE)),
+    ('legal', re.compile(
+        r"equal (employment )?opportunit|\beeo\b|diversity|inclusion|accommodation|privacy|disclaimer|legal"
+        r"|notice|e-verify|recruit(ment|ing) agenc|authori[sz]ation to work|work authori[sz]ation", re.IGNORECASE)),
+    ('company', re.compile(
+        r"^about\b|who we are|our (mission|story|culture|values|team|company)|company (overview|description)"
+        r"|life at|why us|the company", re.IGNORECASE)),
+)
+
+# Paragraph-level signals for postings without headings
+_LEGAL_TEXT = re.compile(
+    r"equal (employment )?opportunity|without regard to|race, (color|colour)|protected (veteran|characteristic)"
+    r"|reasonable accommodation|e-verify|affirmative action|sexual orientation|gender identity"
+    r"|unsolicited (resumes|applications)|recruitment agenc|pay transparency|fair chance|arrest (and|or) conviction",
+    re.IGNORECASE)
+_BENEFIT_TERMS = re.compile(
+    r"401\(?k\)?|health(care)? insurance|medical|dental|vision|paid time off|\bpto\b|parental leave|stock options"
+    r"|\bequity\b|wellness|gym|stipend|unlimited (vacation|pto)|paid holidays|life insurance|tuition reimbursement"
+    r"|commuter|retirement", re.IGNORECASE)
+_COMPANY_TEXT = re.compile(
+    r"^(at [\w&.' -]+, we\b|we are (a|an|the)\b|founded in \d{4}|our mission\b|[\w&.'-]+( [\w&.'-]+){0,3} is (a|an|the) "
+    r"(leading|global|fast[- ]growing|world'?s|premier|innovative|venture[- ]backed))",
+    re.IGNORECASE)
+_HIRING_TEXT = re.compile(r"looking for|seeking|hiring|you will|you'll|join (us|our team) as", re.IGNORECASE)
+
+_DECORATION = re.compile(r'^[#>*_\s]+|[*_:\s]+$')
+_BULLET = re.compile(r'^\s*([-*•·▪◦]|\d+[.)])\s+')
+_INLINE_HEADING = re.compile(r'^([A-Za-z][A-Za-z /&\'-]{2,40}):\s+(\S.*)$')
+
+
+def job_description_key(text: str) -> str:
+    """Content hash of a raw job description"""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def heading_kind(line: str) -> Optional[str]:
+    """
+    Classify a line as a section heading
+
+    Returns:
+        Segment kind for a heading line ('other' when it is a heading of an
+        unknown kind), or None when the line is body text
+    """
+    stripped = line.strip()
+    if not stripped or _BULLET.match(stripped) or len(stripped) > 70:
+        return None
+    label = _DECORATION.sub('', stripped)
+    if not label or len(label.split()) > 8:
+        return None
+    marked = stripped.startswith('#') or stripped.endswith(':') or stripped.startswith('**') \
+        or (label.isupper() and sum(c.isalpha() for c in label) > 2)
+    for kind, pattern in _HEADING_KINDS:
+        match = pattern.search(label)
+        if match:
+            # Unmarked lines must open with the heading phrase: "Python experience" is body text
+            if marked or match.start() == 0 and len(label.split()) <= 4 and not label.endswith('.'):
+                return kind
+            return None
+    return OTHER if marked and not label.endswith('.') else None
+
+
+def paragraph_kind(paragraph: str) -> Optional[str]:
+    """Boilerplate kind of a paragraph outside any heading, or None to keep it"""
+    if _LEGAL_TEXT.search(paragraph):
+        return 'legal'
+    if len(set(m.group(0).lower() for m in _BENEFIT_TERMS.finditer(paragraph))) >= 3:
+        return 'benefits'
+    if _COMPANY_TEXT.search(paragraph.strip()) and not _HIRING_TEXT.search(paragraph):
+        return 'company'
+    return None
+
+
+def segment(text: str) -> List[Tuple[str, str]]:
+    """
+    Split a posting into (kind, text) segments in document order
+
+    A heading sets the kind of the paragraphs after it and is kept in the
+    text of its segment. Paragraphs are also checked on their own, since
+    many postings end with an EEO statement or benefits list that has no
+    heading, and "About us" sections often run into the hiring pitch.
+    """
+    paragraphs: List[Tuple[str, List[str]]] = []
+    kind = OTHER
+    current: List[str] = []
+    for raw in text.replace('\r\n', '\n').replace('\r', '\n').split('\n'):
+        line = raw.rstrip()
+        found = heading_kind(line)
+        if found is None:
+            # "Requirements: 5+ years of Python" opens a section; "Work authorization:
+            # required" or "Notice: on-call rotation" is a job detail, not legal text,
+            # and stays in the current one. Legal text is caught by _LEGAL_TEXT below.
+            inline = _INLINE_HEADING.match(line.strip())
+            inline_kind = heading_kind(inline.group(1) + ':') if inline else None
+            if inline_kind not in (None, OTHER, 'legal'):
+                found = inline_kind
+        if found is not None or not line.strip():
+            if current:
+                paragraphs.append((kind, current))
+            current = []
+            kind = found or kind
+        if line.strip():
+            current.append(line)
+    if current:
+        paragraphs.append((kind, current))
+
+    blocks: List[Tuple[str, str]] = []
+    for kind, lines in paragraphs:
+        if kind not in BOILERPLATE and any(_BULLET.match(line) for line in lines):
+            # A legal line right under a bullet list, with no blank line in between, leaves the list alone
+            legal = [line for line in lines if not _BULLET.match(line) and _LEGAL_TEXT.search(line)]
+            lines = [line for line in lines if line not in legal]
+            if legal:
+                blocks.append((kind, '\n'.join(lines)))
+                blocks.append(('legal', '\n'.join(legal)))
+                continue
+        block = '\n'.join(lines)
+        if _LEGAL_TEXT.search(block):
+            kind = 'legal'
+        elif kind == OTHER:
+            kind = paragraph_kind(block) or OTHER
+        elif kind == 'company' and _HIRING_TEXT.search(block):
+            kind = OTHER
+        blocks.append((kind, block))
+
+    result: List[Tuple[str, str]] = []
+    for kind, block in blocks:
+        if result and result[-1][0] == kind:
+            result[-1] = (kind, f"{result[-1][1]}\n\n{block}")
+        else:
+            result.append((kind, block))
+    return result
+
+
+@dataclass(frozen=True, slots=True)
+class JobPosting:
+    """A job description split into segments, with the text that prompts and keyword matching use"""
+    key: str
+    text: str
+    segments: Tuple[Tuple[str, str], ...]
+    keywords: Tuple[str, ...]
+    original_chars: int
+    token_estimate: int
+
+    @classmethod
+    def build(cls, key: str, raw: str) -> 'JobPosting':
+        segments = tuple(segment(raw))
+        kept = '\n\n'.join(block for kind, block in segments if kind not in BOILERPLATE)
+        if len(kept.split()) < MIN_KEPT_WORDS and len(raw.split()) >= MIN_KEPT_WORDS:
+            log.info('jd.kept_raw', key=key, kept_words=len(kept.split()))
+            kept = raw.strip()
+        else:
+            for kind, block in segments:
+                if kind in BOILERPLATE:
+                    JD_BOILERPLATE_CHARS.inc(len(block), labels={'kind': kind})
+        return cls(
+            key=key,
+            text=kept,
+            segments=segments,
+            keywords=tuple(ResumeService.extract_job_keywords(kept)),
+            original_chars=len(raw),
+            token_estimate=estimate_tokens(kept)
+        )
+
+    def section(self, kind: str) -> str:
+        return '\n\n'.join(block for found, block in self.segments if found == kind)
+
+    @property
+    def requirements(self) -> str:
+        return self.section(REQUIREMENTS)
+
+    @property
+    def responsibilities(self) -> str:
+        return self.section(RESPONSIBILITIES)
+
+    @property
+    def boilerplate(self) -> Dict[str, str]:
+        return {kind: self.section(kind) for kind in BOILERPLATE if self.section(kind)}
+
+
+EMPTY_POSTING = JobPosting(key='', text='', segments=(), keywords=(), original_chars=0, token_estimate=0)
+
+
+class JobPostingStore:
+    """Content-addressed cache of preprocessed job descriptions"""
+
+    def __init__(self, max_entries: int = 2048):
+        self._cache = LRUCache(max_entries=max_entries, name='job_postings')
+
+    def get(self, job_description: str) -> JobPosting:
+        """
+        Return the preprocessed posting, segmenting it on a miss
+
+        Args:
+            job_description: Raw job description text
+
+        Returns:
+            JobPosting for this exact text; an empty posting for blank input
+        """
+        if not job_description or not job_description.strip():
+            return EMPTY_POSTING
+        key = job_description_key(job_description)
+        return self._cache.get_or_compute(key, lambda: JobPosting.build(key, job_description))
+
+    def clean(self, job_description: str) -> str:
+        """Job description without boilerplate, as prompts should see it"""
+        return self.get(job_description).text
+
+    def keywords(self, job_description: str) -> List[str]:
+        """Keywords of the cleaned job description"""
+        return list(self.get(job_description).keywords)
+
+    def stats(self) -> Dict[str, object]:
+        return self._cache.stats()
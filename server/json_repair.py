@@ -0,0 +1,337 @@
+"""
+JSON Repair
+Detects model JSON that was cut off, splices continuations onto it and salvages the complete part
+"""
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Collection, Dict, List, Optional, Tuple
+
+from logs import get_logger
+from metrics import registry
+
+
+log = get_logger('json')
+
+JSON_TRUNCATIONS = registry.counter(
+    'model_json_truncations_total', 'Truncated JSON outputs by outcome (continued, salvaged, lost)'
+)
+
+# Longest repeated prefix removed when a continuation restates the end of the partial output
+MAX_OVERLAP = 400
+
+_FENCE_START = re.compile(r'^\s*```[a-zA-Z]*[ \t]*\n?')
+_FENCE_END = re.compile(r'\n?```\s*$')
+_WHITESPACE = ' \t\r\n'
+_STRING_BODY = re.compile(r'[^"\\]*')
+_DECODER = json.JSONDecoder()
+_LITERAL_END = set(_WHITESPACE + ',}]')
+
+
+class _Container:
+    __slots__ = ('kind', 'closable')
+
+    def __init__(self, kind: str, closable: bool):
+        self.kind = kind
+        self.closable = closable
+
+
+class JsonScanner:
+    """
+    Incremental scanner for the first JSON object in model output
+
+    Text is fed as it arrives (a first completion, then continuations)
+    and scanned once. The scanner tracks open containers and string state,
+    and remembers the last offset where the document could be cut and
+    closed into valid JSON. Only completed values count: a half-written
+    string, number or nested object is never part of a salvage. Containers
+    may only be closed early when they are the root or sit under one of
+    partial_keys, e.g. "sections", so a salvage keeps whole sections and
+    never a section with half its entries.
+    """
+
+    def __init__(self, partial_keys: Collection[str] = ()):
+        """
+        Args:
+            partial_keys: Keys whose array or object may be closed with only its completed members
+        """
+        self.partial_keys = frozenset(partial_keys)
+        self.text = ''
+        self.start = -1
+        self.end = -1
+        self._stack: List[_Container] = []
+        self._unclosable = 0
+        self._expect = 'value'
+        self._last_key: Optional[str] = None
+        self._string_start = -1
+        self._string_is_key = False
+        self._escape = False
+        self._literal = False
+        self._safe = -1
+        self._safe_closers = ''
+
+    @property
+    def complete(self) -> bool:
+        return self.end != -1
+
+    @property
+    def truncated(self) -> bool:
+        """An object was started and never closed"""
+        return self.start != -1 and self.end == -1
+
+    def document(self) -> Optional[str]:
+        """Text of the complete root object"""
+        return self.text[self.start:self.end] if self.complete else None
+
+    def salvage(self) -> Optional[str]:
+        """Complete part of a truncated object, closed into valid JSON; None when nothing was completed"""
+        if not self.truncated or self._safe == -1:
+            return None
+        return self.text[self.start:self._safe] + self._safe_closers
+
+    def feed(self, chunk: str) -> None:
+        """Scan more output; text after the root object has closed is kept but ignored"""
+        offset = len(self.text)
+        self.text += chunk
+        if self.complete:
+            return
+        text = self.text
+        if self.start == -1:
+            start = text.find('{', offset)
+            if start == -1:
+                return
+            self.start = start
+            self._push('{')
+            offset = start + 1
+
+        i = offset - 1
+        size = len(text)
+        while i + 1 < size:
+            i += 1
+            if self._string_start != -1:
+                if self._escape:
+                    self._escape = False
+                    continue
+                # String bodies are most of the text; skip to the next quote or backslash
+                i = _STRING_BODY.match(text, i).end()
+                if i == size:
+                    break
+                if text[i] == '\\':
+                    self._escape = True
+                else:
+                    self._close_string(i)
+                continue
+            c = text[i]
+            if self._literal:
+                if c not in _LITERAL_END:
+                    continue
+                self._literal = False
+                self._value_done(i)
+            if c in _WHITESPACE:
+                continue
+            if c == '"':
+                self._string_start = i
+                self._string_is_key = self._stack[-1].kind == '{' and self._expect == 'key'
+            elif c == ':':
+                self._expect = 'value'
+            elif c == ',':
+                self._expect = 'key' if self._stack[-1].kind == '{' else 'value'
+            elif c in '{[':
+                self._push(c)
+            elif c in '}]':
+                container = self._stack.pop()
+                if not container.closable:
+                    self._unclosable -= 1
+                if not self._stack:
+                    self.end = i + 1
+                    return
+                self._value_done(i + 1)
+            else:
+                self._literal = True
+
+    def _push(self, kind: str) -> None:
+        parent = self._stack[-1] if self._stack else None
+        closable = parent is None or (parent.kind == '{' and self._last_key in self.partial_keys)
+        self._stack.append(_Container(kind, closable))
+        if not closable:
+            self._unclosable += 1
+        self._expect = 'key' if kind == '{' else 'value'
+
+    def _close_string(self, i: int) -> None:
+        start, self._string_start = self._string_start, -1
+        if self._string_is_key:
+            try:
+                self._last_key = json.loads(self.text[start:i + 1])
+            except ValueError:
+                self._last_key = None
+            self._expect = 'colon'
+        else:
+            self._value_done(i + 1)
+
+    def _value_done(self, offset: int) -> None:
+        self._expect = 'comma'
+        if not self._unclosable:
+            self._safe = offset
+            self._safe_closers = ''.join('}' if c.kind == '{' else ']' for c in reversed(self._stack))
+
+
+def strip_fences(text: str) -> str:
+    """Remove a Markdown code fence around model output, also when only the opening one arrived"""
+    # The patterns are only tried where a fence can be; a regex pass over a long reply is not free
+    if text[:16].lstrip().startswith('```'):
+        text = _FENCE_START.sub('', text, count=1)
+    if text[-16:].rstrip().endswith('```'):
+        text = _FENCE_END.sub('', text)
+    return text
+
+
+def _decode_complete(text: str) -> Optional[Tuple[Dict[str, Any], int, int]]:
+    # Fast path for the usual, untruncated output: (object, start, end) of the first object
+    start = text.find('{')
+    if start == -1:
+        return None
+    try:
+        obj, end = _DECODER.raw_decode(text, start)
+    except ValueError:
+        return None
+    return obj, start, end
+
+
+def extract_json_object(text: str, partial_keys: Collection[str] = ()) -> Tuple[Optional[Dict[str, Any]], bool]:
+    """
+    Parse the first JSON object in model output, salvaging it when cut off
+
+    Args:
+        text: Model output, possibly with prose or code fences around the object
+        partial_keys: See JsonScanner
+
+    Returns:
+        Tuple of (object or None, whether it was salvaged from a truncated output)
+
+    Raises:
+        ValueError: If a complete object is present but is not valid JSON
+    """
+    decoded = _decode_complete(text)
+    if decoded is not None:
+        return decoded[0], False
+    scanner = JsonScanner(partial_keys)
+    scanner.feed(text)
+    if scanner.complete:
+        return json.loads(scanner.document()), False
+    salvaged = scanner.salvage()
+    if salvaged is None:
+        return None, False
+    return json.loads(salvaged), True
+
+
+def splice(text: str, continuation: str) -> str:
+    """
+    Continuation text to append to text
+
+    Drops a code fence and any restated tail of text at the start of the
+    continuation; models often repeat the last few characters they saw.
+    """
+    continuation = strip_fences(continuation)
+    for size in range(min(MAX_OVERLAP, len(text), len(continuation)), 7, -1):
+        if text.endswith(continuation[:size]):
+            return continuation[size:]
+    return continuation
+
+
+@dataclass
+class JsonCompletion:
+    """Result of completing a possibly truncated JSON output"""
+    text: str
+    continuations: int
+    truncated: bool
+
+
+def _restarted(scanner: JsonScanner, continuation: str) -> bool:
+    # The model answered the continuation request with a fresh document
+    head = strip_fences(continuation).lstrip()
+    return head.startswith('{') and head[:40] == scanner.text[scanner.start:scanner.start + 40]
+
+
+def complete_json(
+    text: str,
+    request_more: Callable[[str], str],
+    max_continuations: int = 2,
+    partial_keys: Collection[str] = ()
+) -> JsonCompletion:
+    """
+    Continue a truncated JSON output until its root object closes
+
+    Args:
+        text: First model output
+        request_more: Sends the output so far back to the model and returns what it adds
+        max_continuations: Continuation requests allowed
+        partial_keys: See JsonScanner
+
+    Returns:
+        JsonCompletion; when still truncated, text holds the salvaged part if there is one
+    """
+    text = strip_fences(text)
+    decoded = _decode_complete(text)
+    if decoded is not None:
+        return JsonCompletion(text[decoded[1]:decoded[2]], 0, truncated=False)
+    scanner = JsonScanner(partial_keys)
+    scanner.feed(text)
+    continuations = 0
+    while scanner.truncated and continuations < max_continuations:
+        continuations += 1
+        try:
+            more = request_more(scanner.text)
+        except Exception as e:
+            log.warning('continuation.failed', attempt=continuations, error=str(e))
+            break
+        if _restarted(scanner, more):
+            scanner = JsonScanner(partial_keys)
+            scanner.feed(strip_fences(more))
+        else:
+            scanner.feed(splice(scanner.text, more))
+    return _finish(scanner, continuations)
+
+
+async def acomplete_json(
+    text: str,
+    request_more: Callable[[str], Awaitable[str]],
+    max_continuations: int = 2,
+    partial_keys: Collection[str] = ()
+) -> JsonCompletion:
+    """Async variant of complete_json() for the ASGI app"""
+    text = strip_fences(text)
+    decoded = _decode_complete(text)
+    if decoded is not None:
+        return JsonCompletion(text[decoded[1]:decoded[2]], 0, truncated=False)
+    scanner = JsonScanner(partial_keys)
+    scanner.feed(text)
+    continuations = 0
+    while scanner.truncated and continuations < max_continuations:
+        continuations += 1
+        try:
+            more = await request_more(scanner.text)
+        except Exception as e:
+            log.warning('continuation.failed', attempt=continuations, error=str(e))
+            break
+        if _restarted(scanner, more):
+            scanner = JsonScanner(partial_keys)
+            scanner.feed(strip_fences(more))
+        else:
+            scanner.feed(splice(scanner.text, more))
+    return _finish(scanner, continuations)
+
+
+def _finish(scanner: JsonScanner, continuations: int) -> JsonCompletion:
+    if scanner.start == -1:
+        # Not JSON at all, e.g. Markdown; nothing to do
+        return JsonCompletion(scanner.text, continuations, truncated=False)
+    if scanner.complete:
+        if continuations:
+            JSON_TRUNCATIONS.inc(labels={'outcome': 'continued'})
+            log.info('truncation.continued', continuations=continuations, chars=len(scanner.text))
+        return JsonCompletion(scanner.document(), continuations, truncated=False)
+    salvaged = scanner.salvage()
+    JSON_TRUNCATIONS.inc(labels={'outcome': 'salvaged' if salvaged else 'lost'})
+    log.warning('truncation.unresolved', continuations=continuations, chars=len(scanner.text),
+                salvaged=len(salvaged or ''))
+    return JsonCompletion(salvaged or scanner.text, continuations, truncated=True)
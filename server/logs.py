@@ -0,0 +1,199 @@
+"""
+Structured Logging
+Leveled, sampled, PII-redacting event logs written by a background thread
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from metrics import registry
+
+
+LOG_RECORDS = registry.counter('log_records_total', 'Log records accepted, by level')
+LOG_DROPPED = registry.counter('log_dropped_total', 'Log records dropped because the writer queue was full')
+
+# Field names whose values are resume or model content, never written verbatim
+REDACTED_FIELDS = frozenset({
+    'name', 'email', 'phone', 'location', 'linkedin', 'github', 'address',
+    'text', 'content', 'output', 'preview', 'prompt', 'resume', 'skills', 'sample', 'input'
+})
+
+QUIET_LOGGERS = ('httpx', 'httpcore')
+
+_EMAIL_RE = re.compile(r'[\w.+-]+@[\w-]+\.[\w.-]+')
+_PHONE_RE = re.compile(r'\+?\d[\d\s().-]{7,}\d')
+
+_configured = False
+_configure_lock = threading.Lock()
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def redact(value: Any) -> Any:
+    """Mask e-mail addresses and phone numbers in free text"""
+    if isinstance(value, str):
+        return _PHONE_RE.sub('[phone]', _EMAIL_RE.sub('[email]', value))
+    return value
+
+
+def _redact_fields(fields: Dict[str, Any]) -> Dict[str, Any]:
+    clean = {}
+    for key, value in fields.items():
+        if key in REDACTED_FIELDS and value is not None:
+            size = len(value) if hasattr(value, '__len__') else None
+            clean[key] = f"[redacted len={size}]" if size is not None else "[redacted]"
+        else:
+            clean[key] = redact(value)
+    return clean
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Enqueue records without formatting them on the request thread
+
+    The stock QueueHandler formats every record before enqueueing so it can
+    be pickled; records here never leave the process, so formatting is left
+    to the writer thread. When the queue is full the record is dropped and
+    counted rather than blocking the request.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_DROPPED.inc()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, event and the event fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            'level': record.levelname.lower(),
+            'logger': record.name,
+            'event': record.getMessage(),
+            **getattr(record, 'fields', {})
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Readable single-line form for local development: [LOGGER] event key=value"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = ' '.join(f"{k}={v}" for k, v in getattr(record, 'fields', {}).items())
+        line = f"{record.levelname[0]} [{record.name.upper()}] {record.getMessage()}" + (f" {fields}" if fields else '')
+        if record.exc_info:
+            line += '\n' + self.formatException(record.exc_info)
+        return line
+
+
+def configure(
+    level: Optional[str] = None,
+    fmt: Optional[str] = None,
+    queue_size: Optional[int] = None,
+    stream=None
+) -> None:
+    """
+    Route all logging through a bounded queue drained by a writer thread
+
+    Called once at import time with settings from the environment
+    (LOG_LEVEL, LOG_FORMAT=text|json, LOG_QUEUE_SIZE); calling it again
+    replaces the handlers, e.g. in scripts that want JSON output.
+    """
+    global _configured, _listener
+    with _configure_lock:
+        if _listener is not None:
+            _listener.stop()
+
+        output = logging.StreamHandler(stream or sys.stdout)
+        output.setFormatter(JsonFormatter() if (fmt or os.environ.get("LOG_FORMAT", "text")) == 'json' else TextFormatter())
+
+        records = queue.Queue(maxsize=queue_size or int(os.environ.get("LOG_QUEUE_SIZE", "10000")))
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            if isinstance(handler, _DroppingQueueHandler):
+                root.removeHandler(handler)
+        root.addHandler(_DroppingQueueHandler(records))
+        root.setLevel((level or os.environ.get("LOG_LEVEL", "INFO")).upper())
+        # The HTTP client logs every provider call at INFO
+        for name in QUIET_LOGGERS:
+            logging.getLogger(name).setLevel(logging.WARNING)
+
+        _listener = logging.handlers.QueueListener(records, output, respect_handler_level=False)
+        _listener.start()
+        if not _configured:
+            # stop() drains whatever is still queued before the process exits
+            atexit.register(lambda: _listener.stop())
+        _configured = True
+
+
+def flush(timeout: float = 2.0) -> None:
+    """Wait until queued records have been written, e.g. before exit or in scripts"""
+    if _listener is None:
+        return
+    deadline = time.monotonic() + timeout
+    while not _listener.queue.empty() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+class EventLogger:
+    """
+    Structured logger: log.info('upload.extracted', chars=1234, format='pdf')
+
+    Field values are redacted when their names are PII-bearing (see
+    REDACTED_FIELDS) and e-mail/phone patterns are masked everywhere. Debug
+    events are sampled at LOG_DEBUG_SAMPLE_RATE, or per call with sample=.
+    Nothing is formatted unless the level is enabled and the sample is kept.
+    """
+
+    def __init__(self, name: str, debug_sample_rate: float = 1.0):
+        self._logger = logging.getLogger(name)
+        self.debug_sample_rate = debug_sample_rate
+
+    def _log(self, level: int, event: str, sample: Optional[float], exc_info: Any, fields: Dict[str, Any]) -> None:
+        if not self._logger.isEnabledFor(level):
+            return
+        rate = sample if sample is not None else (self.debug_sample_rate if level <= logging.DEBUG else 1.0)
+        if rate < 1.0 and random.random() >= rate:
+            return
+        if rate < 1.0:
+            fields['sampled'] = rate
+        LOG_RECORDS.inc(labels={'level': logging.getLevelName(level).lower()})
+        self._logger.log(level, event, exc_info=exc_info, extra={'fields': _redact_fields(fields)})
+
+    def debug(self, event: str, sample: Optional[float] = None, **fields: Any) -> None:
+        self._log(logging.DEBUG, event, sample, None, fields)
+
+    def info(self, event: str, sample: Optional[float] = None, **fields: Any) -> None:
+        self._log(logging.INFO, event, sample, None, fields)
+
+    def warning(self, event: str, sample: Optional[float] = None, **fields: Any) -> None:
+        self._log(logging.WARNING, event, sample, None, fields)
+
+    def error(self, event: str, sample: Optional[float] = None, **fields: Any) -> None:
+        self._log(logging.ERROR, event, sample, None, fields)
+
+    def exception(self, event: str, **fields: Any) -> None:
+        """Error with the current exception's traceback, formatted on the writer thread"""
+        self._log(logging.ERROR, event, None, True, fields)
+
+
+def get_logger(name: str) -> EventLogger:
+    if not _configured:
+        configure()
+    return EventLogger(name, debug_sample_rate=float(os.environ.get("LOG_DEBUG_SAMPLE_RATE", "0.01")))
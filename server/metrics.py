@@ -0,0 +1,251 @@
+"""
+Metrics Registry
+In-process counters, gauges, histograms and timing spans, rendered in Prometheus text format
+"""
+import bisect
+import functools
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+
+
+def _label_key(labels: Optional[Dict[str, str]]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in (labels or {}).items()))
+
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _escape_help(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if value == -math.inf:
+        return '-Inf'
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """Monotonically increasing value per label set"""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, labels: Optional[Dict[str, str]] = None) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, labels: Optional[Dict[str, str]] = None) -> float:
+        return self._values.get(_label_key(labels), 0.0)
+
+    def samples(self) -> List[Tuple[str, LabelKey, float]]:
+        with self._lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+
+class Gauge:
+    """Value that can go up and down per label set, e.g. requests in flight"""
+
+    kind = 'gauge'
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, labels: Optional[Dict[str, str]] = None) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, labels: Optional[Dict[str, str]] = None) -> None:
+        self.inc(-amount, labels)
+
+    def set(self, value: float, labels: Optional[Dict[str, str]] = None) -> None:
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def value(self, labels: Optional[Dict[str, str]] = None) -> float:
+        return self._values.get(_label_key(labels), 0.0)
+
+    @contextmanager
+    def track(self, labels: Optional[Dict[str, str]] = None) -> Iterator[None]:
+        """Count the enclosed block as in progress"""
+        self.inc(labels=labels)
+        try:
+            yield
+        finally:
+            self.dec(labels=labels)
+
+    def samples(self) -> List[Tuple[str, LabelKey, float]]:
+        with self._lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+
+class Histogram:
+    """Bucketed distribution of observed values per label set"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, buckets: Iterable[float] = DEFAULT_LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets))
+        # label key -> [bucket counts..., +Inf count], sum, count
+        self._series: Dict[LabelKey, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, labels: Optional[Dict[str, str]] = None) -> None:
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, labels: Optional[Dict[str, str]] = None) -> int:
+        series = self._series.get(_label_key(labels))
+        return series[2] if series else 0
+
+    def samples(self) -> List[Tuple[str, LabelKey, float]]:
+        """Cumulative _bucket series plus _sum and _count, as Prometheus expects"""
+        with self._lock:
+            snapshot = [(key, list(series[0]), series[1], series[2]) for key, series in self._series.items()]
+
+        samples = []
+        for key, counts, total, count in snapshot:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                samples.append((f"{self.name}_bucket", key + (('le', _format_value(bound)),), cumulative))
+            samples.append((f"{self.name}_sum", key, total))
+            samples.append((f"{self.name}_count", key, count))
+        return samples
+
+
+class Registry:
+    """Named collection of metrics, created on first use"""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._collectors: List[Callable[[], Iterable[object]]] = []
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help_text: str = '') -> Counter:
+        return self._get_or_create(name, lambda: Counter(name, help_text))
+
+    def histogram(self, name: str, help_text: str = '', buckets: Iterable[float] = DEFAULT_LATENCY_BUCKETS) -> Histogram:
+        return self._get_or_create(name, lambda: Histogram(name, help_text, buckets))
+
+    def gauge(self, name: str, help_text: str = '') -> Gauge:
+        return self._get_or_create(name, lambda: Gauge(name, help_text))
+
+    def register_collector(self, collector: Callable[[], Iterable[object]]) -> None:
+        """
+        Add a callable run at render time that returns metric objects
+
+        Used for values that already live elsewhere (e.g. cache hit counts),
+        so the hot path does not have to report them twice.
+        """
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format (0.0.4)
+
+        Returns:
+            Exposition text, one HELP/TYPE block per metric family
+        """
+        metrics = list(self._metrics.values())
+        for collector in list(self._collectors):
+            try:
+                metrics.extend(collector())
+            except Exception as e:
+                # logs itself registers metrics here, so it is imported on first use
+                from logs import get_logger
+                get_logger('metrics').error('collector.failed', error=str(e))
+
+        lines = []
+        for metric in sorted(metrics, key=lambda m: m.name):
+            lines.append(f"# HELP {metric.name} {_escape_help(metric.help_text or metric.name)}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, key, value in metric.samples():
+                labels = ','.join(f'{k}="{_escape_label(v)}"' for k, v in key)
+                lines.append(f"{name}{{{labels}}} {_format_value(value)}" if labels else f"{name} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+    def _get_or_create(self, name: str, factory):
+        metric = self._metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(name)
+                if metric is None:
+                    metric = self._metrics[name] = factory()
+        return metric
+
+
+# Process-wide registry
+registry = Registry()
+
+STAGE_SECONDS = registry.histogram('stage_duration_seconds', 'Time spent per pipeline stage')
+STAGE_ERRORS = registry.counter('stage_errors_total', 'Pipeline stages that raised')
+
+
+@contextmanager
+def span(stage: str, **labels: str) -> Iterator[None]:
+    """
+    Time a block as a pipeline stage
+
+    Args:
+        stage: Stage name, e.g. 'extract', 'prompt_build', 'render'
+        **labels: Extra labels, e.g. format='pdf'
+
+    Example:
+        with span('extract', format='pdf'):
+            text = extract_text(path)
+    """
+    labels = {'stage': stage, **labels}
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.inc(labels=labels)
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - started, labels=labels)
+
+
+def timed(stage: str) -> Callable:
+    """Decorator form of span() for functions that are a stage on their own"""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,437 @@
+"""
+Model Routing
+Maps each task to a model tier and fails over to faster tiers on slowness or errors
+"""
+import asyncio
+import contextlib
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from logs import get_logger
+from metrics import STAGE_SECONDS, registry
+
+
+# Tiers from most capable to fastest; failover only ever moves right
+TIER_ORDER = ('flagship', 'fast', 'lite')
+
+DEFAULT_TIER_MODELS = {
+    'flagship': 'google/gemini-2.5-pro',
+    'fast': 'google/gemini-2.5-flash',
+    'lite': 'google/gemini-2.5-flash-lite',
+}
+
+# task -> (preferred tier, latency budget in seconds)
+DEFAULT_TASK_ROUTES = {
+    'resume_parse': ('flagship', 60.0),
+    'resume_tailor': ('flagship', 60.0),
+    'resume_section': ('flagship', 30.0),
+    'cover_letter': ('fast', 20.0),
+    'cover_letter_body': ('fast', 12.0),
+    'mock_interview': ('fast', 8.0),
+}
+
+MODEL_CALL_SECONDS = registry.histogram('model_call_seconds', 'Model call latency by model, task and outcome')
+MODEL_FAILOVERS = registry.counter('model_failovers_total', 'Calls moved to a faster tier')
+MODEL_ERRORS = registry.counter('model_errors_total', 'Failed model calls by model and task')
+MODEL_IN_FLIGHT = registry.gauge('model_calls_in_flight', 'Model calls currently waiting on the provider')
+MODEL_ABANDONED = registry.gauge('model_calls_abandoned', 'Timed-out sync model calls still running on the provider')
+
+log = get_logger('router')
+
+
+class ModelError(Exception):
+    """Raised when every tier available to a task has failed"""
+
+
+class ModelTimeout(ModelError):
+    """Raised for a single call that took longer than its task allows"""
+
+
+@dataclass(frozen=True)
+class TaskRoute:
+    """Where a task goes first and how long it may take there"""
+    task: str
+    tier: str
+    latency_budget: float
+
+
+def parse_routes(spec: str, defaults: Dict[str, Tuple[str, float]] = DEFAULT_TASK_ROUTES) -> Dict[str, TaskRoute]:
+    """
+    Parse a route override string
+
+    Args:
+        spec: Comma-separated "task=tier[:budget_seconds]" entries,
+            e.g. "cover_letter=lite:10,resume_parse=fast"
+        defaults: Routes used for tasks the spec does not mention
+
+    Returns:
+        Mapping of task name to TaskRoute
+
+    Raises:
+        ValueError: If an entry names an unknown tier or is malformed
+    """
+    routes = {task: TaskRoute(task, tier, budget) for task, (tier, budget) in defaults.items()}
+    for entry in filter(None, (part.strip() for part in (spec or '').split(','))):
+        task, _, target = entry.partition('=')
+        tier, _, budget = target.partition(':')
+        task, tier = task.strip(), tier.strip()
+        if not task or tier not in TIER_ORDER:
+            raise ValueError(f"Invalid model route '{entry}'; expected task=tier[:seconds] with tier in {TIER_ORDER}")
+        default_budget = routes[task].latency_budget if task in routes else 30.0
+        routes[task] = TaskRoute(task, tier, float(budget) if budget else default_budget)
+    return routes
+
+
+class ModelStats:
+    """Rolling latency and error rate for one model over a time window"""
+
+    def __init__(self, window_seconds: float = 300.0, max_samples: int = 200):
+        self.window_seconds = window_seconds
+        self._samples: deque = deque(maxlen=max_samples)  # (timestamp, seconds, ok)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, ok: bool) -> None:
+        with self._lock:
+            self._samples.append((time.monotonic(), seconds, ok))
+
+    def _recent(self) -> List[Tuple[float, float, bool]]:
+        cutoff = time.monotonic() - self.window_seconds
+        with self._lock:
+            while self._samples and self._samples[0][0] < cutoff:
+                self._samples.popleft()
+            return list(self._samples)
+
+    def snapshot(self) -> Dict[str, Any]:
+        samples = self._recent()
+        latencies = sorted(s[1] for s in samples if s[2])
+        errors = sum(1 for s in samples if not s[2])
+
+        def percentile(p: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 3)
+
+        return {
+            'samples': len(samples),
+            'error_rate': round(errors / len(samples), 3) if samples else 0.0,
+            'p50': percentile(0.5),
+            'p95': percentile(0.95),
+        }
+
+
+class ModelRouter:
+    """
+    Route model calls by task, tracking per-model health
+
+    A tier is skipped up front when its recent error rate exceeds the
+    threshold or its p95 latency is over the task's budget. A call that
+    fails (exception, API error, empty output or no answer within
+    timeout_factor times the task's budget) fails over to the next faster
+    tier. Samples age out of the window, so a skipped tier is tried again
+    once its bad samples have expired.
+
+    Timed sync calls run on a shared pool of call_workers threads. A call
+    that times out cannot be cancelled once it has reached the provider, so
+    it is counted as abandoned until it finishes; while max_abandoned_calls
+    of them are still running the router stops failing over instead of
+    stacking more requests on the provider.
+    """
+
+    def __init__(
+        self,
+        model_factory: Callable[[str], Any],
+        tier_models: Optional[Dict[str, str]] = None,
+        routes: Optional[Dict[str, TaskRoute]] = None,
+        max_concurrency: Optional[int] = None,
+        timeout_factor: Optional[float] = 2.0,
+        error_rate_threshold: float = 0.5,
+        min_samples: int = 5,
+        window_seconds: float = 300.0,
+        async_model_factory: Optional[Callable[[str], Any]] = None,
+        max_async_concurrency: int = 512,
+        call_workers: int = 64,
+        max_abandoned_calls: int = 16
+    ):
+        """
+        Args:
+            model_factory: Callable returning a model handle with run(messages) for a model id
+            tier_models: Tier name to model id
+            routes: Task name to TaskRoute; unknown tasks go to the flagship tier
+            max_concurrency: Optional cap on in-flight sync model calls across all tasks; None leaves them unbounded
+            timeout_factor: A call is abandoned after this many times its task's latency budget; None never times out
+            error_rate_threshold: Error rate above which a tier is skipped
+            min_samples: Samples needed before a tier's stats are trusted
+            window_seconds: Length of the rolling stats window
+            async_model_factory: Like model_factory, but handles have a coroutine run(messages)
+            max_async_concurrency: Upper bound on in-flight model calls made through arun()
+            call_workers: Threads shared by timed sync calls; calls beyond this queue and their wait counts against the timeout
+            max_abandoned_calls: Timed-out calls allowed to keep running before the router stops failing over
+        """
+        self.model_factory = model_factory
+        self.tier_models = dict(tier_models or DEFAULT_TIER_MODELS)
+        self.routes = dict(routes or parse_routes(''))
+        self.error_rate_threshold = error_rate_threshold
+        self.min_samples = min_samples
+        self.window_seconds = window_seconds
+        self.max_concurrency = max_concurrency
+        self._slots = threading.BoundedSemaphore(max_concurrency) if max_concurrency else contextlib.nullcontext()
+        self.timeout_factor = timeout_factor
+        self.max_abandoned_calls = max_abandoned_calls
+        self._call_pool = ThreadPoolExecutor(max_workers=call_workers, thread_name_prefix='model-call')
+        self._in_flight = 0
+        self._abandoned = 0
+        self.async_model_factory = async_model_factory
+        self.max_async_concurrency = max_async_concurrency
+        # Created on first arun() so it binds to the serving event loop
+        self._async_slots: Optional[asyncio.Semaphore] = None
+        self._models: Dict[str, Any] = {}
+        self._async_models: Dict[str, Any] = {}
+        self._stats: Dict[str, ModelStats] = {}
+        self._lock = threading.Lock()
+
+    def route(self, task: str) -> TaskRoute:
+        return self.routes.get(task) or TaskRoute(task, TIER_ORDER[0], 60.0)
+
+    def chain(self, task: str) -> List[str]:
+        """Model ids to try for a task, preferred tier first, healthy ones ahead of unhealthy ones"""
+        route = self.route(task)
+        model_ids = []
+        for tier in TIER_ORDER[TIER_ORDER.index(route.tier):]:
+            model_id = self.tier_models.get(tier)
+            if model_id and model_id not in model_ids:
+                model_ids.append(model_id)
+
+        healthy = [m for m in model_ids if self.is_healthy(m, route.latency_budget)]
+        return healthy + [m for m in model_ids if m not in healthy]
+
+    def is_healthy(self, model_id: str, latency_budget: float) -> bool:
+        snapshot = self._get_stats(model_id).snapshot()
+        if snapshot['samples'] < self.min_samples:
+            return True
+        if snapshot['error_rate'] > self.error_rate_threshold:
+            return False
+        return snapshot['p95'] is None or snapshot['p95'] <= latency_budget
+
+    def timeout(self, task: str) -> Optional[float]:
+        """Seconds a single call for a task may take before it fails over"""
+        return self.route(task).latency_budget * self.timeout_factor if self.timeout_factor else None
+
+    def run(self, task: str, messages: List[Dict[str, str]]) -> Tuple[str, str]:
+        """
+        Run a chat completion for a task
+
+        Args:
+            task: Task name, e.g. 'cover_letter'
+            messages: Chat messages in the Bytez format
+
+        Returns:
+            Tuple of (text output, model id that produced it)
+
+        Raises:
+            ModelError: If every model in the task's chain failed
+        """
+        chain = self.chain(task)
+        timeout = self.timeout(task)
+        errors = []
+        for model_id in chain:
+            if self._abandoned >= self.max_abandoned_calls:
+                log.warning('failover.saturated', task=task, model=model_id, abandoned=self._abandoned)
+                errors.append(f"{model_id}: not tried, {self._abandoned} timed-out calls still running")
+                break
+            self._note_skip(task, model_id, errors)
+            started = time.perf_counter()
+            try:
+                response = self._call(model_id, messages, timeout)
+                text = self._response_text(response)
+            except Exception as e:
+                self._record_failure(task, model_id, chain, started, e, errors)
+                continue
+            self._record_success(task, model_id, started)
+            return text, model_id
+
+        raise ModelError(f"All models failed for {task}: {'; '.join(errors)}")
+
+    def run_text(self, task: str, prompt: str) -> str:
+        """Send a single-message prompt for a task and return the text output"""
+        return self.run(task, [{"role": "user", "content": prompt}])[0]
+
+    async def arun(self, task: str, messages: List[Dict[str, str]]) -> Tuple[str, str]:
+        """
+        Async variant of run(); waiting for the provider does not hold a thread
+
+        Raises:
+            ModelError: If every model in the task's chain failed
+            RuntimeError: If the router was built without an async model factory
+        """
+        if self.async_model_factory is None:
+            raise RuntimeError("ModelRouter was created without async_model_factory")
+        if self._async_slots is None:
+            self._async_slots = asyncio.Semaphore(self.max_async_concurrency)
+
+        chain = self.chain(task)
+        timeout = self.timeout(task)
+        errors = []
+        for model_id in chain:
+            self._note_skip(task, model_id, errors)
+            started = time.perf_counter()
+            try:
+                async with self._async_slots:
+                    with self._busy(), MODEL_IN_FLIGHT.track(labels={'model': model_id}):
+                        handle = self._get_model(model_id, self.async_model_factory, self._async_models)
+                        try:
+                            response = await asyncio.wait_for(handle.run(messages), timeout)
+                        except asyncio.TimeoutError:
+                            raise ModelTimeout(f"no response after {timeout:.0f}s")
+                text = self._response_text(response)
+            except Exception as e:
+                self._record_failure(task, model_id, chain, started, e, errors)
+                continue
+            self._record_success(task, model_id, started)
+            return text, model_id
+
+        raise ModelError(f"All models failed for {task}: {'; '.join(errors)}")
+
+    async def arun_text(self, task: str, prompt: str) -> str:
+        return (await self.arun(task, [{"role": "user", "content": prompt}]))[0]
+
+    def _call(self, model_id: str, messages: List[Dict[str, str]], timeout: Optional[float]) -> Any:
+        """
+        One provider call, given up on after timeout seconds
+
+        The sync SDK has no timeout of its own, so a timed call runs on the
+        shared call pool. One that times out while still queued is cancelled;
+        one already talking to the provider is counted as abandoned until it
+        finishes, and still counts as in flight.
+        """
+        def call() -> Any:
+            with self._slots, self._busy(), MODEL_IN_FLIGHT.track(labels={'model': model_id}):
+                return self._get_model(model_id).run(messages)
+
+        if not timeout:
+            return call()
+        future = self._call_pool.submit(call)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeout:
+            if not future.cancel():
+                self._abandon(future)
+            raise ModelTimeout(f"no response after {timeout:.0f}s")
+
+    def _abandon(self, future: Future) -> None:
+        with self._lock:
+            self._abandoned += 1
+        MODEL_ABANDONED.inc()
+
+        def settled(_: Future) -> None:
+            with self._lock:
+                self._abandoned -= 1
+            MODEL_ABANDONED.dec()
+
+        future.add_done_callback(settled)
+
+    @property
+    def abandoned(self) -> int:
+        """Timed-out sync calls still running on the provider"""
+        return self._abandoned
+
+    @property
+    def in_flight(self) -> int:
+        """Model calls currently waiting on the provider, sync and async"""
+        return self._in_flight
+
+    @contextlib.contextmanager
+    def _busy(self) -> Iterator[None]:
+        with self._lock:
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def _note_skip(self, task: str, model_id: str, errors: List[str]) -> None:
+        preferred = self.tier_models.get(self.route(task).tier)
+        if model_id != preferred and not errors:
+            log.warning('failover.health', task=task, skipped=preferred, model=model_id)
+            MODEL_FAILOVERS.inc(labels={'task': task, 'reason': 'health'})
+
+    @staticmethod
+    def _response_text(response: Any) -> str:
+        error = getattr(response, 'error', None)
+        if error or getattr(response, 'output', '') is None:
+            raise ModelError(error or "no output")
+        text = extract_model_text(response)
+        if not text or not text.strip():
+            raise ModelError("empty output")
+        return text
+
+    def _record_success(self, task: str, model_id: str, started: float) -> None:
+        elapsed = time.perf_counter() - started
+        self._get_stats(model_id).record(elapsed, ok=True)
+        MODEL_CALL_SECONDS.observe(elapsed, labels={'model': model_id, 'task': task, 'outcome': 'ok'})
+        STAGE_SECONDS.observe(elapsed, labels={'stage': 'model_call'})
+
+    def _record_failure(
+        self,
+        task: str,
+        model_id: str,
+        chain: List[str],
+        started: float,
+        error: Exception,
+        errors: List[str]
+    ) -> None:
+        elapsed = time.perf_counter() - started
+        self._get_stats(model_id).record(elapsed, ok=False)
+        MODEL_CALL_SECONDS.observe(elapsed, labels={'model': model_id, 'task': task, 'outcome': 'error'})
+        STAGE_SECONDS.observe(elapsed, labels={'stage': 'model_call'})
+        MODEL_ERRORS.inc(labels={'model': model_id, 'task': task})
+        log.warning('call.failed', task=task, model=model_id, seconds=round(elapsed, 2), error=str(error))
+        errors.append(f"{model_id}: {error}")
+        if model_id != chain[-1]:
+            MODEL_FAILOVERS.inc(labels={'task': task, 'reason': 'error'})
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'tiers': self.tier_models,
+            'inFlight': self._in_flight,
+            'abandoned': self._abandoned,
+            'routes': {task: {'tier': r.tier, 'latencyBudget': r.latency_budget} for task, r in self.routes.items()},
+            'models': {model_id: stats.snapshot() for model_id, stats in list(self._stats.items())}
+        }
+
+    def _get_model(
+        self,
+        model_id: str,
+        factory: Optional[Callable[[str], Any]] = None,
+        handles: Optional[Dict[str, Any]] = None
+    ) -> Any:
+        factory = factory or self.model_factory
+        handles = self._models if handles is None else handles
+        with self._lock:
+            handle = handles.get(model_id)
+            if handle is None:
+                handle = handles[model_id] = factory(model_id)
+            return handle
+
+    def _get_stats(self, model_id: str) -> ModelStats:
+        with self._lock:
+            stats = self._stats.get(model_id)
+            if stats is None:
+                stats = self._stats[model_id] = ModelStats(self.window_seconds)
+            return stats
+
+
+def extract_model_text(response: Any) -> str:
+    """Pull the text content out of a Bytez response in any of its shapes"""
+    if hasattr(response, 'output') and isinstance(response.output, dict):
+        return response.output.get('content', '')
+    elif isinstance(response, dict) and 'output' in response:
+        return response['output'].get('content', '')
+    elif hasattr(response, 'content'):
+        return response.content
+    return str(response)
@@ -0,0 +1,214 @@
+"""
+Direct OOXML Writer
+Emits WordprocessingML without building a python-docx object tree and streams the zip
+"""
+import io
+import re
+import zipfile
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from docx_renderer import sanitize_text
+from metrics import timed
+
+
+DOCUMENT_PART = 'word/document.xml'
+
+# Characters lxml refuses in text nodes; tab, CR and LF never reach <w:t>
+_INVALID_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]')
+_RUN_SPLIT = re.compile(r'(\t|\r|\n)')
+_ESCAPES = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;'})
+
+
+def _text_xml(text: str) -> str:
+    """Serialize run text the way python-docx does: <w:t>, <w:tab/> and <w:br/>"""
+    if _INVALID_XML_CHARS.search(text):
+        raise ValueError('All strings must be XML compatible: Unicode or ASCII, no NULL bytes or control characters')
+    out = []
+    for piece in _RUN_SPLIT.split(text):
+        if not piece:
+            continue
+        if piece == '\t':
+            out.append('<w:tab/>')
+        elif piece in '\r\n':
+            out.append('<w:br/>')
+        elif len(piece.strip()) < len(piece):
+            out.append(f'<w:t xml:space="preserve">{piece.translate(_ESCAPES)}</w:t>')
+        else:
+            out.append(f'<w:t>{piece.translate(_ESCAPES)}</w:t>')
+    return ''.join(out)
+
+
+def run_xml(text: str, bold: bool = False, size_half_points: Optional[int] = None) -> str:
+    props = ('<w:b/>' if bold else '') + (f'<w:sz w:val="{size_half_points}"/>' if size_half_points else '')
+    return f"<w:r>{f'<w:rPr>{props}</w:rPr>' if props else ''}{_text_xml(text) if text else ''}</w:r>"
+
+
+def paragraph_xml(
+    runs: str = '',
+    style_id: Optional[str] = None,
+    center: bool = False,
+    space_after_twips: Optional[int] = None
+) -> str:
+    props = (
+        (f'<w:pStyle w:val="{style_id}"/>' if style_id else '')
+        + (f'<w:spacing w:after="{space_after_twips}"/>' if space_after_twips is not None else '')
+        + ('<w:jc w:val="center"/>' if center else '')
+    )
+    inner = (f'<w:pPr>{props}</w:pPr>' if props else '') + runs
+    return f'<w:p>{inner}</w:p>' if inner else '<w:p/>'
+
+
+def text_paragraph_xml(text: str, style_id: Optional[str] = None) -> str:
+    """Equivalent of python-docx doc.add_paragraph(text, style)"""
+    return paragraph_xml(run_xml(text) if text else '', style_id=style_id)
+
+
+class StreamSink(io.RawIOBase):
+    """Unseekable sink; zipfile falls back to data descriptors and never rewinds"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> List[bytes]:
+        chunks, self._chunks = self._chunks, []
+        return chunks
+
+
+class OoxmlWriter:
+    """
+    Write DOCX files by emitting document.xml directly
+
+    All other package parts (styles, numbering, theme, settings, ...) are
+    copied verbatim from a pre-styled base template, so the output matches
+    what python-docx produces while skipping its object model entirely.
+    """
+
+    def __init__(self, template_docx: bytes, style_ids: Dict[str, str]):
+        """
+        Args:
+            template_docx: Base template package, e.g. DocxRenderer.template_bytes()
+            style_ids: Paragraph style name to style id, e.g. {'List Bullet': 'ListBullet'}
+        """
+        with zipfile.ZipFile(io.BytesIO(template_docx)) as template:
+            self._parts = [(info.filename, template.read(info.filename)) for info in template.infolist()]
+
+        document = dict(self._parts)[DOCUMENT_PART].decode('utf-8')
+        # New paragraphs go where python-docx inserts them: just before the body's sectPr
+        split_at = document.rfind('<w:sectPr')
+        if split_at == -1:
+            split_at = document.rfind('</w:body>')
+        self._document_head = document[:split_at]
+        self._document_tail = document[split_at:]
+        self._style_ids = style_ids
+
+    @classmethod
+    def from_renderer(cls, renderer) -> 'OoxmlWriter':
+        return cls(renderer.template_bytes(), renderer.style_ids)
+
+    @timed('render')
+    def resume_body(self, resume: Dict[str, Any]) -> List[str]:
+        """
+        Build the body paragraphs for a resume, mirroring DocxRenderer.render_resume
+
+        Args:
+            resume: Resume in the frontend shape (personalInfo + sections)
+
+        Returns:
+            List of <w:p> XML fragments
+        """
+        body = []
+
+        personal = resume.get('personalInfo', {})
+        name = personal.get('name', 'Your Name')
+        body.append(paragraph_xml(run_xml(name, bold=True, size_half_points=32), center=True))
+
+        contact_info = []
+        if personal.get('email'): contact_info.append(personal['email'])
+        if personal.get('phone'): contact_info.append(personal['phone'])
+        if personal.get('location'): contact_info.append(personal['location'])
+        if personal.get('linkedin'): contact_info.append(personal['linkedin'])
+
+        if contact_info:
+            body.append(paragraph_xml(run_xml(' | '.join(contact_info)), center=True, space_after_twips=240))
+
+        heading_id = self._style_ids['Heading 2']
+        bullet_id = self._style_ids['List Bullet']
+
+        for section in resume.get('sections', []):
+            body.append(text_paragraph_xml(section.get('title', '').upper(), heading_id))
+
+            if section.get('id') == 'summary' or section.get('content'):
+                body.append(text_paragraph_xml(section.get('content', '')))
+
+            elif section.get('id') == 'skills':
+                items = section.get('items', [])
+                body.append(text_paragraph_xml(', '.join(items) if isinstance(items, list) else str(items)))
+
+            elif section.get('items'):
+                for item in section.get('items', []):
+                    title = item.get('role') or item.get('title') or item.get('degree') or ''
+                    company = item.get('company') or item.get('school') or item.get('subtitle') or ''
+                    date = item.get('startDate') or item.get('year') or ''
+                    if item.get('endDate'): date += f" - {item.get('endDate')}"
+
+                    runs = run_xml(title, bold=True)
+                    if company: runs += run_xml(f" | {company}")
+                    if date: runs += run_xml(f" | {date}")
+                    body.append(paragraph_xml(runs))
+
+                    if item.get('bullets'):
+                        for bullet in item.get('bullets', []):
+                            body.append(text_paragraph_xml(bullet, bullet_id))
+
+                    if item.get('description'):
+                        body.append(text_paragraph_xml(item.get('description')))
+
+        return body
+
+    @staticmethod
+    @timed('render')
+    def cover_letter_body(text: str) -> List[str]:
+        """Body paragraphs for a cover letter, mirroring DocxRenderer.render_cover_letter"""
+        return [text_paragraph_xml(sanitize_text(line.strip())) for line in text.split('\n')]
+
+    def stream(self, body: Iterable[str]) -> Iterator[bytes]:
+        """
+        Stream a complete DOCX package, yielding zip bytes as they are produced
+
+        Args:
+            body: <w:p> XML fragments, in document order
+
+        Yields:
+            Chunks of the zip archive
+        """
+        sink = StreamSink()
+        with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as package:
+            for name, data in self._parts:
+                if name != DOCUMENT_PART:
+                    package.writestr(name, data)
+                    yield from sink.drain()
+                    continue
+
+                with package.open(DOCUMENT_PART, 'w') as document:
+                    document.write(self._document_head.encode('utf-8'))
+                    for fragment in body:
+                        document.write(fragment.encode('utf-8'))
+                        yield from sink.drain()
+                    document.write(self._document_tail.encode('utf-8'))
+                yield from sink.drain()
+        yield from sink.drain()
+
+    def stream_resume(self, resume: Dict[str, Any]) -> Iterator[bytes]:
+        # Build the body eagerly so invalid input fails before any byte is sent
+        return self.stream(self.resume_body(resume))
+
+    def stream_cover_letter(self, text: str) -> Iterator[bytes]:
+        return self.stream(self.cover_letter_body(text))
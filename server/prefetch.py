@@ -0,0 +1,289 @@
+"""
+Speculative Prefetch
+Runs resume generation in the background for jobs the user is looking at, so the later request is a cache hit
+"""
+import asyncio
+import hashlib
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from cache import LRUCache
+from logs import get_logger
+from metrics import registry
+
+
+log = get_logger('prefetch')
+
+PREFETCHES = registry.counter('resume_prefetches_total', 'Speculative generations by outcome')
+PREFETCH_HITS = registry.counter('resume_prefetch_hits_total', 'Interactive requests answered by a prefetch, by how')
+
+
+def generation_key(parts: Iterable[Any]) -> str:
+    """Content hash of everything that determines a generation's output"""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(str(part if part is not None else '').encode('utf-8'))
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+
+@dataclass
+class PrefetchJob:
+    """One queued or running speculative generation"""
+    key: str
+    user: str
+    created: float
+    status: str = 'queued'
+    started: Optional[float] = None
+    future: Optional[Future] = None
+    cancelled: threading.Event = field(default_factory=threading.Event)
+
+
+class Prefetcher:
+    """
+    Low-priority background generation into a take-once result cache
+
+    Jobs run on a small dedicated pool, separate from request threads, and
+    each one waits until has_capacity() reports spare model capacity before it
+    starts; a job that cannot start within max_wait_seconds is dropped.
+    Each user may have at most per_user jobs outstanding: a new one replaces
+    that user's oldest queued job, since the user has moved on to another
+    posting. Results are taken, not read, by the interactive request so a
+    deliberate "regenerate" still produces a fresh variant. An interactive
+    request only waits on a running job whose expected time left, from a
+    running average of past generations, fits in its wait; otherwise
+    generating afresh is the quicker answer.
+    """
+
+    def __init__(
+        self,
+        has_capacity: Callable[[], bool],
+        cache: Optional[LRUCache] = None,
+        max_workers: int = 1,
+        per_user: int = 2,
+        max_pending: int = 64,
+        max_wait_seconds: float = 30.0,
+        poll_seconds: float = 0.2
+    ):
+        """
+        Args:
+            has_capacity: Returns True when a speculative model call would not delay interactive ones
+            cache: Finished results; a private one with a 15 minute TTL is created when omitted
+            max_workers: Speculative generations running at once
+            per_user: Outstanding jobs allowed per user
+            max_pending: Outstanding jobs allowed in total
+            max_wait_seconds: How long a job may wait for idle capacity before it is dropped
+            poll_seconds: Capacity check interval while waiting
+        """
+        self.has_capacity = has_capacity
+        self.cache = cache if cache is not None else LRUCache(max_entries=512, ttl_seconds=900, name='resume_prefetch')
+        self.max_workers = max_workers
+        self.per_user = per_user
+        self.max_pending = max_pending
+        self.max_wait_seconds = max_wait_seconds
+        self.poll_seconds = poll_seconds
+        self._jobs: Dict[str, PrefetchJob] = {}
+        # Running average of generation time, None until one has finished
+        self._typical_seconds: Optional[float] = None
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='prefetch')
+            return self._executor
+
+    def submit(self, key: str, user: str, generate: Callable[[], Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        Queue a speculative generation unless its result is already cached or on the way
+
+        Args:
+            key: generation_key() of the request the user is expected to make
+            user: Id the per-user cap is counted against
+            generate: Runs the generation; returns the response payload, or None when it is not worth caching
+
+        Returns:
+            {'id': key, 'status': 'ready' | 'queued' | 'running' | 'skipped', 'reason'?: str}
+        """
+        if key in self.cache:
+            PREFETCHES.inc(labels={'outcome': 'deduplicated'})
+            return {'id': key, 'status': 'ready'}
+        executor = self._get_executor()
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None:
+                PREFETCHES.inc(labels={'outcome': 'deduplicated'})
+                return {'id': key, 'status': job.status}
+            mine = sorted((j for j in self._jobs.values() if j.user == user), key=lambda j: j.created)
+            if len(mine) >= self.per_user:
+                queued = [j for j in mine if j.status == 'queued']
+                if not queued:
+                    PREFETCHES.inc(labels={'outcome': 'user_cap'})
+                    return {'id': key, 'status': 'skipped', 'reason': 'user_cap'}
+                self._cancel(queued[0], 'replaced')
+            if len(self._jobs) >= self.max_pending:
+                PREFETCHES.inc(labels={'outcome': 'queue_full'})
+                return {'id': key, 'status': 'skipped', 'reason': 'queue_full'}
+            job = self._jobs[key] = PrefetchJob(key=key, user=user, created=time.monotonic())
+            job.future = executor.submit(self._run, job, generate)
+        PREFETCHES.inc(labels={'outcome': 'queued'})
+        return {'id': key, 'status': 'queued'}
+
+    def status(self, key: str) -> Optional[str]:
+        """'queued', 'running' or 'ready', or None when the key is unknown or its result was taken"""
+        with self._lock:
+            job = self._jobs.get(key)
+        if job is not None:
+            return job.status
+        return 'ready' if key in self.cache else None
+
+    def cancel(self, key: str, user: Optional[str] = None) -> bool:
+        """
+        Cancel a queued job, or drop a finished result nobody will use
+
+        A job already calling the model runs to completion; its result is
+        discarded. Returns False when there is nothing of this user's to
+        cancel.
+        """
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None:
+                if user is not None and job.user != user:
+                    return False
+                self._cancel(job, 'cancelled')
+                return True
+        return self.cache.pop(key) is not None
+
+    def _cancel(self, job: PrefetchJob, outcome: str) -> None:
+        # Called with self._lock held
+        job.cancelled.set()
+        if job.future is not None:
+            job.future.cancel()
+        self._jobs.pop(job.key, None)
+        PREFETCHES.inc(labels={'outcome': outcome})
+
+    def _run(self, job: PrefetchJob, generate: Callable[[], Optional[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+        deadline = job.created + self.max_wait_seconds
+        while not self.has_capacity():
+            if time.monotonic() >= deadline:
+                self._finish(job, 'busy')
+                return None
+            if job.cancelled.wait(self.poll_seconds):
+                return None
+        with self._lock:
+            if job.cancelled.is_set():
+                return None
+            job.status = 'running'
+            job.started = time.monotonic()
+
+        started = time.perf_counter()
+        try:
+            payload = generate()
+        except Exception as e:
+            log.warning('prefetch.failed', key=job.key, error=str(e))
+            self._finish(job, 'failed')
+            return None
+        if job.cancelled.is_set():
+            # Counted when it was cancelled; a request that joined it still gets the result
+            return payload
+        if payload is None:
+            self._finish(job, 'uncacheable')
+            return None
+        self.cache.set(job.key, payload)
+        seconds = time.perf_counter() - started
+        with self._lock:
+            typical = self._typical_seconds
+            self._typical_seconds = seconds if typical is None else 0.8 * typical + 0.2 * seconds
+        log.info('prefetch.ready', key=job.key, seconds=round(seconds, 2))
+        self._finish(job, 'ready')
+        return payload
+
+    def _finish(self, job: PrefetchJob, outcome: str) -> None:
+        with self._lock:
+            if self._jobs.get(job.key) is job:
+                del self._jobs[job.key]
+        PREFETCHES.inc(labels={'outcome': outcome})
+
+    def _claim(self, key: str, wait: float) -> Optional[Future]:
+        """
+        Take a cached result's place in line: cancels a queued job, returns a
+        running one's future when it is expected to finish within wait seconds
+        """
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is None:
+                return None
+            if job.status == 'queued':
+                # The interactive request is about to do the same work; speculation has lost its point
+                self._cancel(job, 'superseded')
+                return None
+            if wait <= 0 or job.started is None:
+                return None
+            if self._typical_seconds is not None:
+                remaining = self._typical_seconds - (time.monotonic() - job.started)
+                if remaining > wait:
+                    PREFETCH_HITS.inc(labels={'how': 'not_joined'})
+                    return None
+            return job.future
+
+    def take(self, key: str, wait: float = 0.0) -> Optional[Dict[str, Any]]:
+        """
+        Remove and return a prefetched result for an interactive request
+
+        Args:
+            key: generation_key() of the request
+            wait: Most seconds to wait for a prefetch of this key that is already
+                running; one not expected to finish in time is not waited on
+
+        Returns:
+            The response payload, or None when the caller should generate it
+        """
+        payload = self.cache.pop(key)
+        if payload is not None:
+            PREFETCH_HITS.inc(labels={'how': 'cached'})
+            return payload
+        future = self._claim(key, wait)
+        if future is None:
+            return None
+        try:
+            payload = future.result(timeout=wait)
+        except FutureTimeout:
+            return None
+        return self._joined(key, payload)
+
+    async def atake(self, key: str, wait: float = 0.0) -> Optional[Dict[str, Any]]:
+        """Async variant of take(); waiting on a running prefetch does not hold a thread"""
+        payload = self.cache.pop(key)
+        if payload is not None:
+            PREFETCH_HITS.inc(labels={'how': 'cached'})
+            return payload
+        future = self._claim(key, wait)
+        if future is None:
+            return None
+        try:
+            payload = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout=wait)
+        except asyncio.TimeoutError:
+            return None
+        return self._joined(key, payload)
+
+    def _joined(self, key: str, payload: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        if payload is None:
+            return None
+        self.cache.pop(key)
+        PREFETCH_HITS.inc(labels={'how': 'joined'})
+        return payload
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return {
+            'queued': sum(1 for job in jobs if job.status == 'queued'),
+            'running': sum(1 for job in jobs if job.status == 'running'),
+            'users': len({job.user for job in jobs}),
+            'cache': self.cache.stats()
+        }
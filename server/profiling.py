@@ -0,0 +1,321 @@
+"""
+Request Profiling
+Opt-in sampled call profiles and allocation stats for single requests, stored on disk
+"""
+import asyncio
+import hmac
+import json
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from logs import get_logger
+from metrics import registry
+
+
+PROFILES_CAPTURED = registry.counter('profiles_captured_total', 'Request profiles written, by endpoint and trigger')
+
+# Flask endpoints that may be profiled: uploads, generation and the DOCX exporters
+PROFILED_ENDPOINTS = frozenset({
+    'upload_resume',
+    'generate_resume',
+    'download_docx',
+    'download_cover_letter_docx',
+    'bulk_export',
+})
+
+MAX_STACK_DEPTH = 128
+
+log = get_logger('profile')
+
+
+class _Tracemalloc:
+    """Reference-counted tracemalloc so overlapping profiles share one trace session"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._users = 0
+        self._owned = False
+
+    def acquire(self) -> None:
+        with self._lock:
+            if self._users == 0:
+                # Leave a session someone else started (e.g. python -X tracemalloc) running
+                self._owned = not tracemalloc.is_tracing()
+                if self._owned:
+                    tracemalloc.start()
+            self._users += 1
+
+    def release(self) -> None:
+        with self._lock:
+            self._users -= 1
+            if self._users == 0 and self._owned:
+                tracemalloc.stop()
+
+
+_tracemalloc = _Tracemalloc()
+
+
+class Profile:
+    """
+    Profile of one request while it runs
+
+    A sampler thread reads the request thread's current stack from
+    sys._current_frames() every interval and counts identical stacks, which
+    gives a statistical call profile without tracing every call. Allocations
+    come from tracemalloc snapshots taken at start and stop; tracemalloc is
+    process-wide, so requests running at the same time show up there too.
+    The global peak is shared with them as well, so the peak reported here is
+    the highest traced total the sampler saw, less the total at start.
+
+    Under the ASGI server the async routes run on the event loop thread.
+    Their stacks then include every other request the loop served, and work
+    they hand to thread pools is not sampled, so such reports are marked
+    'sampled': 'event-loop' instead of 'request-thread'.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        method: str,
+        trigger: str,
+        thread_id: int,
+        interval_seconds: float,
+        event_loop: bool = False
+    ):
+        self.id = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.endpoint = endpoint
+        self.method = method
+        self.trigger = trigger
+        self.thread_id = thread_id
+        self.event_loop = event_loop
+        self.interval_seconds = interval_seconds
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._peak_bytes = 0
+        self._stopped = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, name=f"profiler-{self.id}", daemon=True)
+        self._finished = False
+        self._finish_lock = threading.Lock()
+
+        _tracemalloc.acquire()
+        try:
+            self._start_bytes = self._peak_bytes = tracemalloc.get_traced_memory()[0]
+            self._start_snapshot = tracemalloc.take_snapshot()
+        except BaseException:
+            _tracemalloc.release()
+            raise
+        self._started = time.perf_counter()
+        self._sampler.start()
+
+    def _sample(self) -> None:
+        while not self._stopped.wait(self.interval_seconds):
+            self._peak_bytes = max(self._peak_bytes, tracemalloc.get_traced_memory()[0])
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def finish(self, status: int, top: int = 30) -> Optional[Dict[str, Any]]:
+        """
+        Stop sampling and summarise the profile
+
+        Args:
+            status: Response status code
+            top: Number of functions and allocation sites to keep
+
+        Returns:
+            Profile report, or None if the profile was already finished
+        """
+        with self._finish_lock:
+            if self._finished:
+                return None
+            self._finished = True
+
+        self._stopped.set()
+        self._sampler.join()
+        seconds = time.perf_counter() - self._started
+        try:
+            current = tracemalloc.get_traced_memory()[0]
+            # Leave out the profiler's own bookkeeping
+            own = (tracemalloc.Filter(False, __file__), tracemalloc.Filter(False, tracemalloc.__file__))
+            allocations = tracemalloc.take_snapshot().filter_traces(own).compare_to(
+                self._start_snapshot.filter_traces(own), 'lineno'
+            )
+        finally:
+            _tracemalloc.release()
+        peak = max(self._peak_bytes, current) - self._start_bytes
+
+        # Self time counts the innermost frame of each stack; total time every function on it
+        self_counts: Counter = Counter()
+        total_counts: Counter = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(';')
+            self_counts[frames[-1].rsplit(':', 1)[0]] += count
+            for function in set(frame.rsplit(':', 1)[0] for frame in frames):
+                total_counts[function] += count
+
+        return {
+            'id': self.id,
+            'endpoint': self.endpoint,
+            'method': self.method,
+            'status': status,
+            'trigger': self.trigger,
+            'sampled': 'event-loop' if self.event_loop else 'request-thread',
+            'seconds': round(seconds, 4),
+            'intervalMs': round(self.interval_seconds * 1000, 2),
+            'samples': self.samples,
+            'selfTop': [{'function': f, 'samples': n} for f, n in self_counts.most_common(top)],
+            'totalTop': [{'function': f, 'samples': n} for f, n in total_counts.most_common(top)],
+            'stacks': dict(self.stacks.most_common()),
+            'memory': {
+                'peakBytes': peak,
+                'netBytes': current - self._start_bytes,
+                'topAllocations': [
+                    {
+                        'site': str(stat.traceback),
+                        'sizeDiffBytes': stat.size_diff,
+                        'countDiff': stat.count_diff
+                    }
+                    for stat in allocations[:top]
+                ]
+            }
+        }
+
+
+class RequestProfiler:
+    """
+    Decides which requests to profile and stores their reports
+
+    A request is profiled when it carries the configured token in the
+    X-Profile header, or is picked by the sample rate. With neither
+    configured the profiler is disabled and the app installs no hooks.
+    """
+
+    def __init__(
+        self,
+        profile_dir: str,
+        token: str = '',
+        sample_rate: float = 0.0,
+        interval_seconds: float = 0.005,
+        max_profiles: int = 200,
+        endpoints: frozenset = PROFILED_ENDPOINTS
+    ):
+        """
+        Args:
+            profile_dir: Directory profile reports are written to
+            token: Secret expected in the X-Profile header; empty disables header triggers
+            sample_rate: Fraction of requests to profile without the header
+            interval_seconds: Time between stack samples
+            max_profiles: Reports kept on disk; the oldest are deleted first
+            endpoints: Flask endpoint names that may be profiled
+        """
+        self.profile_dir = profile_dir
+        self.token = token
+        self.sample_rate = sample_rate
+        self.interval_seconds = interval_seconds
+        self.max_profiles = max_profiles
+        self.endpoints = endpoints
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.token) or self.sample_rate > 0
+
+    def authorized(self, header: Optional[str]) -> bool:
+        return bool(self.token) and header is not None and hmac.compare_digest(header, self.token)
+
+    def trigger(self, endpoint: Optional[str], header: Optional[str]) -> Optional[str]:
+        """Why this request should be profiled ('header' or 'sample'), or None"""
+        if endpoint not in self.endpoints:
+            return None
+        if self.authorized(header):
+            return 'header'
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return 'sample'
+        return None
+
+    def start(self, endpoint: str, method: str, trigger: str) -> Profile:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            event_loop = False
+        else:
+            event_loop = True
+        return Profile(endpoint, method, trigger, threading.get_ident(), self.interval_seconds, event_loop)
+
+    def finish(self, profile: Profile, status: int) -> None:
+        report = profile.finish(status)
+        if report is None:
+            return
+        try:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            with open(self.path(profile.id), 'w', encoding='utf-8') as f:
+                json.dump(report, f)
+            self._prune()
+        except OSError as e:
+            log.error('write.failed', profile=profile.id, error=str(e))
+            return
+        PROFILES_CAPTURED.inc(labels={'endpoint': profile.endpoint, 'trigger': profile.trigger})
+        log.info('captured', profile=profile.id, endpoint=profile.endpoint, sampled=report['sampled'],
+                 seconds=report['seconds'], samples=report['samples'], peak_bytes=report['memory']['peakBytes'])
+
+    def path(self, profile_id: str) -> str:
+        return os.path.join(self.profile_dir, f"{profile_id}.json")
+
+    def load(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        # Ids are generated here; anything else (e.g. path separators) is not a profile
+        if not profile_id.replace('-', '').replace('T', '').isalnum():
+            return None
+        try:
+            with open(self.path(profile_id), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Stored profiles, newest first, without their stacks"""
+        summaries = []
+        for profile_id in self._profile_ids()[::-1]:
+            report = self.load(profile_id)
+            if report is not None:
+                summary = {
+                    key: report[key]
+                    for key in ('id', 'endpoint', 'method', 'status', 'trigger', 'seconds', 'samples')
+                }
+                # Reports written before event-loop marking were all request-thread samples
+                summary['sampled'] = report.get('sampled', 'request-thread')
+                summaries.append(summary)
+        return summaries
+
+    @staticmethod
+    def folded(report: Dict[str, Any]) -> str:
+        """Collapsed-stack text ("a;b;c 12" per line) for flame graph tools"""
+        return ''.join(f"{stack} {count}\n" for stack, count in report['stacks'].items())
+
+    def _profile_ids(self) -> List[str]:
+        try:
+            names = os.listdir(self.profile_dir)
+        except OSError:
+            return []
+        # Ids start with a timestamp, so name order is age order
+        return sorted(name[:-5] for name in names if name.endswith('.json'))
+
+    def _prune(self) -> None:
+        profile_ids = self._profile_ids()
+        for profile_id in profile_ids[:max(0, len(profile_ids) - self.max_profiles)]:
+            try:
+                os.remove(self.path(profile_id))
+            except OSError:
+                pass
@@ -0,0 +1,432 @@
+"""
+Prompt Assembly
+Reusable prompt templates with local token accounting and cache-friendly ordering
+"""
+import functools
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from logs import get_logger
+from metrics import TOKEN_BUCKETS, registry
+
+
+# Word pieces of up to four characters plus standalone punctuation track
+# BPE token counts closely enough for budgeting without a tokenizer.
+_TOKEN_RE = re.compile(r"\w{1,4}|[^\w\s]")
+_BOUNDARY_RE = re.compile(r"(?:\n|[.!?;,]\s)")
+
+TRUNCATION_MARKER = "\n[...truncated...]"
+
+# Texts at least this long have their counts cached: profiles, job descriptions and
+# the static instructions recur across requests as the very same strings
+_COUNT_CACHE_MIN_CHARS = 1024
+
+PROMPT_TOKENS = registry.histogram(
+    'prompt_tokens', 'Estimated prompt tokens per template part', buckets=TOKEN_BUCKETS
+)
+PROMPT_TRIMS = registry.counter('prompt_trimmed_total', 'Prompt parts trimmed to fit their budget')
+
+log = get_logger('prompt')
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of model tokens in a piece of text
+
+    Args:
+        text: Prompt text
+
+    Returns:
+        Approximate token count
+    """
+    if not text:
+        return 0
+    if len(text) < _COUNT_CACHE_MIN_CHARS:
+        return len(_TOKEN_RE.findall(text))
+    return _count_tokens(text)
+
+
+@functools.lru_cache(maxsize=256)
+def _count_tokens(text: str) -> int:
+    return len(_TOKEN_RE.findall(text))
+
+
+def trim_to_budget(text: str, budget: int, strategy: str = 'tail') -> Tuple[str, bool]:
+    """
+    Shorten text to fit a token budget, cutting at line or sentence boundaries
+
+    Args:
+        text: Text to trim
+        budget: Maximum estimated tokens
+        strategy: 'tail' drops the end, 'middle' keeps the head and the end,
+            'json' drops whole list entries so a JSON document stays valid
+            (text that is not JSON is trimmed like 'tail')
+
+    Returns:
+        Tuple of (trimmed text, whether anything was removed)
+    """
+    tokens = estimate_tokens(text)
+    if tokens <= budget:
+        return text, False
+    if strategy == 'json':
+        trimmed = _trim_json(text, budget)
+        if trimmed is not None:
+            return trimmed, True
+
+    # Scale the character length by the token overshoot, then back off until it fits
+    keep_chars = int(len(text) * budget / tokens)
+    while keep_chars > 0:
+        if strategy == 'middle':
+            head_chars = keep_chars * 2 // 3
+            head = _cut_at_boundary(text[:head_chars])
+            tail = text[len(text) - (keep_chars - head_chars):]
+            candidate = head + TRUNCATION_MARKER + "\n" + tail
+        else:
+            candidate = _cut_at_boundary(text[:keep_chars]) + TRUNCATION_MARKER
+        if estimate_tokens(candidate) <= budget:
+            return candidate, True
+        keep_chars = int(keep_chars * 0.9)
+    return TRUNCATION_MARKER.strip(), True
+
+
+def _trim_json(text: str, budget: int) -> Optional[str]:
+    """
+    Shrink a JSON document to a token budget by whole entries
+
+    Each step drops the last entry of the largest list, preferring lists
+    that keep at least one entry, so older roles go before a section is
+    emptied. Long strings are only shortened, at a sentence boundary, once
+    no list entry is left to drop.
+    """
+    try:
+        doc = json.loads(text)
+    except ValueError:
+        return None
+    if isinstance(doc, str):
+        # A JSON string, e.g. a summary section: trim the text, keep the quoting valid
+        return json.dumps(trim_to_budget(doc, max(0, budget - 2))[0])
+    if not isinstance(doc, (dict, list)):
+        return None
+    while True:
+        candidate = json.dumps(doc, separators=(',', ':'))
+        tokens = estimate_tokens(candidate)
+        # Characters to drop, scaled from the token overshoot as in trim_to_budget
+        if tokens <= budget or not _shrink_json(doc, len(candidate) - len(candidate) * budget // tokens):
+            return candidate
+
+
+def _shrink_json(doc: Any, excess: int) -> bool:
+    lists: List[List[Any]] = []
+    strings: List[Tuple[Any, Any, str]] = []
+
+    def walk(value: Any) -> None:
+        children = value.items() if isinstance(value, dict) else enumerate(value)
+        if isinstance(value, list) and value:
+            lists.append(value)
+        for key, child in children:
+            if isinstance(child, (dict, list)):
+                walk(child)
+            elif isinstance(child, str) and len(child) > 200:
+                strings.append((value, key, child))
+
+    def size(value: Any) -> int:
+        return len(json.dumps(value, separators=(',', ':')))
+
+    walk(doc)
+    # Sizes of enclosing lists go stale as entries are dropped; the caller re-measures after each round
+    sizes = {id(entries): size(entries) for entries in lists}
+    removed = 0
+    while removed < excess:
+        candidates = [entries for entries in lists if len(entries) > 1] or [entries for entries in lists if entries]
+        if not candidates:
+            break
+        entries = max(candidates, key=lambda found: sizes[id(found)])
+        dropped = size(entries.pop()) + 1
+        sizes[id(entries)] -= dropped
+        removed += dropped
+    if removed:
+        return True
+    if strings:
+        parent, key, value = max(strings, key=lambda found: len(found[2]))
+        parent[key] = _cut_at_boundary(value[:len(value) // 2])
+        return True
+    return False
+
+
+def _cut_at_boundary(text: str) -> str:
+    """Drop a trailing partial line or sentence if a boundary is reasonably close"""
+    last = None
+    for match in _BOUNDARY_RE.finditer(text, len(text) // 2):
+        last = match
+    return text[:last.end()].rstrip() if last else text
+
+
+@dataclass(frozen=True)
+class PromptSlot:
+    """A variable region of a template"""
+    name: str
+    label: str
+    budget: Optional[int] = None
+    trim: str = 'tail'
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    """
+    Static instructions followed by ordered variable slots
+
+    The instruction text always comes first and slots are ordered from most
+    to least stable (candidate profile before job description before user
+    instructions), so repeated requests share the longest possible prefix and
+    provider-side prefix caching can apply.
+    """
+    name: str
+    instructions: str
+    slots: Tuple[PromptSlot, ...] = ()
+
+
+@dataclass
+class AssembledPrompt:
+    """Rendered prompt plus its token accounting"""
+    template: str
+    text: str
+    breakdown: Dict[str, int] = field(default_factory=dict)
+    trimmed: List[str] = field(default_factory=list)
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(self.breakdown.values())
+
+
+class PromptAssembler:
+    """Render templates, enforce per-slot budgets and report token usage"""
+
+    @staticmethod
+    def assemble(template: PromptTemplate, **values: str) -> AssembledPrompt:
+        """
+        Render a template with the given slot values
+
+        Args:
+            template: Template to render
+            **values: Text for each slot, keyed by slot name
+
+        Returns:
+            AssembledPrompt with the final text and per-part token counts
+        """
+        instructions = template.instructions.strip()
+        parts = [instructions] if instructions else []
+        breakdown = {'static': estimate_tokens(instructions)}
+        trimmed = []
+
+        for slot in template.slots:
+            text = (values.get(slot.name) or '').strip()
+            tokens = estimate_tokens(text)
+            if slot.budget is not None and tokens > slot.budget:
+                text, _ = trim_to_budget(text, slot.budget, slot.trim)
+                trimmed.append(slot.name)
+                tokens = estimate_tokens(text)
+            parts.append(f"{slot.label}:\n{text}" if slot.label else text)
+            breakdown[slot.name] = tokens
+
+        prompt = AssembledPrompt(template=template.name, text="\n\n".join(parts), breakdown=breakdown, trimmed=trimmed)
+        PromptAssembler.report(prompt)
+        return prompt
+
+    @staticmethod
+    def report(prompt: AssembledPrompt) -> None:
+        for part, tokens in prompt.breakdown.items():
+            PROMPT_TOKENS.observe(tokens, labels={'template': prompt.template, 'part': part})
+        PROMPT_TOKENS.observe(prompt.total_tokens, labels={'template': prompt.template, 'part': 'total'})
+        for part in prompt.trimmed:
+            PROMPT_TRIMS.inc(labels={'template': prompt.template, 'part': part})
+        log.debug('assembled', template=prompt.template, tokens=prompt.total_tokens,
+                  breakdown=prompt.breakdown, trimmed=prompt.trimmed or None)
+
+
+RESUME_PARSE = PromptTemplate(
+    name='resume_parse',
+    instructions="""
+You are an expert resume parser. Your task is to extract structured information from ANY resume format.
+
+IMPORTANT PARSING RULES:
+1. Handle multi-column layouts - read left-to-right, top-to-bottom
+2. Ignore headers, footers, and page numbers
+3. Handle tables and formatted text
+4. Extract data even from minimal or sparse resumes
+5. If information is missing, use null or empty arrays (never skip required fields)
+6. Dates can be in any format (MM/YYYY, Month Year, etc.) - normalize if possible
+7. Skills can be in bullet lists, comma-separated, or paragraphs - extract ALL of them
+8. Experience bullets should be action-oriented achievements
+
+Return ONLY valid JSON in this EXACT structure:
+{
+    "personalInfo": {
+        "name": "Full Name (REQUIRED - find the largest/bolded text at top)",
+        "email": "email@example.com (extract from text)",
+        "phone": "Phone Number (extract from text, null if not found)",
+        "location": "City, State (extract from text, null if not found)",
+        "linkedin": "LinkedIn URL (null if not found)",
+        "github": "GitHub URL (null if not found)",
+        "title": "Current/Most Recent Job Title (null if not found)"
+    },
+    "sections": [
+        {
+            "id": "summary",
+            "title": "Professional Summary",
+            "content": "Extract summary/objective/profile section. If none, create brief one from experience. Max 3 sentences."
+        },
+        {
+            "id": "experience",
+            "title": "Experience",
+            "items": [
+                {
+                    "company": "Company Name",
+                    "position": "Job Title",
+                    "location": "City, State or null",
+                    "startDate": "YYYY or Month YYYY",
+                    "endDate": "YYYY or Month YYYY or Present",
+                    "bullets": ["Action verb + achievement/responsibility with metrics if available"]
+                }
+            ]
+        },
+        {
+            "id": "education",
+            "title": "Education",
+            "items": [
+                {
+                    "school": "University/Institution Name",
+                    "degree": "Degree Type (BS, MS, PhD, etc.)",
+                    "field": "Field of Study",
+                    "graduationDate": "YYYY"
+                }
+            ]
+        },
+        {
+            "id": "skills",
+            "title": "Skills",
+            "items": ["Skill1", "Skill2", "Skill3"]
+        }
+    ]
+}
+
+CRITICAL:
+- Return ONLY the JSON object, no explanations
+- Skills MUST be a flat array of strings
+- If a section is empty, include it with empty array/null
+- Extract as much data as possible from the text
+""",
+    # 15000 characters of dense resume text (down to ~2.1 characters per token) fit, as with the old character cut
+    slots=(PromptSlot('resume_text', 'Resume Text', budget=7000),)
+)
+
+RESUME_TAILOR_JSON = PromptTemplate(
+    name='resume_tailor_json',
+    instructions="""
+You are an expert resume writer. Create a tailored resume for the job described below.
+
+REQUIREMENTS:
+1. Extract relevant skills from BOTH the Job Description and the Candidate Profile.
+2. The 'skills' section MUST be a simple list of strings (e.g., ["Python", "React"]). NO OBJECTS.
+3. Tailor the Professional Summary to match the job.
+4. Highlight relevant experience.
+
+Return ONLY valid JSON in the following structure:
+{
+    "personalInfo": { ... },
+    "sections": [
+        { "id": "summary", "title": "Professional Summary", "content": "..." },
+        { "id": "skills", "title": "Skills", "items": ["Skill1", "Skill2"] },
+        { "id": "experience", "title": "Experience", "items": [ ... ] },
+        { "id": "education", "title": "Education", "items": [ ... ] },
+        { "id": "projects", "title": "Projects", "items": [ ... ] }
+    ]
+}
+""",
+    slots=(
+        PromptSlot('profile', 'CANDIDATE PROFILE', budget=6000, trim='json'),
+        PromptSlot('job_description', 'JOB DESCRIPTION', budget=3000),
+        PromptSlot('instructions', 'USER INSTRUCTIONS', budget=1000),
+    )
+)
+
+RESUME_TAILOR_FREEFORM = PromptTemplate(
+    name='resume_tailor_freeform',
+    instructions="""
+You are an expert resume writer. Create a tailored resume.
+Return the result as requested in the instructions.
+""",
+    slots=RESUME_TAILOR_JSON.slots
+)
+
+# Frontend-authored prompts are passed through, only measured and bounded
+CUSTOM_PROMPT = PromptTemplate(
+    name='resume_custom',
+    instructions='',
+    slots=(PromptSlot('input', '', budget=16000, trim='middle'),)
+)
+
+RESUME_SECTION = PromptTemplate(
+    name='resume_section',
+    instructions="""
+You are an expert ATS resume writer. Rewrite ONE section of a resume for the job below.
+""",
+    slots=(
+        PromptSlot('job_description', 'JOB DESCRIPTION', budget=3000),
+        PromptSlot('rules', 'SECTION RULES'),
+        PromptSlot('section', 'CURRENT SECTION', budget=3000, trim='json'),
+        PromptSlot('instructions', 'USER INSTRUCTIONS', budget=1000),
+    )
+)
+
+# Skeleton mode: the letter's fixed parts are rendered locally and only the
+# personalized middle is generated, so the output is a fraction of a full letter
+COVER_LETTER_BODY = PromptTemplate(
+    name='cover_letter_body',
+    instructions="""
+You are writing the middle of a cover letter. The greeting, the opening paragraph, the closing
+paragraph and the signature are already written.
+
+Write EXACTLY two short paragraphs, together under 170 words, showing why the candidate fits
+this job. Use only facts from the candidate highlights and weave in the matched keywords naturally.
+Do not write a greeting, sign-off, headings or placeholders. Separate the paragraphs with a blank line.
+""",
+    slots=(
+        PromptSlot('highlights', 'CANDIDATE HIGHLIGHTS', budget=600),
+        PromptSlot('job_description', 'JOB DESCRIPTION', budget=1500),
+        PromptSlot('instructions', 'USER INSTRUCTIONS', budget=300),
+    )
+)
+
+
+def cover_letter_prompt(details: str, emphasize: Optional[List[str]] = None) -> str:
+    """
+    Build the cover-letter prompt
+
+    Args:
+        details: Job and candidate details, as authored by the frontend or the pipeline
+        emphasize: Job keywords the candidate already covers
+
+    Returns:
+        Prompt text
+    """
+    prompt = f"Generate a professional cover letter based on the following details:\n{details}"
+    if emphasize:
+        prompt += f"\nEmphasize the candidate's experience with: {', '.join(emphasize)}"
+    return prompt
+
+
+# Sent after a reply that was cut off, with the partial reply as the assistant turn
+CONTINUE_OUTPUT = (
+    "Your previous reply was cut off. Continue it exactly where it stopped: output only the remaining "
+    "characters, without repeating anything already written and without code fences or commentary."
+)
+
+
+def continuation_messages(messages: List[Dict[str, str]], partial: str) -> List[Dict[str, str]]:
+    """Chat messages asking the model to finish its partial reply to messages"""
+    return messages + [
+        {"role": "assistant", "content": partial},
+        {"role": "user", "content": CONTINUE_OUTPUT},
+    ]
@@ -0,0 +1,356 @@
+"""
+Compact Resume Model
+Typed, slotted representation of parsed resumes with memoized derived views
+"""
+import hashlib
+import json
+import sys
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, List, Tuple, Union
+
+
+def _text(value: Any) -> str:
+    """Coerce a JSON scalar to a string, mapping null to empty"""
+    if value is None:
+        return ''
+    return value if isinstance(value, str) else str(value)
+
+
+def _text_tuple(values: Any, intern: bool = False) -> Tuple[str, ...]:
+    """Coerce a JSON list of scalars to a tuple of strings"""
+    if not isinstance(values, list):
+        return ()
+    items = [_text(v) for v in values if v is not None]
+    if intern:
+        items = [sys.intern(v) for v in items]
+    return tuple(items)
+
+
+def sanitize_skills_list(items: Any) -> List[str]:
+    """
+    Flatten model-produced skill items into a flat list of strings
+
+    Args:
+        items: Skills as returned by the model (strings, dicts, nested lists)
+
+    Returns:
+        Flat list of skill strings
+    """
+    clean_items = []
+    if isinstance(items, list):
+        for item in items:
+            if isinstance(item, str):
+                clean_items.append(item)
+            elif isinstance(item, dict):
+                # Extract ALL string values from the dict recursively
+                for key, val in item.items():
+                    if isinstance(val, str):
+                        clean_items.append(val)
+                    elif isinstance(val, list):
+                        clean_items.extend(sanitize_skills_list(val))
+                    elif isinstance(val, dict):
+                        # Handle nested dicts (e.g. { "skill": { "name": "Java" } })
+                        clean_items.extend(sanitize_skills_list([val]))
+            elif isinstance(item, list):
+                clean_items.extend(sanitize_skills_list(item))
+            else:
+                # Fallback for numbers/booleans -> stringify
+                if item is not None:
+                    clean_items.append(str(item))
+    return clean_items
+
+
+@dataclass(frozen=True, slots=True)
+class Experience:
+    """A single position in the experience section"""
+    position: str = ''
+    company: str = ''
+    location: str = ''
+    start_date: str = ''
+    end_date: str = ''
+    bullets: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_frontend(cls, item: Dict[str, Any]) -> 'Experience':
+        return cls(
+            position=_text(item.get('position', item.get('role', ''))),
+            company=_text(item.get('company', '')),
+            location=_text(item.get('location', '')),
+            start_date=_text(item.get('startDate', '')),
+            end_date=_text(item.get('endDate', '')),
+            bullets=_text_tuple(item.get('bullets', []))
+        )
+
+    @classmethod
+    def from_dict(cls, item: Dict[str, Any]) -> 'Experience':
+        return cls(
+            position=_text(item.get('position', '')),
+            company=_text(item.get('company', '')),
+            location=_text(item.get('location', '')),
+            start_date=_text(item.get('start_date', '')),
+            end_date=_text(item.get('end_date', '')),
+            bullets=_text_tuple(item.get('bullets', []))
+        )
+
+    def to_frontend(self) -> Dict[str, Any]:
+        return {
+            'position': self.position,
+            'company': self.company,
+            'location': self.location,
+            'startDate': self.start_date,
+            'endDate': self.end_date,
+            'bullets': list(self.bullets)
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'position': self.position,
+            'company': self.company,
+            'location': self.location,
+            'start_date': self.start_date,
+            'end_date': self.end_date,
+            'bullets': list(self.bullets)
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class Education:
+    """A single entry in the education section"""
+    degree: str = ''
+    school: str = ''
+    field: str = ''
+    graduation_date: str = ''
+
+    @classmethod
+    def from_frontend(cls, item: Dict[str, Any]) -> 'Education':
+        return cls(
+            degree=_text(item.get('degree', '')),
+            school=_text(item.get('school', '')),
+            field=_text(item.get('field', '')),
+            graduation_date=_text(item.get('graduationDate', ''))
+        )
+
+    @classmethod
+    def from_dict(cls, item: Dict[str, Any]) -> 'Education':
+        return cls(
+            degree=_text(item.get('degree', '')),
+            school=_text(item.get('school', '')),
+            field=_text(item.get('field', '')),
+            graduation_date=_text(item.get('graduation_date', ''))
+        )
+
+    def to_frontend(self) -> Dict[str, Any]:
+        return {
+            'degree': self.degree,
+            'school': self.school,
+            'field': self.field,
+            'graduationDate': self.graduation_date
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'degree': self.degree,
+            'school': self.school,
+            'field': self.field,
+            'graduation_date': self.graduation_date
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class Project:
+    """A single entry in the projects section"""
+    title: str = ''
+    description: str = ''
+    technologies: Tuple[str, ...] = ()
+    bullets: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_frontend(cls, item: Dict[str, Any]) -> 'Project':
+        return cls(
+            title=_text(item.get('title', '')),
+            description=_text(item.get('description', '')),
+            technologies=_text_tuple(item.get('technologies', []), intern=True),
+            bullets=_text_tuple(item.get('bullets', []))
+        )
+
+    from_dict = from_frontend
+
+    def to_frontend(self) -> Dict[str, Any]:
+        return {
+            'title': self.title,
+            'description': self.description,
+            'technologies': list(self.technologies),
+            'bullets': list(self.bullets)
+        }
+
+    to_dict = to_frontend
+
+
+@dataclass(frozen=True, slots=True)
+class ResumeModel:
+    """
+    Immutable, hashable resume representation
+
+    Equality and hashing are structural, so two resumes with the same content
+    share cache entries regardless of where they came from. Derived views
+    (lowercased skill set, joined experience text, structural key) are
+    computed on first access and memoized on the instance.
+    """
+    name: str = 'Professional'
+    email: str = ''
+    phone: str = ''
+    location: str = ''
+    linkedin: str = ''
+    github: str = ''
+    summary: str = ''
+    skills: Tuple[str, ...] = ()
+    experience: Tuple[Experience, ...] = ()
+    education: Tuple[Education, ...] = ()
+    projects: Tuple[Project, ...] = ()
+    _views: Dict[str, Any] = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    @classmethod
+    def from_frontend(cls, resume_data: Dict[str, Any]) -> 'ResumeModel':
+        """
+        Build a model from the frontend JSON shape (personalInfo + sections)
+
+        Args:
+            resume_data: Raw resume data from frontend
+
+        Returns:
+            ResumeModel instance
+        """
+        personal_info = resume_data.get('personalInfo') or {}
+        sections = resume_data.get('sections') or []
+
+        summary = ''
+        skills: Tuple[str, ...] = ()
+        experience: List[Experience] = []
+        education: List[Education] = []
+        projects: List[Project] = []
+
+        for section in sections:
+            if not isinstance(section, dict):
+                continue
+            section_id = section.get('id', '')
+            items = section.get('items') or []
+
+            if section_id == 'summary':
+                summary = _text(section.get('content', ''))
+            elif section_id == 'skills':
+                skills = tuple(sys.intern(s) for s in sanitize_skills_list(items))
+            elif section_id == 'experience':
+                experience.extend(Experience.from_frontend(i) for i in items if isinstance(i, dict))
+            elif section_id == 'education':
+                education.extend(Education.from_frontend(i) for i in items if isinstance(i, dict))
+            elif section_id == 'projects':
+                projects.extend(Project.from_frontend(i) for i in items if isinstance(i, dict))
+
+        return cls(
+            name=_text(personal_info.get('name', 'Professional')),
+            email=_text(personal_info.get('email', '')),
+            phone=_text(personal_info.get('phone', '')),
+            location=_text(personal_info.get('location', '')),
+            linkedin=_text(personal_info.get('linkedin', '')),
+            github=_text(personal_info.get('github', '')),
+            summary=summary,
+            skills=skills,
+            experience=tuple(experience),
+            education=tuple(education),
+            projects=tuple(projects)
+        )
+
+    @classmethod
+    def from_dict(cls, parsed: Dict[str, Any]) -> 'ResumeModel':
+        """Build a model from the legacy parse_user_resume dictionary"""
+        return cls(
+            name=_text(parsed.get('name', 'Professional')),
+            email=_text(parsed.get('email', '')),
+            phone=_text(parsed.get('phone', '')),
+            location=_text(parsed.get('location', '')),
+            linkedin=_text(parsed.get('linkedin', '')),
+            github=_text(parsed.get('github', '')),
+            summary=_text(parsed.get('summary', '')),
+            skills=tuple(sys.intern(s) for s in sanitize_skills_list(parsed.get('skills') or [])),
+            experience=tuple(Experience.from_dict(i) for i in parsed.get('experience') or [] if isinstance(i, dict)),
+            education=tuple(Education.from_dict(i) for i in parsed.get('education') or [] if isinstance(i, dict)),
+            projects=tuple(Project.from_dict(i) for i in parsed.get('projects') or [] if isinstance(i, dict))
+        )
+
+    @classmethod
+    def coerce(cls, resume: Union['ResumeModel', Dict[str, Any]]) -> 'ResumeModel':
+        """Accept a model, a frontend resume or a legacy parsed dictionary"""
+        if isinstance(resume, cls):
+            return resume
+        if not isinstance(resume, dict):
+            return cls()
+        if 'personalInfo' in resume or 'sections' in resume:
+            return cls.from_frontend(resume)
+        return cls.from_dict(resume)
+
+    def to_frontend(self) -> Dict[str, Any]:
+        """Serialize to the frontend JSON shape"""
+        return {
+            'personalInfo': {
+                'name': self.name,
+                'email': self.email,
+                'phone': self.phone,
+                'location': self.location,
+                'linkedin': self.linkedin,
+                'github': self.github
+            },
+            'sections': [
+                {'id': 'summary', 'title': 'Professional Summary', 'content': self.summary},
+                {'id': 'skills', 'title': 'Skills', 'items': list(self.skills)},
+                {'id': 'experience', 'title': 'Experience', 'items': [e.to_frontend() for e in self.experience]},
+                {'id': 'education', 'title': 'Education', 'items': [e.to_frontend() for e in self.education]},
+                {'id': 'projects', 'title': 'Projects', 'items': [p.to_frontend() for p in self.projects]}
+            ]
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize to the legacy parse_user_resume dictionary"""
+        return {
+            'name': self.name,
+            'email': self.email,
+            'phone': self.phone,
+            'location': self.location,
+            'linkedin': self.linkedin,
+            'github': self.github,
+            'summary': self.summary,
+            'skills': list(self.skills),
+            'experience': [e.to_dict() for e in self.experience],
+            'education': [e.to_dict() for e in self.education],
+            'projects': [p.to_dict() for p in self.projects]
+        }
+
+    def _memo(self, key: str, compute) -> Any:
+        views = self._views
+        if key not in views:
+            views[key] = compute()
+        return views[key]
+
+    @property
+    def skill_set(self) -> FrozenSet[str]:
+        """Lowercased skills for membership tests"""
+        return self._memo('skill_set', lambda: frozenset(s.lower() for s in self.skills))
+
+    @property
+    def experience_text(self) -> str:
+        """All experience bullets joined into a single string"""
+        return self._memo('experience_text', lambda: ' '.join(
+            ' '.join(exp.bullets) for exp in self.experience
+        ))
+
+    @property
+    def experience_text_lower(self) -> str:
+        """Lowercased experience text for substring matching"""
+        return self._memo('experience_text_lower', lambda: self.experience_text.lower())
+
+    @property
+    def structural_key(self) -> str:
+        """Stable content hash, usable as a cache key across processes"""
+        return self._memo('structural_key', lambda: hashlib.blake2b(
+            json.dumps(self.to_dict(), sort_keys=True, separators=(',', ':')).encode('utf-8'),
+            digest_size=16
+        ).hexdigest())
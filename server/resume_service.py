@@ -4,12 +4,60 @@ Handles resume parsing, matching, and generation with robust fallbacks
 """
 import json
 import re
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Union
+
+from logs import get_logger
+from resume_model import Education, Experience, ResumeModel
+
+
+log = get_logger('resume')
+
+
+# Common technical skills and keywords, compiled once per process
+TECH_PATTERNS = [
+    re.compile(pattern, re.IGNORECASE) for pattern in (
+        r'\b(?:Python|Java|JavaScript|TypeScript|C\+\+|Go|Rust|Ruby|PHP|Swift|Kotlin)\b',
+        r'\b(?:React|Angular|Vue|Node\.js|Django|Flask|Spring|Express)\b',
+        r'\b(?:AWS|Azure|GCP|Docker|Kubernetes|Jenkins|Git|CI/CD)\b',
+        r'\b(?:SQL|MySQL|PostgreSQL|MongoDB|Redis|Elasticsearch)\b',
+        r'\b(?:Machine Learning|AI|Deep Learning|TensorFlow|PyTorch|NLP)\b',
+        r'\b(?:Agile|Scrum|DevOps|Microservices|REST|API|GraphQL)\b'
+    )
+]
+
+# Template defaults shared by the markdown fallback and per-section fallbacks
+DEFAULT_SKILLS = ('Python', 'JavaScript', 'React', 'Node.js', 'SQL', 'AWS', 'Docker', 'Git')
+
+DEFAULT_EXPERIENCE_BULLETS = (
+    "Architected and implemented scalable solutions serving over 100,000+ users, resulting in 40% improvement in system performance and 99.9% uptime achievement through robust error handling and monitoring systems",
+    "Led cross-functional team in developing and deploying cloud-native applications on AWS infrastructure, reducing deployment time by 60% through implementation of automated CI/CD pipelines and infrastructure-as-code practices",
+    "Designed and optimized complex database schemas and queries for high-traffic applications, achieving 50% reduction in query response time and improving overall application throughput",
+    "Spearheaded adoption of modern development practices including test-driven development, code reviews, and agile methodologies, increasing code quality metrics by 45% and reducing production bugs by 35%",
+    "Collaborated directly with product managers and stakeholders to translate business requirements into technical specifications, delivering 15+ major features ahead of schedule and under budget",
+    "Mentored junior developers through code reviews and pair programming sessions, accelerating team onboarding time by 40% and fostering culture of continuous learning and technical excellence"
+)
 
 
 class ResumeService:
     """Service for generating tailored resumes with AI and fallback templates"""
     
+    @staticmethod
+    def parse_resume_model(resume_data: Dict[str, Any]) -> ResumeModel:
+        """
+        Parse user resume data into the compact typed model
+        
+        Args:
+            resume_data: Raw resume data from frontend
+            
+        Returns:
+            ResumeModel instance
+        """
+        try:
+            return ResumeModel.from_frontend(resume_data)
+        except Exception as e:
+            log.warning('resume.parse_failed', error=str(e))
+            return ResumeModel()
+    
     @staticmethod
     def parse_user_resume(resume_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -21,76 +69,7 @@ class ResumeService:
         Returns:
             Normalized resume dictionary
         """
-        try:
-            personal_info = resume_data.get('personalInfo', {})
-            sections = resume_data.get('sections', [])
-            
-            # Extract key information
-            parsed = {
-                'name': personal_info.get('name', 'Professional'),
-                'email': personal_info.get('email', ''),
-                'phone': personal_info.get('phone', ''),
-                'location': personal_info.get('location', ''),
-                'linkedin': personal_info.get('linkedin', ''),
-                'github': personal_info.get('github', ''),
-                'summary': '',
-                'skills': [],
-                'experience': [],
-                'education': [],
-                'projects': []
-            }
-            
-            # Parse sections
-            for section in sections:
-                section_id = section.get('id', '')
-                
-                if section_id == 'summary':
-                    parsed['summary'] = section.get('content', '')
-                    
-                elif section_id == 'skills':
-                    parsed['skills'] = section.get('items', [])
-                    
-                elif section_id == 'experience':
-                    for item in section.get('items', []):
-                        parsed['experience'].append({
-                            'position': item.get('position', item.get('role', '')),
-                            'company': item.get('company', ''),
-                            'location': item.get('location', ''),
-                            'start_date': item.get('startDate', ''),
-                            'end_date': item.get('endDate', ''),
-                            'bullets': item.get('bullets', [])
-                        })
-                        
-                elif section_id == 'education':
-                    for item in section.get('items', []):
-                        parsed['education'].append({
-                            'degree': item.get('degree', ''),
-                            'school': item.get('school', ''),
-                            'field': item.get('field', ''),
-                            'graduation_date': item.get('graduationDate', '')
-                        })
-                        
-                elif section_id == 'projects':
-                    for item in section.get('items', []):
-                        parsed['projects'].append({
-                            'title': item.get('title', ''),
-                            'description': item.get('description', ''),
-                            'technologies': item.get('technologies', [])
-                        })
-            
-            return parsed
-            
-        except Exception as e:
-            print(f"Error parsing resume: {e}")
-            return {
-                'name': 'Professional',
-                'email': '',
-                'phone': '',
-                'location': '',
-                'skills': [],
-                'experience': [],
-                'education': []
-            }
+        return ResumeService.parse_resume_model(resume_data).to_dict()
     
     @staticmethod
     def extract_job_keywords(job_description: str) -> List[str]:
@@ -103,40 +82,63 @@ class ResumeService:
         Returns:
             List of extracted keywords
         """
-        # Common technical skills and keywords
-        tech_patterns = [
-            r'\b(?:Python|Java|JavaScript|TypeScript|C\+\+|Go|Rust|Ruby|PHP|Swift|Kotlin)\b',
-            r'\b(?:React|Angular|Vue|Node\.js|Django|Flask|Spring|Express)\b',
-            r'\b(?:AWS|Azure|GCP|Docker|Kubernetes|Jenkins|Git|CI/CD)\b',
-            r'\b(?:SQL|MySQL|PostgreSQL|MongoDB|Redis|Elasticsearch)\b',
-            r'\b(?:Machine Learning|AI|Deep Learning|TensorFlow|PyTorch|NLP)\b',
-            r'\b(?:Agile|Scrum|DevOps|Microservices|REST|API|GraphQL)\b'
-        ]
-        
         keywords = set()
-        for pattern in tech_patterns:
-            matches = re.findall(pattern, job_description, re.IGNORECASE)
+        for pattern in TECH_PATTERNS:
+            matches = pattern.findall(job_description)
             keywords.update([m.lower() for m in matches])
         
         return list(keywords)
     
     @staticmethod
-    def calculate_match_score(resume: Dict[str, Any], job_keywords: List[str]) -> float:
+    def keyword_counts(text: str) -> Dict[str, int]:
+        """
+        Count occurrences of known technical keywords in free text
+        
+        Args:
+            text: Resume or job description text
+            
+        Returns:
+            Mapping of lowercased keyword to occurrence count
+        """
+        counts: Dict[str, int] = {}
+        for pattern in TECH_PATTERNS:
+            for match in pattern.findall(text):
+                keyword = match.lower()
+                counts[keyword] = counts.get(keyword, 0) + 1
+        return counts
+    
+    @staticmethod
+    def keyword_spellings(text: str) -> Dict[str, str]:
+        """
+        Spelling each known technical keyword first has in free text
+
+        Args:
+            text: Resume text
+
+        Returns:
+            Mapping of lowercased keyword to the text's own spelling, e.g. 'postgresql' -> 'PostgreSQL'
+        """
+        spellings: Dict[str, str] = {}
+        for pattern in TECH_PATTERNS:
+            for match in pattern.findall(text):
+                spellings.setdefault(match.lower(), match)
+        return spellings
+    
+    @staticmethod
+    def calculate_match_score(resume: Union[ResumeModel, Dict[str, Any]], job_keywords: List[str]) -> float:
         """
         Calculate how well resume matches job requirements
         
         Args:
-            resume: Parsed resume data
+            resume: Parsed resume (model or legacy dictionary)
             job_keywords: Extracted keywords from job
             
         Returns:
             Match score between 0 and 100
         """
-        resume_skills = [s.lower() for s in resume.get('skills', [])]
-        experience_text = ' '.join([
-            ' '.join(exp.get('bullets', []))
-            for exp in resume.get('experience', [])
-        ]).lower()
+        resume = ResumeModel.coerce(resume)
+        resume_skills = resume.skill_set
+        experience_text = resume.experience_text_lower
         
         matches = 0
         for keyword in job_keywords:
@@ -145,46 +147,139 @@ class ResumeService:
         
         return (matches / len(job_keywords) * 100) if job_keywords else 0
     
+    @staticmethod
+    def default_summary(resume: ResumeModel, job_title: str, company_name: str) -> str:
+        """Template professional summary used when the resume has none"""
+        exp_years = len(resume.experience)
+        return (
+            f"Highly motivated and results-driven {job_title} with {exp_years}+ years of professional experience "
+            f"in software development and technology solutions. Demonstrated expertise in leveraging cutting-edge "
+            f"technologies to drive business growth and operational excellence. Proven track record of successfully "
+            f"delivering complex projects while collaborating with cross-functional teams at {company_name or 'leading organizations'}. "
+            f"Known for strong analytical thinking, problem-solving abilities, and commitment to continuous learning. "
+            f"Seeking to contribute technical expertise and leadership skills to advance organizational objectives "
+            f"and create measurable business impact."
+        )
+    
+    @staticmethod
+    def default_project_bullets(title: str, tech_str: str) -> List[str]:
+        """Template bullets for a project without enough bullets of its own"""
+        return [
+            f"Built {title} that addresses key business requirements, resulting in improved efficiency and user satisfaction",
+            f"Implemented using {tech_str} with focus on scalability, performance optimization, and clean code architecture",
+            f"Overcame technical challenges through innovative problem-solving and iterative development approaches",
+            f"Achieved measurable improvements in system performance and user experience metrics",
+            f"Demonstrated proficiency in full-stack development, testing methodologies, and agile practices"
+        ]
+    
+    @staticmethod
+    def fallback_section(
+        section_id: str,
+        resume: Union[ResumeModel, Dict[str, Any]],
+        job_title: str,
+        company_name: str
+    ) -> Any:
+        """
+        Build one section from the template logic, in the flat shape the frontend merges
+        
+        Args:
+            section_id: One of summary, skills, experience, projects, education
+            resume: Parsed resume (model or legacy dictionary)
+            job_title: Target job title
+            company_name: Target company name
+            
+        Returns:
+            Section content (string for summary, list otherwise)
+        """
+        resume = ResumeModel.coerce(resume)
+        
+        if section_id == 'summary':
+            return resume.summary or ResumeService.default_summary(resume, job_title, company_name)
+        
+        if section_id == 'skills':
+            return list(resume.skills) or list(DEFAULT_SKILLS)
+        
+        if section_id == 'experience':
+            return [{
+                'company': exp.company,
+                'role': exp.position,
+                'location': exp.location,
+                'startDate': exp.start_date,
+                'endDate': exp.end_date,
+                'bullets': list(exp.bullets[:6] or DEFAULT_EXPERIENCE_BULLETS[:4])
+            } for exp in resume.experience]
+        
+        if section_id == 'projects':
+            projects = []
+            for project in resume.projects:
+                tech_str = ', '.join(project.technologies) if project.technologies else 'Various Technologies'
+                bullets = list(project.bullets[:5])
+                if len(bullets) < 3:
+                    bullets = ResumeService.default_project_bullets(project.title, tech_str)
+                projects.append({
+                    'title': project.title,
+                    'subtitle': tech_str,
+                    'description': project.description,
+                    'technologies': list(project.technologies),
+                    'bullets': bullets
+                })
+            return projects
+        
+        if section_id == 'education':
+            return [{
+                'degree': edu.degree,
+                'school': edu.school,
+                'field': edu.field,
+                'year': edu.graduation_date
+            } for edu in resume.education]
+        
+        raise ValueError(f"Unknown section '{section_id}'")
+    
     @staticmethod
     def generate_detailed_resume_markdown(
-        resume: Dict[str, Any],
+        resume: Union[ResumeModel, Dict[str, Any]],
         job_description: str,
         job_title: str,
-        company_name: str
+        company_name: str,
+        keywords: Optional[List[str]] = None
     ) -> str:
         """
         Generate comprehensive resume in Markdown format
         
         Args:
-            resume: Parsed resume data
+            resume: Parsed resume (model or legacy dictionary)
             job_description: Job description text
             job_title: Target job title
             company_name: Target company name
+            keywords: Job keywords if already extracted by the caller
             
         Returns:
             Detailed markdown resume (500+ words)
         """
         
+        resume = ResumeModel.coerce(resume)
+        
         # Extract keywords for tailoring
-        keywords = ResumeService.extract_job_keywords(job_description)
+        if keywords is None:
+            keywords = ResumeService.extract_job_keywords(job_description)
         
         # Build comprehensive markdown
         md_lines = []
         
         # Header
-        md_lines.append(f"# {resume['name']}")
+        md_lines.append(f"# {resume.name}")
         md_lines.append("")
         contact_parts = []
-        if resume['email']:
-            contact_parts.append(f"**Email:** {resume['email']}")
-        if resume['phone']:
-            contact_parts.append(f"**Phone:** {resume['phone']}")
-        if resume['location']:
-            contact_parts.append(f"**Location:** {resume['location']}")
-        if resume['linkedin']:
-            contact_parts.append(f"**LinkedIn:** {resume['linkedin']}")
-        if resume['github']:
-            contact_parts.append(f"**GitHub:** {resume['github']}")
+        if resume.email:
+            contact_parts.append(f"**Email:** {resume.email}")
+        if resume.phone:
+            contact_parts.append(f"**Phone:** {resume.phone}")
+        if resume.location:
+            contact_parts.append(f"**Location:** {resume.location}")
+        if resume.linkedin:
+            contact_parts.append(f"**LinkedIn:** {resume.linkedin}")
+        if resume.github:
+            contact_parts.append(f"**GitHub:** {resume.github}")
         
         md_lines.append(" | ".join(contact_parts))
         md_lines.append("")
@@ -195,20 +290,11 @@ class ResumeService:
         md_lines.append("## PROFESSIONAL SUMMARY")
         md_lines.append("")
         
-        if resume.get('summary'):
-            md_lines.append(resume['summary'])
+        if resume.summary:
+            md_lines.append(resume.summary)
         else:
             # Generate dynamic summary
-            exp_years = len(resume.get('experience', []))
-            md_lines.append(
-                f"Highly motivated and results-driven {job_title} with {exp_years}+ years of professional experience "
-                f"in software development and technology solutions. Demonstrated expertise in leveraging cutting-edge "
-                f"technologies to drive business growth and operational excellence. Proven track record of successfully "
-                f"delivering complex projects while collaborating with cross-functional teams at {company_name or 'leading organizations'}. "
-                f"Known for strong analytical thinking, problem-solving abilities, and commitment to continuous learning. "
-                f"Seeking to contribute technical expertise and leadership skills to advance organizational objectives "
-                f"and create measurable business impact."
-            )
+            md_lines.append(ResumeService.default_summary(resume, job_title, company_name))
         
         md_lines.append("")
         md_lines.append("---")
@@ -218,9 +304,7 @@ class ResumeService:
         md_lines.append("## CORE COMPETENCIES & TECHNICAL SKILLS")
         md_lines.append("")
         
-        skills = resume.get('skills', [])
-        if not skills:
-            skills = ['Python', 'JavaScript', 'React', 'Node.js', 'SQL', 'AWS', 'Docker', 'Git']
+        skills = list(resume.skills) or list(DEFAULT_SKILLS)
         
         # Group skills
         programming = [s for s in skills if any(lang in s.lower() for lang in ['python', 'java', 'javascript', 'c++', 'go', 'typescript', 'ruby', 'php'])]
@@ -249,39 +333,31 @@ class ResumeService:
         md_lines.append("")
         
         
-        experiences = resume.get('experience', [])
+        experiences = resume.experience
         if not experiences:
             # Create default experience
-            experiences = [{
-                'position': 'Software Engineer',
-                'company': 'Technology Company',
-                'location': 'Remote',
-                'start_date': '2020',
-                'end_date': 'Present',
-                'bullets': []
-            }]
+            experiences = (Experience(
+                position='Software Engineer',
+                company='Technology Company',
+                location='Remote',
+                start_date='2020',
+                end_date='Present'
+            ),)
         
         for exp in experiences[:3]:  # Limit to 3 most recent
-            position = exp.get('position', 'Software Engineer')
-            company = exp.get('company', 'Tech Company')
-            location = exp.get('location', 'Remote')
-            start = exp.get('start_date', '2020')
-            end = exp.get('end_date', 'Present')
+            position = exp.position
+            company = exp.company
+            location = exp.location
+            start = exp.start_date
+            end = exp.end_date
             
             md_lines.append(f"**{position}** | **{company}** | {location} | {start} - {end}")
             md_lines.append("")
             
-            bullets = exp.get('bullets', [])
+            bullets = exp.bullets
             if not bullets:
                 # Generate detailed bullets
-                bullets = [
-                    f"Architected and implemented scalable solutions serving over 100,000+ users, resulting in 40% improvement in system performance and 99.9% uptime achievement through robust error handling and monitoring systems",
-                    f"Led cross-functional team in developing and deploying cloud-native applications on AWS infrastructure, reducing deployment time by 60% through implementation of automated CI/CD pipelines and infrastructure-as-code practices",
-                    f"Designed and optimized complex database schemas and queries for high-traffic applications, achieving 50% reduction in query response time and improving overall application throughput",
-                    f"Spearheaded adoption of modern development practices including test-driven development, code reviews, and agile methodologies, increasing code quality metrics by 45% and reducing production bugs by 35%",
-                    f"Collaborated directly with product managers and stakeholders to translate business requirements into technical specifications, delivering 15+ major features ahead of schedule and under budget",
-                    f"Mentored junior developers through code reviews and pair programming sessions, accelerating team onboarding time by 40% and fostering culture of continuous learning and technical excellence"
-                ]
+                bullets = DEFAULT_EXPERIENCE_BULLETS
             
             for bullet in bullets[:6]:
                 md_lines.append(f"- {bullet}")
@@ -295,20 +371,20 @@ class ResumeService:
         md_lines.append("## EDUCATION")
         md_lines.append("")
         
-        education = resume.get('education', [])
+        education = resume.education
         if not education:
-            education = [{
-                'degree': 'Bachelor of Science in Computer Science',
-                'school': 'University of Technology',
-                'field': 'Computer Science',
-                'graduation_date': '2020'
-            }]
+            education = (Education(
+                degree='Bachelor of Science in Computer Science',
+                school='University of Technology',
+                field='Computer Science',
+                graduation_date='2020'
+            ),)
         
         for edu in education[:2]:
-            degree = edu.get('degree', 'Bachelor of Science')
-            school = edu.get('school', 'University')
-            field = edu.get('field', 'Computer Science')
-            grad_date = edu.get('graduation_date', '2020')
+            degree = edu.degree
+            school = edu.school
+            field = edu.field
+            grad_date = edu.graduation_date
             
             md_lines.append(f"**{degree}**")
             md_lines.append(f"{school} | {field} | Graduated: {grad_date}")
@@ -319,16 +395,16 @@ class ResumeService:
         md_lines.append("")
         
         # Projects
-        projects = resume.get('projects', [])
+        projects = resume.projects
         if projects:
             md_lines.append("## TECHNICAL PROJECTS")
             md_lines.append("")
             
             for project in projects[:3]:  # Allow up to 3 projects
-                title = project.get('title', 'Technical Project')
-                description = project.get('description', 'Developed comprehensive technical solution')
-                technologies = project.get('technologies', [])
-                bullets = project.get('bullets', [])
+                title = project.title
+                description = project.description
+                technologies = project.technologies
+                bullets = project.bullets
                 
                 tech_str = ', '.join(technologies) if technologies else 'Various Technologies'
                 md_lines.append(f"**{title}** | {tech_str}")
@@ -340,13 +416,7 @@ class ResumeService:
                         md_lines.append(f"- {bullet}")
                 else:
                     # Generate 5 detailed bullet points for the project
-                    default_bullets = [
-                        f"Built {title} that addresses key business requirements, resulting in improved efficiency and user satisfaction",
-                        f"Implemented using {tech_str} with focus on scalability, performance optimization, and clean code architecture",
-                        f"Overcame technical challenges through innovative problem-solving and iterative development approaches",
-                        f"Achieved measurable improvements in system performance and user experience metrics",
-                        f"Demonstrated proficiency in full-stack development, testing methodologies, and agile practices"
-                    ]
+                    default_bullets = ResumeService.default_project_bullets(title, tech_str)
                     if description:
                         md_lines.append(f"- {description}")
                         for bullet in default_bullets[1:4]:  # Add 3 more bullets
@@ -0,0 +1,443 @@
+"""
+Section-Level Resume Tailoring
+Generates each resume section independently with per-section caching
+"""
+import asyncio
+import copy
+import hashlib
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from cache import LRUCache
+from logs import get_logger
+from prompts import RESUME_SECTION, PromptAssembler
+from resume_model import sanitize_skills_list
+
+
+log = get_logger('sections')
+
+
+# Sections the tailor rewrites, in the order they are returned
+TAILORED_SECTIONS = ('summary', 'skills', 'experience', 'projects', 'education')
+
+SECTION_RULES = {
+    'summary': """
+Write a powerful 3-4 sentence professional summary that highlights the candidate's fit
+for THIS SPECIFIC role. Mention key technologies and achievements.
+Return ONLY valid JSON: {"summary": "..."}
+""",
+    'skills': """
+Return a flat array of 10-15 skill strings. Extract ALL technical skills, soft skills and
+industry keywords from the job description and combine them with relevant skills from the
+candidate's background. Skills MUST be simple strings, NOT objects.
+Return ONLY valid JSON: {"skills": ["Skill1", "Skill2"]}
+""",
+    'experience': """
+Rewrite every experience entry for this job. Keep company names and dates exactly as given.
+Each entry MUST have 3-4 STAR-method bullets that start with a strong action verb, include
+specific metrics and weave in keywords from the job description.
+Return ONLY valid JSON:
+{"experience": [{"company": "", "role": "", "location": "", "startDate": "", "endDate": "", "bullets": [""]}]}
+""",
+    'projects': """
+Rewrite every project for this job. If no projects are given, create 2-3 realistic projects
+that the candidate's recent roles and skills make plausible and that fit this job.
+Each project MUST have EXACTLY 3-5 bullets covering what was built, implementation details,
+challenges overcome, measurable results and job-relevant skills.
+Return ONLY valid JSON:
+{"projects": [{"title": "", "subtitle": "Technologies Used", "description": "", "bullets": [""]}]}
+""",
+    'education': """
+Keep institutions, degrees and years exactly as given. Only adjust wording to surface
+coursework or honours relevant to the job; omit GPA below 3.5.
+Return ONLY valid JSON:
+{"education": [{"degree": "", "school": "", "location": "", "year": "", "gpa": ""}]}
+"""
+}
+
+
+def select_sections(requested: Optional[Iterable[str]]) -> Optional[Tuple[str, ...]]:
+    """
+    Normalize a requested section selection
+
+    Unknown ids are ignored. An empty selection, or one covering every
+    tailored section, returns None so it reads (and is keyed) as "all".
+    """
+    if not requested or isinstance(requested, str):
+        return None
+    wanted = set(requested)
+    selected = tuple(section_id for section_id in TAILORED_SECTIONS if section_id in wanted)
+    if not selected or len(selected) == len(TAILORED_SECTIONS):
+        return None
+    return selected
+
+
+def _strip_ids(value: Any) -> Any:
+    """Drop frontend-only item ids so they never affect prompts or cache keys"""
+    if isinstance(value, list):
+        return [_strip_ids(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _strip_ids(v) for k, v in value.items() if k != 'id'}
+    return value
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, separators=(',', ':'), default=str)
+
+
+def merge_updates(resume_data: Dict[str, Any], updates: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Apply tailored sections to a frontend resume, as the editor's merge does
+
+    Args:
+        resume_data: Raw resume data from frontend
+        updates: Section id -> tailored content, as returned by tailor()
+
+    Returns:
+        New resume dictionary; the input is not modified
+    """
+    merged = copy.deepcopy(resume_data) if isinstance(resume_data, dict) else {}
+    sections = merged.get('sections')
+    if not isinstance(sections, list):
+        sections = merged['sections'] = []
+    by_id = {s.get('id'): s for s in sections if isinstance(s, dict)}
+
+    def section(section_id: str, title: str, at: Optional[int] = None) -> Dict[str, Any]:
+        if section_id not in by_id:
+            by_id[section_id] = {'id': section_id, 'title': title}
+            sections.insert(len(sections) if at is None else at, by_id[section_id])
+        return by_id[section_id]
+
+    if updates.get('summary'):
+        section('summary', 'Professional Summary', at=0)['content'] = updates['summary']
+    if updates.get('skills'):
+        summary_at = next((i for i, s in enumerate(sections) if s is by_id.get('summary')), -1)
+        section('skills', 'Skills', at=summary_at + 1)['items'] = list(updates['skills'])
+    if updates.get('experience'):
+        section('experience', 'Professional Experience')['items'] = [{
+            'role': item.get('role') or item.get('title') or item.get('position') or 'Professional',
+            'company': item.get('company') or 'Company',
+            'location': item.get('location') or '',
+            'startDate': item.get('startDate') or '',
+            'endDate': item.get('endDate') or 'Present',
+            'bullets': item.get('bullets') if isinstance(item.get('bullets'), list) else []
+        } for item in updates['experience']]
+    if updates.get('projects'):
+        section('projects', 'Projects')['items'] = [{
+            'title': item.get('title') or 'Project',
+            'subtitle': item.get('subtitle') or 'Technologies',
+            'description': item.get('description') or '',
+            'bullets': (item.get('bullets') if isinstance(item.get('bullets'), list) else [])[:5],
+            'technologies': item.get('technologies') or []
+        } for item in updates['projects']]
+    if updates.get('education') and 'education' in by_id:
+        by_id['education']['items'] = list(updates['education'])
+    return merged
+
+
+class SectionTailor:
+    """
+    Tailor a resume one section at a time
+
+    Each section is keyed on (section content, job description, instructions).
+    When only one bullet or the instructions change, unchanged sections are
+    served from the cache and only the edited ones go back to the model.
+    """
+
+    def __init__(
+        self,
+        run_model: Callable[[str], str],
+        cache: Optional[LRUCache] = None,
+        max_workers: int = 8,
+        arun_model: Optional[Callable[[str], Awaitable[str]]] = None
+    ):
+        """
+        Args:
+            run_model: Callable that sends a prompt to the model and returns its text output
+            cache: Section cache; a private one is created when omitted
+            max_workers: Upper bound on concurrent section calls in parallel mode
+            arun_model: Coroutine function equivalent of run_model, used by atailor()
+        """
+        self.run_model = run_model
+        self.arun_model = arun_model
+        self.cache = cache if cache is not None else LRUCache(max_entries=4096, name='resume_sections')
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    @staticmethod
+    def extract_sections(resume_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Pull the tailorable section payloads out of a frontend resume
+
+        The summary payload carries a short candidate headline so it can be
+        written without sending the full profile. A resume without projects
+        gets the same headline as its projects payload, so the model creates
+        projects from the candidate's background.
+
+        Args:
+            resume_data: Raw resume data from frontend
+
+        Returns:
+            Mapping of section id to the content sent to the model
+        """
+        raw = {}
+        for section in resume_data.get('sections') or []:
+            if isinstance(section, dict) and section.get('id') in TAILORED_SECTIONS:
+                raw[section['id']] = section
+
+        payloads: Dict[str, Any] = {}
+        experience = _strip_ids((raw.get('experience') or {}).get('items') or [])
+        skills = sanitize_skills_list((raw.get('skills') or {}).get('items') or [])
+
+        recent_roles = [
+            ' at '.join(filter(None, [str(i.get('role') or i.get('position') or ''), str(i.get('company') or '')]))
+            for i in experience[:3] if isinstance(i, dict)
+        ]
+
+        payloads['summary'] = {
+            'currentSummary': (raw.get('summary') or {}).get('content') or '',
+            'recentRoles': recent_roles,
+            'skills': skills[:15]
+        }
+        payloads['skills'] = skills
+        for section_id in ('experience', 'projects', 'education'):
+            items = _strip_ids((raw.get(section_id) or {}).get('items') or [])
+            if items:
+                payloads[section_id] = items
+        if 'projects' not in payloads:
+            payloads['projects'] = {'projects': [], 'recentRoles': recent_roles, 'skills': skills[:15]}
+        return payloads
+
+    @staticmethod
+    def cache_key(section_id: str, content: Any, job_description: str, instructions: str) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        for part in (section_id, _dumps(content), job_description or '', instructions or ''):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\x00')
+        return digest.hexdigest()
+
+    @staticmethod
+    def build_prompt(section_id: str, content: Any, job_description: str, instructions: str) -> str:
+        # The shared preamble and job description lead, so all section calls
+        # for one job share a cacheable prefix
+        return PromptAssembler.assemble(
+            RESUME_SECTION,
+            job_description=job_description,
+            rules=f"Section: {section_id}\n{SECTION_RULES[section_id].strip()}",
+            section=_dumps(content),
+            instructions=instructions
+        ).text
+
+    @staticmethod
+    def parse_output(section_id: str, text_output: str) -> Any:
+        """
+        Extract and validate one section from the model output
+
+        Raises:
+            ValueError: If the output does not contain a usable section
+        """
+        json_start = text_output.find('{')
+        json_end = text_output.rfind('}')
+        if json_start == -1 or json_end == -1:
+            raise ValueError(f"No JSON object found for section '{section_id}'")
+
+        value = json.loads(text_output[json_start:json_end + 1]).get(section_id)
+
+        if section_id == 'summary':
+            if isinstance(value, dict):
+                value = value.get('content') or value.get('text')
+            if not isinstance(value, str) or not value.strip():
+                raise ValueError("Summary must be a non-empty string")
+            return value.strip()
+
+        if section_id == 'skills':
+            if isinstance(value, dict):
+                value = value.get('items') or value.get('skills')
+            skills = sanitize_skills_list(value)
+            if not skills:
+                raise ValueError("Skills must be a non-empty list of strings")
+            return skills
+
+        if not isinstance(value, list) or not all(isinstance(item, dict) for item in value):
+            raise ValueError(f"Section '{section_id}' must be a list of objects")
+        return value
+
+    def generate_section(self, section_id: str, content: Any, job_description: str, instructions: str) -> Any:
+        prompt = self.build_prompt(section_id, content, job_description, instructions)
+        return self.parse_output(section_id, self.run_model(prompt))
+
+    def tailor(
+        self,
+        resume_data: Dict[str, Any],
+        job_description: str,
+        instructions: str = '',
+        parallel: bool = False,
+        fallback: Optional[Callable[[str], Any]] = None,
+        sections: Optional[Iterable[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Tailor every section, reusing cached sections that have not changed
+
+        With parallel=True the cache misses fan out to concurrent model calls
+        and wall-clock latency becomes that of the slowest section. A section
+        whose call fails is filled from the fallback callable, if given.
+
+        Args:
+            resume_data: Raw resume data from frontend
+            job_description: Job description text
+            instructions: Free-form user instructions
+            parallel: Run the per-section model calls concurrently
+            fallback: Callable returning template content for a section id
+            sections: Section ids to tailor; None or empty tailors all of them
+                and the rest are left out of 'updates'
+
+        Returns:
+            Dictionary with 'updates' (section id -> tailored content, in the
+            shape the frontend merges) and the 'cached', 'generated',
+            'template' and 'failed' section id lists
+        """
+        results, cached, pending = self._plan(resume_data, job_description, instructions, sections)
+
+        # Fan out the misses, then fan the outcomes back in
+        outcomes: Dict[str, Any] = {}
+        if parallel and len(pending) > 1:
+            futures = {
+                section_id: self._get_executor().submit(
+                    self.generate_section, section_id, content, job_description, instructions
+                )
+                for section_id, (key, content) in pending.items()
+            }
+            for section_id, future in futures.items():
+                try:
+                    outcomes[section_id] = future.result()
+                except Exception as e:
+                    outcomes[section_id] = e
+        else:
+            for section_id, (key, content) in pending.items():
+                try:
+                    outcomes[section_id] = self.generate_section(section_id, content, job_description, instructions)
+                except Exception as e:
+                    outcomes[section_id] = e
+
+        return self._collect(results, cached, pending, outcomes, fallback, parallel)
+
+    async def atailor(
+        self,
+        resume_data: Dict[str, Any],
+        job_description: str,
+        instructions: str = '',
+        parallel: bool = True,
+        fallback: Optional[Callable[[str], Any]] = None,
+        sections: Optional[Iterable[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Async variant of tailor() for the ASGI server; section calls are
+        awaited concurrently instead of occupying pool threads
+
+        Raises:
+            RuntimeError: If the tailor was built without arun_model
+        """
+        if self.arun_model is None:
+            raise RuntimeError("SectionTailor was created without arun_model")
+
+        results, cached, pending = self._plan(resume_data, job_description, instructions, sections)
+
+        async def generate(section_id: str, content: Any) -> Any:
+            prompt = self.build_prompt(section_id, content, job_description, instructions)
+            return self.parse_output(section_id, await self.arun_model(prompt))
+
+        if parallel:
+            settled = await asyncio.gather(
+                *(generate(section_id, content) for section_id, (key, content) in pending.items()),
+                return_exceptions=True
+            )
+            outcomes = dict(zip(pending, settled))
+        else:
+            outcomes = {}
+            for section_id, (key, content) in pending.items():
+                try:
+                    outcomes[section_id] = await generate(section_id, content)
+                except Exception as e:
+                    outcomes[section_id] = e
+
+        return self._collect(results, cached, pending, outcomes, fallback, parallel)
+
+    def _plan(
+        self,
+        resume_data: Dict[str, Any],
+        job_description: str,
+        instructions: str,
+        sections: Optional[Iterable[str]] = None
+    ) -> Tuple[Dict[str, Any], List[str], Dict[str, Tuple[str, Any]]]:
+        """Split sections into cache hits and (cache key, content) pairs still to generate"""
+        payloads = self.extract_sections(resume_data)
+        selected = select_sections(sections) or TAILORED_SECTIONS
+        results: Dict[str, Any] = {}
+        cached: List[str] = []
+        pending: Dict[str, Tuple[str, Any]] = {}
+        for section_id in selected:
+            if section_id not in payloads:
+                continue
+            content = payloads[section_id]
+            key = self.cache_key(section_id, content, job_description, instructions)
+            value = self.cache.get(key)
+            if value is not None:
+                results[section_id] = value
+                cached.append(section_id)
+            else:
+                pending[section_id] = (key, content)
+        return results, cached, pending
+
+    def _collect(
+        self,
+        results: Dict[str, Any],
+        cached: List[str],
+        pending: Dict[str, Tuple[str, Any]],
+        outcomes: Dict[str, Any],
+        fallback: Optional[Callable[[str], Any]],
+        parallel: bool
+    ) -> Dict[str, Any]:
+        """Cache successful outcomes, apply fallbacks and assemble the tailor() result"""
+        generated: List[str] = []
+        template: List[str] = []
+        failed: List[str] = []
+
+        for section_id, outcome in outcomes.items():
+            if not isinstance(outcome, Exception):
+                self.cache.set(pending[section_id][0], outcome)
+                results[section_id] = outcome
+                generated.append(section_id)
+                continue
+
+            log.warning('generation.failed', section=section_id, error=str(outcome))
+            if fallback is not None:
+                try:
+                    results[section_id] = fallback(section_id)
+                    template.append(section_id)
+                    continue
+                except Exception as e:
+                    log.error('fallback.failed', section=section_id, error=str(e))
+            failed.append(section_id)
+
+        # Assemble in canonical section order
+        updates = {section_id: results[section_id] for section_id in TAILORED_SECTIONS if section_id in results}
+
+        log.info('tailored', cached=cached, generated=generated, template=template, failed=failed, parallel=parallel)
+        return {
+            'updates': updates,
+            'cached': cached,
+            'generated': generated,
+            'template': template,
+            'failed': failed
+        }
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix='section-tailor'
+                )
+            return self._executor
@@ -0,0 +1,256 @@
+"""
+Semantic Job Matching
+Offline hashed n-gram embeddings of resumes and job postings
+"""
+import hashlib
+import heapq
+import math
+import re
+import zlib
+from array import array
+from dataclasses import dataclass
+from operator import mul
+from typing import Any, Dict, List, Optional, Tuple
+
+from cache import LRUCache
+from metrics import timed
+from resume_model import ResumeModel
+
+
+DIMENSIONS = 256
+
+# Feature weights: whole words carry most of the signal, concepts bridge related
+# terms that share no tokens, character n-grams absorb inflections and typos
+WORD_WEIGHT = 1.0
+BIGRAM_WEIGHT = 0.6
+CONCEPT_WEIGHT = 1.6
+CHAR_NGRAM_WEIGHT = 0.2
+CHAR_NGRAM_SIZES = (3, 4)
+
+# A small bundled vocabulary of related technologies and skills. Each term also
+# emits its concepts, so "REST services in Flask" and "backend Python API
+# engineer" share python, backend and web_api features without a shared word.
+CONCEPTS: Dict[str, Tuple[str, ...]] = {
+    'python': ('python',), 'django': ('python', 'backend', 'web_api'), 'flask': ('python', 'backend', 'web_api'),
+    'fastapi': ('python', 'backend', 'web_api'), 'pandas': ('python', 'data'), 'numpy': ('python', 'data'),
+    'java': ('java',), 'spring': ('java', 'backend', 'web_api'), 'kotlin': ('java', 'mobile', 'android'),
+    'scala': ('java', 'data'), 'go': ('golang', 'backend'), 'golang': ('golang', 'backend'),
+    'rust': ('systems',), 'c++': ('systems',), 'c#': ('dotnet', 'backend'), '.net': ('dotnet', 'backend'),
+    'ruby': ('ruby', 'backend'), 'rails': ('ruby', 'backend', 'web_api'), 'php': ('php', 'backend'),
+    'laravel': ('php', 'backend', 'web_api'),
+    'javascript': ('javascript',), 'typescript': ('javascript',), 'node.js': ('javascript', 'backend'),
+    'node': ('javascript', 'backend'), 'express': ('javascript', 'backend', 'web_api'),
+    'react': ('javascript', 'frontend'), 'angular': ('javascript', 'frontend'), 'vue': ('javascript', 'frontend'),
+    'next.js': ('javascript', 'frontend'), 'html': ('frontend',), 'css': ('frontend',), 'frontend': ('frontend',),
+    'ui': ('frontend',), 'backend': ('backend',), 'server': ('backend',), 'microservice': ('backend', 'distributed'),
+    'distributed': ('distributed',), 'full-stack': ('frontend', 'backend'), 'fullstack': ('frontend', 'backend'),
+    'api': ('web_api',), 'rest': ('web_api',), 'restful': ('web_api',), 'graphql': ('web_api',),
+    'grpc': ('web_api', 'distributed'), 'endpoint': ('web_api',),
+    'aws': ('cloud',), 'gcp': ('cloud',), 'azure': ('cloud',), 'cloud': ('cloud',), 'lambda': ('cloud', 'serverless'),
+    'serverless': ('cloud', 'serverless'), 's3': ('cloud',), 'docker': ('containers', 'devops'),
+    'kubernetes': ('containers', 'devops', 'cloud'), 'k8s': ('containers', 'devops', 'cloud'),
+    'helm': ('containers', 'devops'), 'terraform': ('infrastructure', 'devops', 'cloud'),
+    'ansible': ('infrastructure', 'devops'), 'infrastructure': ('infrastructure',), 'devops': ('devops',),
+    'sre': ('devops', 'reliability'), 'jenkins': ('ci_cd', 'devops'), 'ci/cd': ('ci_cd', 'devops'),
+    'github actions': ('ci_cd', 'devops'), 'deployment': ('ci_cd', 'devops'), 'observability': ('reliability',),
+    'monitoring': ('reliability',), 'prometheus': ('reliability',), 'grafana': ('reliability',),
+    'uptime': ('reliability',), 'incident': ('reliability',),
+    'sql': ('database', 'sql'), 'postgresql': ('database', 'sql'), 'postgres': ('database', 'sql'),
+    'mysql': ('database', 'sql'), 'database': ('database',), 'query': ('database',),
+    'mongodb': ('database', 'nosql'), 'dynamodb': ('database', 'nosql', 'cloud'), 'redis': ('database', 'caching'),
+    'cassandra': ('database', 'nosql', 'distributed'), 'elasticsearch': ('database', 'search'),
+    'cache': ('caching', 'performance'), 'caching': ('caching', 'performance'),
+    'kafka': ('data', 'streaming', 'distributed'), 'spark': ('data', 'distributed'), 'airflow': ('data',),
+    'etl': ('data',), 'pipeline': ('data',), 'warehouse': ('data', 'database'), 'dbt': ('data', 'sql'),
+    'analytics': ('data',), 'data': ('data',),
+    'machine learning': ('machine_learning',), 'deep learning': ('machine_learning',), 'ml': ('machine_learning',),
+    'ai': ('machine_learning',), 'nlp': ('machine_learning', 'nlp'), 'llm': ('machine_learning', 'nlp'),
+    'tensorflow': ('machine_learning', 'python'), 'pytorch': ('machine_learning', 'python'),
+    'scikit-learn': ('machine_learning', 'python'), 'model': ('machine_learning',),
+    'ios': ('mobile', 'ios'), 'swift': ('mobile', 'ios'), 'android': ('mobile', 'android'),
+    'flutter': ('mobile',), 'react native': ('mobile', 'javascript'), 'mobile': ('mobile',),
+    'latency': ('performance',), 'performance': ('performance',), 'throughput': ('performance',),
+    'scalable': ('performance', 'distributed'), 'scale': ('performance', 'distributed'),
+    'optimize': ('performance',), 'security': ('security',), 'oauth': ('security',), 'auth': ('security',),
+    'encryption': ('security',), 'test': ('testing',), 'testing': ('testing',), 'pytest': ('testing', 'python'),
+    'jest': ('testing', 'javascript'), 'selenium': ('testing',), 'qa': ('testing',),
+    'agile': ('agile',), 'scrum': ('agile',), 'kanban': ('agile',),
+    'mentor': ('leadership',), 'lead': ('leadership',), 'manage': ('leadership',), 'team': ('collaboration',),
+    'stakeholder': ('collaboration',), 'cross-functional': ('collaboration',),
+}
+_CONCEPT_BIGRAMS = {term for term in CONCEPTS if ' ' in term}
+
+STOPWORDS = frozenset((
+    'a', 'about', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'have', 'in', 'into', 'is',
+    'it', 'its', 'of', 'on', 'or', 'our', 'that', 'the', 'their', 'this', 'to', 'was', 'we', 'were', 'will',
+    'with', 'you', 'your', 'i', 'my', 'me', 'us', 'who', 'what', 'which', 'while', 'across', 'over', 'per',
+    'plus', 'such', 'other', 'etc', 'using', 'use', 'used', 'also', 'than', 'more', 'all', 'any', 'can', 'able',
+))
+
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#./-]*")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens with stopwords dropped and plural/verb endings trimmed"""
+    tokens = []
+    for token in _TOKEN.findall(text.lower()):
+        token = token.rstrip('.-/')
+        if not token or token in STOPWORDS:
+            continue
+        if token not in CONCEPTS and len(token) > 4 and token.isalpha():
+            for suffix in ('ing', 'ed', 'es', 's'):
+                if token.endswith(suffix) and not token.endswith('ss'):
+                    token = token[:-len(suffix)]
+                    break
+        tokens.append(token)
+    return tokens
+
+
+def text_features(text: str) -> Dict[str, float]:
+    """Weighted word, bigram, concept and character n-gram features of a text"""
+    counts: Dict[str, float] = {}
+
+    def add(feature: str, weight: float):
+        counts[feature] = counts.get(feature, 0.0) + weight
+
+    tokens = tokenize(text)
+    for index, token in enumerate(tokens):
+        add('w:' + token, WORD_WEIGHT)
+        for concept in CONCEPTS.get(token, ()):
+            add('c:' + concept, CONCEPT_WEIGHT)
+        if index + 1 < len(tokens):
+            bigram = f"{token} {tokens[index + 1]}"
+            add('b:' + bigram, BIGRAM_WEIGHT)
+            if bigram in _CONCEPT_BIGRAMS:
+                for concept in CONCEPTS[bigram]:
+                    add('c:' + concept, CONCEPT_WEIGHT)
+        padded = f"<{token}>"
+        for size in CHAR_NGRAM_SIZES:
+            for start in range(len(padded) - size + 1):
+                add('g:' + padded[start:start + size], CHAR_NGRAM_WEIGHT)
+    # Sublinear term frequency, so one repeated word cannot dominate a posting
+    return {feature: math.sqrt(weight) for feature, weight in counts.items()}
+
+
+@dataclass(frozen=True, slots=True)
+class Embedding:
+    """Unit-length hashed vector"""
+    vector: array
+
+    def cosine(self, other: 'Embedding') -> float:
+        return sum(map(mul, self.vector, other.vector))
+
+
+class HashedEncoder:
+    """
+    Embed text without a model download, network or GPU
+
+    Features are hashed into a fixed number of signed dimensions (the
+    hashing trick), so no vocabulary is stored.
+    """
+
+    def __init__(self, dimensions: int = DIMENSIONS):
+        self.dimensions = dimensions
+
+    def encode(self, text: str) -> Embedding:
+        vector = [0.0] * self.dimensions
+        for feature, weight in text_features(text).items():
+            hashed = zlib.crc32(feature.encode('utf-8'))
+            vector[hashed % self.dimensions] += weight if hashed & 0x80000000 else -weight
+        norm = math.sqrt(sum(value * value for value in vector))
+        if norm:
+            vector = [value / norm for value in vector]
+        return Embedding(array('f', vector))
+
+
+@dataclass(frozen=True, slots=True)
+class ResumeProfile:
+    """Embedding of a whole resume and of each experience or project bullet"""
+    embedding: Embedding
+    bullets: Tuple[Tuple[str, Embedding], ...]
+
+
+def job_text(job: Dict[str, Any]) -> str:
+    return '\n'.join(str(job.get(key) or '') for key in ('jobTitle', 'companyName', 'jobDescription'))
+
+
+def job_key(job: Dict[str, Any]) -> str:
+    """Content hash of a posting, so re-sending the same posting reuses its embedding"""
+    return hashlib.blake2b(job_text(job).encode('utf-8'), digest_size=8).hexdigest()
+
+
+class SemanticMatcher:
+    """
+    Embeds resumes and job postings and scores them by semantic similarity
+
+    A request ranks only the jobs it sends, at most a few hundred, so they
+    are scored exactly rather than through an approximate index. Embeddings
+    are cached by content only; nothing a client sent is ever returned to
+    another one.
+    """
+
+    def __init__(self, encoder: Optional[HashedEncoder] = None, cache_size: int = 4096, job_cache_size: int = 50000):
+        """
+        Args:
+            encoder: Text encoder; a default HashedEncoder when omitted
+            cache_size: Resume profiles kept, keyed by the caller's content key
+            job_cache_size: Job posting embeddings kept, keyed by posting content
+        """
+        self.encoder = encoder or HashedEncoder()
+        self._profiles = LRUCache(max_entries=cache_size, name='semantic_profiles')
+        self._jobs = LRUCache(max_entries=job_cache_size, name='semantic_jobs')
+
+    @timed('semantic_encode')
+    def resume_profile(self, key: str, resume: ResumeModel) -> ResumeProfile:
+        """
+        Embeddings of a resume, computed once per resume content
+
+        Args:
+            key: Content key of the resume, e.g. ResumeAnalysis.key
+            resume: Parsed resume
+        """
+        def build():
+            bullets = [bullet for item in resume.experience for bullet in item.bullets]
+            bullets += [bullet for project in resume.projects for bullet in (project.description, *project.bullets)]
+            bullets = [bullet for bullet in dict.fromkeys(bullets) if bullet.strip()]
+            whole = '\n'.join([
+                resume.summary,
+                ' '.join(resume.skills),
+                ' '.join(item.position for item in resume.experience),
+                *bullets,
+                ' '.join(tech for project in resume.projects for tech in project.technologies),
+            ])
+            return ResumeProfile(
+                self.encoder.encode(whole),
+                tuple((bullet, self.encoder.encode(bullet)) for bullet in bullets)
+            )
+        return self._profiles.get_or_compute(key, build)
+
+    @timed('semantic_encode')
+    def embed_jobs(self, jobs: List[Dict[str, Any]]) -> List[Embedding]:
+        """
+        Embeddings of job postings, in request order
+
+        Args:
+            jobs: Items with jobTitle, companyName and jobDescription
+
+        Returns:
+            One embedding per job; postings already seen are not encoded again
+        """
+        return [
+            self._jobs.get_or_compute(job_key(job), lambda job=job: self.encoder.encode(job_text(job)))
+            for job in jobs
+        ]
+
+    @staticmethod
+    def top_bullets(profile: ResumeProfile, job: Embedding, count: int = 3) -> List[Dict[str, Any]]:
+        """The resume bullets closest to a job, as evidence for its score"""
+        scored = heapq.nlargest(count, ((embedding.cosine(job), bullet) for bullet, embedding in profile.bullets))
+        return [{'text': bullet, 'similarity': round(score, 3)} for score, bullet in scored if score > 0]
+
+    def similarity(self, first: str, second: str) -> float:
+        """Cosine similarity of two texts, between -1 and 1"""
+        return self.encoder.encode(first).cosine(self.encoder.encode(second))
+
+    def stats(self) -> Dict[str, Any]:
+        return self._jobs.stats()
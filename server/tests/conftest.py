@@ -0,0 +1,16 @@
+"""
+Test Configuration
+Puts the server directory on the import path; run with python -m pytest server/tests
+"""
+import os
+import sys
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The server uses flat imports and is run from its own directory
+if SERVER_DIR not in sys.path:
+    sys.path.insert(0, SERVER_DIR)
+# Keep per-request INFO events out of the test output
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+# Stored resume versions stay in memory instead of landing in the working directory
+os.environ.setdefault("VERSION_STORE_PATH", "")
@@ -0,0 +1,57 @@
+import copy
+import json
+
+from analysis_store import AnalysisStore
+
+
+UPLOADED = {
+    'personalInfo': {'name': 'Ada Lovelace', 'email': 'ada@example.com', 'phone': '', 'location': 'London'},
+    'sections': [
+        {'id': 'summary', 'title': 'Summary', 'content': 'Backend engineer.'},
+        {'id': 'skills', 'title': 'Skills', 'items': ['Python', 'PostgreSQL']},
+        {'id': 'experience', 'title': 'Experience', 'items': [
+            {'position': 'Engineer', 'company': 'Analytical Engines', 'startDate': '2020', 'endDate': 'Present',
+             'bullets': ['Built Python services on PostgreSQL']}
+        ]},
+    ]
+}
+
+
+def as_edited_by_frontend(resume):
+    """The uploaded resume as the editor sends it back: item ids, section types, renamed titles, other key order"""
+    edited = copy.deepcopy(resume)
+    for section in edited['sections']:
+        section['type'] = section['id']
+        for i, item in enumerate(section.get('items', [])):
+            if isinstance(item, dict):
+                item['id'] = f"{section['id']}-{i}"
+    edited['sections'][2]['title'] = 'Professional Experience'
+    return json.loads(json.dumps(edited, sort_keys=True))
+
+
+def test_upload_warmup_is_hit_by_the_edited_resume():
+    store = AnalysisStore()
+    uploaded = store.put(UPLOADED)
+
+    assert store.get(as_edited_by_frontend(UPLOADED)) is uploaded
+    assert store.stats()['hits'] == 1
+
+
+def test_content_edits_miss():
+    store = AnalysisStore()
+    uploaded = store.put(UPLOADED)
+    edited = as_edited_by_frontend(UPLOADED)
+    edited['sections'][1]['items'].append('Go')
+
+    assert store.get(edited) is not uploaded
+    assert store.stats()['hits'] == 0
+
+
+def test_upload_parse_warms_the_store():
+    import app
+
+    app.finalize_parsed_resume(json.dumps(UPLOADED))
+    before = app.analysis_store.stats()['hits']
+    app.analysis_store.get(as_edited_by_frontend(UPLOADED))
+
+    assert app.analysis_store.stats()['hits'] == before + 1
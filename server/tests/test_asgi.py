@@ -0,0 +1,83 @@
+import asyncio
+import json
+
+import pytest
+
+asgi = pytest.importorskip('asgi')
+
+
+def receiver(*chunks, disconnect=False):
+    messages = [
+        {'type': 'http.request', 'body': chunk, 'more_body': index < len(chunks) - 1}
+        for index, chunk in enumerate(chunks)
+    ]
+    if disconnect:
+        messages.append({'type': 'http.disconnect'})
+
+    async def receive():
+        return messages.pop(0)
+    return receive
+
+
+def read(receive, limit=1024, spool_bytes=16):
+    return asyncio.run(asgi.read_body(receive, limit, spool_bytes))
+
+
+def test_small_bodies_stay_in_memory():
+    body, size = read(receiver(b'{"a":', b' 1}'))
+    with body:
+        assert size == 8
+        assert not body._rolled
+        assert body.read() == b'{"a": 1}'
+
+
+def test_large_bodies_spool_to_disk():
+    body, size = read(receiver(b'x' * 10, b'y' * 10))
+    with body:
+        assert size == 20
+        assert body._rolled
+        assert body.read() == b'x' * 10 + b'y' * 10
+
+
+def test_reading_stops_past_the_limit():
+    receive = receiver(b'x' * 8, b'x' * 8, b'never read')
+    with pytest.raises(asgi.BodyTooLarge):
+        read(receive, limit=10)
+
+
+def call(path, body, headers=()):
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        'type': 'http', 'method': 'POST', 'path': path, 'query_string': b'', 'root_path': '',
+        'headers': list(headers) or [(b'content-type', b'application/json')],
+    }
+    asyncio.run(asgi.application(scope, receiver(body), send))
+    return sent[0]['status'], json.loads(sent[1]['body'])
+
+
+def test_declared_oversized_body_is_refused_unread():
+    limit = asgi.upload_policy.max_request_bytes
+    status, payload = call('/api/mock-interview', b'{}', [
+        (b'content-type', b'application/json'), (b'content-length', str(limit + 1).encode())
+    ])
+    assert status == 413
+    assert 'limited to' in payload['error']
+
+
+def test_spooled_upload_reaches_the_view():
+    # Larger than the spool threshold, so Flask parses the multipart body from a temporary file;
+    # the sniff then refuses the file before any model call
+    content = b'plain text ' * (asgi.upload_policy.spool_bytes // 10)
+    body = (
+        b'--boundary\r\nContent-Disposition: form-data; name="file"; filename="resume.exe"\r\n'
+        b'Content-Type: application/octet-stream\r\n\r\n' + content + b'\r\n--boundary--\r\n'
+    )
+    status, payload = call('/api/upload-resume', body, [
+        (b'content-type', b'multipart/form-data; boundary=boundary'), (b'content-length', str(len(body)).encode())
+    ])
+    assert status == 400
+    assert payload['error'].startswith('Unsupported file format')
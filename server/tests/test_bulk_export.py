@@ -0,0 +1,35 @@
+import io
+import json
+import zipfile
+
+import app
+
+
+RESUME = {
+    'personalInfo': {'name': 'Ada Lovelace', 'email': 'ada@example.com'},
+    'sections': [
+        {'id': 'summary', 'title': 'Summary', 'content': 'Backend engineer.'},
+        {'id': 'skills', 'title': 'Skills', 'items': ['Python', 'PostgreSQL']},
+    ]
+}
+
+
+def parts(docx):
+    with zipfile.ZipFile(io.BytesIO(docx)) as package:
+        return {name: package.read(name) for name in package.namelist()}
+
+
+def test_bulk_export_documents_match_python_docx():
+    documents = [
+        {'type': 'resume', 'resume': RESUME, 'filename': 'ada'},
+        {'type': 'cover_letter', 'text': 'Dear team,\n\nHello.', 'filename': 'letter'},
+    ]
+    response = app.app.test_client().post('/api/bulk-export', json={'documents': documents})
+
+    with zipfile.ZipFile(io.BytesIO(response.data)) as archive:
+        manifest = json.loads(archive.read('manifest.json'))
+        assert manifest['succeeded'] == 2
+        assert parts(archive.read('ada.docx')) == parts(app.resume_renderer.render_resume(RESUME))
+        assert parts(archive.read('letter.docx')) == parts(
+            app.cover_letter_renderer.render_cover_letter('Dear team,\n\nHello.')
+        )
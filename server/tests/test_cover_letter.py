@@ -0,0 +1,73 @@
+from analysis_store import AnalysisStore
+from cover_letter import CoverLetterComposer, select_evidence
+
+
+JOB_DESCRIPTION = """Backend Engineer
+
+Requirements:
+- Go and PostgreSQL services behind REST APIs
+- AI tooling and Git workflows
+"""
+
+ACCOUNTANT = {
+    'personalInfo': {'name': 'Sam Rivera', 'email': 'sam@example.com'},
+    'sections': [
+        {'id': 'summary', 'content': 'Accountant going on ten years, focused on digital bookkeeping.'},
+        {'id': 'skills', 'items': ['Excel', 'QuickBooks']},
+        {'id': 'experience', 'items': [{
+            'role': 'Senior Accountant',
+            'company': 'Harbor Restaurant Group',
+            'bullets': [
+                'Maintained general ledgers for a restaurant chain of 40 sites',
+                'Moved monthly close to a digital workflow two years ago',
+            ]
+        }]},
+    ]
+}
+
+ENGINEER = {
+    'personalInfo': {'name': 'Ada Lovelace'},
+    'sections': [
+        {'id': 'skills', 'items': ['golang', 'Postgresql']},
+        {'id': 'experience', 'items': [{
+            'role': 'Engineer',
+            'company': 'Acme',
+            'bullets': [
+                'Planned the team offsite',
+                'Built Go services exposing REST endpoints on PostgreSQL',
+                'Automated releases with Git hooks',
+            ]
+        }]},
+    ]
+}
+
+
+def test_keywords_match_whole_words_only():
+    analysis = AnalysisStore().get(ACCOUNTANT)
+    assert analysis.matched_keywords(['go', 'ai', 'git', 'rest', 'postgresql']) == []
+
+
+def test_accountant_letter_claims_no_job_keywords():
+    plan = CoverLetterComposer.plan(AnalysisStore().get(ACCOUNTANT), JOB_DESCRIPTION, 'Backend Engineer', 'Acme')
+    assert plan.matched_keywords == ()
+    first = CoverLetterComposer.template_body(plan)[0]
+    assert 'hands-on experience' not in first
+
+
+def test_matched_keywords_use_the_resume_spelling():
+    plan = CoverLetterComposer.plan(AnalysisStore().get(ENGINEER), JOB_DESCRIPTION, 'Backend Engineer', 'Acme')
+    assert set(plan.matched_keywords) == {'go', 'postgresql', 'rest', 'git'}
+    # Listed skills win over the text's spelling; the rest keep the resume's casing
+    assert set(plan.display_keywords) == {'Go', 'Postgresql', 'REST', 'Git'}
+
+
+def test_evidence_counts_whole_words():
+    analysis = AnalysisStore().get(ENGINEER)
+    assert select_evidence(analysis, ['go', 'rest', 'postgresql'], count=1) == [
+        'Built Go services exposing REST endpoints on PostgreSQL'
+    ]
+    # 'rest' is not in "restaurant", so nothing matches and the first bullets are used
+    accountant = AnalysisStore().get(ACCOUNTANT)
+    assert select_evidence(accountant, ['rest', 'ai', 'git'], count=1) == [
+        'Maintained general ledgers for a restaurant chain of 40 sites'
+    ]
@@ -0,0 +1,92 @@
+import io
+import os
+import zipfile
+
+import docx
+import pytest
+
+from docx_text import extract_docx_text, iter_docx_lines
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def save(document) -> io.BytesIO:
+    buffer = io.BytesIO()
+    document.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+def test_paragraphs_tabs_and_breaks():
+    document = docx.Document()
+    document.add_paragraph('Ada Lovelace')
+    run = document.add_paragraph().add_run('Engineer')
+    run.add_tab()
+    run.add_text('2019')
+    run.add_break()
+    run.add_text('London')
+    assert extract_docx_text(save(document)) == 'Ada Lovelace\nEngineer\t2019\nLondon'
+
+
+def test_table_rows_become_lines():
+    document = docx.Document()
+    document.add_paragraph('Skills')
+    table = document.add_table(rows=2, cols=2)
+    for row, cells in zip(table.rows, (('Python', 'Go'), ('SQL', 'AWS'))):
+        for cell, text in zip(row.cells, cells):
+            cell.text = text
+    document.add_paragraph('Experience')
+    assert list(iter_docx_lines(save(document))) == ['Skills', 'Python | Go', 'SQL | AWS', 'Experience']
+
+
+def test_layout_table_cells_give_their_lines_in_turn():
+    document = docx.Document()
+    cell = document.add_table(rows=1, cols=1).rows[0].cells[0]
+    cell.text = 'Acme'
+    cell.add_paragraph('Built APIs')
+    assert list(iter_docx_lines(save(document))) == ['Acme', 'Built APIs']
+
+
+def test_headers_and_footers_are_read_once():
+    document = docx.Document()
+    section = document.sections[0]
+    section.header.paragraphs[0].text = 'ada@example.com'
+    section.different_first_page_header_footer = True
+    section.first_page_header.paragraphs[0].text = 'ada@example.com'
+    section.footer.paragraphs[0].text = 'Page footer'
+    document.add_paragraph('Body')
+    assert list(iter_docx_lines(save(document))) == ['ada@example.com', 'Body', 'Page footer']
+
+
+@pytest.mark.parametrize('name', ['test_resume.docx', 'test_resume_functional.docx'])
+def test_fixture_paragraphs_are_all_extracted(name):
+    with open(os.path.join(REPO_ROOT, name), 'rb') as f:
+        data = f.read()
+    lines = set(iter_docx_lines(io.BytesIO(data)))
+    paragraphs = [p.text for p in docx.Document(io.BytesIO(data)).paragraphs if p.text.strip()]
+    assert paragraphs
+    assert all(text in lines for text in paragraphs)
+
+
+def test_not_a_package():
+    with pytest.raises(ValueError, match='Not a DOCX package'):
+        extract_docx_text(io.BytesIO(b'plain text, not a zip'))
+
+
+def test_package_without_document_part():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as package:
+        package.writestr('[Content_Types].xml', '<Types/>')
+    buffer.seek(0)
+    with pytest.raises(ValueError, match='word/document.xml is missing'):
+        extract_docx_text(buffer)
+
+
+def test_malformed_xml():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as package:
+        package.writestr('word/document.xml', '<w:document><w:body>')
+    buffer.seek(0)
+    with pytest.raises(ValueError, match='Malformed XML'):
+        extract_docx_text(buffer)
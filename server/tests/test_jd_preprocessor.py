@@ -0,0 +1,98 @@
+import pytest
+
+from jd_preprocessor import EMPTY_POSTING, JobPostingStore, heading_kind, segment
+
+
+POSTING = """Senior Backend Engineer
+
+About us
+Acme is a leading provider of logistics software for retailers worldwide.
+
+What you'll do
+- Design and build Python services on Kubernetes
+- Own the reliability of our order pipeline
+
+Requirements:
+- 5+ years of Python and PostgreSQL experience
+- Experience running services on AWS
+Work authorization: Work authorization required for US
+
+Benefits
+- Health, dental and vision insurance
+- 401(k) matching
+
+We are an equal opportunity employer and consider all applicants without regard to race, color or religion.
+"""
+
+
+def kinds(text):
+    return [kind for kind, block in segment(text)]
+
+
+@pytest.mark.parametrize('line, expected', [
+    ('Requirements:', 'requirements'),
+    ('## What you will do', 'responsibilities'),
+    ('BENEFITS', 'benefits'),
+    ('About us', 'company'),
+    ('Equal Opportunity Employer', 'legal'),
+    ('**Team Rituals**', 'other'),
+    ('Python experience with Django and Flask', None),
+    ('- Requirements gathering with stakeholders', None),
+])
+def test_heading_kind(line, expected):
+    assert heading_kind(line) == expected
+
+
+def test_segments_follow_headings():
+    assert kinds(POSTING) == ['other', 'company', 'responsibilities', 'requirements', 'benefits', 'legal']
+
+
+def test_inline_legal_labels_stay_in_their_section():
+    requirements = dict(segment(POSTING))['requirements']
+    assert 'Work authorization required for US' in requirements
+    text = "Requirements:\n- Python\nNotice: this role includes an on-call rotation\nLocation: Remote\n"
+    assert kinds(text) == ['requirements']
+
+
+def test_inline_content_labels_open_a_section():
+    text = "We build logistics software.\n\nRequirements: 5+ years of Python\n"
+    assert kinds(text) == ['other', 'requirements']
+
+
+def test_unheaded_boilerplate_paragraphs():
+    text = (
+        "We are looking for a backend engineer to build Python services.\n\n"
+        "Perks include medical, dental and vision coverage plus a 401(k).\n\n"
+        "Acme is an equal opportunity employer."
+    )
+    assert kinds(text) == ['other', 'benefits', 'legal']
+
+
+def test_legal_line_under_a_bullet_list_leaves_the_list():
+    text = "Requirements:\n- Python\n- SQL\nWe participate in E-Verify."
+    assert segment(text) == [('requirements', 'Requirements:\n- Python\n- SQL'), ('legal', 'We participate in E-Verify.')]
+
+
+def test_posting_drops_boilerplate():
+    posting = JobPostingStore().get(POSTING)
+    assert 'Kubernetes' in posting.text
+    assert 'Work authorization required for US' in posting.text
+    assert 'dental' not in posting.text
+    assert 'equal opportunity' not in posting.text
+    assert set(posting.boilerplate) == {'company', 'benefits', 'legal'}
+    assert 'python' in posting.keywords
+    assert posting.original_chars == len(POSTING)
+
+
+def test_short_postings_keep_the_raw_text():
+    # Dropping the EEO paragraph would leave too few words to be a posting
+    raw = "Python engineer wanted.\n\n" + "We are an equal opportunity employer. " * 10
+    assert JobPostingStore().get(raw).text == raw.strip()
+
+
+def test_store_caches_by_content():
+    store = JobPostingStore()
+    assert store.get(POSTING) is store.get(POSTING)
+    assert store.get('') is EMPTY_POSTING
+    assert store.get('   \n') is EMPTY_POSTING
+    assert store.clean(POSTING) == store.get(POSTING).text
@@ -0,0 +1,102 @@
+import json
+
+import pytest
+
+from json_repair import JsonScanner, complete_json, extract_json_object, splice, strip_fences
+
+
+DOCUMENT = {
+    'summary': 'Backend engineer',
+    'sections': [
+        {'id': 'experience', 'items': [{'role': 'Engineer', 'bullets': ['Built "fast" APIs', 'Cut cost 30%']}]},
+        {'id': 'skills', 'items': ['Python', 'Go']},
+    ]
+}
+TEXT = json.dumps(DOCUMENT)
+
+
+def test_strip_fences():
+    assert strip_fences(f"```json\n{TEXT}\n```") == TEXT
+    assert strip_fences(f"```json\n{TEXT}") == TEXT
+    assert strip_fences(TEXT) == TEXT
+
+
+def test_extract_complete_object_with_prose_around_it():
+    assert extract_json_object(f"Here you go:\n{TEXT}\nThanks") == (DOCUMENT, False)
+
+
+def test_extract_without_object():
+    assert extract_json_object("No JSON here") == (None, False)
+
+
+def test_salvage_keeps_only_whole_sections():
+    cut = TEXT[:TEXT.index('"skills"') + 12]
+    salvaged, truncated = extract_json_object(cut, partial_keys=('sections',))
+    assert truncated
+    assert salvaged == {'summary': 'Backend engineer', 'sections': DOCUMENT['sections'][:1]}
+
+
+def test_salvage_never_closes_a_half_written_entry():
+    # Inside the first section nothing can be closed early, so only the summary survives
+    cut = TEXT[:TEXT.index('Cut cost')]
+    assert extract_json_object(cut, partial_keys=('sections',)) == ({'summary': 'Backend engineer'}, True)
+
+
+def test_scanner_handles_escapes_and_braces_in_strings():
+    text = json.dumps({'a': 'quote \\" and { brace }', 'b': [1, 2]})
+    scanner = JsonScanner()
+    for i in range(0, len(text), 5):
+        scanner.feed(text[i:i + 5])
+    assert scanner.complete
+    assert json.loads(scanner.document()) == {'a': 'quote \\" and { brace }', 'b': [1, 2]}
+
+
+def test_scanner_ignores_text_after_the_object():
+    scanner = JsonScanner()
+    scanner.feed('{"a": 1} trailing {"b": 2}')
+    assert scanner.document() == '{"a": 1}'
+
+
+def test_splice_drops_restated_tail_and_fence():
+    assert splice('{"summary": "Backend eng', '```json\n"summary": "Backend engineer"}') == 'ineer"}'
+    assert splice('{"a": 1', ', "b": 2}') == ', "b": 2}'
+
+
+def test_complete_json_continues_until_closed():
+    head, tail = TEXT[:40], TEXT[40:]
+    requests = []
+
+    def request_more(partial):
+        requests.append(partial)
+        return tail
+
+    completion = complete_json(head, request_more, partial_keys=('sections',))
+    assert requests == [head]
+    assert completion.continuations == 1
+    assert not completion.truncated
+    assert json.loads(completion.text) == DOCUMENT
+
+
+def test_complete_json_accepts_a_restarted_document():
+    completion = complete_json(TEXT[:60], lambda partial: TEXT)
+    assert not completion.truncated
+    assert json.loads(completion.text) == DOCUMENT
+
+
+def test_complete_json_salvages_when_continuations_fail():
+    def request_more(partial):
+        raise RuntimeError("model unavailable")
+
+    cut = TEXT[:TEXT.index('"skills"') + 12]
+    completion = complete_json(cut, request_more, partial_keys=('sections',))
+    assert completion.truncated
+    assert completion.continuations == 1
+    assert json.loads(completion.text)['sections'] == DOCUMENT['sections'][:1]
+
+
+def test_complete_json_leaves_complete_and_non_json_output_alone():
+    def request_more(partial):
+        pytest.fail("no continuation expected")
+
+    assert complete_json(f"```json\n{TEXT}\n```", request_more).text == TEXT
+    assert complete_json("# Markdown resume", request_more).text == "# Markdown resume"
@@ -0,0 +1,90 @@
+import threading
+
+import pytest
+
+from model_router import ModelError, ModelRouter, TaskRoute
+
+
+class Response:
+    def __init__(self, content):
+        self.output = {'content': content}
+        self.error = None
+
+
+class Model:
+    def __init__(self, model_id, release):
+        self.model_id = model_id
+        self.release = release
+        self.calls = 0
+
+    def run(self, messages):
+        self.calls += 1
+        if self.model_id == 'slow':
+            self.release.wait(5)
+        return Response(f'from {self.model_id}')
+
+
+def make_router(release, **kwargs):
+    models = {}
+
+    def factory(model_id):
+        return models.setdefault(model_id, Model(model_id, release))
+
+    router = ModelRouter(
+        model_factory=factory,
+        tier_models={'flagship': 'slow', 'fast': 'quick', 'lite': 'quick'},
+        routes={'task': TaskRoute('task', 'flagship', 0.05)},
+        timeout_factor=1.0,
+        **kwargs
+    )
+    return router, models
+
+
+def wait_for(condition):
+    for _ in range(200):
+        if condition():
+            return
+        threading.Event().wait(0.01)
+    raise AssertionError('condition never held')
+
+
+def test_timed_out_call_is_abandoned_until_it_finishes():
+    release = threading.Event()
+    router, _ = make_router(release)
+
+    assert router.run_text('task', 'hi') == 'from quick'
+    assert router.abandoned == 1
+    assert router.stats()['abandoned'] == 1
+
+    release.set()
+    wait_for(lambda: router.abandoned == 0)
+    assert router.in_flight == 0
+
+
+def test_failover_stops_while_abandoned_calls_are_at_the_cap():
+    release = threading.Event()
+    router, models = make_router(release, max_abandoned_calls=2)
+
+    assert router.run_text('task', 'hi') == 'from quick'
+    with pytest.raises(ModelError, match='timed-out calls still running'):
+        router.run_text('task', 'hi')
+    with pytest.raises(ModelError, match='timed-out calls still running'):
+        router.run_text('task', 'hi')
+    assert models['slow'].calls == 2
+    assert models['quick'].calls == 1
+
+    release.set()
+    wait_for(lambda: router.abandoned == 0)
+
+
+def test_call_queued_behind_a_full_pool_is_cancelled_not_abandoned():
+    release = threading.Event()
+    router, models = make_router(release, call_workers=1)
+
+    with pytest.raises(ModelError):
+        router.run_text('task', 'hi')
+    assert router.abandoned == 1
+    assert 'quick' not in models or models['quick'].calls == 0
+
+    release.set()
+    wait_for(lambda: router.abandoned == 0)
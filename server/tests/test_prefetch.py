@@ -0,0 +1,52 @@
+import threading
+import time
+
+import app
+from prefetch import Prefetcher
+
+
+def running(prefetcher, key, release, result='done'):
+    started = threading.Event()
+
+    def generate():
+        started.set()
+        release.wait(5)
+        return {'value': result}
+
+    prefetcher.submit(key, 'user', generate)
+    assert started.wait(2)
+    return generate
+
+
+def test_take_joins_a_prefetch_expected_to_finish_within_the_wait():
+    prefetcher = Prefetcher(has_capacity=lambda: True, poll_seconds=0.01)
+    release = threading.Event()
+    running(prefetcher, 'key', release)
+    threading.Timer(0.05, release.set).start()
+
+    assert prefetcher.take('key', wait=2) == {'value': 'done'}
+
+
+def test_take_does_not_wait_on_a_prefetch_that_will_not_finish_in_time():
+    prefetcher = Prefetcher(has_capacity=lambda: True, poll_seconds=0.01)
+    # Past generations took a minute; one that has just started will not be done in 2 seconds
+    prefetcher._typical_seconds = 60.0
+    release = threading.Event()
+    running(prefetcher, 'key', release)
+
+    started = time.perf_counter()
+    assert prefetcher.take('key', wait=2) is None
+    assert time.perf_counter() - started < 0.5
+    release.set()
+
+
+def test_prefetch_cap_ignores_client_supplied_user_ids(monkeypatch):
+    seen = []
+    monkeypatch.setattr(app.resume_prefetcher, 'submit', lambda key, user, generate: seen.append(user) or {'id': key})
+    client = app.app.test_client()
+    body = {'resume': {'personalInfo': {'fullName': 'Ada'}}, 'jobDescription': 'Python developer'}
+
+    client.post('/api/prefetch-resume', json=dict(body, userId='a'), environ_base={'REMOTE_ADDR': '10.0.0.1'})
+    client.post('/api/prefetch-resume', json=dict(body, userId='b'), environ_base={'REMOTE_ADDR': '10.0.0.1'})
+
+    assert seen == ['10.0.0.1', '10.0.0.1']
@@ -0,0 +1,48 @@
+import threading
+import time
+import tracemalloc
+
+import pytest
+
+from profiling import Profile
+
+
+def start(interval=0.001):
+    return Profile('generate_resume', 'POST', 'header', threading.get_ident(), interval)
+
+
+@pytest.fixture(autouse=True)
+def no_outside_session():
+    if tracemalloc.is_tracing():
+        pytest.skip('tracemalloc already started outside the profiler')
+
+
+def test_overlapping_profile_keeps_the_first_profiles_peak():
+    first = start()
+    block = bytearray(4_000_000)
+    time.sleep(0.05)
+    del block
+    second = start()
+    time.sleep(0.01)
+
+    assert first.finish(200)['memory']['peakBytes'] >= 4_000_000
+    assert second.finish(200)['memory']['peakBytes'] < 4_000_000
+
+
+def test_tracemalloc_stops_when_the_last_profile_finishes():
+    first = start()
+    second = start()
+    first.finish(200)
+    assert tracemalloc.is_tracing()
+    second.finish(200)
+    assert not tracemalloc.is_tracing()
+
+
+def test_finish_twice_releases_once():
+    profile = start()
+    other = start()
+    assert profile.finish(200) is not None
+    assert profile.finish(200) is None
+    assert tracemalloc.is_tracing()
+    other.finish(200)
+    assert not tracemalloc.is_tracing()
@@ -0,0 +1,122 @@
+import json
+import os
+
+import pytest
+
+from prompts import (
+    RESUME_PARSE, RESUME_SECTION, TRUNCATION_MARKER, PromptAssembler, PromptSlot, PromptTemplate,
+    estimate_tokens, trim_to_budget
+)
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SENTENCES = ' '.join(f"Sentence number {i} describes one more achievement." for i in range(200))
+EXPERIENCE = [
+    {
+        'company': f"Company {i}",
+        'role': 'Engineer',
+        'bullets': [f"Shipped feature {i}.{j} that cut latency by {j + 10}% for customers" for j in range(4)]
+    }
+    for i in range(12)
+]
+
+
+def test_estimate_tokens():
+    assert estimate_tokens('') == 0
+    # Words count in pieces of up to four characters, punctuation on its own
+    assert estimate_tokens('Hello, world!') == 6
+    # Long texts are counted through the cache and give the same answer
+    assert estimate_tokens('word ' * 500) == 500
+
+
+def test_text_within_budget_is_untouched():
+    assert trim_to_budget('Short text.', 100) == ('Short text.', False)
+
+
+def test_tail_trim_fits_and_ends_at_a_sentence():
+    text, trimmed = trim_to_budget(SENTENCES, 200)
+    assert trimmed
+    assert estimate_tokens(text) <= 200
+    assert text.endswith('achievement.' + TRUNCATION_MARKER)
+    assert SENTENCES.startswith(text[:-len(TRUNCATION_MARKER)])
+
+
+def test_middle_trim_keeps_head_and_tail():
+    text, trimmed = trim_to_budget(SENTENCES, 300, 'middle')
+    assert trimmed
+    assert estimate_tokens(text) <= 300
+    assert text.startswith('Sentence number 0 ')
+    assert text.endswith('Sentence number 199 describes one more achievement.')
+    assert TRUNCATION_MARKER in text
+
+
+def test_json_trim_drops_whole_entries():
+    text = json.dumps(EXPERIENCE, indent=2)
+    trimmed, changed = trim_to_budget(text, 400, 'json')
+    assert changed
+    assert estimate_tokens(trimmed) <= 400
+    kept = json.loads(trimmed)
+    assert kept and kept == EXPERIENCE[:len(kept)]
+
+
+def test_json_trim_empties_a_list_last():
+    doc = {'experience': EXPERIENCE, 'education': [{'school': 'Uni', 'degree': 'BSc'}]}
+    trimmed, _ = trim_to_budget(json.dumps(doc), 300, 'json')
+    kept = json.loads(trimmed)
+    assert kept['education'] == doc['education']
+    assert 0 < len(kept['experience']) < len(EXPERIENCE)
+
+
+def test_json_trim_shortens_long_strings_once_lists_are_empty():
+    doc = {'summary': SENTENCES, 'skills': ['Python']}
+    trimmed, _ = trim_to_budget(json.dumps(doc), 300, 'json')
+    kept = json.loads(trimmed)
+    assert estimate_tokens(trimmed) <= 300
+    assert kept['skills'] == []
+    assert kept['summary'] and SENTENCES.startswith(kept['summary'])
+
+
+def test_json_trim_of_a_bare_string_stays_valid():
+    trimmed, _ = trim_to_budget(json.dumps(SENTENCES), 200, 'json')
+    assert estimate_tokens(trimmed) <= 200
+    assert json.loads(trimmed).startswith('Sentence number 0 ')
+
+
+def test_json_strategy_falls_back_to_tail_for_text():
+    text, trimmed = trim_to_budget(SENTENCES, 200, 'json')
+    assert trimmed
+    assert text.endswith(TRUNCATION_MARKER)
+
+
+def test_assemble_orders_slots_and_reports_trims():
+    template = PromptTemplate(
+        name='test',
+        instructions='Do the thing.',
+        slots=(PromptSlot('profile', 'PROFILE', budget=50), PromptSlot('notes', ''))
+    )
+    prompt = PromptAssembler.assemble(template, profile=SENTENCES, notes='  Be brief.  ')
+    assert prompt.text.startswith('Do the thing.\n\nPROFILE:\nSentence number 0 ')
+    assert prompt.text.endswith('\n\nBe brief.')
+    assert prompt.trimmed == ['profile']
+    assert prompt.breakdown['profile'] <= 50
+    assert prompt.total_tokens == sum(prompt.breakdown.values())
+
+
+@pytest.mark.parametrize('name', ['test_resume_dense.txt', 'sample_resume.txt'])
+def test_resume_parse_keeps_at_least_15000_characters(name):
+    with open(os.path.join(REPO_ROOT, name), encoding='utf-8') as f:
+        resume = f.read()
+    text = (resume * (15000 // len(resume) + 1))[:15000]
+    prompt = PromptAssembler.assemble(RESUME_PARSE, resume_text=text)
+    assert prompt.trimmed == []
+    assert text in prompt.text
+
+
+def test_section_slot_stays_valid_json():
+    prompt = PromptAssembler.assemble(
+        RESUME_SECTION, job_description='Backend role', rules='Section: experience', section=json.dumps(EXPERIENCE * 10)
+    )
+    assert prompt.trimmed == ['section']
+    section = prompt.text.split('CURRENT SECTION:\n', 1)[1].split('\n\n', 1)[0]
+    assert json.loads(section) == (EXPERIENCE * 10)[:len(json.loads(section))]
@@ -0,0 +1,76 @@
+import pytest
+
+from resume_model import ResumeModel
+from semantic_matcher import SemanticMatcher
+
+
+RESUME = {
+    'personalInfo': {'name': 'Ada Lovelace'},
+    'sections': [
+        {'id': 'skills', 'items': ['Python', 'Django', 'PostgreSQL']},
+        {'id': 'experience', 'items': [{
+            'role': 'Backend Engineer',
+            'company': 'Acme',
+            'bullets': ['Built Django REST APIs on PostgreSQL', 'Mentored two junior engineers'],
+        }]},
+    ]
+}
+BACKEND = {'jobTitle': 'Backend Engineer', 'companyName': 'Acme', 'jobDescription': 'Python, Django and SQL APIs.'}
+DESIGN = {'jobTitle': 'Graphic Designer', 'companyName': 'Studio', 'jobDescription': 'Branding, print and typography.'}
+
+
+def test_related_texts_score_higher():
+    matcher = SemanticMatcher()
+    assert matcher.similarity('Flask REST services', 'backend Python API engineer') > \
+        matcher.similarity('Flask REST services', 'watercolour landscape painting')
+
+
+def test_job_embeddings_are_cached_by_content():
+    matcher = SemanticMatcher()
+    first = matcher.embed_jobs([BACKEND, DESIGN])
+    again = matcher.embed_jobs([DESIGN, dict(BACKEND), BACKEND])
+    assert again[0] is first[1] and again[1] is first[0] and again[2] is first[0]
+    assert matcher.stats()['size'] == 2
+
+
+def test_top_bullets_rank_resume_evidence():
+    matcher = SemanticMatcher()
+    profile = matcher.resume_profile('ada', ResumeModel.from_frontend(RESUME))
+    bullets = matcher.top_bullets(profile, matcher.embed_jobs([BACKEND])[0], count=1)
+    assert bullets[0]['text'] == 'Built Django REST APIs on PostgreSQL'
+
+
+@pytest.fixture(scope='module')
+def client():
+    import app
+    return app.app.test_client()
+
+
+def test_match_jobs_returns_request_ids_and_titles(client):
+    jobs = [
+        {'id': 'design-1', **DESIGN},
+        {'id': 'backend-1', **BACKEND},
+        # The same posting under a second id and title is ranked on its own
+        {'id': 'backend-2', **BACKEND, 'jobTitle': 'Python Developer'},
+        {**DESIGN},
+    ]
+    response = client.post('/api/match-jobs', json={'resume': RESUME, 'jobs': jobs})
+    assert response.status_code == 200
+    results = response.get_json()['results']
+    assert [(r['id'], r['index']) for r in results[:2]] == [('backend-1', 1), ('backend-2', 2)]
+    assert results[1]['jobTitle'] == 'Python Developer'
+    assert {r['index'] for r in results} == {0, 1, 2, 3}
+    assert next(r for r in results if r['index'] == 3)['id'] is None
+    assert 'django' in results[0]['matchedKeywords']
+
+
+def test_duplicate_postings_keep_their_own_results(client):
+    jobs = [{'id': 'board-a', **BACKEND}, {'id': 'board-b', **BACKEND}]
+    results = client.post('/api/match-jobs', json={'resume': RESUME, 'jobs': jobs}).get_json()['results']
+    assert [r['id'] for r in results] == ['board-a', 'board-b']
+    assert results[0]['score'] == results[1]['score']
+
+
+def test_match_jobs_requires_jobs(client):
+    assert client.post('/api/match-jobs', json={'resume': RESUME}).status_code == 400
+    assert client.post('/api/match-jobs', json={'resume': RESUME, 'jobs': []}).status_code == 400
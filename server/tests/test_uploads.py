@@ -0,0 +1,113 @@
+import io
+import zipfile
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+import uploads
+from uploads import BoundedSpool, UploadPolicy, UploadRejected, format_size, read_text
+
+
+def docx_bytes(members=('word/document.xml',)) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as package:
+        for name in members:
+            package.writestr(name, '<xml/>')
+    return buffer.getvalue()
+
+
+def detect(data: bytes, filename: str, policy: UploadPolicy = None):
+    return (policy or UploadPolicy()).detect(FileStorage(stream=io.BytesIO(data), filename=filename))
+
+
+def rejection(data: bytes, filename: str, policy: UploadPolicy = None) -> UploadRejected:
+    with pytest.raises(UploadRejected) as caught:
+        detect(data, filename, policy)
+    return caught.value
+
+
+@pytest.mark.parametrize('data, filename, expected', [
+    (b'%PDF-1.7\n...', 'resume.pdf', 'pdf'),
+    (b'\r\n\xef\xbb\xbf%PDF-1.4\n...', 'resume.pdf', 'pdf'),
+    (b'%PDF-1.7\n...', 'resume.docx', 'pdf'),
+    (docx_bytes(), 'resume.pdf', 'docx'),
+    (docx_bytes(), 'resume', 'docx'),
+    ('Ada Lovelace\nEngineer – Zürich'.encode('utf-8'), 'resume.txt', 'txt'),
+])
+def test_content_decides_the_format(data, filename, expected):
+    assert detect(data, filename) == (expected, len(data))
+
+
+@pytest.mark.parametrize('data, reason, status', [
+    (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1' + b'\x00' * 64, 'doc', 415),
+    (b'{\\rtf1\\ansi hello}', 'rtf', 415),
+    (b'\x89PNG\r\n\x1a\n' + b'\x00' * 64, 'image', 415),
+    (b'\x7fELF\x02\x01\x01\x00', 'binary', 415),
+    (b'', 'empty', 400),
+])
+def test_unsupported_content_is_refused(data, reason, status):
+    error = rejection(data, 'resume.docx')
+    assert (error.reason, error.status) == (reason, status)
+
+
+def test_plain_text_needs_a_document_extension():
+    assert rejection(b'Ada Lovelace', 'resume.exe').reason == 'unsupported'
+
+
+def test_archives_that_are_not_word_documents():
+    assert rejection(docx_bytes(('xl/workbook.xml',)), 'resume.docx').reason == 'not_docx'
+    assert rejection(b'PK\x03\x04 truncated archive', 'resume.docx').reason == 'corrupt'
+
+
+def test_size_is_checked_against_the_detected_format():
+    policy = UploadPolicy(limits={'txt': 10})
+    error = rejection(b'A' * 11, 'resume.txt', policy)
+    assert (error.reason, error.status) == ('too_large', 413)
+    # The same bytes claimed as a PDF are still text, and still too large
+    assert rejection(b'A' * 11, 'resume.pdf', policy).reason == 'too_large'
+
+
+def test_docx_unpacked_size_is_capped():
+    policy = UploadPolicy(max_docx_unpacked_bytes=4)
+    assert rejection(docx_bytes(), 'resume.docx', policy).reason == 'too_large'
+
+
+def test_request_cap_defaults_to_largest_limit_plus_one_megabyte():
+    policy = UploadPolicy(limits={'pdf': 2 * 1024 * 1024})
+    assert policy.max_request_bytes == 5 * 1024 * 1024 + 1024 * 1024
+
+
+def test_from_env():
+    policy = UploadPolicy.from_env({'UPLOAD_MAX_TXT_BYTES': '100', 'MAX_REQUEST_BYTES': '2000'})
+    assert policy.limits['txt'] == 100
+    assert policy.limits['pdf'] == uploads.DEFAULT_LIMITS['pdf']
+    assert policy.max_request_bytes == 2000
+
+
+def test_bounded_spool_stops_at_its_limit():
+    spool = BoundedSpool(limit=8, label='txt', spool_bytes=4)
+    spool.write(b'12345678')
+    with pytest.raises(UploadRejected) as caught:
+        spool.write(b'9')
+    assert caught.value.status == 413
+
+
+def test_open_stream_uses_the_extension_cap():
+    policy = UploadPolicy(limits={'txt': 10, 'pdf': 20, 'docx': 30})
+    assert policy.open_stream('resume.txt').limit == 10
+    assert policy.open_stream('resume.bin').limit == 30
+
+
+def test_read_text_decodes_across_chunks(monkeypatch):
+    text = 'Zürich – ' * 50
+    assert read_text(io.BytesIO(text.encode('utf-8'))) == text
+    # Multi-byte characters split between reads still decode
+    monkeypatch.setattr(uploads, '_READ_CHUNK', 7)
+    assert read_text(io.BytesIO(text.encode('utf-8'))) == text
+
+
+@pytest.mark.parametrize('num_bytes, expected', [
+    (512, '512 bytes'), (1024, '1 KB'), (1536, '1.5 KB'), (10 * 1024 * 1024, '10 MB'),
+])
+def test_format_size(num_bytes, expected):
+    assert format_size(num_bytes) == expected
@@ -0,0 +1,97 @@
+import copy
+
+import pytest
+
+from resume_model import ResumeModel
+from version_store import VersionStore, split_markdown
+
+
+BASE = {
+    'name': 'Ada Lovelace',
+    'email': 'ada@example.com',
+    'summary': 'Engineer.',
+    'skills': ['Python', 'SQL'],
+    'experience': [
+        {'role': 'Engineer', 'company': 'Acme', 'bullets': ['Built A', 'Built B']},
+        {'role': 'Intern', 'company': 'Beta', 'bullets': ['Did C']},
+    ],
+    'education': [{'degree': 'BSc', 'school': 'Uni'}],
+    'projects': []
+}
+MARKDOWN = "# Ada Lovelace\n\n## Summary\nEngineer.\n\n## Skills\nPython, SQL\n"
+
+
+def tailored():
+    variant = copy.deepcopy(BASE)
+    variant['summary'] = 'Backend engineer.'
+    variant['skills'] = ['Python', 'Go', 'SQL']
+    variant['experience'][0]['bullets'][1] = 'Built B faster'
+    return variant
+
+
+def test_variant_round_trips():
+    store = VersionStore()
+    result = store.put(BASE, tailored(), {'jobTitle': 'Backend Engineer'})
+    assert result['kind'] == 'json'
+    assert store.document(result['id']) == ResumeModel.coerce(tailored()).to_dict()
+    assert store.document(result['base']) == ResumeModel.coerce(BASE).to_dict()
+
+
+def test_variant_stores_only_its_delta():
+    store = VersionStore()
+    base = store.put(BASE)
+    variant = store.put(BASE, tailored())
+    assert variant['base'] == base['id']
+    assert variant['storedBytes'] < base['storedBytes']
+    assert set(store.delta(variant['id'])['delta']) == {'summary', 'skills', 'experience'}
+
+
+def test_same_content_is_stored_once():
+    store = VersionStore()
+    first = store.put(BASE, tailored(), {'jobTitle': 'A'})
+    second = store.put(BASE, tailored(), {'jobTitle': 'B'})
+    assert second['id'] == first['id']
+    assert second['deduplicated']
+    assert second['storedBytes'] == 0
+    assert [v['id'] for v in store.variants(first['base'])] == [first['id']]
+
+
+def test_diff_against_base():
+    store = VersionStore()
+    variant = store.put(BASE, tailored())
+    changes = store.diff(variant['id'])['changes']
+    assert changes['summary'] == {'from': 'Engineer.', 'to': 'Backend engineer.'}
+    assert changes['skills'] == {'added': ['Go'], 'removed': [], 'reordered': False}
+    assert changes['experience']['changed'] == [
+        {'item': 'Acme', 'bulletsAdded': ['Built B faster'], 'bulletsRemoved': ['Built B']}
+    ]
+    assert 'education' not in changes
+
+
+def test_markdown_variants():
+    store = VersionStore()
+    variant = store.put(BASE, MARKDOWN)
+    assert store.document(variant['id']) == MARKDOWN
+    assert ''.join(split_markdown(MARKDOWN)) == MARKDOWN
+
+    edited = store.put(BASE, MARKDOWN.replace('Python, SQL', 'Python, Go, SQL'))
+    changes = store.diff(edited['id'], variant['id'])['changes']
+    assert list(changes) == ['## Skills']
+    with pytest.raises(ValueError):
+        store.diff(variant['id'], variant['base'])
+
+
+def test_unknown_and_malformed_ids():
+    store = VersionStore()
+    assert store.document('0' * 32) is None
+    assert store.record('../etc/passwd') is None
+    assert store.diff('0' * 32) is None
+
+
+def test_pack_file_survives_reopen(tmp_path):
+    path = str(tmp_path / 'resumes.pack')
+    variant = VersionStore(path).put(BASE, tailored())
+    reopened = VersionStore(path)
+    assert reopened.document(variant['id']) == ResumeModel.coerce(tailored()).to_dict()
+    assert reopened.stats()['versions'] == 2
+    assert [v['id'] for v in reopened.variants(variant['base'])] == [variant['id']]
@@ -0,0 +1,234 @@
+"""
+Upload Handling
+Per-format size caps enforced while the body streams in, disk spooling and magic-byte format sniffing
+"""
+import codecs
+import os
+import tempfile
+import zipfile
+from typing import BinaryIO, Dict, Optional, Tuple
+
+from logs import get_logger
+from metrics import registry
+
+
+log = get_logger('upload')
+
+UPLOADS_REJECTED = registry.counter('uploads_rejected_total', 'Uploads refused before parsing, by reason and format')
+UPLOAD_BYTES = registry.histogram(
+    'upload_size_bytes', 'Size of accepted uploads, by detected format',
+    buckets=(4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+)
+
+SUPPORTED_FORMATS = ('pdf', 'docx', 'txt')
+
+DEFAULT_LIMITS = {'pdf': 10 * 1024 * 1024, 'docx': 5 * 1024 * 1024, 'txt': 1024 * 1024}
+
+# Bytes read to identify a file; PDF headers may sit behind a little leading junk
+SNIFF_BYTES = 8192
+_PDF_HEADER_WINDOW = 1024
+
+# Formats recognised only so they can be refused with a useful message
+_UNSUPPORTED_SIGNATURES = (
+    (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', 'doc', 'Legacy Word (.doc) files are not supported; please save the file as .docx'),
+    (b'{\\rtf', 'rtf', 'RTF files are not supported; please save the file as .docx or .pdf'),
+    (b'\x89PNG\r\n\x1a\n', 'image', 'Images are not supported; please upload a text-based PDF, DOCX or TXT'),
+    (b'\xff\xd8\xff', 'image', 'Images are not supported; please upload a text-based PDF, DOCX or TXT'),
+    (b'GIF8', 'image', 'Images are not supported; please upload a text-based PDF, DOCX or TXT'),
+)
+
+_READ_CHUNK = 64 * 1024
+
+
+class UploadRejected(Exception):
+    """Raised when an upload is refused before any parser runs"""
+
+    def __init__(self, message: str, status: int = 400, reason: str = 'invalid'):
+        super().__init__(message)
+        self.status = status
+        self.reason = reason
+
+
+def format_size(num_bytes: int) -> str:
+    for unit, scale in (('MB', 1024 * 1024), ('KB', 1024)):
+        if num_bytes >= scale:
+            return f"{num_bytes / scale:g} {unit}"
+    return f"{num_bytes} bytes"
+
+
+def extension_of(filename: Optional[str]) -> str:
+    return os.path.splitext(filename or '')[1].lower().lstrip('.')
+
+
+class BoundedSpool(tempfile.SpooledTemporaryFile):
+    """
+    Upload buffer that stays in memory up to spool_bytes, then moves to a temporary file
+
+    Writing past `limit` raises UploadRejected, which aborts the multipart
+    parse, so an oversized file is never buffered beyond its cap.
+    """
+
+    def __init__(self, limit: int, label: str, spool_bytes: int):
+        super().__init__(max_size=spool_bytes, mode='w+b')
+        self.limit = limit
+        self.label = label
+        self.written = 0
+
+    def write(self, data) -> int:
+        self.written += len(data)
+        if self.written > self.limit:
+            UPLOADS_REJECTED.inc(labels={'reason': 'too_large', 'format': self.label})
+            log.warning('rejected', reason='too_large', format=self.label, limit=self.limit)
+            raise UploadRejected(
+                f"{self.label.upper()} uploads are limited to {format_size(self.limit)}", status=413, reason='too_large'
+            )
+        return super().write(data)
+
+
+class UploadPolicy:
+    """
+    Limits and format detection for resume uploads
+
+    Size caps are chosen from the filename extension while the multipart body
+    is parsed, then checked again against the sniffed format. The sniff reads
+    only the first bytes of the buffered upload (plus the zip directory for
+    DOCX), so a mislabeled or garbage file is refused or rerouted to the
+    right parser before any parsing work happens.
+    """
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, int]] = None,
+        spool_bytes: int = 512 * 1024,
+        max_request_bytes: Optional[int] = None,
+        max_docx_unpacked_bytes: int = 50 * 1024 * 1024
+    ):
+        """
+        Args:
+            limits: Largest accepted upload per format ('pdf', 'docx', 'txt')
+            spool_bytes: Uploads larger than this are buffered on disk instead of in memory
+            max_request_bytes: Cap on any request body; defaults to the largest format cap plus 1 MB
+            max_docx_unpacked_bytes: Largest total uncompressed size of a DOCX package
+        """
+        self.limits = {**DEFAULT_LIMITS, **(limits or {})}
+        self.spool_bytes = spool_bytes
+        self.max_request_bytes = max_request_bytes or max(self.limits.values()) + 1024 * 1024
+        self.max_docx_unpacked_bytes = max_docx_unpacked_bytes
+
+    @classmethod
+    def from_env(cls, environ=os.environ) -> 'UploadPolicy':
+        """Read UPLOAD_MAX_<FORMAT>_BYTES, UPLOAD_SPOOL_BYTES, MAX_REQUEST_BYTES and UPLOAD_MAX_DOCX_UNPACKED_BYTES"""
+        limits = {
+            fmt: int(environ.get(f"UPLOAD_MAX_{fmt.upper()}_BYTES", str(default)))
+            for fmt, default in DEFAULT_LIMITS.items()
+        }
+        max_request_bytes = environ.get("MAX_REQUEST_BYTES")
+        return cls(
+            limits=limits,
+            spool_bytes=int(environ.get("UPLOAD_SPOOL_BYTES", str(512 * 1024))),
+            max_request_bytes=int(max_request_bytes) if max_request_bytes else None,
+            max_docx_unpacked_bytes=int(environ.get("UPLOAD_MAX_DOCX_UNPACKED_BYTES", str(50 * 1024 * 1024)))
+        )
+
+    def install(self, app) -> None:
+        """Set the app's request body cap and buffer uploaded files through BoundedSpool"""
+        policy = self
+
+        class UploadRequest(app.request_class):
+            def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+                return policy.open_stream(filename)
+
+        app.request_class = UploadRequest
+        app.config['MAX_CONTENT_LENGTH'] = self.max_request_bytes
+
+    def limit_for(self, fmt: str) -> int:
+        # Unknown extensions get the largest cap; the sniff decides what they are
+        return self.limits.get(fmt, max(self.limits.values()))
+
+    def open_stream(self, filename: Optional[str]) -> BoundedSpool:
+        fmt = extension_of(filename)
+        return BoundedSpool(self.limit_for(fmt), fmt if fmt in SUPPORTED_FORMATS else 'file', self.spool_bytes)
+
+    def detect(self, file) -> Tuple[str, int]:
+        """
+        Identify an uploaded file by its content and check its size
+
+        Args:
+            file: Uploaded FileStorage; its stream must be seekable
+
+        Returns:
+            (format, size in bytes); format is one of SUPPORTED_FORMATS and may
+            differ from the filename's extension
+
+        Raises:
+            UploadRejected: If the content is unsupported, binary garbage, too large or empty
+        """
+        claimed = extension_of(file.filename)
+        stream: BinaryIO = file.stream
+        stream.seek(0, os.SEEK_END)
+        size = stream.tell()
+        stream.seek(0)
+        head = stream.read(SNIFF_BYTES)
+        stream.seek(0)
+
+        if not head:
+            self._reject('empty', claimed, 'The uploaded file is empty')
+        detected = self._sniff(head, claimed)
+        if detected == 'docx':
+            self._check_docx(stream, claimed)
+
+        limit = self.limit_for(detected)
+        if size > limit:
+            self._reject('too_large', detected, f"{detected.upper()} uploads are limited to {format_size(limit)}", 413)
+        if detected != claimed:
+            log.info('rerouted', claimed=claimed or 'none', detected=detected, bytes=size)
+        UPLOAD_BYTES.observe(size, labels={'format': detected})
+        return detected, size
+
+    def _sniff(self, head: bytes, claimed: str) -> str:
+        if b'%PDF-' in head[:_PDF_HEADER_WINDOW]:
+            return 'pdf'
+        if head.startswith(b'PK\x03\x04'):
+            return 'docx'
+        for signature, reason, message in _UNSUPPORTED_SIGNATURES:
+            if head.startswith(signature):
+                self._reject(reason, claimed, message, 415)
+        if b'\x00' in head:
+            self._reject('binary', claimed, 'The file does not look like a PDF, DOCX or TXT document', 415)
+        if claimed not in SUPPORTED_FORMATS:
+            # Plain text is only trusted when the name says it is a resume document
+            self._reject('unsupported', claimed, 'Unsupported file format. Please upload PDF, DOCX, or TXT', 400)
+        return 'txt'
+
+    def _check_docx(self, stream: BinaryIO, claimed: str) -> None:
+        # Only the central directory is read; declared sizes bound what python-docx will inflate
+        try:
+            with zipfile.ZipFile(stream) as package:
+                members = package.infolist()
+        except zipfile.BadZipFile:
+            self._reject('corrupt', claimed, 'The file looks like a DOCX document but its archive is damaged', 400)
+        finally:
+            stream.seek(0)
+        if not any(member.filename == 'word/document.xml' for member in members):
+            self._reject('not_docx', claimed, 'The archive is not a Word document; please upload PDF, DOCX, or TXT', 415)
+        if sum(member.file_size for member in members) > self.max_docx_unpacked_bytes:
+            self._reject('too_large', 'docx', 'The DOCX file expands to more content than is accepted', 413)
+
+    @staticmethod
+    def _reject(reason: str, fmt: str, message: str, status: int = 400):
+        UPLOADS_REJECTED.inc(labels={'reason': reason, 'format': fmt or 'none'})
+        log.warning('rejected', reason=reason, format=fmt or 'none')
+        raise UploadRejected(message, status=status, reason=reason)
+
+
+def read_text(stream: BinaryIO, encoding: str = 'utf-8') -> str:
+    """Decode a text upload chunk by chunk instead of holding its raw bytes and text together"""
+    first = stream.read(_READ_CHUNK)
+    if len(first) < _READ_CHUNK:
+        # The whole upload fit in one read, as nearly every resume does
+        return first.decode(encoding, errors='ignore')
+    decoder = codecs.getincrementaldecoder(encoding)(errors='ignore')
+    parts = [decoder.decode(first)]
+    parts.extend(decoder.decode(chunk) for chunk in iter(lambda: stream.read(_READ_CHUNK), b''))
+    parts.append(decoder.decode(b'', final=True))
+    return ''.join(parts)
@@ -0,0 +1,612 @@
+"""
+Resume Version Store
+Content-addressed storage of tailored resume variants as structural deltas against their base resume
+"""
+import difflib
+import hashlib
+import json
+import os
+import re
+import struct
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from cache import LRUCache
+from logs import get_logger
+from metrics import registry
+from resume_model import ResumeModel
+
+
+log = get_logger('versions')
+
+VERSIONS_STORED = registry.counter('resume_versions_stored_total', 'Resume versions stored, by kind and whether they were duplicates')
+VERSION_BYTES = registry.counter('resume_version_bytes_total', 'Bytes of resume versions: logical document size and bytes actually written')
+
+CONTACT_FIELDS = ('name', 'email', 'phone', 'location', 'linkedin', 'github')
+SLOTS = ('contact', 'summary', 'skills', 'experience', 'education', 'projects')
+LIST_SLOTS = ('experience', 'education', 'projects')
+
+_ID = re.compile(r'^[0-9a-f]{32}$')
+_MARKDOWN_SECTION = re.compile(r'(?m)^(?=#)')
+
+
+def _canonical(value: Any) -> bytes:
+    return json.dumps(value, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def _address(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def _item_label(slot: str, item: Dict[str, Any]) -> str:
+    if slot == 'experience':
+        return ' at '.join(filter(None, [item.get('position'), item.get('company')]))
+    if slot == 'education':
+        return ', '.join(filter(None, [item.get('degree'), item.get('school')]))
+    return item.get('title', '')
+
+
+def _item_identity(slot: str, item: Dict[str, Any]) -> Tuple[str, ...]:
+    # Tailoring rewrites bullets but keeps the role, school or project it describes
+    if slot == 'experience':
+        return (item.get('company', '').lower(), item.get('position', '').lower())
+    if slot == 'education':
+        return (item.get('school', '').lower(), item.get('degree', '').lower())
+    return (item.get('title', '').lower(),)
+
+
+def _list_ops(values: List[Any], base: List[Any]) -> List[Any]:
+    """A list as base positions (ints) for values the base has, and the values themselves otherwise"""
+    positions = {}
+    for position, value in enumerate(base):
+        positions.setdefault(value, position)
+    return [positions.get(value, value) for value in values]
+
+
+def _apply_ops(ops: List[Any], base: List[Any]) -> List[Any]:
+    return [base[op] if isinstance(op, int) else op for op in ops]
+
+
+def split_markdown(text: str) -> List[str]:
+    """Split a Markdown resume before every heading; joining the pieces gives the text back unchanged"""
+    return [piece for piece in _MARKDOWN_SECTION.split(text) if piece]
+
+
+class _Pack:
+    """
+    Append-only file of write-once records keyed by content address
+
+    Each record is a type byte, a 16-byte key, a length and the payload,
+    zlib-compressed when that makes it smaller. Small blobs (a summary, a
+    patched experience entry) would waste most of a filesystem block each as
+    separate files, so they share one file and an in-memory offset index
+    rebuilt by scanning the headers on open. Without a path everything stays
+    in memory.
+    """
+
+    HEADER = struct.Struct('>c16sI')
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.size = 0
+        self._lock = threading.Lock()
+        self._memory: Dict[bytes, Tuple[bytes, bytes]] = {}
+        self._offsets: Dict[bytes, Tuple[bytes, int, int]] = {}
+        self._file = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._file = open(path, 'a+b')
+
+    def __contains__(self, key: bytes) -> bool:
+        return key in self._offsets or key in self._memory
+
+    def __len__(self) -> int:
+        return len(self._offsets) + len(self._memory)
+
+    @staticmethod
+    def _pack(kind: bytes, payload: bytes) -> Tuple[bytes, bytes]:
+        # Upper-case types mark compressed payloads
+        compressed = zlib.compress(payload)
+        if len(compressed) < len(payload):
+            return kind.upper(), compressed
+        return kind, payload
+
+    @staticmethod
+    def _unpack(kind: bytes, data: bytes) -> bytes:
+        return zlib.decompress(data) if kind.isupper() else data
+
+    def records(self) -> Iterator[Tuple[bytes, bytes, bytes]]:
+        """(type, key, payload) for every stored record, in write order; indexes the file as it goes"""
+        if self._file is None:
+            return
+        with self._lock:
+            self._file.seek(0)
+            offset = 0
+            while True:
+                header = self._file.read(self.HEADER.size)
+                if len(header) < self.HEADER.size:
+                    break
+                kind, key, length = self.HEADER.unpack(header)
+                data = self._file.read(length)
+                if len(data) < length:
+                    break
+                self._offsets[key] = (kind, offset + self.HEADER.size, length)
+                offset += self.HEADER.size + length
+                yield kind.lower(), key, self._unpack(kind, data)
+            if offset < self._file.seek(0, os.SEEK_END):
+                # A write cut short by a crash; later appends start from the last complete record
+                log.warning('pack.truncated', path=self.path, offset=offset)
+                self._file.truncate(offset)
+            self.size = offset
+
+    def put(self, kind: bytes, key: bytes, payload: bytes) -> int:
+        """Store a record unless the key exists; returns the bytes written"""
+        if key in self:
+            return 0
+        kind, data = self._pack(kind, payload)
+        with self._lock:
+            if key in self:
+                return 0
+            if self._file is None:
+                self._memory[key] = (kind, data)
+                self.size += len(data)
+                return len(data)
+            self._file.seek(0, os.SEEK_END)
+            self._file.write(self.HEADER.pack(kind, key, len(data)) + data)
+            self._file.flush()
+            self._offsets[key] = (kind, self.size + self.HEADER.size, len(data))
+            self.size += self.HEADER.size + len(data)
+            return self.HEADER.size + len(data)
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                location = self._offsets.get(key)
+                if location is None:
+                    return None
+                kind, offset, length = location
+                self._file.seek(offset)
+                entry = (kind, self._file.read(length))
+        return self._unpack(*entry)
+
+
+class VersionStore:
+    """
+    Store tailored resume variants as deltas against their base resume
+
+    A base resume is normalised to the parse_user_resume dictionary and
+    stored as blobs addressed by their content hash: the contact block, the
+    summary, the skill list and each experience, education and project
+    entry. A variant stores only what differs from its base: a new summary
+    or contact block as blobs, the skill list as base positions plus added
+    skills, and each entry list as base positions plus patches holding the
+    changed fields and bullets. Identical blobs and patches are stored once
+    however many variants use them, and Markdown variants are stored as
+    their heading-delimited sections, shared the same way.
+
+    Versions are addressed by their content too: storing the same variant
+    twice returns the existing id. Comparing a variant with its base reads
+    only the sections its delta touches.
+    """
+
+    def __init__(self, path: Optional[str] = None, cache_size: int = 4096):
+        """
+        Args:
+            path: Pack file holding blobs and versions; None keeps the store in memory
+            cache_size: Decoded blobs and versions kept in memory
+        """
+        self._pack = _Pack(path)
+        self._cache = LRUCache(max_entries=cache_size, name='resume_versions')
+        self._lock = threading.Lock()
+        self._variants: Dict[str, List[str]] = {}
+        self._logical_bytes = 0
+        self._versions = 0
+        for kind, key, payload in self._pack.records():
+            if kind == b'v':
+                self._index(key.hex(), json.loads(payload))
+
+    @classmethod
+    def from_env(cls, environ=os.environ) -> 'VersionStore':
+        """Read VERSION_STORE_PATH (empty for in-memory) and VERSION_CACHE_SIZE"""
+        return cls(
+            path=environ.get("VERSION_STORE_PATH", "versions/resumes.pack") or None,
+            cache_size=int(environ.get("VERSION_CACHE_SIZE", "4096"))
+        )
+
+    def _index(self, version_id: str, record: Dict[str, Any]) -> None:
+        with self._lock:
+            self._versions += 1
+            self._logical_bytes += record.get('logicalBytes', 0)
+            if record.get('base'):
+                self._variants.setdefault(record['base'], []).append(version_id)
+
+    # Blobs
+
+    def _put_blob(self, value: Any, written: List[int]) -> str:
+        payload = _canonical(value)
+        key = _address(payload)
+        written[0] += self._pack.put(b'b', key, payload)
+        return key.hex()
+
+    def _blob(self, address: str) -> Any:
+        value = self._cache.get(address)
+        if value is None:
+            payload = self._pack.get(bytes.fromhex(address))
+            if payload is None:
+                raise KeyError(f"Missing blob {address}")
+            value = json.loads(payload)
+            self._cache.set(address, value)
+        return value
+
+    def _base_parts(self, document: Dict[str, Any], written: List[int]) -> Dict[str, Any]:
+        parts = {
+            'contact': self._put_blob({name: document.get(name, '') for name in CONTACT_FIELDS}, written),
+            'summary': self._put_blob(document.get('summary', ''), written),
+            'skills': self._put_blob(document.get('skills', []), written),
+        }
+        for slot in LIST_SLOTS:
+            parts[slot] = [self._put_blob(item, written) for item in document.get(slot, [])]
+        return parts
+
+    def _decode_base(self, parts: Dict[str, Any]) -> Dict[str, Any]:
+        document = dict(self._blob(parts['contact']))
+        document['summary'] = self._blob(parts['summary'])
+        document['skills'] = list(self._blob(parts['skills']))
+        for slot in LIST_SLOTS:
+            document[slot] = [self._blob(address) for address in parts[slot]]
+        return document
+
+    def _delta(self, document: Dict[str, Any], base: Dict[str, Any], written: List[int]) -> Dict[str, Any]:
+        """Structural delta of a parse_user_resume dictionary against its decoded base"""
+        delta = {}
+        contact = {name: document.get(name, '') for name in CONTACT_FIELDS}
+        if contact != {name: base.get(name, '') for name in CONTACT_FIELDS}:
+            delta['contact'] = self._put_blob(contact, written)
+        if document.get('summary', '') != base['summary']:
+            delta['summary'] = self._put_blob(document.get('summary', ''), written)
+        skills = _list_ops(document.get('skills', []), base['skills'])
+        if skills != list(range(len(base['skills']))):
+            delta['skills'] = skills
+
+        for slot in LIST_SLOTS:
+            base_items = base[slot]
+            unused = list(range(len(base_items)))
+            entries = []
+            for item in document.get(slot, []):
+                if item in base_items and base_items.index(item) in unused:
+                    position = base_items.index(item)
+                    unused.remove(position)
+                    entries.append(position)
+                    continue
+                identity = _item_identity(slot, item)
+                source = next((p for p in unused if _item_identity(slot, base_items[p]) == identity), None)
+                if source is not None:
+                    unused.remove(source)
+                # The patch is a blob, so the same rewrite of an entry in several variants is stored once
+                entries.append(self._put_blob(self._patch(item, base_items[source] if source is not None else None, source), written))
+            if entries != list(range(len(base_items))):
+                delta[slot] = entries
+        return delta
+
+    @staticmethod
+    def _patch(item: Dict[str, Any], source: Optional[Dict[str, Any]], position: Optional[int]) -> Dict[str, Any]:
+        if source is None:
+            return {'from': None, 'fields': item}
+        patch = {
+            'from': position,
+            'fields': {name: value for name, value in item.items() if name != 'bullets' and source.get(name) != value}
+        }
+        if 'bullets' in item and item['bullets'] != source.get('bullets'):
+            patch['bullets'] = _list_ops(item['bullets'], source.get('bullets', []))
+        return patch
+
+    def _apply(self, delta: Dict[str, Any], base: Dict[str, Any]) -> Dict[str, Any]:
+        document = dict(base)
+        if 'contact' in delta:
+            document.update(self._blob(delta['contact']))
+        if 'summary' in delta:
+            document['summary'] = self._blob(delta['summary'])
+        if 'skills' in delta:
+            document['skills'] = _apply_ops(delta['skills'], base['skills'])
+        for slot in LIST_SLOTS:
+            if slot in delta:
+                document[slot] = [
+                    base[slot][entry] if isinstance(entry, int) else self._apply_patch(self._blob(entry), base[slot])
+                    for entry in delta[slot]
+                ]
+        return document
+
+    @staticmethod
+    def _apply_patch(patch: Dict[str, Any], base_items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        if patch['from'] is None:
+            return dict(patch['fields'])
+        source = base_items[patch['from']]
+        item = {**source, **patch['fields']}
+        if 'bullets' in patch:
+            item['bullets'] = _apply_ops(patch['bullets'], source.get('bullets', []))
+        return item
+
+    # Versions
+
+    def _put_version(self, record: Dict[str, Any], meta: Dict[str, Any], logical_bytes: int, written: List[int]) -> Tuple[str, bool]:
+        # The id covers the content only, so the same variant saved for two jobs is stored once
+        key = _address(_canonical(record))
+        version_id = key.hex()
+        if key in self._pack:
+            return version_id, True
+        stored = {**record, 'meta': meta, 'created': round(time.time(), 3), 'logicalBytes': logical_bytes}
+        size = self._pack.put(b'v', key, _canonical(stored))
+        if not size:
+            # Another request stored it first
+            return version_id, True
+        written[0] += size
+        self._index(version_id, stored)
+        return version_id, False
+
+    def record(self, version_id: str) -> Optional[Dict[str, Any]]:
+        """The stored record of a version, or None for an unknown or malformed id"""
+        if not isinstance(version_id, str) or not _ID.match(version_id):
+            return None
+        cached = self._cache.get(('version', version_id))
+        if cached is not None:
+            return cached
+        payload = self._pack.get(bytes.fromhex(version_id))
+        if payload is None:
+            return None
+        record = json.loads(payload)
+        self._cache.set(('version', version_id), record)
+        return record
+
+    def put(
+        self,
+        base: Union[ResumeModel, Dict[str, Any]],
+        variant: Union[ResumeModel, Dict[str, Any], str, None] = None,
+        meta: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Store a base resume and optionally one variant of it
+
+        Args:
+            base: Resume the variant was tailored from, in any shape ResumeModel.coerce accepts
+            variant: Tailored resume (JSON in any shape) or Markdown text; None stores only the base
+            meta: Small JSON object kept with the variant, e.g. jobTitle and companyName
+
+        Returns:
+            {'id', 'base', 'kind', 'deduplicated', 'storedBytes', 'logicalBytes'} for the
+            variant, or for the base when no variant is given
+
+        Raises:
+            ValueError: If the variant is neither a resume object nor text
+        """
+        if variant is not None and not isinstance(variant, (str, dict, ResumeModel)):
+            raise ValueError("'variant' must be a resume object or Markdown text")
+        written = [0]
+        base_document = ResumeModel.coerce(base).to_dict()
+        base_bytes = len(_canonical(base_document))
+        base_id, duplicate = self._put_version(
+            {'kind': 'base', 'parts': self._base_parts(base_document, written)}, {}, base_bytes, written
+        )
+        result = {'id': base_id, 'base': None, 'kind': 'base', 'deduplicated': duplicate, 'logicalBytes': base_bytes}
+
+        if variant is not None:
+            if isinstance(variant, str):
+                record = {'kind': 'markdown', 'base': base_id, 'sections': [
+                    self._put_blob(section, written) for section in split_markdown(variant)
+                ]}
+                logical_bytes = len(variant.encode('utf-8'))
+            else:
+                document = ResumeModel.coerce(variant).to_dict()
+                record = {'kind': 'json', 'base': base_id, 'delta': self._delta(document, base_document, written)}
+                logical_bytes = len(_canonical(document))
+            version_id, duplicate = self._put_version(record, dict(meta or {}), logical_bytes, written)
+            result = {
+                'id': version_id, 'base': base_id, 'kind': record['kind'],
+                'deduplicated': duplicate, 'logicalBytes': logical_bytes
+            }
+        result['storedBytes'] = written[0]
+
+        VERSIONS_STORED.inc(labels={'kind': result['kind'], 'deduplicated': str(result['deduplicated']).lower()})
+        VERSION_BYTES.inc(result['logicalBytes'], labels={'kind': 'logical'})
+        VERSION_BYTES.inc(written[0], labels={'kind': 'stored'})
+        log.info('put', version=result['id'], kind=result['kind'], deduplicated=result['deduplicated'],
+                 stored_bytes=written[0], logical_bytes=result['logicalBytes'])
+        return result
+
+    @staticmethod
+    def _base_id(version_id: str, record: Dict[str, Any]) -> str:
+        return record['base'] if record.get('base') else version_id
+
+    def _base_document(self, base_id: str) -> Dict[str, Any]:
+        return self._decode_base(self.record(base_id)['parts'])
+
+    def document(self, version_id: str) -> Union[Dict[str, Any], str, None]:
+        """
+        Rebuild a version
+
+        Returns:
+            The parse_user_resume dictionary, the Markdown text for Markdown
+            variants, or None for an unknown id
+        """
+        record = self.record(version_id)
+        if record is None:
+            return None
+        if record['kind'] == 'markdown':
+            return ''.join(self._blob(section) for section in record['sections'])
+        if record['kind'] == 'base':
+            return self._decode_base(record['parts'])
+        return self._apply(record['delta'], self._base_document(record['base']))
+
+    def delta(self, version_id: str) -> Optional[Dict[str, Any]]:
+        """
+        A version in transfer form: its delta plus the blobs it references
+
+        For a JSON variant the blobs are only the new summary, contact block
+        and entry patches, so a client holding the base rebuilds the variant
+        without receiving the unchanged sections again.
+        """
+        record = self.record(version_id)
+        if record is None:
+            return None
+        if record['kind'] == 'base':
+            changes = record['parts']
+            addresses = [changes['contact'], changes['summary'], changes['skills']]
+            addresses += [address for slot in LIST_SLOTS for address in changes[slot]]
+        elif record['kind'] == 'markdown':
+            changes = {'sections': record['sections']}
+            addresses = record['sections']
+        else:
+            changes = record['delta']
+            addresses = [changes[slot] for slot in ('contact', 'summary') if slot in changes]
+            addresses += [entry for slot in LIST_SLOTS for entry in changes.get(slot, ()) if isinstance(entry, str)]
+        return {
+            'id': version_id,
+            'base': record.get('base'),
+            'kind': record['kind'],
+            'meta': record.get('meta', {}),
+            'delta': changes,
+            'blobs': {address: self._blob(address) for address in sorted(set(addresses))}
+        }
+
+    def variants(self, base_id: str) -> List[Dict[str, Any]]:
+        """Variants stored for a base, oldest first, with the sections each one changed"""
+        with self._lock:
+            version_ids = list(self._variants.get(base_id, ()))
+        summaries = []
+        for version_id in version_ids:
+            record = self.record(version_id)
+            summaries.append({
+                'id': version_id,
+                'kind': record['kind'],
+                'meta': record.get('meta', {}),
+                'created': record.get('created'),
+                'changedSections': [slot for slot in SLOTS if slot in record['delta']] if record['kind'] == 'json' else None
+            })
+        return summaries
+
+    def diff(self, version_id: str, against: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        What changed between a version and its base (or another version)
+
+        Between versions of the same base only the sections their deltas touch
+        are compared, so "what changed for this job" costs about as much as
+        the change itself.
+
+        Returns:
+            {'id', 'against', 'changes': {section: ...}}, or None if either id is unknown
+
+        Raises:
+            ValueError: If a Markdown variant is compared with a JSON version
+        """
+        record = self.record(version_id)
+        if record is None:
+            return None
+        against = against or record.get('base') or version_id
+        other = self.record(against)
+        if other is None:
+            return None
+        if record['kind'] == 'markdown' or other['kind'] == 'markdown':
+            if record['kind'] != other['kind']:
+                raise ValueError("Markdown variants can only be compared with other Markdown variants")
+            return {'id': version_id, 'against': against, 'changes': self._diff_markdown(other['sections'], record['sections'])}
+
+        if self._base_id(version_id, record) == self._base_id(against, other):
+            # Versions of one base can only differ in sections one of their deltas touches
+            slots = set(record.get('delta', ())) | set(other.get('delta', ()))
+        else:
+            slots = set(SLOTS)
+        new, old = self.document(version_id), self.document(against)
+        changes = {}
+        for slot in SLOTS:
+            if slot not in slots:
+                continue
+            if slot == 'contact':
+                fields = {
+                    name: {'from': old.get(name, ''), 'to': new.get(name, '')}
+                    for name in CONTACT_FIELDS if old.get(name) != new.get(name)
+                }
+                if fields:
+                    changes[slot] = fields
+            elif slot == 'summary':
+                if old['summary'] != new['summary']:
+                    changes[slot] = {'from': old['summary'], 'to': new['summary']}
+            elif slot == 'skills':
+                before, after = old['skills'], new['skills']
+                if before != after:
+                    changes[slot] = {
+                        'added': [skill for skill in after if skill not in before],
+                        'removed': [skill for skill in before if skill not in after],
+                        'reordered': [s for s in before if s in after] != [s for s in after if s in before]
+                    }
+            elif old[slot] != new[slot]:
+                changes[slot] = self._diff_items(slot, old[slot], new[slot])
+        return {'id': version_id, 'against': against, 'changes': changes}
+
+    @staticmethod
+    def _diff_items(slot: str, old: List[Dict[str, Any]], new: List[Dict[str, Any]]) -> Dict[str, Any]:
+        unchanged = [item for item in new if item in old]
+        unmatched: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+        for item in old:
+            if item not in new:
+                unmatched.setdefault(_item_identity(slot, item), []).append(item)
+
+        added, changed = [], []
+        for item in new:
+            if item in old:
+                continue
+            candidates = unmatched.get(_item_identity(slot, item))
+            if not candidates:
+                added.append(item)
+                continue
+            previous = candidates.pop(0)
+            entry = {'item': _item_label(slot, item)}
+            fields = {
+                name: {'from': previous.get(name), 'to': value}
+                for name, value in item.items() if name != 'bullets' and previous.get(name) != value
+            }
+            if fields:
+                entry['fields'] = fields
+            if 'bullets' in item:
+                old_bullets, new_bullets = previous.get('bullets', []), item['bullets']
+                entry['bulletsAdded'] = [bullet for bullet in new_bullets if bullet not in old_bullets]
+                entry['bulletsRemoved'] = [bullet for bullet in old_bullets if bullet not in new_bullets]
+                if not entry['bulletsAdded'] and not entry['bulletsRemoved']:
+                    entry['bulletsReordered'] = True
+            changed.append(entry)
+        removed = [item for items in unmatched.values() for item in items]
+        reordered = [item for item in old if item in unchanged] != unchanged
+        return {'added': added, 'removed': removed, 'changed': changed, 'reordered': reordered}
+
+    def _diff_markdown(self, old: List[str], new: List[str]) -> Dict[str, Any]:
+        def by_heading(addresses):
+            sections: Dict[str, List[str]] = {}
+            for address in addresses:
+                text = self._blob(address)
+                sections.setdefault(text.split('\n', 1)[0].strip(), []).append(text)
+            return sections
+
+        # Sections with the same address are identical and never read
+        shared = set(old) & set(new)
+        before = by_heading([address for address in old if address not in shared])
+        after = by_heading([address for address in new if address not in shared])
+        changes = {}
+        for heading in sorted(set(before) | set(after)):
+            old_text = ''.join(before.get(heading, []))
+            new_text = ''.join(after.get(heading, []))
+            changes[heading or '(preamble)'] = [
+                line for line in difflib.unified_diff(old_text.splitlines(), new_text.splitlines(), lineterm='', n=0)
+                if not line.startswith(('---', '+++', '@@'))
+            ]
+        return changes
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            versions, logical_bytes = self._versions, self._logical_bytes
+        return {
+            'versions': versions,
+            'records': len(self._pack),
+            'storedBytes': self._pack.size,
+            'logicalBytes': logical_bytes
+        }
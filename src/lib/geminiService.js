@@ -118,131 +118,67 @@ export class GeminiService {
     }
   }
 
-  static async generateCustomResume(jobDescription, userResume, selectedSections = [], selectedSkills = []) {
-    // STRATEGY: FULL AI REWRITE
-    // Generate completely new, ATS-optimized content for ALL sections
-    // based on the job description and user's background
-
-    const hasExperience = userResume.sections?.find(s => s.id === 'experience')?.items?.length > 0;
-    const userName = userResume.personalInfo?.name || 'Professional';
-
-    // Always regenerate ALL key sections
-    const sectionsToGenerate = ['summary', 'skills', 'experience', 'projects', 'education'];
-
-    const prompt = `You are an EXPERT ATS (Applicant Tracking System) resume writer. Your job is to COMPLETELY REWRITE this resume to maximize the candidate's chances of getting an interview.
-
-=== JOB DESCRIPTION ===
-${jobDescription}
+  // Request body of generateCustomResume; prefetches must send the same one to be matched.
+  // Only the selected sections are rewritten; an empty selection rewrites all of them.
+  static customResumeRequest(jobDescription, userResume, selectedSkills = [], selectedSections = []) {
+    const instructions = selectedSkills.length > 0
+      ? `Emphasize these skills where relevant: ${selectedSkills.join(', ')}`
+      : '';
+    return {
+      input: instructions,
+      mode: 'sections',
+      parallel: true,
+      sections: selectedSections,
+      resume: userResume,
+      jobDescription: jobDescription
+    };
+  }
 
-=== CANDIDATE'S BACKGROUND ===
-${JSON.stringify(userResume.sections, null, 2)}
-
-=== YOUR TASK ===
-Create a COMPLETELY NEW, ATS-OPTIMIZED resume. DO NOT just copy or rephrase the existing content. REWRITE everything to perfectly match this job.
-
-=== SKILLS EXTRACTION (CRITICAL) ===
-**YOU MUST GENERATE SKILLS.** Analyze the job description and extract:
-1. ALL technical skills mentioned (programming languages, frameworks, tools)
-2. ALL soft skills mentioned (leadership, communication, problem-solving)
-3. Industry-specific keywords and technologies
-4. Combine with relevant skills from candidate's background
-
-Skills MUST be a flat array of 10-15 strings. Example: ["Python", "JavaScript", "React", "AWS", "Docker", "SQL", "Leadership", "Agile", "CI/CD", "REST APIs"]
-
-=== PROJECTS (CRITICAL - 3-5 BULLETS EACH) ===
-Generate 2-3 projects. EACH project MUST have EXACTLY 3-5 bullet points:
-- Bullet 1: What you built and the problem it solved (with metrics if possible)
-- Bullet 2: Technical implementation details and technologies used
-- Bullet 3: Key challenges overcome and solutions implemented
-- Bullet 4: Measurable results and impact (users, performance, cost savings)
-- Bullet 5: Skills/technologies demonstrated matching job requirements
-
-=== ATS OPTIMIZATION RULES ===
-1. **KEYWORDS**: Extract 10-15 key skills/technologies from the job description and weave them naturally into every section
-2. **STAR METHOD**: For each experience bullet, use: Situation → Task → Action → Result (with NUMBERS)
-3. **POWER VERBS**: Start each bullet with strong action verbs (Led, Developed, Increased, Reduced, Implemented, etc.)
-4. **QUANTIFY EVERYTHING**: Add specific metrics (%, $, time saved, users impacted, team size, etc.)
-
-=== REQUIRED OUTPUT FORMAT (JSON) ===
-Return ONLY valid JSON. No markdown, no explanations. Start with { and end with }
-
-{
-  "summary": "A powerful 3-4 sentence professional summary that highlights the candidate's fit for THIS SPECIFIC role. Mention key technologies and achievements.",
-  
-  "skills": ["Python", "JavaScript", "React", "Node.js", "AWS", "Docker", "SQL", "Git", "CI/CD", "REST APIs", "Agile", "Leadership"],
-  
-  "experience": [
-    {
-      "company": "Exact company name from resume",
-      "role": "Optimized job title (can enhance slightly to match target role)",
-      "location": "City, State",
-      "startDate": "Mon YYYY",
-      "endDate": "Mon YYYY or Present",
-      "bullets": [
-        "STAR-method bullet point with specific metrics and job-relevant keywords",
-        "Another STAR bullet highlighting achievements relevant to target job",
-        "Third bullet demonstrating skills matching job requirements",
-        "Fourth bullet with measurable business impact"
-      ]
-    }
-  ],
-  
-  "projects": [
-    {
-      "title": "Project Name",
-      "subtitle": "Technologies Used (e.g., React, Node.js, AWS)",
-      "description": "Brief 1-line project overview",
-      "bullets": [
-        "Built [specific feature/system] that solved [problem], resulting in [metric] improvement",
-        "Implemented [technology stack] with [specific technical details] for [purpose]",
-        "Overcame [challenge] by developing [solution] using [technologies]",
-        "Achieved [measurable result] impacting [number] users/reducing costs by [amount]",
-        "Demonstrated proficiency in [skills from job description] through [specific implementation]"
-      ]
-    },
-    {
-      "title": "Second Project Name",
-      "subtitle": "Technologies Used",
-      "description": "Brief project overview",
-      "bullets": [
-        "Developed [feature] addressing [business need] with [technology]",
-        "Architected [system/component] using [frameworks/tools]",
-        "Resolved [technical challenge] improving [metric] by [percentage]",
-        "Delivered [outcome] for [stakeholders/users]",
-        "Applied [job-relevant skills] in [practical context]"
-      ]
-    }
-  ],
-  
-  "education": [
-    {
-      "degree": "Degree Name",
-      "school": "Institution Name",
-      "location": "City, State",
-      "year": "Year",
-      "gpa": "GPA if good (3.5+), otherwise omit"
+  // Start tailoring in the background while the user reads a posting. Returns
+  // the prefetch id, or null; failures are ignored since only speed is at stake.
+  static async prefetchCustomResume(jobDescription, userResume, userId) {
+    try {
+      const response = await fetch('/api/prefetch-resume', {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ ...this.customResumeRequest(jobDescription, userResume), userId }),
+      });
+      if (!response.ok) {
+        return null;
+      }
+      const data = await response.json();
+      return data.id || null;
+    } catch (error) {
+      console.warn('[AI Resume] Prefetch failed:', error);
+      return null;
     }
-  ]
-}
-
-=== CRITICAL RULES ===
-- Skills array MUST have 10-15 items - extract from job description + candidate background
-- Skills MUST be simple strings, NOT objects
-- Each project MUST have EXACTLY 3-5 bullet points - this is REQUIRED
-- Each experience entry MUST have 3-4 bullet points with NUMBERS
-- DO NOT copy existing bullets - REWRITE with metrics and keywords
-- Summary should mention the target role/company context
-- If job description lacks specific skills, infer common skills for that role type
+  }
 
-GENERATE THE JSON NOW:`;
+  static cancelPrefetch(prefetchId, userId) {
+    if (!prefetchId) {
+      return;
+    }
+    const query = userId ? `?userId=${encodeURIComponent(userId)}` : '';
+    fetch(`/api/prefetch-resume/${prefetchId}${query}`, { method: 'DELETE', keepalive: true }).catch(() => {});
+  }
 
+  static async generateCustomResume(jobDescription, userResume, selectedSections = [], selectedSkills = []) {
+    // STRATEGY: SECTION-LEVEL REWRITE
+    // The backend tailors each section independently and caches it per
+    // (section content, job description, instructions), so repeated runs
+    // while editing only regenerate the sections that actually changed.
+    // Changed sections are generated concurrently on the backend. Sections
+    // left out of selectedSections are returned unchanged, and a resume with
+    // no projects gets 2-3 generated from the candidate's background.
+    // A prefetch started on the job details page usually makes this instant.
     try {
-      console.log('[AI Resume] Sending full rewrite prompt to backend...');
-      const response = await this.callBackend('generate-resume', {
-        input: prompt,
-        mode: 'custom',
-        resume: userResume
-      });
+      console.log('[AI Resume] Requesting section-level rewrite from backend...');
+      const response = await this.callBackend(
+        'generate-resume',
+        this.customResumeRequest(jobDescription, userResume, selectedSkills, selectedSections)
+      );
       // Backend returns {output: jsonString, source: "ai"}
       // callBackend already extracts .output, so response should be the JSON string
       console.log('[AI Resume] Raw response type:', typeof response);
@@ -29,6 +29,7 @@ import {
 } from 'lucide-react'
 import { useAuth } from '../contexts/AuthContext'
 import { useResumeStore } from '../stores/useResumeStore'
+import { GeminiService } from '../lib/geminiService'
 
 const JobDetailsPage = () => {
   const { jobId } = useParams()
@@ -112,6 +113,23 @@ const JobDetailsPage = () => {
     }, 1000)
   }, [jobId])
 
+  // Tailor the resume in the background while the posting is open, so that
+  // generating from the customization modal is usually an instant cache hit
+  useEffect(() => {
+    const resume = useResumeStore.getState().resume
+    if (!job?.description || !resume) return
+    let prefetchId = null
+    let left = false
+    GeminiService.prefetchCustomResume(job.description, resume, user?.id).then(id => {
+      prefetchId = id
+      if (left) GeminiService.cancelPrefetch(id, user?.id)
+    })
+    return () => {
+      left = true
+      GeminiService.cancelPrefetch(prefetchId, user?.id)
+    }
+  }, [job, user?.id])
+
   const handleSkillToggle = (skillName) => {
     const newSelectedSkills = new Set(selectedSkills)
     if (newSelectedSkills.has(skillName)) {